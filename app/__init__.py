@@ -6,16 +6,35 @@ Initializes the Flask application, loads configuration, and registers blueprints
 Dependencies:
 - flask
 - config.Config
-- app.routes (chat_bp, history_bp)
+- app.routes (chat_bp, history_bp, metrics_bp, eval_bp, models_bp, admin_bp, ws_bp, jobs_bp)
+- app.catalog.model_catalog
+- app.history (HistoryCompactor, HistoryIndexRegistry, SharedSummaryStore)
+- app.providers.base.LLMProvider
+- app.providers.credentials.credential_pools
+- app.observability (configure_logging, configure_tracing, bind_log_context, reset_log_context)
+- app.state.shared_state
+- app.streaming (build_pipeline, streams)
+- app.usage.usage_ledger
 
 @author Auto-refactored by Cline
 """
 
 import os
-from flask import Flask
+import uuid
+
+from flask import Flask, g, request
 from config import Config
 
-from app.routes import chat_bp, history_bp
+from app.catalog import model_catalog
+from app.history import HistoryCompactor, HistoryIndexRegistry, SharedSummaryStore
+from app.observability import bind_log_context, configure_logging, configure_tracing, reset_log_context
+from app.providers.base import LLMProvider
+from app.providers.credentials import credential_pools
+from app.routes import admin_bp, chat_bp, eval_bp, history_bp, jobs_bp, metrics_bp, models_bp, ws_bp
+from app.routes.provider_factory import PROVIDER_CLASSES, create_llm_provider
+from app.state import shared_state
+from app.streaming import build_pipeline, streams
+from app.usage import usage_ledger
 
 def create_app():
     """
@@ -33,7 +52,88 @@ def create_app():
     app.config.from_object(Config)
     app.secret_key = Config.SECRET_KEY
 
+    configure_logging(Config)
+    configure_tracing(Config)
+    register_request_ids(app)
+    # Fail at startup rather than on the first stream if STREAM_TRANSFORMS is misconfigured
+    build_pipeline()
+
     app.register_blueprint(chat_bp)
     app.register_blueprint(history_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(eval_bp)
+    app.register_blueprint(models_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(ws_bp)
+    app.register_blueprint(jobs_bp)
+
+    configure_history_compaction()
+    configure_history_retrieval()
+    # Warm-up lists every provider through the shared SDK clients, opening their connection pools
+    model_catalog.start(create_llm_provider, PROVIDER_CLASSES)
+    usage_ledger.start()
+    # Lets other workers cancel this worker's streams and share API key ejections (shared state backend only)
+    streams.start()
+    credential_pools.start()
 
     return app
+
+def configure_history_compaction():
+    """
+    Install the background history summarizer on all providers, if enabled.
+
+    Side effects:
+        Sets LLMProvider.compactor (class-wide).
+    """
+    if not Config.HISTORY_SUMMARY_ENABLED or LLMProvider.compactor is not None:
+        return
+    LLMProvider.compactor = HistoryCompactor(
+        provider_factory=lambda: create_llm_provider(Config.HISTORY_SUMMARY_PROVIDER),
+        model=Config.HISTORY_SUMMARY_MODEL,
+        max_workers=Config.HISTORY_SUMMARY_WORKERS,
+        # Summaries must follow a session across workers; one process keeps its LRU store
+        store=SharedSummaryStore(shared_state) if shared_state.shared else None,
+    )
+
+def configure_history_retrieval():
+    """
+    Install the per-conversation vector indexes used by 'retrieval' history mode.
+
+    Side effects:
+        Sets LLMProvider.history_index (class-wide).
+    """
+    if LLMProvider.history_index is not None:
+        return
+    LLMProvider.history_index = HistoryIndexRegistry(
+        dim=Config.HISTORY_RETRIEVAL_DIM,
+        top_k=Config.HISTORY_RETRIEVAL_TOP_K,
+        recent_turns=Config.HISTORY_RETRIEVAL_RECENT,
+        max_conversations=Config.HISTORY_RETRIEVAL_MAX_CONVERSATIONS,
+    )
+
+def register_request_ids(app):
+    """
+    Give every request an id, bind it to log records and echo it in X-Request-ID.
+
+    An incoming X-Request-ID header is reused so ids line up with upstream proxies.
+    The binding lasts until teardown, which for streaming responses is after the
+    stream ends, so generator logs carry the id too.
+
+    Args:
+        app (Flask): Application to register hooks on.
+    """
+    @app.before_request
+    def bind_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.log_context_token = bind_log_context(request_id=g.request_id)
+
+    @app.after_request
+    def echo_request_id(response):
+        response.headers['X-Request-ID'] = g.request_id
+        return response
+
+    @app.teardown_request
+    def unbind_request_id(exc):
+        token = g.pop('log_context_token', None)
+        if token is not None:
+            reset_log_context(token)
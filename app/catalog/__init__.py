@@ -0,0 +1,14 @@
+"""
+__init__.py - Model catalog for the app.catalog package
+
+Imports and exposes:
+- model_catalog: Process-wide ModelCatalog
+- ModelCatalog: TTL-cached per-provider model lists with a background refresher
+- STATIC_MODELS: Fallback model table used when listing is unavailable
+
+@author Auto-refactored by Cline
+"""
+
+from app.catalog.model_catalog import STATIC_MODELS, ModelCatalog, model_catalog
+
+__all__ = ["ModelCatalog", "STATIC_MODELS", "model_catalog"]
@@ -0,0 +1,105 @@
+"""
+catalog_entry.py - Model list entries of the model catalog
+
+Implements CatalogEntry, one provider's model list in ModelCatalog (model_catalog.py),
+the STATIC_MODELS fallback table, and the exchange of listings through a shared state backend: each listing is stored under
+'catalog:<provider>' as JSON with its fetch time, so other workers can adopt it while it is
+recent enough.
+
+Dependencies:
+- Python standard library (json, logging, time)
+- app.state.StateBackendError
+
+@author Auto-refactored by Cline
+"""
+
+import json
+import logging
+import time
+
+from app.state import StateBackendError
+
+logger = logging.getLogger(__name__)
+
+# ====================================
+# Constants and configuration
+# ====================================
+STATIC_MODELS = {
+    'groq': ['gemma2-9b-it', 'llama-3.3-70b-versatile', 'llama-3.1-8b-instant', 'llama-guard-3-8b',
+             'llama3-70b-8192', 'llama3-8b-8192'],
+    'gemini': ['gemini-2.5-flash-preview-04-17', 'gemini-2.5-pro-preview-03-25', 'gemini-2.0-flash',
+               'gemini-2.0-flash-lite', 'gemini-1.5-flash', 'gemini-1.5-flash-8b', 'gemini-1.5-pro'],
+    'cerebras': ['llama-3.3-70b', 'llama3.1-8b', 'llama4-scout'],
+    'openai': ['gpt-4o', 'gpt-4o-mini', 'gpt-4.1', 'gpt-4.1-mini', 'gpt-4.1-nano'],
+    'anthropic': ['claude-2.1', 'claude-2.0', 'claude-instant-1.2'],
+}
+
+class CatalogEntry:
+    """
+    Model list of one provider.
+
+    Attributes:
+        models (list): Model ids in display order.
+        ids (frozenset): Same ids, for O(1) membership checks.
+        source (str): 'api' if listed by the provider, 'static' for the fallback table.
+        fetched_at (float | None): Unix time of the listing (None for the static table).
+    """
+
+    def __init__(self, models, source, fetched_at=None):
+        self.models = list(models)
+        self.ids = frozenset(self.models)
+        self.source = source
+        self.fetched_at = fetched_at
+
+    def to_dict(self):
+        """
+        Serialize for the /models endpoint.
+
+        Returns:
+            dict: 'models', 'source' and 'fetched_at'.
+        """
+        return {"models": self.models, "source": self.source, "fetched_at": self.fetched_at}
+
+def read_shared_entry(backend, provider, max_age):
+    """
+    Get a listing another worker published, if it is recent enough.
+
+    Args:
+        backend (StateBackend | None): Shared state (None: no shared listings).
+        provider (str): Provider name.
+        max_age (float): Oldest acceptable listing in seconds.
+
+    Returns:
+        CatalogEntry | None: The shared listing, or None.
+    """
+    if backend is None:
+        return None
+    try:
+        raw = backend.get(f"catalog:{provider}")
+    except StateBackendError as e:
+        logger.info("Shared model catalog unavailable: %s", e)
+        return None
+    if raw is None:
+        return None
+    listing = json.loads(raw)
+    if time.time() - listing["fetched_at"] > max_age:
+        return None
+    return CatalogEntry(listing["models"], 'api', listing["fetched_at"])
+
+def share_entry(backend, provider, entry, ttl):
+    """
+    Publish a fresh listing for the other workers (no-op without a shared backend).
+
+    Args:
+        backend (StateBackend | None): Shared state.
+        provider (str): Provider name.
+        entry (CatalogEntry): Listing from the provider's API.
+        ttl (float): Seconds the shared listing is kept.
+    """
+    if backend is None:
+        return
+    try:
+        backend.set(f"catalog:{provider}", json.dumps({"models": entry.models, "fetched_at": entry.fetched_at}),
+                    ttl=ttl)
+    except StateBackendError as e:
+        logger.info("Could not share model catalog of %s: %s", provider, e)
@@ -0,0 +1,199 @@
+"""
+model_catalog.py - Cached per-provider model catalog
+
+Implements the ModelCatalog class and the process-wide `model_catalog` instance. Each
+provider's model list comes from its SDK's listing call (LLMProvider.list_models()) and
+is held in memory; a background thread refreshes it, so requests never wait on a listing
+call. Until a listing succeeds, or once a listed catalog is older than its TTL because
+refreshes keep failing, the static STATIC_MODELS table (catalog_entry.py) is used instead (for configured
+OpenAI-compatible providers, the 'models' option of their entry).
+
+The first refresh runs at startup for all providers in parallel. It goes through the shared
+SDK clients, so it also opens the pooled connections the first chat requests will reuse.
+
+With a shared state backend (app/state/), listings are published there too: a worker whose
+refresh finds another worker's listing younger than the refresh interval adopts it instead
+of calling the provider, so N workers list each provider about once per interval, and a
+worker whose own listing fails falls back to a shared one within the TTL (see
+catalog_entry.py).
+
+Dependencies:
+- Python standard library (concurrent.futures, logging, threading, time)
+- app.catalog.catalog_entry (CatalogEntry, STATIC_MODELS, read_shared_entry, share_entry)
+- app.observability.metrics
+- app.providers.compatible_providers.parse_compatible_providers
+- app.state.shared_state
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.catalog.catalog_entry import STATIC_MODELS, CatalogEntry, read_shared_entry, share_entry
+from app.observability import metrics
+from app.providers.compatible_providers import parse_compatible_providers
+from app.state import shared_state
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class ModelCatalog:
+    """
+    TTL-cached model lists per provider with a background refresher.
+
+    Entries are replaced whole, so readers never take a lock.
+
+    Attributes:
+        refresh_interval (int): Seconds between background refreshes.
+        ttl (int): Seconds a listed entry is kept while refreshes fail.
+        backend (StateBackend | None): Shared state the listings are exchanged through.
+    """
+
+    def __init__(self, static_models, refresh_interval, ttl, backend=None):
+        """
+        Initialize ModelCatalog with the static table.
+
+        Args:
+            static_models (dict): Provider names mapped to fallback model ids.
+            refresh_interval (int): Seconds between background refreshes.
+            ttl (int): Seconds a listed entry is kept while refreshes fail.
+            backend (StateBackend): Shared state (only used if it is shared between processes).
+        """
+        self.static_models = static_models
+        self.refresh_interval = refresh_interval
+        self.ttl = ttl
+        self.backend = backend if backend is not None and backend.shared else None
+        self.provider_factory = None
+        self._entries = {provider: CatalogEntry(models, 'static') for provider, models in static_models.items()}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, provider_factory, providers):
+        """
+        Warm the catalog and keep it fresh in a daemon thread (no-op if already started).
+
+        Args:
+            provider_factory (callable): Creates a session-free LLMProvider from a provider name.
+            providers (iterable): Provider names to list.
+        """
+        if self._thread is not None:
+            return
+        self.provider_factory = provider_factory
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(list(providers),), name="model-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background refresher.
+        """
+        self._stop.set()
+        self._thread = None
+
+    def refresh_all(self, providers):
+        """
+        Refresh several providers in parallel.
+
+        Args:
+            providers (list): Provider names.
+        """
+        if not providers:
+            return
+        with ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="model-catalog-refresh") as pool:
+            list(pool.map(self.refresh, providers))
+
+    def refresh(self, provider):
+        """
+        List one provider's models and update its entry.
+
+        On failure the previous listing is kept until it is older than the TTL, after
+        which the static table takes over.
+
+        Args:
+            provider (str): Provider name.
+
+        Returns:
+            CatalogEntry: The provider's entry after the refresh.
+        """
+        shared = read_shared_entry(self.backend, provider, self.refresh_interval)
+        if shared is not None:
+            metrics.increment("catalog.refresh.shared")
+            self._entries[provider] = shared
+            return shared
+        started = time.perf_counter()
+        try:
+            models = self.provider_factory(provider).list_models()
+        except Exception as e:
+            models = None
+            metrics.increment("catalog.refresh.failed")
+            logger.info("Model listing for %s failed, keeping cached catalog: %s", provider, e)
+        else:
+            metrics.observe("catalog.refresh_ms", (time.perf_counter() - started) * 1000)
+        if models:
+            entry = CatalogEntry(sorted(models), 'api', time.time())
+            share_entry(self.backend, provider, entry, self.ttl)
+        else:
+            entry = self._entries.get(provider)
+            if entry is None or (entry.source == 'api' and time.time() - entry.fetched_at > self.ttl):
+                entry = read_shared_entry(self.backend, provider, self.ttl) or \
+                    CatalogEntry(self.static_models.get(provider, []), 'static')
+        self._entries[provider] = entry
+        return entry
+
+    def get(self, provider):
+        """
+        Get a provider's cached entry.
+
+        Args:
+            provider (str): Provider name.
+
+        Returns:
+            CatalogEntry | None: The entry, or None for an unknown provider.
+        """
+        return self._entries.get(provider)
+
+    def is_known(self, provider, model):
+        """
+        Check a model id against the cache without any upstream call.
+
+        Args:
+            provider (str): Provider name.
+            model (str): Model identifier.
+
+        Returns:
+            bool: True if the provider currently offers the model.
+        """
+        entry = self._entries.get(provider)
+        return entry is not None and model in entry.ids
+
+    def snapshot(self):
+        """
+        Get all cached entries.
+
+        Returns:
+            dict: Provider names mapped to CatalogEntry.to_dict().
+        """
+        return {provider: entry.to_dict() for provider, entry in self._entries.items()}
+
+    def _run(self, providers):
+        """
+        Refresher loop: warm up immediately, then refresh every refresh_interval seconds.
+        """
+        while True:
+            self.refresh_all(providers)
+            if self._stop.wait(self.refresh_interval):
+                return
+
+model_catalog = ModelCatalog(
+    {**STATIC_MODELS, **{name: options.get('models', [])
+                         for name, options in parse_compatible_providers(Config.OPENAI_COMPATIBLE_PROVIDERS).items()}},
+    refresh_interval=Config.MODEL_CATALOG_REFRESH_INTERVAL,
+    ttl=Config.MODEL_CATALOG_TTL,
+    backend=shared_state,
+)
+
+__all__ = ["CatalogEntry", "ModelCatalog", "STATIC_MODELS", "model_catalog"]
@@ -0,0 +1,23 @@
+"""
+__init__.py - Traffic control for upstream LLM calls in the app.control package
+
+Imports and exposes:
+- admission: Process-wide AdmissionController
+- AdmissionController: Global/per-session limiter with a weighted fair wait queue
+- AdmissionRejected: Raised when a request should get 429
+- budget: Process-wide BudgetPolicy
+- BudgetPolicy: Pre-flight daily token budgets per session and provider
+- BudgetExceeded: Raised when a request would exceed a budget
+- router: Process-wide LatencyRouter
+- LatencyRouter: Picks the fastest healthy provider/model pair for `auto` requests
+- RouteUnavailable: Raised when an `auto` request has no candidate
+
+@author Auto-refactored by Cline
+"""
+
+from app.control.admission import AdmissionController, AdmissionRejected, admission
+from app.control.budget import BudgetExceeded, BudgetPolicy, budget
+from app.control.routing import AUTO_PROVIDER, LatencyRouter, RouteUnavailable, router
+
+__all__ = ["AUTO_PROVIDER", "AdmissionController", "AdmissionRejected", "BudgetExceeded", "BudgetPolicy",
+           "LatencyRouter", "RouteUnavailable", "admission", "budget", "router"]
@@ -0,0 +1,217 @@
+"""
+admission.py - Admission control and fair queuing for upstream LLM calls
+
+Implements the AdmissionController class and the process-wide `admission` instance. Each
+chat request must hold a permit while it talks to providers. Permits are limited globally
+and per session; requests that cannot start immediately wait in a bounded queue and are
+admitted by weighted fair queuing across sessions, so a few heavy users (e.g. five-provider
+compares with reasoning) cannot starve everyone else. When the queue is full, or a request
+waits longer than allowed, AdmissionRejected is raised so the route can answer 429 with a
+Retry-After instead of letting latency collapse.
+
+The limits count upstream calls in flight. A permit holds as many slots as the request runs
+provider calls in parallel: one for sequential requests (streaming /chat, a plain
+non-streaming compare), one per provider for parallel ones (deadline compares, WebSocket
+turns), capped at the session and global limits. Parallel callers run each call inside
+Permit.slot(), so a request never has more calls in flight than its permit holds. The
+request's total number of upstream calls is its cost in the fair-queuing tags.
+
+Dependencies:
+- Python standard library (collections, math, threading, time)
+- app.control.permit (AdmissionRejected, Permit)
+- app.observability.metrics
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import math
+import threading
+import time
+from collections import defaultdict, deque
+
+from app.control.permit import AdmissionRejected, Permit
+from app.observability import metrics
+from config import Config
+
+# ====================================
+# Constants and configuration
+# ====================================
+HOLD_TIME_ALPHA = 0.1
+
+class AdmissionController:
+    """
+    Global and per-session concurrency limiter with a weighted fair wait queue.
+
+    Fair queuing uses start-time tags: a session's next request starts at
+    max(virtual clock, that session's previous finish tag) and finishes cost/weight later.
+    The eligible waiter with the smallest start tag is admitted first, so sessions share
+    capacity in proportion to their weights regardless of how much work each queues.
+
+    Attributes:
+        global_limit (int): Upstream calls (permit slots) in flight at once across the process.
+        session_limit (int): Upstream calls (permit slots) in flight at once per session.
+        max_queue (int): Waiting requests allowed before rejecting.
+        max_wait (float): Seconds a request may wait before being rejected.
+    """
+
+    def __init__(self, global_limit, session_limit, max_queue, max_wait):
+        """
+        Initialize AdmissionController.
+
+        Args:
+            global_limit (int): Upstream calls in flight at once across the process.
+            session_limit (int): Upstream calls in flight at once per session.
+            max_queue (int): Waiting requests allowed before rejecting.
+            max_wait (float): Seconds a request may wait before being rejected.
+        """
+        self.global_limit = global_limit
+        self.session_limit = session_limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._session_in_flight = defaultdict(int)
+        self._waiting = {}
+        self._queued = 0
+        self._finish_tags = {}
+        self._virtual_clock = 0.0
+        self._hold_seconds = 1.0
+
+    def acquire(self, session_id, cost=1, weight=1.0, slots=1):
+        """
+        Get a permit, waiting in the fair queue if necessary.
+
+        Args:
+            session_id (str): Session the request belongs to.
+            cost (int): Upstream calls the request will make.
+            weight (float): Session share (higher gets more capacity).
+            slots (int): Upstream calls the request makes in parallel (capped at the limits).
+
+        Returns:
+            Permit: Granted permit.
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait exceeds max_wait.
+        """
+        started = time.monotonic()
+        with self._lock:
+            slots = max(1, min(slots, self.session_limit, self.global_limit))
+            if self._queued >= self.max_queue and not self._has_capacity(session_id, slots):
+                metrics.increment("admission.rejected")
+                raise AdmissionRejected("Too many requests in queue", self._retry_after())
+            start_tag = max(self._virtual_clock, self._finish_tags.get(session_id, 0.0))
+            finish_tag = self._finish_tags[session_id] = start_tag + cost / weight
+            permit = Permit(self, session_id, start_tag, slots)
+            # Always go through the queue so an idle slot goes to the smallest tag, not the newest caller
+            self._waiting.setdefault(session_id, deque()).append(permit)
+            self._queued += 1
+            self._dispatch()
+
+        if not permit.event.wait(self.max_wait):
+            with self._lock:
+                if not permit.event.is_set():
+                    self._withdraw(permit, finish_tag)
+                    # It may have been the wide waiter holding back the queue
+                    self._dispatch()
+                    metrics.increment("admission.rejected")
+                    raise AdmissionRejected("Timed out waiting for capacity", self._retry_after())
+        metrics.observe("admission.wait_ms", (time.monotonic() - started) * 1000)
+        return permit
+
+    def _has_capacity(self, session_id, slots=1):
+        return (self._in_flight + slots <= self.global_limit
+                and self._session_in_flight.get(session_id, 0) + slots <= self.session_limit)
+
+    def _grant(self, permit):
+        """
+        Hand a permit out (lock held).
+        """
+        self._in_flight += permit.slots
+        self._session_in_flight[permit.session_id] += permit.slots
+        self._virtual_clock = max(self._virtual_clock, permit.start_tag)
+        permit.granted_at = time.monotonic()
+        permit.event.set()
+        metrics.set_gauge("admission.in_flight", self._in_flight)
+
+    def _release(self, permit):
+        """
+        Return a permit and admit the next eligible waiters.
+        """
+        with self._lock:
+            if permit.released or permit.granted_at is None:
+                return
+            permit.released = True
+            self._hold_seconds += HOLD_TIME_ALPHA * (time.monotonic() - permit.granted_at - self._hold_seconds)
+            self._in_flight -= permit.slots
+            self._session_in_flight[permit.session_id] -= permit.slots
+            if not self._session_in_flight[permit.session_id]:
+                del self._session_in_flight[permit.session_id]
+                self._forget_if_idle(permit.session_id)
+            self._dispatch()
+            metrics.set_gauge("admission.in_flight", self._in_flight)
+
+    def _withdraw(self, permit, finish_tag):
+        """
+        Take a waiter that timed out out of the queue and undo its fair-queuing tag (lock held).
+
+        Args:
+            permit (Permit): The waiter.
+            finish_tag (float): The session's finish tag set when the waiter was queued.
+        """
+        session_id = permit.session_id
+        self._waiting[session_id].remove(permit)
+        if not self._waiting[session_id]:
+            del self._waiting[session_id]
+        self._queued -= 1
+        # Its work never ran; unless a later request was tagged after it, the session's tag goes back
+        if self._finish_tags.get(session_id) == finish_tag:
+            self._finish_tags[session_id] = permit.start_tag
+        self._forget_if_idle(session_id)
+
+    def _forget_if_idle(self, session_id):
+        """
+        Drop the tag of a session with nothing in flight or waiting (lock held).
+
+        An idle session whose tag the clock has passed behaves like a new one.
+        """
+        if (session_id not in self._session_in_flight and session_id not in self._waiting
+                and self._finish_tags.get(session_id, 0.0) <= self._virtual_clock):
+            self._finish_tags.pop(session_id, None)
+
+    def _dispatch(self):
+        """
+        Admit waiters in start-tag order while capacity allows (lock held).
+
+        A waiter whose slots do not fit globally yet blocks the ones behind it, so wide
+        requests are not starved by a stream of narrow ones.
+        """
+        while self._in_flight < self.global_limit:
+            eligible = [queue[0] for session_id, queue in self._waiting.items()
+                        if queue and self._session_in_flight.get(session_id, 0) + queue[0].slots <= self.session_limit]
+            if not eligible:
+                break
+            permit = min(eligible, key=lambda waiter: waiter.start_tag)
+            if self._in_flight + permit.slots > self.global_limit:
+                break
+            self._waiting[permit.session_id].popleft()
+            if not self._waiting[permit.session_id]:
+                del self._waiting[permit.session_id]
+            self._queued -= 1
+            self._grant(permit)
+        metrics.set_gauge("admission.queue_depth", self._queued)
+
+    def _retry_after(self):
+        """
+        Estimate seconds until a new request could be admitted (lock held).
+        """
+        return max(1, math.ceil(self._hold_seconds * (self._queued + 1) / max(1, self.global_limit)))
+
+admission = AdmissionController(
+    global_limit=Config.ADMISSION_GLOBAL_LIMIT,
+    session_limit=Config.ADMISSION_SESSION_LIMIT,
+    max_queue=Config.ADMISSION_MAX_QUEUE,
+    max_wait=Config.ADMISSION_MAX_WAIT,
+)
+
+__all__ = ["AdmissionController", "AdmissionRejected", "Permit", "admission"]
@@ -0,0 +1,197 @@
+"""
+budget.py - Pre-flight token budget enforcement
+
+Implements the BudgetPolicy class and the process-wide `budget` instance. Before a /chat
+request makes any upstream call, plan() estimates what each provider call will cost
+(prompt tokens from the session's history plus the expected completion length) and
+compares it with today's usage in the ledger (app/usage/ledger.py):
+
+- past BUDGET_DOWNGRADE_AT of a session or provider budget, calls switch to the cheaper
+  model configured in BUDGET_DOWNGRADE_MODELS, if there is one
+- past the budget itself, the request is rejected with BudgetExceeded (answered as 429
+  with Retry-After set to the next UTC midnight, when daily budgets reset)
+
+Budgets of 0 are unlimited.
+
+Dependencies:
+- Python standard library (datetime, math)
+- app.observability.metrics
+- app.providers.base.estimate_prompt_tokens
+- app.streaming.streams (expected completion lengths)
+- app.usage.usage_ledger
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import datetime
+import math
+
+from app.observability import metrics
+from app.providers.base import estimate_prompt_tokens
+from app.streaming import streams
+from app.usage import usage_ledger
+from config import Config
+
+def parse_limits(spec):
+    """
+    Parse 'name=tokens,...' into a dict.
+
+    Args:
+        spec (str): E.g. 'openai=2000000,groq=5000000'.
+
+    Returns:
+        dict: Names mapped to token limits.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, value = item.partition("=")
+        limits[name.strip()] = int(value)
+    return limits
+
+def parse_downgrades(spec):
+    """
+    Parse 'provider:model=cheaper-model,...' into a dict.
+
+    Args:
+        spec (str): E.g. 'openai:gpt-4.1=gpt-4.1-mini,groq:llama-3.3-70b-versatile=llama-3.1-8b-instant'.
+
+    Returns:
+        dict: (provider, model) mapped to the downgrade model.
+    """
+    downgrades = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        source, _, target = item.partition("=")
+        provider, _, model = source.partition(":")
+        downgrades[(provider.strip(), model.strip())] = target.strip()
+    return downgrades
+
+def seconds_until_reset():
+    """
+    Get seconds until daily budgets reset (next UTC midnight).
+
+    Returns:
+        int: Seconds, at least 1.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    tomorrow = (now + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, math.ceil((tomorrow - now).total_seconds()))
+
+class BudgetExceeded(Exception):
+    """
+    Raised when a request would exceed a session or provider budget.
+
+    Attributes:
+        retry_after (int): Seconds until budgets reset.
+    """
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class BudgetPolicy:
+    """
+    Daily token budgets per session and per provider, checked before any upstream call.
+
+    Attributes:
+        session_limit (int): Tokens per session per day (0 = unlimited).
+        provider_limits (dict): Provider name mapped to tokens per day.
+        downgrade_at (float): Fraction of a budget after which calls are downgraded.
+        downgrades (dict): (provider, model) mapped to a cheaper model.
+        default_completion_tokens (int): Expected completion length before any has been observed.
+    """
+
+    def __init__(self, ledger, session_limit, provider_limits, downgrade_at, downgrades, default_completion_tokens):
+        """
+        Initialize BudgetPolicy.
+
+        Args:
+            ledger (UsageLedger): Source of today's usage.
+            session_limit (int): Tokens per session per day (0 = unlimited).
+            provider_limits (dict): Provider name mapped to tokens per day.
+            downgrade_at (float): Fraction of a budget after which calls are downgraded.
+            downgrades (dict): (provider, model) mapped to a cheaper model.
+            default_completion_tokens (int): Expected completion length before any has been observed.
+        """
+        self.ledger = ledger
+        self.session_limit = session_limit
+        self.provider_limits = provider_limits
+        self.downgrade_at = downgrade_at
+        self.downgrades = downgrades
+        self.default_completion_tokens = default_completion_tokens
+
+    @property
+    def enabled(self):
+        """
+        bool: True if any budget is configured.
+        """
+        return bool(self.session_limit or self.provider_limits)
+
+    def estimate_cost(self, provider, model, state, message, use_reasoning):
+        """
+        Estimate the tokens one provider call will use.
+
+        Args:
+            provider (str): Provider name.
+            model (str): Model identifier.
+            state (dict | None): The provider's serialized session state (LLMProvider.to_dict()).
+            message (str): New user message.
+            use_reasoning (bool): Reasoning makes a second upstream call.
+
+        Returns:
+            int: Estimated prompt plus completion tokens.
+        """
+        state = state or {}
+        prompt = estimate_prompt_tokens(state.get("conversation_history", []), state.get("summary"), message)
+        completion = streams.lengths.expected(provider, model) or self.default_completion_tokens
+        return math.ceil(prompt + completion * (2 if use_reasoning else 1))
+
+    def plan(self, session_id, providers, states, message, use_reasoning):
+        """
+        Check a request against the budgets and pick the model for each provider.
+
+        Args:
+            session_id (str): Browser session id.
+            providers (dict): Provider names mapped to requested models.
+            states (dict): Provider names mapped to serialized session state.
+            message (str): New user message.
+            use_reasoning (bool): Whether reasoning is requested.
+
+        Returns:
+            dict: Provider names mapped to the model to call (downgraded where needed).
+
+        Raises:
+            BudgetExceeded: If the request would exceed a budget.
+        """
+        if not self.enabled:
+            return dict(providers)
+        costs = {provider: self.estimate_cost(provider, model, states.get(provider), message, use_reasoning)
+                 for provider, model in providers.items()}
+        session_projected = self.ledger.tokens("session", session_id) + sum(costs.values())
+        if self.session_limit and session_projected > self.session_limit:
+            metrics.increment("budget.rejected.session")
+            raise BudgetExceeded("Daily token budget for this session is used up", seconds_until_reset())
+
+        planned = {}
+        for provider, model in providers.items():
+            limit = self.provider_limits.get(provider)
+            projected = self.ledger.tokens("provider", provider) + costs[provider]
+            if limit and projected > limit:
+                metrics.increment("budget.rejected.provider")
+                raise BudgetExceeded(f"Daily token budget for {provider} is used up", seconds_until_reset())
+            near_limit = ((self.session_limit and session_projected > self.downgrade_at * self.session_limit)
+                          or (limit and projected > self.downgrade_at * limit))
+            if near_limit and (provider, model) in self.downgrades:
+                metrics.increment("budget.downgraded")
+                model = self.downgrades[(provider, model)]
+            planned[provider] = model
+        return planned
+
+budget = BudgetPolicy(
+    usage_ledger,
+    session_limit=Config.BUDGET_SESSION_DAILY_TOKENS,
+    provider_limits=parse_limits(Config.BUDGET_PROVIDER_DAILY_TOKENS),
+    downgrade_at=Config.BUDGET_DOWNGRADE_AT,
+    downgrades=parse_downgrades(Config.BUDGET_DOWNGRADE_MODELS),
+    default_completion_tokens=Config.BUDGET_DEFAULT_COMPLETION_TOKENS,
+)
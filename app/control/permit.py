@@ -0,0 +1,68 @@
+"""
+permit.py - Admission permits and rejections
+
+Implements the Permit an AdmissionController (admission.py) grants, with the slots that
+bound how many upstream calls a request makes in parallel, and AdmissionRejected, which
+routes turn into 429 answers with Retry-After.
+
+Dependencies:
+- Python standard library (threading)
+
+@author Auto-refactored by Cline
+"""
+
+import threading
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request cannot be admitted.
+
+    Attributes:
+        retry_after (int): Suggested seconds before retrying.
+    """
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class Permit:
+    """
+    Right to make upstream calls; release it when the request is done.
+
+    Usable as a context manager. release() is idempotent so it can be wired to several
+    cleanup paths (e.g. a streaming response's close callback).
+
+    Attributes:
+        slots (int): Upstream calls the permit allows in flight at once.
+    """
+
+    def __init__(self, controller, session_id, start_tag, slots=1):
+        self.controller = controller
+        self.session_id = session_id
+        self.start_tag = start_tag
+        self.slots = slots
+        self.granted_at = None
+        self.released = False
+        self.event = threading.Event()
+        self._slots = threading.BoundedSemaphore(slots)
+
+    def slot(self):
+        """
+        Hold one of the permit's slots for an upstream call made in parallel with others.
+
+        Returns:
+            BoundedSemaphore: Context manager; entering it waits while all slots are busy.
+        """
+        return self._slots
+
+    def release(self):
+        """
+        Return the permit to the controller (no-op if already released).
+        """
+        self.controller._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.release()
@@ -0,0 +1,158 @@
+"""
+route_stats.py - Live measurements behind latency-aware routing
+
+Implements CandidateStats, the EWMAs the LatencyRouter (routing.py) keeps per provider/model
+pair, and CallTiming, the stopwatch a provider call reports to the router with when it ends:
+
+- time to first token (TTFT), generation speed (tokens per second after the first token)
+  and whole-call latency (TTFT and speed come from streamed calls only)
+- recent error rate: an EWMA of failed calls that decays over ERROR_HALF_LIFE seconds, so a
+  backend that failed a while ago is trusted again
+
+Dependencies:
+- Python standard library (time)
+
+@author Auto-refactored by Cline
+"""
+
+import time
+
+# ====================================
+# Constants and configuration
+# ====================================
+EWMA_ALPHA = 0.2
+# Seconds for a candidate's recent error rate to halve without new calls
+ERROR_HALF_LIFE = 300
+# Floor of the success rate expected latencies are divided by
+MIN_SUCCESS_RATE = 0.05
+
+def ewma(average, sample):
+    """
+    Fold a sample into an EWMA (None sample: unchanged; None average: the sample).
+    """
+    if sample is None:
+        return average
+    return sample if average is None else average + EWMA_ALPHA * (sample - average)
+
+class CandidateStats:
+    """
+    Live measurements of one provider/model pair.
+
+    Attributes:
+        ttft (float | None): EWMA of seconds to the first chunk.
+        tokens_per_second (float | None): EWMA of generation speed after the first chunk.
+        latency (float | None): EWMA of seconds per completed call.
+        error_rate (float): EWMA of failed calls, as of updated_at.
+        updated_at (float | None): time.monotonic() of the last observation.
+    """
+
+    def __init__(self):
+        """
+        Initialize CandidateStats with no observations.
+        """
+        self.ttft = None
+        self.tokens_per_second = None
+        self.latency = None
+        self.error_rate = 0.0
+        self.updated_at = None
+
+    def current_error_rate(self, now):
+        """
+        Get the error rate decayed to now.
+        """
+        if self.updated_at is None:
+            return 0.0
+        return self.error_rate * 0.5 ** ((now - self.updated_at) / ERROR_HALF_LIFE)
+
+    def observe(self, now, ttft=None, tokens_per_second=None, latency=None, error=False):
+        """
+        Fold one call into the EWMAs (unknown values leave theirs unchanged).
+        """
+        error_rate = self.current_error_rate(now)
+        self.error_rate = error_rate + EWMA_ALPHA * ((1.0 if error else 0.0) - error_rate)
+        self.ttft = ewma(self.ttft, ttft)
+        self.tokens_per_second = ewma(self.tokens_per_second, tokens_per_second)
+        self.latency = ewma(self.latency, latency)
+        self.updated_at = now
+
+    def estimate(self, now, streaming, reference_tokens):
+        """
+        Summarize the measurements for a request mode.
+
+        Args:
+            now (float): time.monotonic() the error rate is decayed to.
+            streaming (bool): Expect a streamed answer (TTFT plus reference_tokens at the
+                generation speed) rather than a whole call.
+            reference_tokens (int): Answer length expected latencies are compared at.
+
+        Returns:
+            dict: ttft_ms, tokens_per_second, latency_ms, error_rate and expected_ms (the
+            expected wait divided by the success rate; None where not measured yet).
+        """
+        error_rate = self.current_error_rate(now)
+        estimate = {
+            "ttft_ms": None if self.ttft is None else round(self.ttft * 1000, 1),
+            "tokens_per_second": None if self.tokens_per_second is None else round(self.tokens_per_second, 1),
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 1),
+            "error_rate": round(error_rate, 4),
+            "expected_ms": None,
+        }
+        seconds = self.latency
+        if streaming:
+            seconds = self.ttft
+            if seconds is not None and self.tokens_per_second:
+                seconds += reference_tokens / self.tokens_per_second
+        if seconds is not None:
+            estimate["expected_ms"] = round(seconds * 1000 / max(MIN_SUCCESS_RATE, 1 - error_rate), 1)
+        return estimate
+
+class CallTiming:
+    """
+    Stopwatch for one provider call, reported to the router when the call ends.
+    """
+
+    def __init__(self, router, provider, model):
+        """
+        Initialize CallTiming, starting the clock.
+
+        Args:
+            router (LatencyRouter): Router to report to.
+            provider (str): Provider name.
+            model (str): Model identifier.
+        """
+        self.router = router
+        self.provider = provider
+        self.model = model
+        self.started = time.perf_counter()
+        self.first_chunk_at = None
+        self.chunks = 0
+
+    def chunk(self):
+        """
+        Note that a streamed chunk arrived.
+        """
+        self.chunks += 1
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.perf_counter()
+
+    def finish(self, tokens):
+        """
+        Report a completed call.
+
+        Args:
+            tokens (int): Completion tokens produced.
+        """
+        now = time.perf_counter()
+        ttft = tokens_per_second = None
+        if self.first_chunk_at is not None:
+            ttft = self.first_chunk_at - self.started
+            if self.chunks > 1 and tokens > 1 and now > self.first_chunk_at:
+                tokens_per_second = (tokens - 1) / (now - self.first_chunk_at)
+        self.router.observe(self.provider, self.model, ttft=ttft, tokens_per_second=tokens_per_second,
+                            latency=now - self.started)
+
+    def fail(self):
+        """
+        Report a failed call.
+        """
+        self.router.observe(self.provider, self.model, error=True)
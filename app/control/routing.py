@@ -0,0 +1,199 @@
+"""
+routing.py - Latency-aware routing for the `auto` provider
+
+Implements the LatencyRouter class and the process-wide `router` instance. A /chat or /ws
+request may ask for provider `auto` instead of naming one; the router then picks one of the
+equivalent provider/model pairs configured in AUTO_ROUTE_CANDIDATES from live measurements
+(route_stats.py): TTFT, generation speed, call latency and a decaying recent error rate,
+taken from the candidate's calls in any request, not only `auto` ones.
+
+Candidates are ranked by what the request will wait for: a streaming request by TTFT plus a
+reference answer length at the candidate's generation speed, a non-streaming one by call
+latency; either is divided by the success rate (failures cost a retry). Candidates with no
+observation at all are tried first; observed ones without an estimate for the request's
+mode (e.g. only failed calls so far) come after every measured one; those above
+AUTO_ROUTE_MAX_ERROR_RATE are skipped while a healthy one exists; and a share
+AUTO_ROUTE_EXPLORATION of decisions goes to the least recently measured other candidate, so
+estimates stay fresh. Measurements are per process.
+
+Decisions are counted in metrics (routing.decisions.<provider>, routing.reasons.<reason>)
+and each candidate's estimates are published as routing.<provider>:<model>.* gauges.
+
+Dependencies:
+- Python standard library (random, threading, time)
+- app.control.route_stats (CallTiming, CandidateStats)
+- app.observability.metrics
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import random
+import threading
+import time
+
+from app.control.route_stats import CallTiming, CandidateStats
+from app.observability import metrics
+from config import Config
+
+# ====================================
+# Constants and configuration
+# ====================================
+AUTO_PROVIDER = 'auto'
+
+def parse_candidates(spec):
+    """
+    Parse 'provider:model,...' into a list of pairs.
+
+    Args:
+        spec (str): E.g. 'groq:llama-3.1-8b-instant,cerebras:llama3.1-8b'.
+
+    Returns:
+        list: (provider, model) tuples, in configured order.
+    """
+    candidates = []
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        # Model ids may contain ':' (e.g. 'llama3:8b'); provider names do not
+        provider, _, model = item.partition(":")
+        candidates.append((provider.strip(), model.strip()))
+    return candidates
+
+class RouteUnavailable(Exception):
+    """
+    Raised when an `auto` request has no candidate to route to.
+    """
+
+class LatencyRouter:
+    """
+    Picks the fastest healthy candidate for `auto` requests from live measurements.
+
+    Attributes:
+        candidates (list): Equivalent (provider, model) pairs.
+        exploration (float): Share of decisions that go to the least recently measured candidate.
+        max_error_rate (float): Recent error rate above which a candidate is avoided.
+        reference_tokens (int): Answer length expected latencies are compared at.
+    """
+
+    def __init__(self, candidates, exploration=0.05, max_error_rate=0.5, reference_tokens=512, rng=None):
+        """
+        Initialize LatencyRouter.
+
+        Args:
+            candidates (list): Equivalent (provider, model) pairs.
+            exploration (float): Share of decisions spent exploring.
+            max_error_rate (float): Recent error rate above which a candidate is avoided.
+            reference_tokens (int): Answer length expected latencies are compared at.
+            rng (random.Random): Source of exploration draws (seedable for tests and benchmarks).
+        """
+        self.candidates = list(candidates)
+        self.exploration = exploration
+        self.max_error_rate = max_error_rate
+        self.reference_tokens = reference_tokens
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stats = {candidate: CandidateStats() for candidate in self.candidates}
+
+    def timing(self, provider, model):
+        """
+        Start timing a provider call.
+
+        Returns:
+            CallTiming: Stopwatch to call chunk() on and finish() or fail() at the end.
+        """
+        return CallTiming(self, provider, model)
+
+    def observe(self, provider, model, ttft=None, tokens_per_second=None, latency=None, error=False):
+        """
+        Record one call of a candidate (calls to other pairs are ignored).
+
+        Args:
+            provider (str): Provider name.
+            model (str): Model identifier.
+            ttft (float): Seconds to the first chunk, if streamed.
+            tokens_per_second (float): Generation speed after the first chunk, if known.
+            latency (float): Seconds the whole call took.
+            error (bool): True if the call failed.
+        """
+        stats = self._stats.get((provider, model))
+        if stats is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            stats.observe(now, ttft, tokens_per_second, latency, error)
+            estimate = stats.estimate(now, streaming=False, reference_tokens=self.reference_tokens)
+        for field, value in estimate.items():
+            # expected_ms depends on the request's mode; only measurements are published
+            if value is not None and field != "expected_ms":
+                metrics.set_gauge(f"routing.{provider}:{model}.{field}", value)
+
+    def choose(self, exclude=(), streaming=False):
+        """
+        Pick the provider/model pair for an `auto` request.
+
+        Args:
+            exclude (iterable): Provider names already answering this request.
+            streaming (bool): Rank by time to a streamed answer rather than call latency.
+
+        Returns:
+            dict: provider, model, reason ('unmeasured', 'fastest', 'explore' or 'degraded')
+            and estimates ('provider:model' mapped to ttft_ms, tokens_per_second, latency_ms,
+            error_rate and expected_ms; None where not measured yet).
+
+        Raises:
+            RouteUnavailable: If no candidate is configured or all are excluded.
+        """
+        if not self.candidates:
+            raise RouteUnavailable("Automatic routing is not configured (AUTO_ROUTE_CANDIDATES)")
+        exclude = set(exclude)
+        candidates = [c for c in self.candidates if c[0] not in exclude]
+        if not candidates:
+            raise RouteUnavailable("Every auto routing candidate is already selected in this request")
+        now = time.monotonic()
+        with self._lock:
+            estimates = {candidate: self._stats[candidate].estimate(now, streaming, self.reference_tokens)
+                         for candidate in candidates}
+            last_measured = {candidate: self._stats[candidate].updated_at for candidate in candidates}
+            explore = self._rng.random() < self.exploration
+
+        chosen, reason = self._rank(candidates, estimates, last_measured)
+        others = [c for c in candidates if c != chosen]
+        if explore and others and reason != 'unmeasured':
+            chosen, reason = min(others, key=lambda c: last_measured[c] or 0), 'explore'
+
+        metrics.increment(f"routing.decisions.{chosen[0]}")
+        metrics.increment(f"routing.reasons.{reason}")
+        return {
+            "provider": chosen[0],
+            "model": chosen[1],
+            "reason": reason,
+            "estimates": {f"{provider}:{model}": estimate for (provider, model), estimate in estimates.items()},
+        }
+
+    def _rank(self, candidates, estimates, last_measured):
+        """
+        Pick the best candidate without exploration.
+
+        Returns:
+            tuple: (candidate, reason): never observed first ('unmeasured'), then the lowest
+            expected_ms ('fastest'), then observed ones without an estimate for the mode
+            ('unmeasured'), then the least failing unhealthy one ('degraded').
+        """
+        healthy = [c for c in candidates if estimates[c]["error_rate"] <= self.max_error_rate]
+        # A failed call is an observation too: only never-observed candidates jump the queue
+        unmeasured = [c for c in healthy if last_measured[c] is None]
+        measured = [c for c in healthy if estimates[c]["expected_ms"] is not None]
+        unestimated = [c for c in healthy if last_measured[c] is not None and estimates[c]["expected_ms"] is None]
+        if unmeasured:
+            return unmeasured[0], 'unmeasured'
+        if measured:
+            return min(measured, key=lambda c: estimates[c]["expected_ms"]), 'fastest'
+        if unestimated:
+            return min(unestimated, key=lambda c: estimates[c]["error_rate"]), 'unmeasured'
+        return min(candidates, key=lambda c: estimates[c]["error_rate"]), 'degraded'
+
+router = LatencyRouter(
+    parse_candidates(Config.AUTO_ROUTE_CANDIDATES),
+    exploration=Config.AUTO_ROUTE_EXPLORATION,
+    max_error_rate=Config.AUTO_ROUTE_MAX_ERROR_RATE,
+    reference_tokens=Config.BUDGET_DEFAULT_COMPLETION_TOKENS,
+)
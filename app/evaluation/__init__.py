@@ -0,0 +1,15 @@
+"""
+__init__.py - Batch evaluation for the app.evaluation package
+
+Imports and exposes:
+- BatchRunner: Runs a prompt x provider/model matrix with bounded concurrency
+- load_prompts: Parse JSONL prompt files
+- parse_matrix: Normalize provider/model matrices
+
+@author Auto-refactored by Cline
+"""
+
+from app.evaluation.cells import load_prompts, parse_matrix
+from app.evaluation.runner import BatchRunner
+
+__all__ = ["BatchRunner", "load_prompts", "parse_matrix"]
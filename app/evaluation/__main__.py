@@ -0,0 +1,91 @@
+"""
+__main__.py - Command-line entry point for batch evaluation
+
+Runs a JSONL prompt file against a provider/model matrix and streams results to a JSONL
+file. Re-running with the same --out resumes, skipping cells that already succeeded.
+
+Usage:
+    python -m app.evaluation prompts.jsonl --out results.jsonl \
+        --matrix groq=llama-3.1-8b-instant,gemma2-9b-it --matrix cerebras=llama3.1-8b \
+        --concurrency groq=8 --concurrency cerebras=4
+
+Dependencies:
+- argparse
+- python-dotenv
+- app.evaluation.runner.BatchRunner
+- app.observability.configure_logging
+- app.routes.provider_factory.PROVIDER_CLASSES
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import argparse
+import json
+import sys
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.evaluation.runner import BatchRunner, load_prompts
+from app.observability import configure_logging
+from app.routes.provider_factory import PROVIDER_CLASSES
+from config import Config
+
+def parse_assignments(values, parse_value):
+    """
+    Turn repeated 'name=value' arguments into a dict.
+
+    Args:
+        values (list): Raw argument strings.
+        parse_value (callable): Converts the right-hand side.
+
+    Returns:
+        dict: Parsed assignments.
+    """
+    parsed = {}
+    for value in values or []:
+        name, _, rhs = value.partition("=")
+        parsed[name.strip()] = parse_value(rhs.strip())
+    return parsed
+
+def main(argv=None):
+    """
+    Parse arguments, run the matrix and print the final status.
+
+    Args:
+        argv (list): Command-line arguments (defaults to sys.argv[1:]).
+
+    Returns:
+        int: Exit code (1 if any cell failed).
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.evaluation", description="Run prompts against a provider/model matrix.")
+    parser.add_argument("prompts", help="JSONL file of {\"id\": ..., \"prompt\": ...} records")
+    parser.add_argument("--out", required=True, help="JSONL results file (resumed if it exists)")
+    parser.add_argument("--matrix", action="append", required=True, help="provider=model[,model...] (repeatable)")
+    parser.add_argument("--concurrency", action="append", help="provider=N worker threads (repeatable)")
+    parser.add_argument("--default-concurrency", type=int, default=Config.EVAL_DEFAULT_CONCURRENCY)
+    parser.add_argument("--reasoning", action="store_true", help="Run cells with reasoning enabled")
+    args = parser.parse_args(argv)
+    configure_logging(Config)
+
+    with open(args.prompts, encoding="utf-8") as prompt_file:
+        prompts = load_prompts(prompt_file)
+    try:
+        runner = BatchRunner(
+            prompts,
+            parse_assignments(args.matrix, lambda rhs: [model for model in rhs.split(",") if model]),
+            args.out,
+            concurrency=parse_assignments(args.concurrency, int),
+            default_concurrency=args.default_concurrency,
+            use_reasoning=args.reasoning,
+            providers=PROVIDER_CLASSES,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    status = runner.run()
+    print(json.dumps(status))
+    return 1 if status["error"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+cells.py - Inputs and results files of a batch evaluation
+
+Parses what a batch evaluation runs (JSONL prompts and a provider/model matrix) and
+identifies its cells, so BatchRunner (runner.py) can skip those a previous run already
+completed in the results file.
+
+Dependencies:
+- Python standard library (json, logging, os)
+
+@author Auto-refactored by Cline
+"""
+
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def load_prompts(lines):
+    """
+    Parse JSONL prompt records.
+
+    Each line is either {"id": ..., "prompt": ...} or a bare JSON string. Records without
+    an id get their 1-based line number, which stays stable across resumed runs.
+
+    Args:
+        lines (iterable): Lines of a JSONL file.
+
+    Returns:
+        list: Dicts with 'id' and 'prompt'.
+    """
+    prompts = []
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if isinstance(record, str):
+            record = {"prompt": record}
+        prompts.append({"id": str(record.get("id", line_number)), "prompt": record["prompt"]})
+    return prompts
+
+def parse_matrix(matrix, providers=None):
+    """
+    Normalize and validate a provider/model matrix.
+
+    Args:
+        matrix (dict | list): {'groq': ['model-a', 'model-b']} or [['groq', 'model-a'], ...].
+        providers (iterable): Known provider names (None accepts any).
+
+    Returns:
+        list: (provider, model) tuples.
+
+    Raises:
+        ValueError: If the matrix is malformed, empty or names an unknown provider.
+    """
+    if isinstance(matrix, dict):
+        cells = [(provider, model) for provider, models in matrix.items()
+                 for model in ([models] if isinstance(models, str) else models or [])]
+    elif isinstance(matrix, list) and all(isinstance(cell, (list, tuple)) and len(cell) == 2 for cell in matrix):
+        cells = [tuple(cell) for cell in matrix]
+    else:
+        raise ValueError("matrix must map providers to models or list [provider, model] pairs")
+    if not cells or not all(isinstance(provider, str) and isinstance(model, str) and model
+                            for provider, model in cells):
+        raise ValueError("matrix needs at least one provider and non-empty model names")
+    unknown = sorted({provider for provider, _ in cells} - set(providers)) if providers is not None else []
+    if unknown:
+        raise ValueError(f"Unknown providers: {', '.join(unknown)}")
+    return cells
+
+def cell_key(prompt_id, provider, model):
+    """
+    Identify one matrix cell.
+
+    Returns:
+        str: 'prompt_id|provider|model'.
+    """
+    return f"{prompt_id}|{provider}|{model}"
+
+def load_completed(output_path):
+    """
+    Read the cells already finished successfully in a results file.
+
+    Also terminates a trailing partial line left by a crash so appended records
+    start on a fresh line.
+
+    Args:
+        output_path (str): JSONL results file (a missing file has none).
+
+    Returns:
+        set: Cell keys (see cell_key()).
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r+", encoding="utf-8") as existing:
+        content = existing.read()
+        for line in content.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                completed.add(cell_key(record["prompt_id"], record["provider"], record["model"]))
+        if content and not content.endswith("\n"):
+            existing.write("\n")
+    logger.info("Resuming %s: %d cells already completed", output_path, len(completed))
+    return completed
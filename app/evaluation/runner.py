@@ -0,0 +1,184 @@
+"""
+runner.py - Batch evaluation over a prompt x provider/model matrix
+
+Implements the BatchRunner class, which runs every (prompt, provider, model) cell through
+the existing LLMProvider classes with a bounded number of worker threads per provider and
+appends one JSON line per finished cell to an output file. Cells already completed in that
+file are skipped, so a crashed run resumes where it stopped.
+
+Main functions/classes:
+- BatchRunner: Runs the matrix and streams results
+- load_prompts(), parse_matrix(): Read a JSONL prompt file and normalize a matrix (cells.py,
+  re-exported)
+
+Dependencies:
+- Python standard library (json, os, threading, time, queue)
+- app.evaluation.cells (cell_key, load_completed, load_prompts, parse_matrix)
+- app.providers.base.estimate_tokens
+- app.usage.resolve_usage
+- app.providers.generation.resolve_generation
+- app.routes.provider_factory.create_llm_provider
+
+@author Auto-refactored by Cline
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+from app.evaluation.cells import cell_key, load_completed, load_prompts, parse_matrix
+from app.providers.base import estimate_tokens
+from app.providers.generation import resolve_generation
+from app.routes.provider_factory import create_llm_provider
+from app.usage import resolve_usage
+
+class BatchRunner:
+    """
+    Runs a prompt x provider/model matrix with per-provider concurrency bounds.
+
+    Attributes:
+        output_path (str): JSONL file results are appended to.
+        counts (dict): Progress counters ('total', 'skipped', 'ok', 'error').
+    """
+
+    def __init__(self, prompts, matrix, output_path, concurrency=None, default_concurrency=4,
+                 use_reasoning=False, provider_factory=create_llm_provider, providers=None):
+        """
+        Initialize BatchRunner.
+
+        Args:
+            prompts (list): Dicts with 'id' and 'prompt' (see load_prompts()).
+            matrix (dict | list): Provider/model matrix (see parse_matrix()).
+            output_path (str): JSONL results file; existing 'ok' cells are skipped.
+            concurrency (dict): Worker threads per provider name.
+            default_concurrency (int): Worker threads for providers not in `concurrency`.
+            use_reasoning (bool): Run cells with reasoning enabled.
+            provider_factory (callable): Creates a fresh LLMProvider from a provider name.
+            providers (iterable): Known provider names the matrix is checked against.
+
+        Raises:
+            ValueError: If the matrix is invalid (see parse_matrix()).
+        """
+        self.prompts = prompts
+        self.matrix = parse_matrix(matrix, providers)
+        self.output_path = output_path
+        self.concurrency = concurrency or {}
+        self.default_concurrency = default_concurrency
+        self.use_reasoning = use_reasoning
+        self.provider_factory = provider_factory
+        self.counts = {"total": 0, "skipped": 0, "ok": 0, "error": 0}
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def status(self):
+        """
+        Get run progress.
+
+        Returns:
+            dict: Counters plus 'finished' and 'output_path'.
+        """
+        with self._lock:
+            return dict(self.counts, finished=self.finished, output_path=self.output_path)
+
+    def run(self):
+        """
+        Run every pending cell and block until all are written.
+
+        Returns:
+            dict: Final status (see status()).
+        """
+        completed = load_completed(self.output_path)
+        queues = {}
+        for prompt in self.prompts:
+            for provider, model in self.matrix:
+                self.counts["total"] += 1
+                if cell_key(prompt["id"], provider, model) in completed:
+                    self.counts["skipped"] += 1
+                    continue
+                queues.setdefault(provider, queue.SimpleQueue()).put((prompt, model))
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        with open(self.output_path, "a", encoding="utf-8") as output:
+            workers = [
+                threading.Thread(target=self._worker, args=(provider, cells, output), daemon=True)
+                for provider, cells in queues.items()
+                for _ in range(self.concurrency.get(provider, self.default_concurrency))
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        with self._lock:
+            self.finished = True
+        return self.status()
+
+    def run_cell(self, provider, prompt, model):
+        """
+        Run one cell and measure it.
+
+        Args:
+            provider (str): Provider name.
+            prompt (dict): Prompt record with 'id' and 'prompt'.
+            model (str): Model identifier.
+
+        Returns:
+            dict: Result record (status, output, latency/TTFT and token metrics; token counts are
+            SDK-reported when every upstream call reported usage, else estimated).
+        """
+        record = {"prompt_id": prompt["id"], "provider": provider, "model": model,
+                  "use_reasoning": self.use_reasoning, "started_at": time.time()}
+        started = time.perf_counter()
+        first_chunk_at = None
+        chunks = []
+        llm = None
+        try:
+            llm = self.provider_factory(provider)
+            # Same per-model generation defaults as /chat
+            llm.generation = resolve_generation(provider, model)
+            local_chunks = llm.local_chunks
+            for chunk in llm.generate_stream(prompt["prompt"], model, self.use_reasoning):
+                # TTFT is to the first chunk from upstream, not to a locally yielded reasoning header
+                if first_chunk_at is None and llm.local_chunks == local_chunks:
+                    first_chunk_at = time.perf_counter()
+                local_chunks = llm.local_chunks
+                chunks.append(chunk)
+            record["status"] = "ok"
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = str(e)
+        latency = time.perf_counter() - started
+        output = "".join(chunks)
+        usage = llm.take_usage() if llm is not None else {"calls": 0, "reported": 0}
+        prompt_tokens, completion_tokens, estimated = resolve_usage(usage, estimate_tokens(prompt["prompt"]),
+                                                                    estimate_tokens(output))
+        record.update({
+            "output": output,
+            "latency_s": round(latency, 4),
+            "ttft_s": round(first_chunk_at - started, 4) if first_chunk_at else None,
+            "chunks": len(chunks),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_estimated": estimated,
+            "tokens_per_s": round(completion_tokens / latency, 2) if latency > 0 else None,
+        })
+        return record
+
+    def _worker(self, provider, cells, output):
+        """
+        Pull cells for one provider until its queue is empty, writing each result.
+        """
+        while True:
+            try:
+                prompt, model = cells.get_nowait()
+            except queue.Empty:
+                return
+            record = self.run_cell(provider, prompt, model)
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            with self._lock:
+                output.write(line)
+                output.flush()
+                self.counts[record["status"]] += 1
+
+__all__ = ["BatchRunner", "cell_key", "load_prompts", "parse_matrix"]
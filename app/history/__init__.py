@@ -0,0 +1,17 @@
+"""
+__init__.py - Conversation history management for the app.history package
+
+Imports and exposes:
+- HistoryCompactor: Background summarization of evicted history turns
+- SummaryStore: Thread-safe store of rolling conversation summaries
+- SharedSummaryStore: Summary store kept in the shared state backend (multi-worker)
+- HistoryIndexRegistry: Per-conversation local vector indexes for retrieval mode
+
+@author Auto-refactored by Cline
+"""
+
+from app.history.compaction import HistoryCompactor
+from app.history.summary_store import SharedSummaryStore, SummaryStore
+from app.history.retrieval import HistoryIndexRegistry
+
+__all__ = ["HistoryCompactor", "HistoryIndexRegistry", "SharedSummaryStore", "SummaryStore"]
@@ -0,0 +1,154 @@
+"""
+compaction.py - Background summarization of evicted conversation history
+
+Implements the HistoryCompactor class, which folds conversation turns evicted by
+LLMProvider.add_to_history() into a rolling summary. Summaries are produced by a
+configurable (cheap, fast) provider/model on a background thread pool so the
+request path never waits on them, and are swapped into a SummaryStore atomically
+once ready. With several worker processes, SharedSummaryStore keeps summaries in the
+shared state backend (app/state/) so a session's next request finds them whichever
+worker it lands on. Both stores live in summary_store.py.
+
+Dependencies:
+- Python standard library (threading, concurrent.futures)
+- Logging module
+- app.history.summary_store (SharedSummaryStore, SummaryStore)
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.history.summary_store import SharedSummaryStore, SummaryStore
+
+logger = logging.getLogger(__name__)
+
+# ====================================
+# Constants and configuration
+# ====================================
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant.\n"
+    "Update the summary so it also covers the new turns below. Keep names, facts, decisions "
+    "and open questions; drop pleasantries. Reply with the updated summary only.\n\n"
+    "Current summary:\n{summary}\n\nNew turns:\n{turns}"
+)
+
+class HistoryCompactor:
+    """
+    Summarizes evicted history turns off the request path.
+
+    Turns submitted for the same conversation are queued and drained by a single job
+    at a time, so each rolling summary builds on the previous one in order.
+
+    Attributes:
+        provider_factory (callable): Returns a fresh LLMProvider used for summarization.
+        model (str): Model identifier passed to the summarization provider.
+        store (SummaryStore): Where finished summaries are published.
+    """
+
+    def __init__(self, provider_factory, model, max_workers=2, store=None):
+        """
+        Initialize HistoryCompactor.
+
+        Args:
+            provider_factory (callable): Zero-argument callable returning an LLMProvider.
+                Tests can pass a stand-in provider here.
+            model (str): Model identifier for summarization.
+            max_workers (int): Background worker threads.
+            store (SummaryStore | SharedSummaryStore): Optional summary store (a new
+                SummaryStore is created if omitted).
+        """
+        self.provider_factory = provider_factory
+        self.model = model
+        self.store = store if store is not None else SummaryStore()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='history-compactor')
+        self._lock = threading.Condition()
+        self._pending = {}
+        self._running = set()
+
+    def submit(self, key, turns, previous_summary=None):
+        """
+        Queue evicted turns for summarization and return immediately.
+
+        Args:
+            key (str): Conversation id.
+            turns (list): Evicted message dicts with 'role' and 'content'.
+            previous_summary (str): Summary the caller already holds, used to seed the
+                store when this process has none (e.g. after a restart).
+
+        Returns:
+            Future | None: Future of the drain job, or None if one is already running.
+        """
+        if previous_summary and self.store.get(key) is None:
+            self.store.put(key, previous_summary)
+        with self._lock:
+            self._pending.setdefault(key, []).extend(turns)
+            if key in self._running:
+                return None
+            self._running.add(key)
+        return self._executor.submit(self._drain, key)
+
+    def get_summary(self, key):
+        """
+        Get the latest published summary for a conversation.
+
+        Args:
+            key (str): Conversation id.
+
+        Returns:
+            str | None: Summary text.
+        """
+        return self.store.get(key)
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until no summarization jobs are queued or running.
+
+        Args:
+            timeout (float): Maximum seconds to wait.
+
+        Returns:
+            bool: True if idle, False on timeout.
+        """
+        with self._lock:
+            return self._lock.wait_for(lambda: not self._running, timeout)
+
+    def summarize(self, previous_summary, turns):
+        """
+        Produce an updated rolling summary.
+
+        Args:
+            previous_summary (str | None): Current summary.
+            turns (list): Message dicts to fold in.
+
+        Returns:
+            str: Updated summary text.
+        """
+        rendered = "\n".join(f"{turn['role'].capitalize()}: {turn['content']}" for turn in turns)
+        prompt = SUMMARY_PROMPT.format(summary=previous_summary or "(none)", turns=rendered)
+        return self.provider_factory().generate_response(prompt, self.model).strip()
+
+    def _drain(self, key):
+        """
+        Fold every pending batch for a conversation into its summary, one at a time.
+
+        Args:
+            key (str): Conversation id.
+        """
+        while True:
+            with self._lock:
+                turns = self._pending.pop(key, None)
+                if not turns:
+                    self._running.discard(key)
+                    self._lock.notify_all()
+                    return
+            try:
+                self.store.put(key, self.summarize(self.store.get(key), turns))
+            except Exception as e:
+                # Evicted turns are already gone from the prompt; losing them here is no
+                # worse than the old truncation, so log and keep draining.
+                logger.warning("History summarization failed for %s: %s", key, e)
+
+__all__ = ["HistoryCompactor", "SharedSummaryStore", "SummaryStore"]
@@ -0,0 +1,189 @@
+"""
+retrieval.py - Local vector index over long conversation history
+
+Implements an offline alternative to sending the last N turns: every turn is embedded
+with a hashed bag-of-words (TF-IDF weighted at query time) as add_to_history() runs, and
+only the older turns most relevant to the new message are retrieved by a NumPy-vectorized
+cosine search.
+
+Main classes:
+- HashingEmbedder: Stable hashed term-frequency vectors, no model download
+- HistoryIndex: Incrementally built index for one conversation
+- HistoryIndexRegistry: Size-bounded map of conversation id to HistoryIndex
+
+Dependencies:
+- numpy
+- Python standard library (re, zlib, threading, collections)
+
+@author Auto-refactored by Cline
+"""
+
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# ====================================
+# Constants and configuration
+# ====================================
+TOKEN_PATTERN = re.compile(r"\w+")
+INITIAL_CAPACITY = 64
+
+class HashingEmbedder:
+    """
+    Embeds text as sublinear term frequencies over hashed buckets.
+
+    crc32 is used instead of hash() so vectors are identical across processes.
+
+    Attributes:
+        dim (int): Number of hash buckets.
+    """
+
+    def __init__(self, dim=1024):
+        """
+        Initialize HashingEmbedder.
+
+        Args:
+            dim (int): Number of hash buckets.
+        """
+        self.dim = dim
+
+    def embed(self, text):
+        """
+        Embed a piece of text.
+
+        Args:
+            text (str): Text to embed.
+
+        Returns:
+            numpy.ndarray: float32 vector of length dim (all zeros for empty text).
+        """
+        buckets = [zlib.crc32(token.encode()) % self.dim for token in TOKEN_PATTERN.findall(text.lower())]
+        counts = np.bincount(np.asarray(buckets, dtype=np.int64), minlength=self.dim).astype(np.float32)
+        return np.log1p(counts)
+
+class HistoryIndex:
+    """
+    Append-only vector index over one conversation's turns.
+
+    Vectors live in a preallocated matrix that doubles when full, so adding a turn is
+    amortized O(dim). Document frequencies are tracked per bucket so IDF weights reflect
+    the whole conversation at query time.
+    """
+
+    def __init__(self, embedder):
+        """
+        Initialize HistoryIndex.
+
+        Args:
+            embedder (HashingEmbedder): Embedder shared by the registry.
+        """
+        self.embedder = embedder
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((INITIAL_CAPACITY, embedder.dim), dtype=np.float32)
+        self._document_frequency = np.zeros(embedder.dim, dtype=np.float32)
+        self._turns = []
+        self.total_chars = 0
+
+    def __len__(self):
+        return len(self._turns)
+
+    def add(self, turn):
+        """
+        Index one turn.
+
+        Args:
+            turn (dict): Message dict with 'role' and 'content'.
+        """
+        vector = self.embedder.embed(turn["content"])
+        with self._lock:
+            count = len(self._turns)
+            if count == self._vectors.shape[0]:
+                self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+            self._vectors[count] = vector
+            self._document_frequency += vector > 0
+            self._turns.append(turn)
+            self.total_chars += len(turn["content"])
+
+    def search(self, query, top_k, exclude_last=0):
+        """
+        Find the turns most similar to a query.
+
+        Args:
+            query (str): Query text (usually the new user message).
+            top_k (int): Maximum number of turns to return.
+            exclude_last (int): Ignore the newest N turns (they are sent anyway).
+
+        Returns:
+            list: Matching turns in chronological order; turns sharing no terms are dropped.
+        """
+        query_vector = self.embedder.embed(query)
+        with self._lock:
+            count = len(self._turns) - exclude_last
+            if count <= 0 or top_k <= 0:
+                return []
+            idf = np.log((1 + count) / (1 + self._document_frequency)) + 1
+            weighted = self._vectors[:count] * idf
+            weighted_query = query_vector * idf
+            norms = np.linalg.norm(weighted, axis=1) * np.linalg.norm(weighted_query)
+            scores = np.divide(weighted @ weighted_query, norms, out=np.zeros(count, dtype=np.float32), where=norms > 0)
+            k = min(top_k, count)
+            best = np.argpartition(-scores, k - 1)[:k]
+            return [self._turns[i] for i in np.sort(best) if scores[i] > 0]
+
+class HistoryIndexRegistry:
+    """
+    Per-conversation HistoryIndex instances with least-recently-used eviction.
+
+    Also carries the retrieval settings so LLMProvider needs no config import.
+
+    Attributes:
+        top_k (int): Older turns retrieved per request.
+        recent_turns (int): Newest turns always sent verbatim.
+        max_conversations (int): Indexes kept in memory.
+    """
+
+    def __init__(self, dim=1024, top_k=4, recent_turns=4, max_conversations=256):
+        """
+        Initialize HistoryIndexRegistry.
+
+        Args:
+            dim (int): Embedding dimension.
+            top_k (int): Older turns retrieved per request.
+            recent_turns (int): Newest turns always sent verbatim.
+            max_conversations (int): Indexes kept in memory.
+        """
+        self.embedder = HashingEmbedder(dim)
+        self.top_k = top_k
+        self.recent_turns = recent_turns
+        self.max_conversations = max_conversations
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+
+    def get(self, key, seed_turns=()):
+        """
+        Get the index for a conversation, creating it from seed turns on a miss.
+
+        A miss happens for new conversations, after eviction, or on another process;
+        seeding from the provider's window keeps retrieval useful in those cases.
+
+        Args:
+            key (str): Conversation id.
+            seed_turns (list): Turns to index if the conversation has no index yet.
+
+        Returns:
+            HistoryIndex: The conversation's index.
+        """
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+            index = self._indexes[key] = HistoryIndex(self.embedder)
+            while len(self._indexes) > self.max_conversations:
+                self._indexes.popitem(last=False)
+        for turn in seed_turns:
+            index.add(turn)
+        return index
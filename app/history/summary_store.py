@@ -0,0 +1,126 @@
+"""
+summary_store.py - Stores of rolling conversation summaries
+
+Implements SummaryStore, the in-process LRU store HistoryCompactor (compaction.py) swaps
+finished summaries into, and SharedSummaryStore, which keeps them in the shared state
+backend (app/state/) so a session's next request finds them whichever worker process it
+lands on. Both replace a summary in one operation, so readers never see a partial one.
+
+Dependencies:
+- Python standard library (collections, logging, threading)
+- app.state.StateBackendError
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+from app.state import StateBackendError
+
+logger = logging.getLogger(__name__)
+
+class SummaryStore:
+    """
+    Thread-safe, size-bounded map of conversation id to rolling summary text.
+
+    Replacing a whole string under a lock is what makes the swap atomic: readers see
+    either the previous summary or the new one, never a partial update.
+
+    Attributes:
+        max_entries (int): Maximum number of conversations kept (least recently used evicted).
+    """
+
+    def __init__(self, max_entries=10000):
+        """
+        Initialize SummaryStore.
+
+        Args:
+            max_entries (int): Maximum number of conversations kept.
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._summaries = OrderedDict()
+
+    def get(self, key):
+        """
+        Get the current summary for a conversation.
+
+        Args:
+            key (str): Conversation id.
+
+        Returns:
+            str | None: Summary text, or None if nothing has been summarized yet.
+        """
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+            return summary
+
+    def put(self, key, summary):
+        """
+        Atomically replace the summary for a conversation.
+
+        Args:
+            key (str): Conversation id.
+            summary (str): New summary text.
+        """
+        with self._lock:
+            self._summaries[key] = summary
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.max_entries:
+                self._summaries.popitem(last=False)
+
+class SharedSummaryStore:
+    """
+    SummaryStore replacement backed by a shared state backend.
+
+    A single SET replaces the whole summary, so the swap stays atomic across processes.
+    Summaries expire ttl seconds after their last update instead of by LRU.
+
+    Attributes:
+        backend (StateBackend): Where summaries are kept.
+        ttl (float): Seconds a summary outlives its last update.
+    """
+
+    def __init__(self, backend, ttl=86400):
+        """
+        Initialize SharedSummaryStore.
+
+        Args:
+            backend (StateBackend): Shared state backend.
+            ttl (float): Seconds a summary outlives its last update.
+        """
+        self.backend = backend
+        self.ttl = ttl
+
+    def get(self, key):
+        """
+        Get the current summary for a conversation.
+
+        Args:
+            key (str): Conversation id.
+
+        Returns:
+            str | None: Summary text, or None if there is none or the backend is unreachable.
+        """
+        try:
+            return self.backend.get(f"summary:{key}")
+        except StateBackendError as e:
+            logger.warning("Could not read history summary for %s: %s", key, e)
+            return None
+
+    def put(self, key, summary):
+        """
+        Atomically replace the summary for a conversation.
+
+        Args:
+            key (str): Conversation id.
+            summary (str): New summary text.
+        """
+        try:
+            self.backend.set(f"summary:{key}", summary, ttl=self.ttl)
+        except StateBackendError as e:
+            logger.warning("Could not store history summary for %s: %s", key, e)
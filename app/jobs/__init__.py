@@ -0,0 +1,17 @@
+"""
+__init__.py - Background chat jobs for the app.jobs package
+
+Imports and exposes:
+- jobs: Process-wide JobRegistry
+- JobRegistry: Chat jobs with bounded retention and cancellation
+- ChatJob: One provider's answer generated in the background
+- JobResults: History commits of finished jobs, shared between workers
+
+@author Auto-refactored by Cline
+"""
+
+from app.jobs.job import ChatJob
+from app.jobs.registry import JobRegistry, jobs
+from app.jobs.results import JobResults
+
+__all__ = ["ChatJob", "JobRegistry", "JobResults", "jobs"]
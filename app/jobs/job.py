@@ -0,0 +1,197 @@
+"""
+job.py - One background chat job
+
+Implements the ChatJob class: one provider's answer to one message, generated on its own
+thread by run_job() (runner.py). The partial text can be read or followed while the job runs,
+and cancel() closes its upstream stream at once. With reasoning, clients get the whole answer
+but only the final response (`answer`) joins the history.
+
+Dependencies:
+- Python standard library (threading, time, uuid)
+- app.providers.reasoning.final_response
+
+@author Auto-refactored by Cline
+"""
+
+import threading
+import time
+import uuid
+
+from app.providers.reasoning import final_response
+
+# ====================================
+# Constants and configuration
+# ====================================
+FINISHED = ('done', 'error', 'cancelled')
+
+class ChatJob:
+    """
+    One provider's answer to one message, generated in the background.
+
+    Attributes:
+        job_id (str): Random id given to the client.
+        session_id (str): Session that owns the job (only it may read or cancel it).
+        provider (str): Provider name.
+        model (str): Model called.
+        requested_model (str): Model the client asked for (differs after a budget downgrade).
+        message (str): User message.
+        history_mode (str | None): History mode applied to the provider.
+        generation (dict | None): Requested generation options (merged with the model's defaults).
+        use_reasoning (bool): Whether the answer includes reasoning.
+        status (str): 'running', 'done', 'error' or 'cancelled'.
+        error (str | None): Error message when status is 'error'.
+        committed (bool): True once the turn was written to the session's history.
+        finished_at (float | None): Unix time the job finished.
+    """
+
+    def __init__(self, session_id, provider, model, requested_model, message, history_mode, generation=None):
+        """
+        Initialize a running ChatJob (started by JobRegistry.submit()).
+        """
+        self.job_id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.provider = provider
+        self.model = model
+        self.requested_model = requested_model
+        self.message = message
+        self.history_mode = history_mode
+        self.generation = generation
+        self.use_reasoning = False
+        self.status = 'running'
+        self.error = None
+        self.committed = False
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cond = threading.Condition()
+        self._chunks = []
+        self._final_from = None
+        self._llm = None
+        self._cancel_reason = None
+
+    @property
+    def finished(self):
+        """
+        bool: True once the job is done, failed or cancelled.
+        """
+        return self.status in FINISHED
+
+    @property
+    def text(self):
+        """
+        str: Text generated so far (the whole answer once done).
+        """
+        with self.cond:
+            return "".join(self._chunks)
+
+    @property
+    def answer(self):
+        """
+        str: What joins the history: the text, or only its final response with reasoning.
+        """
+        if not self.use_reasoning:
+            return self.text
+        with self.cond:
+            if self._final_from is None:
+                return ""
+            # From the header's chunk on, so the reasoning cannot be mistaken for the header
+            return final_response("".join(self._chunks[self._final_from:]))
+
+    def result(self):
+        """
+        Get the job's answer in the shape /chat uses for a provider: the text, 'Error: ...' if
+        it failed, or {'model', 'content'} after a budget downgrade.
+        """
+        content = f"Error: {self.error}" if self.status == 'error' else self.text
+        if self.model != self.requested_model:
+            return {'model': self.model, 'content': content}
+        return content
+
+    def to_dict(self):
+        """
+        Serialize for the job endpoints: job_id, provider, model, status and content (partial while running).
+        """
+        data = {"job_id": self.job_id, "provider": self.provider, "model": self.model,
+                "status": self.status, "content": self.text}
+        if self.error:
+            data["error"] = self.error
+        if self._cancel_reason:
+            data["reason"] = self._cancel_reason
+        return data
+
+    def attach(self, llm, use_reasoning):
+        """
+        Bind the provider generating the answer; a cancel requested before now applies to it.
+        """
+        with self.cond:
+            self._llm = llm
+            self.use_reasoning = use_reasoning
+            reason = self._cancel_reason
+        if reason:
+            llm.cancel()
+
+    def append(self, text, final_header=False):
+        """
+        Add transformed text to the job's output and wake its followers (final_header: the
+        text was produced from the final response header, where `answer` starts).
+        """
+        with self.cond:
+            if final_header and self._final_from is None:
+                self._final_from = len(self._chunks)
+            if text:
+                self._chunks.append(text)
+                self.cond.notify_all()
+
+    def finish(self, status, error=None):
+        """
+        Record the outcome ('done', 'error' or 'cancelled') and wake waiters and followers.
+        """
+        with self.cond:
+            self.status, self.error = status, error
+            self.finished_at = time.time()
+            self.cond.notify_all()
+
+    def cancel(self, reason='client'):
+        """
+        Stop the job, closing its upstream stream (safe from any thread); False if it had already finished.
+        """
+        with self.cond:
+            if self.finished:
+                return False
+            self._cancel_reason = self._cancel_reason or reason
+            llm = self._llm
+        if llm is not None:
+            llm.cancel()
+        return True
+
+    def wait(self, timeout=None):
+        """
+        Block until the job finishes, for at most `timeout` seconds; True if it did.
+        """
+        with self.cond:
+            return self.cond.wait_for(lambda: self.finished, timeout)
+
+    def follow(self, poll=15.0):
+        """
+        Follow the job as events: the text so far, then new chunks as they arrive.
+
+        Args:
+            poll (float): Seconds between ('wait', '') events while nothing arrives (for keep-alives).
+
+        Yields:
+            tuple: ('chunk', text) and ('wait', '') events, then (status, detail) once
+            finished: ('done', ''), ('error', message) or ('cancelled', reason).
+        """
+        sent = 0
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: len(self._chunks) > sent or self.finished, poll)
+                chunks = self._chunks[sent:]
+                finished = self.finished
+            sent += len(chunks)
+            if chunks:
+                yield 'chunk', "".join(chunks)
+            elif not finished:
+                yield 'wait', ''
+            if finished and sent == len(self._chunks):
+                yield self.status, self.error or self._cancel_reason or ''
+                return
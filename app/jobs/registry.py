@@ -0,0 +1,197 @@
+"""
+registry.py - Registry of background chat jobs for deadline-bounded compares
+
+Implements the JobRegistry class and the process-wide `jobs` instance. A non-streaming /chat
+request with a `deadline` runs each provider as a ChatJob (job.py) on its own thread and
+answers with the jobs that finished in time; the stragglers keep running and are reported as
+pending job ids. Their text can be polled (GET /chat/jobs/<id>) or followed as SSE
+(GET /chat/jobs/<id>/events), and they can be cancelled. A job can be given an admission slot
+(Permit.slot()) to hold while it calls upstream.
+
+A finished job is committed to the session's history the next time that session reaches the
+server (the poll itself, or its next chat), because only a request can write the session
+cookie; turns are therefore committed in completion order (see `results`, results.py, which
+also publishes finished results for other workers with a shared state backend).
+
+Finished jobs are kept for `retention` seconds and at most `max_jobs` are kept in total
+(oldest finished first).
+
+Dependencies:
+- Python standard library (collections, contextlib, contextvars, threading, time)
+- app.jobs.job.ChatJob
+- app.jobs.runner.run_job
+- app.jobs.results.JobResults
+- app.observability.metrics
+- app.routes.provider_factory.provider_from_state (imported lazily; routes import this module)
+- app.state.shared_state
+- app.streaming.drain
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+
+from app.jobs.job import ChatJob
+from app.jobs.runner import run_job
+from app.jobs.results import JobResults
+from app.observability import metrics
+from app.state import shared_state
+from app.streaming import drain
+from config import Config
+
+class JobRegistry:
+    """
+    Process-wide registry of chat jobs with bounded retention.
+
+    Attributes:
+        retention (float): Seconds a finished job is kept.
+        max_jobs (int): Jobs kept at most (oldest finished evicted first).
+        results (JobResults): History commits, and finished results shared with other workers.
+    """
+
+    def __init__(self, retention, max_jobs, backend=None):
+        """
+        Initialize an empty registry.
+
+        Args:
+            retention (float): Seconds a finished job is kept.
+            max_jobs (int): Jobs kept at most.
+            backend (StateBackend): Shared state (only used if it is shared between processes).
+        """
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self.results = JobResults(backend, retention)
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+
+    def submit(self, session_id, provider, model, requested_model, message, state, history_mode,
+               use_reasoning, span, on_finish=None, generation=None, slot=None):
+        """
+        Start a job on its own thread.
+
+        Args:
+            session_id (str): Owning session.
+            provider (str): Provider name.
+            model (str): Model to call.
+            requested_model (str): Model the client asked for.
+            message (str): User message.
+            state (dict | None): The provider's serialized session state.
+            history_mode (str | None): History mode to apply.
+            use_reasoning (bool): Whether to include reasoning.
+            span (Span): Span of the provider call (ended by the job).
+            on_finish (callable): Called with the job once it finished.
+            generation (dict | None): Requested generation options.
+            slot (context manager): Admission slot held while the job calls upstream
+                (see Permit.slot()); None runs it at once.
+
+        Returns:
+            ChatJob: The running job.
+        """
+        from app.routes.provider_factory import provider_from_state
+
+        job = ChatJob(session_id, provider, model, requested_model, message, history_mode, generation)
+        llm = provider_from_state(provider, state)
+        with self._lock:
+            self._purge()
+            self._jobs[job.job_id] = job
+        metrics.increment("jobs.started")
+        drain.stream_opened()
+
+        def work():
+            try:
+                with slot or contextlib.nullcontext():
+                    run_job(job, llm, use_reasoning, span)
+            finally:
+                drain.stream_closed()
+                metrics.increment(f"jobs.{job.status}")
+                self.results.publish(job)
+                if on_finish is not None:
+                    on_finish(job)
+
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(work,),
+                                  name=f"chat-job-{provider}", daemon=True)
+        thread.start()
+        return job
+
+    def cancel_all(self, reason):
+        """
+        Cancel every running local job (e.g. at the drain deadline).
+
+        Args:
+            reason (str): Why the jobs are cancelled.
+
+        Returns:
+            int: Jobs cancelled.
+        """
+        with self._lock:
+            running = [job for job in self._jobs.values() if not job.finished]
+        return sum(1 for job in running if job.cancel(reason))
+
+    def get(self, job_id, session_id):
+        """
+        Get a session's job.
+
+        Returns:
+            ChatJob | None: The job, or None if unknown, expired or owned by another session.
+        """
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+        if job is None or job.session_id != session_id:
+            return None
+        return job
+
+    def cancel(self, job_id, session_id, reason='client'):
+        """
+        Cancel a session's running job.
+
+        Returns:
+            bool: True if a running job was cancelled.
+        """
+        job = self.get(job_id, session_id)
+        return job is not None and job.cancel(reason)
+
+    def discard(self, job):
+        """
+        Forget a job whose result was already delivered and committed.
+        """
+        with self._lock:
+            self._jobs.pop(job.job_id, None)
+
+    def commit_finished(self, session_id, states):
+        """
+        Commit every finished, uncommitted job of a session.
+
+        Args:
+            session_id (str): Session id.
+            states (dict): session['llm_provider'], updated in place.
+
+        Returns:
+            list: Providers whose history changed.
+        """
+        with self._lock:
+            finished = [job for job in self._jobs.values()
+                        if job.session_id == session_id and job.finished and not job.committed]
+        finished.sort(key=lambda job: job.finished_at)
+        return [job.provider for job in finished if self.results.commit(job, states)]
+
+    def _purge(self):
+        """
+        Drop expired finished jobs, then the oldest finished ones beyond max_jobs (caller holds the lock).
+        """
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and now - job.finished_at > self.retention]:
+            del self._jobs[job_id]
+        excess = len(self._jobs) - self.max_jobs
+        if excess > 0:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:excess]:
+                del self._jobs[job_id]
+
+jobs = JobRegistry(Config.JOB_RETENTION, Config.JOB_MAX_RETAINED, shared_state)
+drain.on_expire(lambda: jobs.cancel_all('shutdown'))
@@ -0,0 +1,141 @@
+"""
+results.py - History commits of finished chat jobs, and their results shared between workers
+
+Implements the JobResults class. Only a request can write the session cookie, so a finished
+job's turn is committed by whichever worker the session reaches next: the poll that sees it
+or the session's next chat. With a shared state backend (app/state/), finished results are
+published as `job:<id>` so a poll landing on another worker still gets them, and
+`job:<id>:committed` makes sure only one worker commits the turn.
+
+Dependencies:
+- Python standard library (json, logging)
+- app.routes.provider_factory.provider_from_state (imported lazily; routes import this package)
+- app.state.StateBackendError
+
+@author Auto-refactored by Cline
+"""
+
+import json
+import logging
+
+from app.state import StateBackendError
+
+logger = logging.getLogger(__name__)
+
+class JobResults:
+    """
+    History commits of finished jobs, and their results published to a shared state backend.
+
+    Attributes:
+        backend (StateBackend | None): Shared state (None when it is not shared between processes).
+        retention (float): Seconds a published result is kept.
+    """
+
+    def __init__(self, backend, retention):
+        """
+        Initialize the results.
+
+        Args:
+            backend (StateBackend): State backend (only used if it is shared between processes).
+            retention (float): Seconds a published result is kept.
+        """
+        self.backend = backend if backend is not None and backend.shared else None
+        self.retention = retention
+
+    def commit(self, job, states):
+        """
+        Write a finished job's turn into a session's provider states.
+
+        The turn is applied to the session's current state for the provider, so turns
+        committed since the job started are kept.
+
+        Args:
+            job (ChatJob): Finished job.
+            states (dict): session['llm_provider'], updated in place.
+
+        Returns:
+            bool: True if the turn was committed now.
+        """
+        with job.cond:
+            if job.status != 'done' or job.committed:
+                return False
+            job.committed = True
+        if not self._claim_commit(job.job_id):
+            return False
+        self._apply_turn(job.provider, job.history_mode, job.message, job.answer, states)
+        return True
+
+    def commit_shared(self, job_id, data, states):
+        """
+        Write the turn of a job finished on another worker into a session's provider states.
+
+        Args:
+            job_id (str): Job id.
+            data (dict): get() result.
+            states (dict): session['llm_provider'], updated in place.
+
+        Returns:
+            bool: True if the turn was committed now.
+        """
+        if data["status"] != 'done' or not self._claim_commit(job_id):
+            return False
+        self._apply_turn(data["provider"], data.get("history_mode"), data["message"], data["answer"], states)
+        return True
+
+    def publish(self, job):
+        """
+        Publish a finished job's result for polls that land on other workers.
+        """
+        if self.backend is None:
+            return
+        data = dict(job.to_dict(), session_id=job.session_id, result=job.result(), answer=job.answer,
+                    message=job.message, history_mode=job.history_mode)
+        try:
+            self.backend.set(f"job:{job.job_id}", json.dumps(data), ttl=self.retention)
+        except StateBackendError as e:
+            logger.warning("Could not share job %s: %s", job.job_id, e)
+
+    def get(self, job_id, session_id):
+        """
+        Get a finished job's result published by another worker.
+
+        Returns:
+            dict | None: ChatJob.to_dict() plus 'result', 'answer', 'message' and 'history_mode', or None.
+        """
+        if self.backend is None or not isinstance(job_id, str):
+            return None
+        try:
+            raw = self.backend.get(f"job:{job_id}")
+        except StateBackendError as e:
+            logger.warning("Could not read shared job %s: %s", job_id, e)
+            return None
+        data = json.loads(raw) if raw else None
+        if data is None or data.pop("session_id") != session_id:
+            return None
+        return data
+
+    def _claim_commit(self, job_id):
+        """
+        Make sure only one worker commits a job (always true without a shared backend).
+        """
+        if self.backend is None:
+            return True
+        try:
+            return self.backend.incr(f"job:{job_id}:committed", ttl=self.retention) == 1
+        except StateBackendError as e:
+            logger.warning("Could not claim commit of job %s: %s", job_id, e)
+            return True
+
+    @staticmethod
+    def _apply_turn(provider, history_mode, message, content, states):
+        """
+        Append a user/assistant turn to a provider's serialized state.
+        """
+        from app.routes.provider_factory import provider_from_state
+
+        llm = provider_from_state(provider, states.get(provider))
+        if history_mode:
+            llm.history_mode = history_mode
+        llm.add_to_history("user", message)
+        llm.add_to_history("assistant", content)
+        states[provider] = llm.to_dict()
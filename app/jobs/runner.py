@@ -0,0 +1,97 @@
+"""
+runner.py - Generation of a chat job's answer
+
+Implements run_job(), which runs on a job's thread: it streams the provider's answer through
+LLMProvider.generate_stream() and the STREAM_TRANSFORMS pipeline into the ChatJob, like a
+streamed /chat answer, and records the call's latency, usage and outcome.
+
+Dependencies:
+- Python standard library (logging)
+- app.control.router
+- app.observability.log_context
+- app.providers.base.estimate_tokens
+- app.providers.generation.resolve_generation
+- app.providers.reasoning.FINAL_RESPONSE_HEADER
+- app.streaming (build_pipeline, drain)
+- app.usage.usage_ledger
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+
+from app.control import router
+from app.observability import log_context
+from app.providers.base import estimate_tokens
+from app.providers.generation import resolve_generation
+from app.providers.reasoning import FINAL_RESPONSE_HEADER
+from app.streaming import build_pipeline, drain
+from app.usage import usage_ledger
+
+logger = logging.getLogger(__name__)
+
+def run_job(job, llm, use_reasoning, span):
+    """
+    Generate a job's answer (runs on the job's thread).
+
+    Args:
+        job (ChatJob): The job.
+        llm (LLMProvider): Provider restored from the session's state.
+        use_reasoning (bool): Whether to include reasoning.
+        span (Span): Span of this provider call, ended here.
+    """
+    job.attach(llm, use_reasoning)
+    if job.history_mode:
+        llm.history_mode = job.history_mode
+    llm.generation = resolve_generation(job.provider, job.model, job.generation)
+    prompt_estimate = llm.estimate_prompt_tokens(job.message)
+    with span, log_context(provider=job.provider, model=job.model):
+        timing = router.timing(job.provider, job.model)
+        pipeline = build_pipeline()
+        try:
+            status, error = _generate(job, llm, pipeline, timing, span)
+        finally:
+            pipeline.report()
+            usage_ledger.record_call(job.session_id, job.provider, job.model, llm, prompt_estimate,
+                                     estimate_tokens(job.text), job.requested_model)
+    if llm.cancelled and status == 'done':
+        status = 'cancelled'
+    elif status == 'done' and not pipeline.stopped:
+        timing.finish(estimate_tokens(job.text))
+    job.finish(status, error)
+
+def _generate(job, llm, pipeline, timing, span):
+    """
+    Feed the provider's stream through the pipeline into the job.
+
+    Returns:
+        tuple: (status, error): ('done', None), or ('error', message) if the call failed.
+    """
+    chunks = llm.generate_stream(job.message, job.model, job.use_reasoning)
+    local_chunks = llm.local_chunks
+    try:
+        if drain.expired():
+            job.cancel('shutdown')
+        for chunk in chunks:
+            # Jobs still running at the drain deadline are cancelled by JobRegistry.cancel_all()
+            if llm.cancelled:
+                break
+            if llm.local_chunks == local_chunks:
+                # Reasoning headers are yielded before their upstream stream opens
+                timing.chunk()
+            local_chunks = llm.local_chunks
+            job.append(pipeline.feed(chunk), final_header=job.use_reasoning and chunk == FINAL_RESPONSE_HEADER)
+            if pipeline.stopped:
+                break
+        if not llm.cancelled:
+            job.append(pipeline.flush())
+    except Exception as e:
+        if llm.cancelled:
+            return 'done', None
+        logger.error("Error in chat job for provider %s: %s", job.provider, e)
+        span.record_error(e)
+        timing.fail()
+        return 'error', str(e)
+    finally:
+        chunks.close()
+    return 'done', None
@@ -0,0 +1,26 @@
+"""
+__init__.py - Observability helpers for the app.observability package
+
+Imports and exposes:
+- metrics: Process-wide MetricsRegistry instance
+- MetricsRegistry: Thread-safe counters, gauges and distributions
+- configure_logging: Install the queue-based JSON logging pipeline
+- log_context / bind_log_context / reset_log_context: Attach request id, provider and model to log records
+- redact_body: Truncate or redact message bodies for logging
+- tracer: Process-wide Tracer (start_trace, span, use)
+- configure_tracing: Install the trace sampler and exporter from Config
+- profiling: On-demand per-request profiling (module)
+
+@author Auto-refactored by Cline
+"""
+
+from app.observability.log_fields import bind_log_context, log_context, redact_body, reset_log_context
+from app.observability.logging_setup import configure_logging
+from app.observability.metrics import MetricsRegistry, metrics
+from app.observability.tracing import configure_tracing, tracer
+from app.observability import profiling
+
+__all__ = [
+    "MetricsRegistry", "bind_log_context", "configure_logging", "configure_tracing", "log_context",
+    "metrics", "profiling", "redact_body", "reset_log_context", "tracer",
+]
@@ -0,0 +1,107 @@
+"""
+log_fields.py - Context fields and message bodies of log records
+
+Request threads bind the request id, provider and model with log_context() (or
+bind_log_context() where a `with` block cannot span the lifetime); ContextFilter copies them,
+and the trace/span ids of the active span, onto each record before it is queued (see
+logging_setup.py). redact_body() shortens or hides message bodies before they are logged.
+
+Main functions:
+- log_context(): Bind request id / provider / model to records in the current context
+- redact_body(): Truncate or redact message bodies before they are logged
+
+Dependencies:
+- Python standard library (contextlib, contextvars, logging)
+- app.observability.tracing.current_span
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import contextlib
+import contextvars
+import logging
+
+from app.observability.tracing import current_span
+from config import Config
+
+# ====================================
+# Constants and configuration
+# ====================================
+CONTEXT_FIELDS = ("request_id", "provider", "model", "trace_id", "span_id")
+
+_log_context = contextvars.ContextVar("log_context", default={})
+
+@contextlib.contextmanager
+def log_context(**fields):
+    """
+    Bind fields (request_id, provider, model, ...) to every record logged inside the block.
+
+    Args:
+        **fields: Values to attach; they extend any fields already bound.
+
+    Example:
+        with log_context(provider='groq', model='llama-3.1-8b-instant'):
+            logger.info("Calling provider")
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+def bind_log_context(**fields):
+    """
+    Bind fields until reset_log_context() is called with the returned token.
+
+    Used where a `with` block cannot span the lifetime (e.g. Flask request hooks).
+
+    Returns:
+        contextvars.Token: Token for reset_log_context().
+    """
+    return _log_context.set({**_log_context.get(), **fields})
+
+def reset_log_context(token):
+    """
+    Undo a bind_log_context() call.
+
+    Args:
+        token (contextvars.Token): Token returned by bind_log_context().
+    """
+    _log_context.reset(token)
+
+def redact_body(text, mode=None, max_chars=None):
+    """
+    Prepare a user or model message for logging.
+
+    Args:
+        text (str): Message body.
+        mode (str): 'truncate', 'redact' or 'full' (defaults to the configured mode).
+        max_chars (int): Characters kept when truncating (defaults to the configured limit).
+
+    Returns:
+        str: The body, shortened or replaced according to the mode.
+    """
+    mode = mode or Config.LOG_BODY_MODE
+    max_chars = Config.LOG_BODY_MAX_CHARS if max_chars is None else max_chars
+    if text is None or mode == 'full':
+        return text
+    if mode == 'redact':
+        return f"<redacted {len(text)} chars>"
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}...(+{len(text) - max_chars} chars)"
+
+class ContextFilter(logging.Filter):
+    """
+    Copies the bound log context onto each record (runs in the calling thread, before queueing).
+    """
+
+    def filter(self, record):
+        for name, value in _log_context.get().items():
+            setattr(record, name, value)
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
@@ -0,0 +1,145 @@
+"""
+logging_setup.py - Asynchronous, structured logging pipeline
+
+Configures the root logger from Config so that request threads never block on log I/O:
+records are filtered and sampled in the calling thread, then handed to a queue that a
+background QueueListener drains into the configured sinks as one JSON object per line.
+Each record carries the request id and provider/model bound with log_context(), and the
+trace/span ids of the active span when the request is traced.
+
+Main functions:
+- configure_logging(): Install the pipeline (called by the app factory)
+- log_context(), redact_body(): Fields and bodies of records (log_fields.py, re-exported)
+
+Dependencies:
+- Python standard library (atexit, json, logging, queue, random, sys)
+- app.observability.log_fields (CONTEXT_FIELDS, ContextFilter, bind_log_context, log_context, redact_body,
+  reset_log_context)
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+
+from app.observability.log_fields import (CONTEXT_FIELDS, ContextFilter, bind_log_context, log_context, redact_body,
+                                          reset_log_context)
+from config import Config
+
+_listener = None
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a configured fraction of records per level; unlisted levels are always kept.
+
+    Attributes:
+        rates (dict): Level number mapped to the fraction kept (0.0-1.0).
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        return rate is None or rate >= 1 or random.random() < rate
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as single-line JSON objects.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def parse_sample_rates(spec):
+    """
+    Parse a 'LEVEL=rate,...' sampling spec.
+
+    Args:
+        spec (str): E.g. 'DEBUG=0.01,INFO=0.5'.
+
+    Returns:
+        dict: Level number mapped to rate.
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        level, _, rate = item.partition("=")
+        rates[logging.getLevelName(level.strip().upper())] = float(rate)
+    return rates
+
+def build_sink(spec):
+    """
+    Create a handler for one sink spec.
+
+    Args:
+        spec (str): 'stderr', 'stdout' or 'file:/path/to/app.log'.
+
+    Returns:
+        logging.Handler: Handler writing JSON lines.
+    """
+    if spec == 'stdout':
+        handler = logging.StreamHandler(sys.stdout)
+    elif spec.startswith('file:'):
+        handler = logging.handlers.WatchedFileHandler(spec[len('file:'):])
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+def configure_logging(config=Config):
+    """
+    Install the queue-based JSON logging pipeline on the root logger.
+
+    Args:
+        config (Config): Provides LOG_LEVEL, LOG_SINKS and LOG_SAMPLE_RATES.
+
+    Side effects:
+        Replaces root handlers and (re)starts the background listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    sinks = [build_sink(spec.strip()) for spec in config.LOG_SINKS.split(",") if spec.strip()]
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(config.LOG_SAMPLE_RATES)))
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config.LOG_LEVEL.upper())
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *sinks, respect_handler_level=True)
+    _listener.start()
+
+@atexit.register
+def _flush_on_exit():
+    """
+    Drain queued records before the interpreter exits.
+    """
+    if _listener is not None:
+        _listener.stop()
+
+__all__ = ["CONTEXT_FIELDS", "ContextFilter", "JsonFormatter", "SamplingFilter", "bind_log_context", "build_sink",
+           "configure_logging", "log_context", "parse_sample_rates", "redact_body", "reset_log_context"]
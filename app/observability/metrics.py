@@ -0,0 +1,100 @@
+"""
+metrics.py - In-process metrics registry
+
+Implements the MetricsRegistry class, a thread-safe collection of counters, gauges and
+timing/size distributions, plus the process-wide `metrics` instance that the rest of the
+app records into. Snapshots are served as JSON by app/routes/metrics_routes.py.
+
+Dependencies:
+- Python standard library (threading, collections)
+
+@author Auto-refactored by Cline
+"""
+
+import threading
+from collections import defaultdict, deque
+
+# ====================================
+# Constants and configuration
+# ====================================
+RESERVOIR_SIZE = 1024
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of named counters, gauges and distributions.
+
+    Distributions keep count/sum/min/max over their lifetime plus the most recent
+    RESERVOIR_SIZE samples for percentiles, so memory stays bounded.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty registry.
+        """
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._distributions = {}
+
+    def increment(self, name, value=1):
+        """
+        Add to a counter.
+
+        Args:
+            name (str): Metric name.
+            value (float): Amount to add.
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name, value):
+        """
+        Set a gauge to its current value.
+
+        Args:
+            name (str): Metric name.
+            value (float): Current value.
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, value):
+        """
+        Record one sample of a distribution (latency, size, ratio, ...).
+
+        Args:
+            name (str): Metric name.
+            value (float): Sample value.
+        """
+        with self._lock:
+            dist = self._distributions.get(name)
+            if dist is None:
+                dist = self._distributions[name] = {
+                    "count": 0, "sum": 0.0, "min": value, "max": value,
+                    "recent": deque(maxlen=RESERVOIR_SIZE),
+                }
+            dist["count"] += 1
+            dist["sum"] += value
+            dist["min"] = min(dist["min"], value)
+            dist["max"] = max(dist["max"], value)
+            dist["recent"].append(value)
+
+    def snapshot(self):
+        """
+        Get a JSON-serializable copy of every metric.
+
+        Returns:
+            dict: {'counters': {...}, 'gauges': {...}, 'distributions': {...}}.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            distributions = {name: dict(dist, recent=list(dist["recent"])) for name, dist in self._distributions.items()}
+        for dist in distributions.values():
+            recent = sorted(dist.pop("recent"))
+            dist["mean"] = dist["sum"] / dist["count"]
+            dist["p50"] = recent[len(recent) // 2]
+            dist["p95"] = recent[min(len(recent) - 1, int(len(recent) * 0.95))]
+        return {"counters": counters, "gauges": gauges, "distributions": distributions}
+
+metrics = MetricsRegistry()
@@ -0,0 +1,197 @@
+"""
+profiling.py - On-demand profiling of single requests
+
+Lets an operator profile one live /chat request without redeploying. A request is profiled
+when it carries a valid signed X-Profile-Token header, or when an admin has armed the next
+N requests (POST /admin/profiles/arm). The profile runs cProfile on the request's thread
+from the start of the view until the response is closed, so a streaming response is
+covered for the whole generator lifetime, and is written as a pstats file to PROFILE_DIR.
+
+Requests that ask for nothing pay one header lookup and one integer check.
+
+Tokens are '<unix time>.<hex HMAC-SHA256 of the time under PROFILE_SECRET>' and are
+accepted for PROFILE_TOKEN_TTL seconds:
+
+    python -c "from app.observability.profiling import sign_profile_token; print(sign_profile_token())"
+
+Main functions/classes:
+- RequestProfiler: cProfile wrapper for one request
+- profiler_for_request(): Decide whether a request is profiled and start the profiler
+- arm(): Profile the next N requests in this process
+- list_profiles(): Recent profiles, newest first
+
+Dependencies:
+- Python standard library (cProfile, hashlib, hmac, os, re, threading, time)
+- app.observability.metrics
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import cProfile
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+
+from app.observability.metrics import metrics
+from config import Config
+
+# ====================================
+# Constants and configuration
+# ====================================
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+\.prof$")
+
+_armed = 0
+_armed_lock = threading.Lock()
+
+def sign_profile_token(timestamp=None, secret=None):
+    """
+    Create a profiling token.
+
+    Args:
+        timestamp (int): Unix time the token is issued at (defaults to now).
+        secret (str): Signing secret (defaults to PROFILE_SECRET).
+
+    Returns:
+        str: '<timestamp>.<signature>'.
+    """
+    timestamp = str(int(time.time() if timestamp is None else timestamp))
+    secret = secret or Config.PROFILE_SECRET
+    signature = hmac.new(secret.encode('utf-8'), timestamp.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f"{timestamp}.{signature}"
+
+def verify_profile_token(token):
+    """
+    Check a profiling token's signature and age.
+
+    Args:
+        token (str): Header value.
+
+    Returns:
+        bool: True if signed with PROFILE_SECRET within PROFILE_TOKEN_TTL seconds.
+    """
+    if not Config.PROFILE_SECRET:
+        return False
+    timestamp, _, _ = token.partition('.')
+    if not timestamp.isdigit() or abs(time.time() - int(timestamp)) > Config.PROFILE_TOKEN_TTL:
+        return False
+    return hmac.compare_digest(token, sign_profile_token(int(timestamp)))
+
+def arm(count=1):
+    """
+    Profile the next `count` requests handled by this process.
+
+    Args:
+        count (int): Requests to profile (0 disarms).
+
+    Returns:
+        int: Requests now armed.
+    """
+    global _armed
+    with _armed_lock:
+        _armed = max(0, count)
+        return _armed
+
+def _take_armed():
+    """
+    Consume one armed slot if any.
+    """
+    global _armed
+    if not _armed:
+        return False
+    with _armed_lock:
+        if not _armed:
+            return False
+        _armed -= 1
+        return True
+
+class RequestProfiler:
+    """
+    Deterministic profiler for one request, bound to the thread that serves it.
+
+    Attributes:
+        path (str): File the pstats output is written to.
+        reason (str): 'token' or 'armed'.
+    """
+
+    def __init__(self, name, reason):
+        """
+        Start profiling the current thread.
+
+        Args:
+            name (str): Identifier for the file name (e.g. the request id).
+            reason (str): Why the request is profiled.
+        """
+        self.reason = reason
+        name = re.sub(r"[^A-Za-z0-9_-]", "", name)[:64] or "request"
+        self.path = os.path.join(Config.PROFILE_DIR, f"{time.strftime('%Y%m%dT%H%M%S')}-{name}.prof")
+        self._stopped = False
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self):
+        """
+        Stop profiling and write the profile (idempotent).
+
+        Must run on the thread that started the profiler; for streaming responses this is
+        the response's close callback.
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+        self._profile.disable()
+        os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+        self._profile.dump_stats(self.path)
+        metrics.increment("profiles.captured")
+        _prune(Config.PROFILE_DIR, Config.PROFILE_MAX_FILES)
+
+def profiler_for_request(headers, name):
+    """
+    Start a profiler if this request asked for one.
+
+    Args:
+        headers: Request headers.
+        name (str): Identifier for the profile file name.
+
+    Returns:
+        RequestProfiler | None: Running profiler, or None for a normal request.
+    """
+    token = headers.get(PROFILE_HEADER)
+    if token is not None:
+        if verify_profile_token(token):
+            return RequestProfiler(name, 'token')
+        metrics.increment("profiles.rejected_tokens")
+    if _take_armed():
+        return RequestProfiler(name, 'armed')
+    return None
+
+def list_profiles(directory=None):
+    """
+    List saved profiles, newest first.
+
+    Returns:
+        list: Dicts with 'name', 'size' and 'created'.
+    """
+    directory = directory or Config.PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and PROFILE_NAME_PATTERN.match(entry.name):
+            stat = entry.stat()
+            profiles.append({"name": entry.name, "size": stat.st_size, "created": stat.st_mtime})
+    return sorted(profiles, key=lambda profile: profile["created"], reverse=True)
+
+def _prune(directory, keep):
+    """
+    Delete all but the newest `keep` profiles.
+    """
+    for profile in list_profiles(directory)[keep:]:
+        try:
+            os.remove(os.path.join(directory, profile["name"]))
+        except OSError:
+            pass
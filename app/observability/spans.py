@@ -0,0 +1,139 @@
+"""
+spans.py - Spans of the lightweight request tracer
+
+Implements Span, one timed operation in a trace, and NOOP_SPAN, which stands in for spans
+outside a recorded trace. The current span lives in a contextvar, so child spans and log
+records (see logging_setup.py) pick it up without passing it around. Spans are created by
+the Tracer (tracing.py), which exports them once they end.
+
+Main functions/classes:
+- Span: Recorded span (a context manager that makes it current and ends it)
+- NOOP_SPAN: Shared span for unsampled work; every operation does nothing
+- current_span(): The active span, if any
+
+Dependencies:
+- Python standard library (contextvars, os, time)
+
+@author Auto-refactored by Cline
+"""
+
+import contextvars
+import os
+import time
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def current_span():
+    """
+    Get the span active in the current context.
+
+    Returns:
+        Span | None: The active span (None outside any recorded span).
+    """
+    return _current_span.get()
+
+class Span:
+    """
+    One timed operation in a trace. Entering it makes it current; leaving it ends it.
+
+    Attributes:
+        trace_id (str): 32 hex chars shared by every span of the trace.
+        span_id (str): 16 hex chars.
+        parent_id (str | None): Parent span id (None for the root).
+        name (str): Operation name, e.g. 'chat' or 'upstream.first_token'.
+        attributes (dict): Extra key/values (provider, model, chunks, ...).
+    """
+
+    is_recording = True
+
+    def __init__(self, tracer, name, trace_id, parent_id, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._token = None
+
+    def set_attribute(self, key, value):
+        """
+        Attach an attribute.
+        """
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        """
+        Mark the span as failed.
+
+        Args:
+            error (BaseException | str): The failure.
+        """
+        self.status = "error"
+        self.attributes["error"] = str(error)
+
+    def end(self):
+        """
+        Finish the span and queue it for export (no-op if already ended).
+        """
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._finish(self)
+
+    def to_dict(self):
+        """
+        Serialize for the file exporter.
+
+        Returns:
+            dict: Ids, name, timing (ns and ms), status and attributes.
+        """
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current_span.reset(self._token)
+        # GeneratorExit means the consumer went away (e.g. client disconnect), not a failure
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.record_error(exc)
+        self.end()
+
+class _NoopSpan:
+    """
+    Stand-in for unsampled spans: every operation does nothing.
+    """
+
+    is_recording = False
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        pass
+
+NOOP_SPAN = _NoopSpan()
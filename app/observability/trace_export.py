@@ -0,0 +1,79 @@
+"""
+trace_export.py - Exporters of finished trace spans
+
+Writes batches of finished spans to a JSONL file, or POSTs them as OTLP/HTTP JSON to a
+collector. The Tracer (tracing.py) calls export() from its background thread.
+
+Main functions/classes:
+- FileSpanExporter: Appends spans to a JSONL file
+- OtlpHttpSpanExporter: Sends spans to an OTLP/HTTP collector
+
+Dependencies:
+- Python standard library (json, os, urllib)
+
+@author Auto-refactored by Cline
+"""
+
+import json
+import os
+import urllib.request
+
+class FileSpanExporter:
+    """
+    Appends finished spans to a JSONL file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as output:
+            output.writelines(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+
+class OtlpHttpSpanExporter:
+    """
+    POSTs finished spans to an OTLP/HTTP collector using the JSON encoding.
+    """
+
+    def __init__(self, endpoint, service_name, timeout=5):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans):
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [_otlp_span(span) for span in spans]}],
+        }]}
+        request = urllib.request.Request(self.endpoint, data=json.dumps(payload).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+def _otlp_span(span):
+    encoded = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+        "status": {"code": 2 if span.status == "error" else 1},
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    return encoded
@@ -0,0 +1,189 @@
+"""
+tracing.py - Lightweight request tracing
+
+Implements a minimal span tracer for breaking slow requests down by phase: the /chat
+request, each provider call, session restore, prompt building, the upstream request, time
+to first token and the stream tail. The current span lives in a contextvar (spans.py), so
+child spans and log records (see logging_setup.py) pick it up without passing it around.
+
+Sampling is decided once per trace, when start_trace() opens the root span. Spans outside a
+recorded trace (unsampled requests, background work, or everything when TRACE_SAMPLE_RATE is
+0) are the shared NOOP_SPAN, so disabled tracing costs one contextvar read per span.
+Finished spans are batched by a background thread and written to a JSONL file or POSTed
+as OTLP/HTTP JSON to a collector (trace_export.py).
+
+Main functions/classes:
+- tracer: Process-wide Tracer (tracer.start_trace(), tracer.span(), tracer.use())
+- current_span(): The active span, if any
+- configure_tracing(): Install the sampler and exporter from Config (called by the app factory)
+
+Dependencies:
+- Python standard library (atexit, contextlib, logging, os, queue, random, threading, time)
+- app.observability.spans (NOOP_SPAN, Span, current_span)
+- app.observability.trace_export (FileSpanExporter, OtlpHttpSpanExporter)
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import atexit
+import contextlib
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from app.observability.spans import NOOP_SPAN, Span, _current_span, current_span
+from app.observability.trace_export import FileSpanExporter, OtlpHttpSpanExporter
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# ====================================
+# Constants and configuration
+# ====================================
+EXPORT_BATCH_SIZE = 256
+EXPORT_INTERVAL_SECONDS = 2.0
+
+class Tracer:
+    """
+    Creates spans, samples traces and exports finished spans in the background.
+
+    Attributes:
+        sample_rate (float): Fraction of root spans recorded (0 disables tracing).
+        exporter: FileSpanExporter, OtlpHttpSpanExporter or None.
+    """
+
+    def __init__(self, sample_rate=0.0, exporter=None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start_trace(self, name, **attributes):
+        """
+        Start a root span, subject to sampling, without making it current.
+
+        Enter it (`with span:`) where its work runs, or make it current for a block with
+        use(); a streaming response enters it inside its generator.
+
+        Args:
+            name (str): Operation name.
+            **attributes: Initial attributes.
+
+        Returns:
+            Span | _NoopSpan: A recording span, or NOOP_SPAN if the trace is not sampled.
+        """
+        if self.exporter is None or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return NOOP_SPAN
+        return Span(self, name, os.urandom(16).hex(), None, attributes)
+
+    def span(self, name, **attributes):
+        """
+        Start a child of the current span.
+
+        Use it as a context manager to make it current, or call end() yourself.
+
+        Args:
+            name (str): Operation name.
+            **attributes: Initial attributes.
+
+        Returns:
+            Span | _NoopSpan: A recording span, or NOOP_SPAN outside a recorded trace.
+
+        Example:
+            with tracer.span('session.restore', provider='groq'):
+                llm = get_llm_provider('groq')
+        """
+        parent = current_span()
+        if parent is None:
+            return NOOP_SPAN
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    @contextlib.contextmanager
+    def use(self, span):
+        """
+        Make a span current for a block without ending it.
+
+        Args:
+            span (Span | _NoopSpan): Span started with start_trace().
+        """
+        if not span.is_recording:
+            yield span
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    def flush(self):
+        """
+        Export every queued span now (used at exit).
+        """
+        self._export_pending()
+
+    def _finish(self, span):
+        """
+        Queue an ended span and make sure the export thread is running.
+        """
+        self._queue.put(span)
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        """
+        Export loop: flush a batch every EXPORT_INTERVAL_SECONDS.
+        """
+        while True:
+            time.sleep(EXPORT_INTERVAL_SECONDS)
+            self._export_pending()
+
+    def _export_pending(self):
+        with self._lock:
+            while True:
+                batch = []
+                while len(batch) < EXPORT_BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return
+                try:
+                    self.exporter.export(batch)
+                except Exception as e:
+                    logger.warning("Dropped %d spans: export failed: %s", len(batch), e)
+
+tracer = Tracer()
+
+def configure_tracing(config=Config):
+    """
+    Configure the process-wide tracer from Config.
+
+    Args:
+        config (Config): Provides TRACE_SAMPLE_RATE, TRACE_EXPORTER, TRACE_FILE,
+            TRACE_OTLP_ENDPOINT and TRACE_SERVICE_NAME.
+    """
+    if config.TRACE_EXPORTER == 'otlp':
+        tracer.exporter = OtlpHttpSpanExporter(config.TRACE_OTLP_ENDPOINT, config.TRACE_SERVICE_NAME)
+    else:
+        tracer.exporter = FileSpanExporter(config.TRACE_FILE)
+    tracer.sample_rate = config.TRACE_SAMPLE_RATE
+
+@atexit.register
+def _flush_on_exit():
+    """
+    Export spans still queued when the interpreter exits.
+    """
+    if tracer.exporter is not None:
+        tracer.flush()
+
+__all__ = ["FileSpanExporter", "NOOP_SPAN", "OtlpHttpSpanExporter", "Span", "Tracer", "configure_tracing",
+           "current_span", "tracer"]
@@ -2,32 +2,58 @@
 anthropic-provider.py - Anthropic LLM API provider implementation
 
 Implements the AnthropicProvider class, which extends LLMProvider to interact with the Anthropic API.
-Supports chat, reasoning, and streaming responses.
+Supports chat, reasoning, and streaming responses. completion_prompt() renders the history as
+a text-completions prompt. Calls lease a key from the provider's credential pool
+(ANTHROPIC_API_KEYS, see credentials.py), each key with its own shared client. Generation
+options (see generation.py) map onto max_tokens_to_sample, stop_sequences and temperature.
 
 Dependencies:
 - anthropic
 - Python standard library
 - Logging module
-- app.providers.base.LLMProvider
+- app.providers.base (LLMProvider, shared_client)
+- app.providers.credentials.credential_pools
+- app.providers.reasoning (prompts and layout of reasoning answers)
 
 @author Auto-refactored by Cline
 """
 
-import os
 import logging
 
 from anthropic import Anthropic
 
-from app.providers.base import LLMProvider
+from app.providers.base import LLMProvider, shared_client
+from app.providers.credentials import credential_pools
+from app.providers.reasoning import final_prompt, format_reasoning_answer, reasoning_prompt
 
 logger = logging.getLogger(__name__)
 
+# ====================================
+# Constants and configuration
+# ====================================
+MAX_TOKENS_TO_SAMPLE = 300
+MAX_TEMPERATURE = 1.0
+ASSISTANT_TURN = "\n\nAssistant:"
+
+def completion_prompt(history):
+    """
+    Render a conversation history as a text-completions prompt.
+
+    Args:
+        history (list): Message dicts with 'role' and 'content'.
+
+    Returns:
+        str: 'Role: content' turns separated by blank lines, ending with the Assistant cue.
+    """
+    prompt = "\n\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in history])
+    return prompt + ASSISTANT_TURN
+
 class AnthropicProvider(LLMProvider):
     """
     LLMProvider implementation for Anthropic API.
 
     Attributes:
-        client (Anthropic): Anthropic API client instance.
+        credentials (CredentialPool): Anthropic API keys, each with its own shared Anthropic client.
     """
 
     def __init__(self, max_history=10):
@@ -38,7 +64,75 @@ class AnthropicProvider(LLMProvider):
             max_history (int): Maximum conversation history length.
         """
         super().__init__(max_history)
-        self.client = Anthropic(api_key=os.environ.get('ANTHROPIC_API_KEY'))
+        self.credentials = credential_pools.get('anthropic', 'ANTHROPIC_API_KEY')
+
+    def client_for(self, credential):
+        """
+        Get the shared Anthropic client of one pooled key, creating it on first use.
+        """
+        return shared_client(('anthropic',) + credential.client_key, lambda: Anthropic(api_key=credential.api_key))
+
+    def request_options(self, reasoning=False):
+        """
+        Map the generation options of one call onto text-completions parameters.
+
+        Args:
+            reasoning (bool): True for the reasoning step of a reasoning request.
+
+        Returns:
+            dict: max_tokens_to_sample (MAX_TOKENS_TO_SAMPLE unless set) plus any of
+            stop_sequences and temperature (capped at MAX_TEMPERATURE).
+        """
+        options = self.generation_options(reasoning)
+        request = {"max_tokens_to_sample": options.get("max_tokens", MAX_TOKENS_TO_SAMPLE)}
+        if "stop" in options:
+            request["stop_sequences"] = options["stop"]
+        if "temperature" in options:
+            request["temperature"] = min(options["temperature"], MAX_TEMPERATURE)
+        return request
+
+    def complete(self, prompt, model, reasoning=False):
+        """
+        Make one non-streaming completion call.
+
+        Args:
+            prompt (str): Text-completions prompt.
+            model (str): Model identifier.
+            reasoning (bool): True for the reasoning step of a reasoning request.
+
+        Returns:
+            str: The completion text.
+        """
+        with self.credentials.lease() as lease:
+            response = self.client_for(lease.credential).completions.with_raw_response.create(
+                model=model, prompt=prompt, **self.request_options(reasoning))
+            lease.headers = response.headers
+        completion = response.parse()
+        self.record_usage(self.read_usage(completion))
+        return completion.completion
+
+    def open_completion_stream(self, prompt, model, reasoning=False):
+        """
+        Open a streaming completion call.
+
+        Args:
+            prompt (str): Text-completions prompt.
+            model (str): Model identifier.
+            reasoning (bool): True for the reasoning step of a reasoning request.
+
+        Returns:
+            The SDK stream (see LLMProvider.open_stream()); iterate it with iter_stream(),
+            which ends the key's lease.
+        """
+        with self.credentials.lease() as lease:
+            response = self.open_stream(self.client_for(lease.credential).completions.with_raw_response.create,
+                                        model=model, prompt=prompt, stream=True,
+                                        **self.request_options(reasoning))
+            lease.headers = response.headers
+            stream = response.parse()
+            # The key stays in flight until iter_stream() closes the stream
+            self.hold_lease(stream, lease)
+        return stream
 
     def generate_response(self, message, model):
         """
@@ -53,17 +147,11 @@ class AnthropicProvider(LLMProvider):
         """
         try:
             self.add_to_history("user", message)
-            prompt = "\n\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in self.get_conversation_history()])
-            prompt += "\n\nAssistant:"
-            response = self.client.completions.create(
-                model=model,
-                prompt=prompt,
-                max_tokens_to_sample=300
-            )
-            self.add_to_history("assistant", response.completion)
-            return response.completion
+            response = self.complete(completion_prompt(self.get_conversation_history()), model)
+            self.add_to_history("assistant", response)
+            return response
         except Exception as e:
-            logger.error(f"Error in AnthropicProvider.generate_response: {str(e)}")
+            logger.error("Error in AnthropicProvider.generate_response: %s", e)
             raise
 
     def generate_response_with_reasoning(self, message, model):
@@ -79,24 +167,13 @@ class AnthropicProvider(LLMProvider):
         """
         try:
             self.add_to_history("user", message)
-            reasoning_prompt = f"Reason step-by-step about the following message: {message}\n\nAssistant:"
-            reasoning_response = self.client.completions.create(
-                model=model,
-                prompt=reasoning_prompt,
-                max_tokens_to_sample=300
-            ).completion
-
-            final_prompt = f"Based on the following reasoning, provide a final response:\n\nReasoning:\n{reasoning_response}\n\nFinal response:\n\nAssistant:"
-            final_response = self.client.completions.create(
-                model=model,
-                prompt=final_prompt,
-                max_tokens_to_sample=300
-            ).completion
+            reasoning_response = self.complete(f"{reasoning_prompt(message)}{ASSISTANT_TURN}", model, reasoning=True)
+            final_response = self.complete(f"{final_prompt(reasoning_response)}{ASSISTANT_TURN}", model)
 
             self.add_to_history("assistant", final_response)
-            return f"Reasoning:\n{reasoning_response}\n\nFinal Response:\n{final_response}"
+            return format_reasoning_answer(reasoning_response, final_response)
         except Exception as e:
-            logger.error(f"Error in AnthropicProvider.generate_response_with_reasoning: {str(e)}")
+            logger.error("Error in AnthropicProvider.generate_response_with_reasoning: %s", e)
             raise
 
     def generate_stream(self, message, model, use_reasoning=False):
@@ -114,41 +191,14 @@ class AnthropicProvider(LLMProvider):
         try:
             self.add_to_history("user", message)
             if use_reasoning:
-                reasoning_prompt = f"Reason step-by-step about the following message: {message}\n\nAssistant:"
-                reasoning_stream = self.client.completions.create(
-                    model=model,
-                    prompt=reasoning_prompt,
-                    max_tokens_to_sample=300,
-                    stream=True
-                )
-                yield "Reasoning:\n"
-                for completion in reasoning_stream:
-                    if completion.completion:
-                        yield completion.completion
-
-                final_prompt = f"Based on the reasoning, provide a final response.\n\nAssistant:"
-                final_stream = self.client.completions.create(
-                    model=model,
-                    prompt=final_prompt,
-                    max_tokens_to_sample=300,
-                    stream=True
-                )
-                yield "\n\nFinal Response:\n"
-                for completion in final_stream:
-                    if completion.completion:
-                        yield completion.completion
+                yield from self.stream_reasoning(
+                    lambda: self.open_completion_stream(f"{reasoning_prompt(message)}{ASSISTANT_TURN}", model,
+                                                        reasoning=True),
+                    lambda reasoning: self.open_completion_stream(f"{final_prompt(reasoning)}{ASSISTANT_TURN}", model),
+                    lambda completion: completion.completion)
             else:
-                prompt = "\n\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in self.get_conversation_history()])
-                prompt += "\n\nAssistant:"
-                stream = self.client.completions.create(
-                    model=model,
-                    prompt=prompt,
-                    max_tokens_to_sample=300,
-                    stream=True
-                )
-                for completion in stream:
-                    if completion.completion:
-                        yield completion.completion
+                stream = self.open_completion_stream(completion_prompt(self.get_conversation_history()), model)
+                yield from self.iter_stream(stream, lambda completion: completion.completion)
         except Exception as e:
-            logger.error(f"Error in AnthropicProvider.generate_stream: {str(e)}")
+            logger.error("Error in AnthropicProvider.generate_stream: %s", e)
             raise
@@ -1,29 +1,41 @@
 """
 base.py - Abstract base class for LLM providers
 
-Defines the LLMProvider class, which manages conversation history and provides an interface
-for generating responses and streams from different LLM APIs.
+Defines the LLMProvider class, which manages conversation history (Conversation,
+conversation.py) and upstream streams and usage (UpstreamCalls, upstream_calls.py), and
+provides an interface for generating responses and streams from different LLM APIs.
+stream_reasoning() runs the two streaming steps of a reasoning request for every provider.
 
 Dependencies:
-- Python standard library
-- Logging module
+- app.providers.conversation.Conversation
+- app.providers.reasoning (FINAL_RESPONSE_HEADER, REASONING_HEADER)
+- app.providers.upstream (CHARS_PER_TOKEN, chat_chunk_text, close_stream, estimate_prompt_tokens,
+  estimate_tokens, shared_client)
+- app.providers.upstream_calls.UpstreamCalls
 
 @author Auto-refactored by Cline
 """
 
-import logging
+from app.providers.conversation import Conversation
+from app.providers.reasoning import FINAL_RESPONSE_HEADER, REASONING_HEADER
+from app.providers.upstream import (CHARS_PER_TOKEN, chat_chunk_text, close_stream, estimate_prompt_tokens,
+                                    estimate_tokens, shared_client)
+from app.providers.upstream_calls import UpstreamCalls
 
-logger = logging.getLogger(__name__)
-
-class LLMProvider:
+class LLMProvider(Conversation, UpstreamCalls):
     """
     Abstract base class for Large Language Model providers.
 
     Manages conversation history and defines the interface for generating responses.
 
     Attributes:
-        conversation_history (list): List of message dicts with 'role' and 'content'.
-        max_history (int): Maximum number of messages to retain in history.
+        generation (dict): Normalized generation options of the current request (see
+            app/providers/generation.py); providers map them onto their SDK calls. Not persisted.
+        local_chunks (int): Stream chunks the provider yielded itself rather than from upstream
+            (reasoning headers), counted before each is yielded; consumers timing upstream
+            latency skip a chunk when this changed since the previous one.
+
+    See Conversation for the history attributes and UpstreamCalls for cancelled and usage.
     """
 
     def __init__(self, max_history=10):
@@ -33,8 +45,61 @@ class LLMProvider:
         Args:
             max_history (int): Maximum conversation history length.
         """
-        self.conversation_history = []
-        self.max_history = max_history
+        Conversation.__init__(self, max_history)
+        UpstreamCalls.__init__(self)
+        self.generation = {}
+        self.local_chunks = 0
+
+    def generation_options(self, reasoning=False):
+        """
+        Get the generation options of one upstream call.
+
+        The reasoning step of a reasoning request is capped by reasoning_max_tokens (falling
+        back to max_tokens) and does not use stop sequences, which apply to the answer.
+
+        Args:
+            reasoning (bool): True for the reasoning step of a reasoning request.
+
+        Returns:
+            dict: Any of 'max_tokens', 'stop' and 'temperature'.
+        """
+        generation = self.generation
+        options = {}
+        max_tokens = generation.get("reasoning_max_tokens") if reasoning else None
+        max_tokens = max_tokens or generation.get("max_tokens")
+        if max_tokens:
+            options["max_tokens"] = max_tokens
+        if generation.get("stop") and not reasoning:
+            options["stop"] = generation["stop"]
+        if generation.get("temperature") is not None:
+            options["temperature"] = generation["temperature"]
+        return options
+
+    def stream_reasoning(self, open_reasoning, open_final, chunk_text):
+        """
+        Stream a reasoning answer: the reasoning step, then the final response built on it.
+
+        Args:
+            open_reasoning (callable): Opens the reasoning step's SDK stream.
+            open_final (callable): Opens the final step's SDK stream, given the reasoning text.
+            chunk_text (callable): Text of one SDK chunk.
+
+        Yields:
+            str: REASONING_HEADER, the reasoning chunks, FINAL_RESPONSE_HEADER and the final
+            chunks; the final step is skipped if the stream was cancelled.
+        """
+        # Headers go out before each stream opens, so an opened stream is always iterated (and closed)
+        self.local_chunks += 1
+        yield REASONING_HEADER
+        reasoning = []
+        for chunk in self.iter_stream(open_reasoning(), chunk_text):
+            reasoning.append(chunk)
+            yield chunk
+        if self.cancelled:
+            return
+        self.local_chunks += 1
+        yield FINAL_RESPONSE_HEADER
+        yield from self.iter_stream(open_final("".join(reasoning)), chunk_text)
 
     def generate_response(self, message, model):
         """
@@ -85,50 +150,15 @@ class LLMProvider:
         """
         raise NotImplementedError
 
-    def add_to_history(self, role, content):
+    def list_models(self):
         """
-        Add a message to the conversation history.
-
-        Args:
-            role (str): 'user' or 'assistant'.
-            content (str): Message content.
-        """
-        self.conversation_history.append({"role": role, "content": content})
-        if len(self.conversation_history) > self.max_history:
-            self.conversation_history = self.conversation_history[-self.max_history:]
-
-    def get_conversation_history(self):
-        """
-        Get the current conversation history.
-
-        Returns:
-            list: List of message dicts.
-        """
-        return self.conversation_history
-
-    def to_dict(self):
-        """
-        Serialize provider state to a dictionary.
+        List the model ids the provider's API currently offers.
 
         Returns:
-            dict: Provider state.
-        """
-        return {
-            "max_history": self.max_history,
-            "conversation_history": self.conversation_history
-        }
-
-    @classmethod
-    def from_dict(cls, data):
+            list | None: Model ids, or None if the SDK has no listing call (the catalog
+            then uses its static table).
         """
-        Deserialize provider state from a dictionary.
+        return None
 
-        Args:
-            data (dict): Serialized provider state.
-
-        Returns:
-            LLMProvider: New instance with restored state.
-        """
-        provider = cls(max_history=data.get("max_history", 10))
-        provider.conversation_history = data.get("conversation_history", [])
-        return provider
+__all__ = ["CHARS_PER_TOKEN", "LLMProvider", "chat_chunk_text", "close_stream", "estimate_prompt_tokens",
+           "estimate_tokens", "shared_client"]
@@ -0,0 +1,138 @@
+"""
+cassette.py - Cassette files of recorded provider calls
+
+A cassette is one gzip-compressed JSON-lines file per provider (CASSETTE_DIR/<provider>.jsonl.gz);
+each line is one recorded call (see cassette_provider.py for the format and the record and
+replay modes). Cassette loads a file, appends new recordings to it and hands out the
+recordings of a call in turn. Recording itself is in cassette_recording.py.
+
+Main functions/classes:
+- Cassette: Thread-safe cassette file
+- CassetteMiss: Raised when a replayed call has no recording
+- cassette_path(): Cassette file of a provider
+- parse_speed(): Parse CASSETTE_SPEED
+
+Dependencies:
+- Python standard library (gzip, json, os, threading)
+
+@author Auto-refactored by Cline
+"""
+
+import gzip
+import json
+import os
+import threading
+
+# ====================================
+# Constants and configuration
+# ====================================
+CASSETTE_SUFFIX = ".jsonl.gz"
+USAGE_FIELDS = ("calls", "reported", "prompt_tokens", "completion_tokens")
+
+class CassetteMiss(LookupError):
+    """
+    Raised when a replayed call has no recording.
+    """
+
+class Cassette:
+    """
+    Recorded calls of one provider, backed by a gzip JSON-lines file.
+
+    Attributes:
+        path (str): Cassette file.
+        entries (list): Recorded calls, in recording order.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize Cassette, loading the file if it exists.
+
+        Args:
+            path (str): Cassette file.
+        """
+        self.path = path
+        self.entries = []
+        self._lock = threading.Lock()
+        self._cursors = {}
+        if os.path.exists(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+
+    def record(self, entry):
+        """
+        Append one call to the cassette and its file.
+
+        Args:
+            entry (dict): kind, model, message, chunks, delays_ms and usage.
+        """
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n"
+        with self._lock:
+            self.entries.append(entry)
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            # Each append adds a gzip member; readers see one continuous stream
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                f.write(line)
+
+    def next_entry(self, kind, model, message):
+        """
+        Get the next recording for a call, cycling through matches.
+
+        Args:
+            kind (str): 'response', 'reasoning', 'stream' or 'reasoning_stream'.
+            model (str): Model identifier.
+            message (str): User message.
+
+        Returns:
+            dict: The recording.
+
+        Raises:
+            CassetteMiss: If nothing of this kind and model was recorded.
+        """
+        with self._lock:
+            for key, match in (((kind, model, message), lambda e: e["message"] == message),
+                               ((kind, model), lambda e: True)):
+                candidates = [e for e in self.entries if e["kind"] == kind and e["model"] == model and match(e)]
+                if candidates:
+                    cursor = self._cursors.get(key, 0)
+                    self._cursors[key] = cursor + 1
+                    return candidates[cursor % len(candidates)]
+        raise CassetteMiss(f"No {kind} recording for model {model} in {self.path}")
+
+    def models(self):
+        """
+        Get the models with recordings.
+
+        Returns:
+            list: Sorted model ids.
+        """
+        with self._lock:
+            return sorted({entry["model"] for entry in self.entries})
+
+def parse_speed(value):
+    """
+    Parse CASSETTE_SPEED.
+
+    Args:
+        value (str): 'recorded', 'max', or a positive factor.
+
+    Returns:
+        float: Playback speed factor (0 means no delays).
+
+    Raises:
+        ValueError: If the value is not understood.
+    """
+    value = (value or 'recorded').strip().lower()
+    if value == 'recorded':
+        return 1.0
+    if value == 'max':
+        return 0.0
+    speed = float(value)
+    if speed <= 0:
+        raise ValueError("CASSETTE_SPEED must be 'recorded', 'max' or a positive factor")
+    return speed
+
+def cassette_path(directory, provider):
+    """
+    Get the cassette file of a provider.
+    """
+    return os.path.join(directory, provider + CASSETTE_SUFFIX)
@@ -0,0 +1,184 @@
+"""
+cassette_provider.py - Record-and-replay cassettes for provider calls
+
+Records what real providers return, chunk by chunk with the time between chunks, and plays
+it back offline, so benchmarks and CI exercise the real chunking and pacing of Groq,
+Gemini, Anthropic, OpenAI and Cerebras with no network and deterministic timing.
+
+A cassette is one gzip-compressed JSON-lines file per provider (CASSETTE_DIR/<provider>.jsonl.gz).
+Each line is one call:
+
+    {"kind": "stream", "model": "llama-3.1-8b-instant", "message": "Hi",
+     "chunks": ["Hel", "lo"], "delays_ms": [212.4, 8.1], "usage": {...}}
+
+kind is 'response', 'reasoning' (generate_response_with_reasoning), 'stream' or
+'reasoning_stream'. For streams, delays_ms[0] is the time to the first chunk and
+delays_ms[i] the gap before chunk i; a response is a single chunk whose delay is the call's
+latency. usage is the LLMProvider.usage the call added, so replayed calls are accounted
+like the recorded ones.
+
+Modes (CASSETTE_MODE):
+- 'record': every provider class is wrapped; completed calls are appended to its cassette
+  (cancelled or failed streams are not recorded)
+- 'replay': every provider class is replaced by a CassetteProvider reading its cassette.
+  A call plays the recordings of the same kind, model and message in turn, falling back to
+  those of the same kind and model; with none, CassetteMiss is raised
+- 'off' (default): providers are used unchanged
+
+Speed (CASSETTE_SPEED): 'recorded' (1.0), a factor such as '10' (ten times faster), or
+'max' (no delays).
+
+Main functions/classes:
+- CassetteProvider: Offline provider replaying a cassette
+- cassette_provider_classes(): Apply CASSETTE_MODE to PROVIDER_CLASSES
+- Cassette, CassetteMiss, cassette_path(), parse_speed(), recording_provider_class(): Cassette
+  files (cassette.py) and recording (cassette_recording.py), re-exported
+
+Dependencies:
+- Python standard library (logging, time)
+- app.providers.base.LLMProvider
+- app.providers.cassette (Cassette, CassetteMiss, USAGE_FIELDS, cassette_path, parse_speed)
+- app.providers.cassette_recording.recording_provider_class
+- app.providers.reasoning (FINAL_RESPONSE_HEADER, REASONING_HEADER)
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+import time
+
+from app.providers.base import LLMProvider
+from app.providers.cassette import USAGE_FIELDS, Cassette, CassetteMiss, cassette_path, parse_speed
+from app.providers.cassette_recording import recording_provider_class
+from app.providers.reasoning import FINAL_RESPONSE_HEADER, REASONING_HEADER
+
+logger = logging.getLogger(__name__)
+
+class CassetteProvider(LLMProvider):
+    """
+    Offline LLMProvider that replays a cassette.
+
+    History is kept like a real provider's, so session state, budgets and history modes
+    work unchanged; only the upstream call is replaced.
+
+    Class Attributes:
+        name (str): Provider name.
+        cassette (Cassette): Recordings to play.
+        speed (float): Playback speed factor (0 plays without delays).
+    """
+
+    name = 'cassette'
+    cassette = None
+    speed = 1.0
+
+    def list_models(self):
+        """
+        List the models with recordings.
+
+        Returns:
+            list: Model ids.
+        """
+        return self.cassette.models()
+
+    def generate_response(self, message, model):
+        """
+        Replay a recorded response.
+
+        Args:
+            message (str): User input message.
+            model (str): Model identifier.
+
+        Returns:
+            str: Recorded response.
+        """
+        self.add_to_history("user", message)
+        response = "".join(self._play(self.cassette.next_entry("response", model, message)))
+        self.add_to_history("assistant", response)
+        return response
+
+    def generate_response_with_reasoning(self, message, model):
+        """
+        Replay a recorded reasoning response.
+
+        Args:
+            message (str): User input message.
+            model (str): Model identifier.
+
+        Returns:
+            str: Recorded reasoning and final response.
+        """
+        self.add_to_history("user", message)
+        response = "".join(self._play(self.cassette.next_entry("reasoning", model, message)))
+        self.add_to_history("assistant", response)
+        return response
+
+    def generate_stream(self, message, model, use_reasoning=False):
+        """
+        Replay a recorded stream with its recorded pacing (scaled by speed).
+
+        Args:
+            message (str): User input message.
+            model (str): Model identifier.
+            use_reasoning (bool): Whether to replay a reasoning stream.
+
+        Yields:
+            str: Recorded chunks.
+        """
+        self.add_to_history("user", message)
+        yield from self._play(self.cassette.next_entry("reasoning_stream" if use_reasoning else "stream",
+                                                       model, message))
+
+    def _play(self, entry):
+        """
+        Yield a recording's chunks after their delays, stopping early if cancelled.
+
+        The recorded usage is accounted once the recording has been played (or cut short).
+        """
+        try:
+            for chunk, delay_ms in zip(entry["chunks"], entry["delays_ms"]):
+                if self.speed and delay_ms:
+                    time.sleep(delay_ms / 1000 / self.speed)
+                if self.cancelled:
+                    return
+                if chunk in (REASONING_HEADER, FINAL_RESPONSE_HEADER):
+                    # Recorded headers were yielded by the provider, not upstream
+                    self.local_chunks += 1
+                yield chunk
+        finally:
+            for field in USAGE_FIELDS:
+                self.usage[field] += entry["usage"].get(field, 0)
+
+def cassette_provider_classes(provider_classes, mode, directory, speed=1.0):
+    """
+    Apply a cassette mode to the provider classes.
+
+    Args:
+        provider_classes (dict): Provider names mapped to LLMProvider subclasses.
+        mode (str): 'off', 'record' or 'replay'.
+        directory (str): Directory of the cassette files.
+        speed (float): Replay speed factor (0 for no delays).
+
+    Returns:
+        dict: Provider names mapped to the classes to use.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    if mode == 'off':
+        return dict(provider_classes)
+    if mode == 'record':
+        return {name: recording_provider_class(cls, Cassette(cassette_path(directory, name)))
+                for name, cls in provider_classes.items()}
+    if mode == 'replay':
+        classes = {}
+        for name, cls in provider_classes.items():
+            cassette = Cassette(cassette_path(directory, name))
+            if not cassette.entries:
+                logger.warning("No cassette recordings for %s in %s", name, directory)
+            classes[name] = type(f"Replay{cls.__name__}", (CassetteProvider,),
+                                 {"name": name, "cassette": cassette, "speed": speed})
+        return classes
+    raise ValueError(f"Unknown CASSETTE_MODE: {mode!r} (use 'off', 'record' or 'replay')")
+
+__all__ = ["Cassette", "CassetteMiss", "CassetteProvider", "cassette_path", "cassette_provider_classes", "parse_speed",
+           "recording_provider_class"]
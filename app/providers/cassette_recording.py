@@ -0,0 +1,94 @@
+"""
+cassette_recording.py - Recording provider calls to cassettes
+
+Contains recording_provider_class(), which CASSETTE_MODE=record applies to every provider
+class (see cassette_provider.py): the subclass it creates appends each completed call to
+the provider's Cassette (cassette.py), with its chunks, the time between them and the
+usage it added. Cancelled or failed streams are not recorded.
+
+Main functions/classes:
+- recording_provider_class(): Subclass of a provider that records its calls
+- record_response(): Record one non-streaming call
+- usage_delta(): Usage added between two snapshots
+
+Dependencies:
+- Python standard library (time)
+- app.providers.cassette.USAGE_FIELDS
+
+@author Auto-refactored by Cline
+"""
+
+import time
+
+from app.providers.cassette import USAGE_FIELDS
+
+def usage_delta(before, after):
+    """
+    dict: Usage counted between two snapshots of LLMProvider.usage.
+    """
+    return {field: after[field] - before[field] for field in USAGE_FIELDS}
+
+def record_response(cassette, llm, kind, call, message, model):
+    """
+    Make a non-streaming call and record it as a one-chunk cassette entry.
+
+    Args:
+        cassette (Cassette): Where the call is recorded.
+        llm (LLMProvider): Provider making the call; its usage counters are read around it.
+        kind (str): 'response' or 'reasoning'.
+        call (callable): The wrapped generate method, taking (message, model).
+        message (str): User message.
+        model (str): Model name.
+
+    Returns:
+        str: The response.
+    """
+    before = dict(llm.usage)
+    started = time.perf_counter()
+    response = call(message, model)
+    cassette.record({"kind": kind, "model": model, "message": message, "chunks": [response],
+                     "delays_ms": [round((time.perf_counter() - started) * 1000, 1)],
+                     "usage": usage_delta(before, llm.usage)})
+    return response
+
+def recording_provider_class(provider_class, cassette):
+    """
+    Create a subclass of a provider that records its calls to a cassette.
+
+    Args:
+        provider_class (type): LLMProvider subclass to wrap.
+        cassette (Cassette): Where calls are recorded.
+
+    Returns:
+        type: The recording subclass (history, cancellation and usage behave as before).
+    """
+
+    def generate_response(self, message, model):
+        return record_response(cassette, self, "response", super(cls, self).generate_response, message, model)
+
+    def generate_response_with_reasoning(self, message, model):
+        return record_response(cassette, self, "reasoning", super(cls, self).generate_response_with_reasoning,
+                               message, model)
+
+    def generate_stream(self, message, model, use_reasoning=False):
+        before = dict(self.usage)
+        chunks, delays = [], []
+        last = time.perf_counter()
+        for chunk in super(cls, self).generate_stream(message, model, use_reasoning):
+            now = time.perf_counter()
+            chunks.append(chunk)
+            delays.append(round((now - last) * 1000, 1))
+            # Time spent by the consumer between chunks is not upstream pacing
+            yield chunk
+            last = time.perf_counter()
+        if not self.cancelled:
+            cassette.record({"kind": "reasoning_stream" if use_reasoning else "stream", "model": model,
+                             "message": message, "chunks": chunks, "delays_ms": delays,
+                             "usage": usage_delta(before, self.usage)})
+
+    cls = type(f"Recording{provider_class.__name__}", (provider_class,), {
+        "generate_response": generate_response,
+        "generate_response_with_reasoning": generate_response_with_reasoning,
+        "generate_stream": generate_stream,
+    })
+    return cls
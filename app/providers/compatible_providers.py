@@ -0,0 +1,100 @@
+"""
+compatible_providers.py - Providers configured in OPENAI_COMPATIBLE_PROVIDERS
+
+Registers further OpenAI-compatible endpoints (e.g. self-hosted vLLM or llama.cpp servers)
+from the OPENAI_COMPATIBLE_PROVIDERS setting, a JSON object mapping provider names to
+options:
+
+    {"local": {"base_url": "http://127.0.0.1:8000/v1", "timeout": 30, "max_retries": 0,
+               "models": ["llama-3.1-8b-instruct"], "stream_usage": true}}
+
+Options:
+- base_url (required): API root, including the version path (e.g. '/v1')
+- api_key_env: Environment variable holding the key (self-hosted servers usually need none)
+- headers: Extra headers sent with every request
+- timeout / max_retries: Seconds per request and SDK retries (SDK defaults when unset)
+- stream_usage: Ask for a final usage chunk in streams (servers must support stream_options)
+- models: Model ids shown while the server's /models listing is unavailable
+- label: Name shown in the UI (defaults to the provider name)
+
+Main functions/classes:
+- parse_compatible_providers(): Validate the OPENAI_COMPATIBLE_PROVIDERS setting
+- compatible_provider_classes(): One provider class per configured entry
+
+Dependencies:
+- Python standard library (json)
+- app.providers.openai_compatible_provider.OpenAICompatibleProvider
+
+@author Auto-refactored by Cline
+"""
+
+import json
+
+from app.providers.openai_compatible_provider import OpenAICompatibleProvider
+
+# ====================================
+# Constants and configuration
+# ====================================
+ENTRY_OPTIONS = {"base_url", "api_key_env", "headers", "timeout", "max_retries", "stream_usage", "models", "label"}
+# Placeholder key for servers that do not check one (the SDKs refuse to start without a key)
+UNUSED_API_KEY = "EMPTY"
+
+def parse_compatible_providers(spec):
+    """
+    Parse and validate the OPENAI_COMPATIBLE_PROVIDERS setting.
+
+    Args:
+        spec (str): JSON object mapping provider names to option dicts (empty for none).
+
+    Returns:
+        dict: Provider names mapped to their options.
+
+    Raises:
+        ValueError: If the JSON is invalid, an entry has no base_url, or uses unknown options.
+    """
+    if not spec or not spec.strip():
+        return {}
+    try:
+        entries = json.loads(spec)
+    except ValueError as e:
+        raise ValueError(f"OPENAI_COMPATIBLE_PROVIDERS is not valid JSON: {e}") from e
+    if not isinstance(entries, dict):
+        raise ValueError("OPENAI_COMPATIBLE_PROVIDERS must be a JSON object")
+    for name, options in entries.items():
+        if not isinstance(options, dict) or not options.get("base_url"):
+            raise ValueError(f"OpenAI-compatible provider '{name}' needs a base_url")
+        unknown = set(options) - ENTRY_OPTIONS
+        if unknown:
+            raise ValueError(f"OpenAI-compatible provider '{name}' has unknown options: {', '.join(sorted(unknown))}")
+    return entries
+
+def compatible_provider_classes(entries, reserved=()):
+    """
+    Create one provider class per configured entry.
+
+    Args:
+        entries (dict): parse_compatible_providers() result.
+        reserved (iterable): Names already taken by built-in providers.
+
+    Returns:
+        dict: Provider names mapped to OpenAICompatibleProvider subclasses.
+
+    Raises:
+        ValueError: If an entry reuses a reserved name.
+    """
+    classes = {}
+    for name, options in entries.items():
+        if name in reserved:
+            raise ValueError(f"OpenAI-compatible provider '{name}' clashes with a built-in provider")
+        class_name = "".join(part.capitalize() for part in name.replace("_", "-").split("-")) + "Provider"
+        classes[name] = type(class_name, (OpenAICompatibleProvider,), {
+            "name": name,
+            "api_key_env": options.get("api_key_env"),
+            "default_api_key": UNUSED_API_KEY,
+            "base_url": options["base_url"],
+            "default_headers": options.get("headers"),
+            "timeout": options.get("timeout"),
+            "max_retries": options.get("max_retries"),
+            "stream_usage": bool(options.get("stream_usage", False)),
+        })
+    return classes
@@ -0,0 +1,180 @@
+"""
+completions_api.py - Chat completions calls of OpenAI-compatible providers
+
+Implements the CompletionsAPI class, the part of OpenAICompatibleProvider that talks to
+the API: one shared SDK client per pooled key, generation options mapped onto request
+parameters, and the non-streaming and streaming chat completion calls.
+
+Calls lease a key from the provider's credential pool (api_key_env plus 'S' holds several
+keys, see credentials.py); each key has its own shared SDK client, and the rate-limit
+headers of every response update the key's remaining quota.
+
+Generation options (see generation.py) map onto max_tokens (or max_tokens_param), stop and
+temperature.
+
+Dependencies:
+- openai
+- app.providers.base (LLMProvider, shared_client)
+- app.providers.credentials.credential_pools
+
+@author Auto-refactored by Cline
+"""
+
+from openai import OpenAI
+
+from app.providers.base import LLMProvider, shared_client
+from app.providers.credentials import credential_pools
+
+class CompletionsAPI(LLMProvider):
+    """
+    Chat completions client of an OpenAI-compatible provider (see OpenAICompatibleProvider).
+
+    Class Attributes:
+        name (str): Provider name (key of PROVIDER_CLASSES).
+        client_class (type): SDK client class; takes api_key, base_url, default_headers,
+            timeout and max_retries (and organization / project for OpenAI).
+        api_key_env (str | None): Environment variable holding the API key (plus 'S': a key pool).
+        default_api_key (str | None): Key used when neither variable is set.
+        base_url (str | None): API root (None uses the SDK's default).
+        default_headers (dict | None): Extra headers for every request.
+        timeout (float | None): Seconds per request (None uses the SDK's default).
+        max_retries (int | None): SDK retries (None uses the SDK's default).
+        stream_usage (bool): Request a usage chunk at the end of streams.
+        max_tokens_param (str): Request parameter capping the answer length ('max_tokens', or
+            'max_completion_tokens' where the API deprecates max_tokens).
+
+    Attributes:
+        credentials (CredentialPool): The provider's API keys (see client_for()).
+    """
+
+    name = 'openai-compatible'
+    client_class = OpenAI
+    api_key_env = None
+    default_api_key = None
+    base_url = None
+    default_headers = None
+    timeout = None
+    max_retries = None
+    stream_usage = False
+    max_tokens_param = 'max_tokens'
+
+    def __init__(self, max_history=10):
+        """
+        Initialize the provider.
+
+        Args:
+            max_history (int): Maximum conversation history length.
+        """
+        super().__init__(max_history)
+        self.credentials = credential_pools.get(self.name, self.api_key_env, self.default_api_key)
+
+    def client_for(self, credential):
+        """
+        Get the shared SDK client of one pooled key, creating it on first use.
+
+        Args:
+            credential (Credential): Key leased from self.credentials.
+
+        Returns:
+            The SDK client (each key keeps its own connection pool).
+        """
+        return shared_client((self.name, self.base_url) + credential.client_key,
+                             lambda: self.client_class(**self.client_options(credential)))
+
+    @classmethod
+    def client_options(cls, credential):
+        """
+        Build the SDK client's keyword arguments from the class attributes and a pooled key.
+
+        Args:
+            credential (Credential): The key.
+
+        Returns:
+            dict: api_key plus whichever of organization, project, base_url, default_headers,
+            timeout and max_retries are set.
+        """
+        options = {"api_key": credential.api_key}
+        if credential.organization:
+            options["organization"] = credential.organization
+        if credential.project:
+            options["project"] = credential.project
+        if cls.base_url:
+            options["base_url"] = cls.base_url
+        if cls.default_headers:
+            options["default_headers"] = dict(cls.default_headers)
+        if cls.timeout is not None:
+            options["timeout"] = cls.timeout
+        if cls.max_retries is not None:
+            options["max_retries"] = cls.max_retries
+        return options
+
+    def request_options(self, reasoning=False):
+        """
+        Map the generation options of one call onto chat completions parameters.
+
+        Args:
+            reasoning (bool): True for the reasoning step of a reasoning request.
+
+        Returns:
+            dict: Keyword arguments for chat.completions.create().
+        """
+        options = self.generation_options(reasoning)
+        if "max_tokens" in options:
+            options[self.max_tokens_param] = options.pop("max_tokens")
+        return options
+
+    def list_models(self):
+        """
+        List models available to this API key.
+
+        Returns:
+            list: Model ids.
+        """
+        with self.credentials.lease() as lease:
+            return [model.id for model in self.client_for(lease.credential).models.list().data]
+
+    def complete(self, messages, model, reasoning=False):
+        """
+        Make one non-streaming chat completion call and record its usage.
+
+        Args:
+            messages (list): Chat messages.
+            model (str): Model identifier.
+            reasoning (bool): True for the reasoning step of a reasoning request.
+
+        Returns:
+            str: The completion text.
+        """
+        with self.credentials.lease() as lease:
+            response = self.client_for(lease.credential).chat.completions.with_raw_response.create(
+                messages=messages, model=model, **self.request_options(reasoning))
+            lease.headers = response.headers
+        completion = response.parse()
+        self.record_usage(self.read_usage(completion))
+        return completion.choices[0].message.content
+
+    def open_completion_stream(self, messages, model, reasoning=False):
+        """
+        Open a streaming chat completion call.
+
+        Args:
+            messages (list): Chat messages.
+            model (str): Model identifier.
+            reasoning (bool): True for the reasoning step of a reasoning request.
+
+        Returns:
+            The SDK stream (see LLMProvider.open_stream()); iterate it with iter_stream(),
+            which ends the key's lease.
+        """
+        options = self.request_options(reasoning)
+        if self.stream_usage:
+            # Adds a final usage-only chunk (see read_usage())
+            options["stream_options"] = {"include_usage": True}
+        with self.credentials.lease() as lease:
+            response = self.open_stream(self.client_for(lease.credential).chat.completions.with_raw_response.create,
+                                        messages=messages, model=model, stream=True, **options)
+            lease.headers = response.headers
+            stream = response.parse()
+            # The key stays in flight until iter_stream() closes the stream
+            self.hold_lease(stream, lease)
+        return stream
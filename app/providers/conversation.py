@@ -0,0 +1,176 @@
+"""
+conversation.py - Conversation state of LLM providers
+
+Defines the Conversation class, which every LLMProvider extends: the history window, the
+rolling summary of evicted turns (summarized in the background by app.history's
+compactor), the 'retrieval' history mode, and the serialization kept in the session.
+
+Dependencies:
+- Python standard library (logging, time, uuid)
+- app.observability (metrics, tracer)
+- app.providers.upstream.estimate_prompt_tokens
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+import time
+import uuid
+
+from app.observability import metrics, tracer
+from app.providers.upstream import estimate_prompt_tokens
+
+logger = logging.getLogger(__name__)
+
+class Conversation:
+    """
+    Conversation history of one provider, restored from and saved to the session.
+
+    Attributes:
+        conversation_history (list): List of message dicts with 'role' and 'content'.
+        max_history (int): Maximum number of messages to retain in history.
+        conversation_id (str): Stable id used to key server-side history state.
+        summary (str): Rolling summary of turns evicted from the history window.
+        history_mode (str): 'window' sends the last max_history turns; 'retrieval' sends the
+            newest turns plus older turns retrieved by relevance from history_index.
+        compactor (HistoryCompactor): Class-wide summarizer for evicted turns, or None
+            to simply drop them. Configured by the app factory.
+        history_index (HistoryIndexRegistry): Class-wide vector indexes used in 'retrieval'
+            mode. Configured by the app factory.
+    """
+
+    compactor = None
+    history_index = None
+
+    def __init__(self, max_history=10):
+        """
+        Initialize an empty conversation.
+
+        Args:
+            max_history (int): Maximum conversation history length.
+        """
+        self.conversation_history = []
+        self.max_history = max_history
+        self.conversation_id = uuid.uuid4().hex
+        self.summary = None
+        self.history_mode = 'window'
+
+    def estimate_prompt_tokens(self, message):
+        """
+        Estimate the prompt tokens of sending `message` with the current history.
+
+        Returns:
+            int: Estimated prompt tokens.
+        """
+        return estimate_prompt_tokens(self.conversation_history, self.get_summary(), message)
+
+    def add_to_history(self, role, content):
+        """
+        Add a message to the conversation history.
+
+        Args:
+            role (str): 'user' or 'assistant'.
+            content (str): Message content.
+
+        Side effects:
+            In 'retrieval' mode the turn is also added to the conversation's vector index.
+            Turns evicted from the window are handed to the compactor (if configured),
+            which summarizes them in the background.
+        """
+        turn = {"role": role, "content": content}
+        if self.history_mode == 'retrieval' and self.history_index is not None:
+            self.history_index.get(self.conversation_id, self.conversation_history).add(turn)
+        self.conversation_history.append(turn)
+        if len(self.conversation_history) > self.max_history:
+            evicted = self.conversation_history[:-self.max_history]
+            self.conversation_history = self.conversation_history[-self.max_history:]
+            if self.compactor is not None:
+                self.compactor.submit(self.conversation_id, evicted, self.summary)
+
+    def get_summary(self):
+        """
+        Get the rolling summary of evicted turns, picking up any newer background result.
+
+        Returns:
+            str | None: Summary text.
+        """
+        if self.compactor is not None:
+            latest = self.compactor.get_summary(self.conversation_id)
+            if latest is not None:
+                self.summary = latest
+        return self.summary
+
+    def get_conversation_history(self):
+        """
+        Get the history to send, prefixed by the rolling summary if any.
+
+        In 'retrieval' mode this is the newest turns plus the older turns most relevant
+        to the latest message, instead of the whole window.
+
+        Returns:
+            list: List of message dicts.
+        """
+        with tracer.span('prompt.build', history_mode=self.history_mode):
+            history = self.conversation_history
+            if self.history_mode == 'retrieval' and self.history_index is not None:
+                history = self._retrieve_history()
+            summary = self.get_summary()
+            if summary:
+                return [{"role": "system", "content": f"Summary of the earlier conversation: {summary}"}] + history
+            return history
+
+    def _retrieve_history(self):
+        """
+        Build the retrieval-mode history and record its latency and prompt-size reduction.
+
+        Returns:
+            list: Retrieved older turns followed by the newest turns, in chronological order.
+        """
+        started = time.perf_counter()
+        registry = self.history_index
+        index = registry.get(self.conversation_id, self.conversation_history)
+        recent = self.conversation_history[-registry.recent_turns:] if registry.recent_turns else []
+        query = self.conversation_history[-1]["content"] if self.conversation_history else ""
+        history = index.search(query, registry.top_k, exclude_last=len(recent)) + recent
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        sent_chars = sum(len(turn["content"]) for turn in history)
+        metrics.observe("history.retrieval.latency_ms", latency_ms)
+        if index.total_chars:
+            metrics.observe("history.retrieval.prompt_reduction", 1 - sent_chars / index.total_chars)
+        logger.debug("Retrieved %d of %d turns in %.2fms (%d of %d chars)",
+                     len(history), len(index), latency_ms, sent_chars, index.total_chars)
+        return history
+
+    def to_dict(self):
+        """
+        Serialize provider state to a dictionary.
+
+        Returns:
+            dict: Provider state.
+        """
+        return {
+            "max_history": self.max_history,
+            "conversation_history": self.conversation_history,
+            "conversation_id": self.conversation_id,
+            "summary": self.get_summary(),
+            "history_mode": self.history_mode
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Deserialize provider state from a dictionary.
+
+        Args:
+            data (dict): Serialized provider state.
+
+        Returns:
+            LLMProvider: New instance with restored state.
+        """
+        provider = cls(max_history=data.get("max_history", 10))
+        provider.conversation_history = data.get("conversation_history", [])
+        provider.conversation_id = data.get("conversation_id", provider.conversation_id)
+        provider.summary = data.get("summary")
+        provider.history_mode = data.get("history_mode", 'window')
+        return provider
@@ -0,0 +1,170 @@
+"""
+credential.py - One pooled API key and a call's lease of it
+
+Implements the Credential class (a key with its usage counts, last reported quota and
+ejection state) and the Lease class handed out by CredentialPool.lease() for one call. A
+lease normally ends with its `with` block; a streaming call hold()s it until the stream
+closes (see LLMProvider.hold_lease()). parse_key_pool() reads the keys of a pool setting.
+
+Dependencies:
+- None
+
+@author Auto-refactored by Cline
+"""
+
+# ====================================
+# Constants and configuration
+# ====================================
+CREDENTIAL_OPTIONS = {"organization", "project"}
+
+def parse_key_pool(spec):
+    """
+    Parse a key pool variable.
+
+    Args:
+        spec (str): Comma-separated 'key[;organization=...][;project=...]' entries.
+
+    Returns:
+        list: Dicts with 'api_key' and any of 'organization' and 'project'.
+
+    Raises:
+        ValueError: If an entry has an unknown or malformed option.
+    """
+    entries = []
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        api_key, *options = [part.strip() for part in item.split(";")]
+        entry = {"api_key": api_key}
+        for option in options:
+            name, sep, value = option.partition("=")
+            if not sep or name.strip() not in CREDENTIAL_OPTIONS:
+                raise ValueError(f"Unknown API key option '{option}' (expected organization=... or project=...)")
+            entry[name.strip()] = value.strip()
+        entries.append(entry)
+    return entries
+
+class Credential:
+    """
+    One API key of a pool and its health.
+
+    Attributes:
+        label (str): Name used in metrics and reports ('key1', 'key2', ...).
+        api_key (str): The key.
+        organization (str | None): OpenAI organization id.
+        project (str | None): OpenAI project id.
+        in_flight (int): Calls currently leasing the key.
+        calls / rate_limited / auth_failures / errors (int): Lifetime outcome counts.
+        quota (float | None): Remaining fraction of the tightest rate-limit window, as last reported.
+        remaining_requests / remaining_tokens (int | None): As last reported.
+        quota_reset_at (float | None): time.monotonic() at which the reported window resets.
+        ejected_until (float): time.monotonic() until which the key sits out.
+        consecutive_rate_limits (int): 429s since the last successful call.
+        last_used (float): time.monotonic() of the last lease.
+        last_error (str | None): Last failure, e.g. '429 Too Many Requests'.
+    """
+
+    def __init__(self, label, api_key, organization=None, project=None):
+        """
+        Initialize Credential.
+
+        Args:
+            label (str): Name used in metrics and reports.
+            api_key (str): The key.
+            organization (str): OpenAI organization id.
+            project (str): OpenAI project id.
+        """
+        self.label = label
+        self.api_key = api_key
+        self.organization = organization
+        self.project = project
+        self.in_flight = 0
+        self.calls = 0
+        self.rate_limited = 0
+        self.auth_failures = 0
+        self.errors = 0
+        self.quota = None
+        self.remaining_requests = None
+        self.remaining_tokens = None
+        self.quota_reset_at = None
+        self.ejected_until = 0.0
+        self.consecutive_rate_limits = 0
+        self.last_used = 0.0
+        self.last_error = None
+
+    @property
+    def client_key(self):
+        """
+        Identity of the key for shared_client() (one SDK client per key).
+        """
+        return (self.api_key, self.organization, self.project)
+
+    def current_quota(self, now):
+        """
+        Get the remaining quota fraction, full once the reported window has reset or when unknown.
+        """
+        if self.quota is None or (self.quota_reset_at is not None and now >= self.quota_reset_at):
+            return 1.0
+        return self.quota
+
+    def to_dict(self, now):
+        """
+        Summarize the key's usage and health (the key itself is masked).
+
+        Returns:
+            dict: label, key hint, counts, quota and ejection state.
+        """
+        return {
+            "label": self.label,
+            "key": f"...{self.api_key[-4:]}" if self.api_key and len(self.api_key) > 8 else "...",
+            "organization": self.organization,
+            "project": self.project,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "auth_failures": self.auth_failures,
+            "errors": self.errors,
+            "quota": round(self.current_quota(now), 4),
+            "remaining_requests": self.remaining_requests,
+            "remaining_tokens": self.remaining_tokens,
+            "ejected_for": round(max(0.0, self.ejected_until - now), 1),
+            "last_error": self.last_error,
+        }
+
+class Lease:
+    """
+    One call's use of a pooled key (see CredentialPool.lease()).
+
+    Attributes:
+        credential (Credential): The leased key.
+        headers (Mapping | None): Set by the caller to the response headers, to update the key's quota.
+        held (bool): True once hold() kept the lease open past its `with` block.
+    """
+
+    def __init__(self, pool, credential):
+        """
+        Initialize Lease.
+        """
+        self.pool = pool
+        self.credential = credential
+        self.headers = None
+        self.held = False
+        self.ended = False
+
+    def hold(self):
+        """
+        Keep the key in flight after the `with` block, until end() is called.
+
+        Used for streams: the call lasts until the stream closes, not until it opens.
+        """
+        self.held = True
+
+    def end(self, error=None):
+        """
+        Report how the call ended and return the key (no-op if already ended).
+
+        Args:
+            error (Exception): The call's exception, if it failed.
+        """
+        if self.ended:
+            return
+        self.ended = True
+        self.pool.release(self.credential, headers=None if error is not None else self.headers, error=error)
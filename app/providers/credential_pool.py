@@ -0,0 +1,200 @@
+"""
+credential_pool.py - Key selection and ejection for one provider
+
+Implements the CredentialPool class. acquire() picks the key for a call: keys are ranked by
+remaining quota (from their last response's rate-limit headers; a window past its reset
+counts as full), then by calls in flight, then by least recent use. release() records the
+outcome: a 429 ejects the key until Retry-After (or the rate-limit reset), otherwise for
+eject_seconds doubling on consecutive 429s up to max_eject_seconds; a 401/403 ejects it for
+auth_eject_seconds. When every key is ejected, the one returning soonest is used anyway.
+Ejections are reported to `on_eject` so other workers can sit the key out too (eject()).
+
+Dependencies:
+- Python standard library (contextlib, threading, time)
+- app.observability.metrics
+- app.providers.credential (Credential, Lease)
+- app.providers.rate_limits (error_status, read_rate_limits, retry_after)
+
+@author Auto-refactored by Cline
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from app.observability import metrics
+from app.providers.credential import Credential, Lease
+from app.providers.rate_limits import error_status, read_rate_limits, retry_after
+
+# ====================================
+# Constants and configuration
+# ====================================
+# Remaining-quota fractions closer than this rank as equal (then in-flight calls decide)
+QUOTA_STEP = 0.05
+
+class CredentialPool:
+    """
+    API keys of one provider.
+
+    Attributes:
+        provider (str): Provider name.
+        credentials (list): Credential objects, in configured order.
+        eject_seconds (float): Base ejection after a 429 without Retry-After.
+        max_eject_seconds (float): Longest rate-limit ejection.
+        auth_eject_seconds (float): Ejection after a 401/403.
+        on_eject (callable): Called with (provider, label, seconds, error) when a call ejects a key.
+    """
+
+    def __init__(self, provider, entries, eject_seconds=30, max_eject_seconds=600, auth_eject_seconds=900):
+        """
+        Initialize CredentialPool.
+
+        Args:
+            provider (str): Provider name.
+            entries (list): parse_key_pool() entries (api_key may be None when no key is configured).
+            eject_seconds (float): Base ejection after a 429 without Retry-After.
+            max_eject_seconds (float): Longest rate-limit ejection.
+            auth_eject_seconds (float): Ejection after a 401/403.
+        """
+        self.provider = provider
+        self.credentials = [Credential(f"key{i}", entry.get("api_key"), entry.get("organization"), entry.get("project"))
+                            for i, entry in enumerate(entries, start=1)]
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.auth_eject_seconds = auth_eject_seconds
+        self.on_eject = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Pick the key for one call and count it as in flight.
+
+        Returns:
+            Credential: The healthy key with the most remaining quota (ties: fewest calls in
+            flight, then least recently used), or the ejected key returning soonest.
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [c for c in self.credentials if c.ejected_until <= now]
+            if healthy:
+                credential = min(healthy, key=lambda c: (-round(c.current_quota(now) / QUOTA_STEP),
+                                                         c.in_flight, c.last_used))
+            else:
+                credential = min(self.credentials, key=lambda c: c.ejected_until)
+                metrics.increment(f"credentials.{self.provider}.exhausted")
+            credential.in_flight += 1
+            credential.last_used = now
+        return credential
+
+    def release(self, credential, headers=None, error=None):
+        """
+        Report how a call with the key ended.
+
+        Args:
+            credential (Credential): Key from acquire().
+            headers (Mapping): Response headers of a successful call, if available.
+            error (Exception): The call's exception, if it failed.
+        """
+        now = time.monotonic()
+        outcome, ejected_for = 'calls', 0.0
+        with self._lock:
+            credential.in_flight -= 1
+            credential.calls += 1
+            if error is None:
+                credential.consecutive_rate_limits = 0
+                limits = read_rate_limits(headers) if headers else None
+                if limits:
+                    credential.quota = limits["quota"]
+                    credential.remaining_requests = limits["remaining_requests"]
+                    credential.remaining_tokens = limits["remaining_tokens"]
+                    credential.quota_reset_at = None if limits["reset_in"] is None else now + limits["reset_in"]
+            else:
+                outcome, ejected_for = self._record_failure(credential, error, now)
+            quota = credential.current_quota(now)
+            ejected = credential.ejected_until > now
+        prefix = f"credentials.{self.provider}.{credential.label}"
+        metrics.increment(f"{prefix}.{outcome}")
+        metrics.set_gauge(f"{prefix}.quota", quota)
+        metrics.set_gauge(f"{prefix}.ejected", 1 if ejected else 0)
+        if ejected_for and self.on_eject is not None:
+            self.on_eject(self.provider, credential.label, ejected_for, credential.last_error)
+
+    def _record_failure(self, credential, error, now):
+        """
+        Count a failed call and eject the key if the failure calls for it (caller holds the lock).
+
+        Returns:
+            tuple: (outcome counter name, seconds the key was ejected for or 0).
+        """
+        status = error_status(error)
+        credential.last_error = f"{status or type(error).__name__}: {error}"[:200]
+        if status == 429:
+            credential.rate_limited += 1
+            credential.consecutive_rate_limits += 1
+            seconds = retry_after(error)
+            if seconds is None:
+                seconds = self.eject_seconds * 2 ** (credential.consecutive_rate_limits - 1)
+            seconds = min(seconds, self.max_eject_seconds)
+            credential.ejected_until = now + seconds
+            credential.quota = 0.0
+            return 'rate_limited', seconds
+        if status in (401, 403):
+            credential.auth_failures += 1
+            credential.ejected_until = now + self.auth_eject_seconds
+            return 'auth_failures', self.auth_eject_seconds
+        credential.errors += 1
+        return 'errors', 0.0
+
+    def eject(self, label, seconds, error=None):
+        """
+        Sit a key out because another worker ejected it.
+
+        Args:
+            label (str): Label of the key (pools built from the same settings share labels).
+            seconds (float): How long the key sits out from now.
+            error (str): The failure that ejected it.
+
+        Returns:
+            bool: False if the pool has no key with that label.
+        """
+        now = time.monotonic()
+        with self._lock:
+            credential = next((c for c in self.credentials if c.label == label), None)
+            if credential is None:
+                return False
+            credential.ejected_until = max(credential.ejected_until, now + seconds)
+            credential.last_error = error or credential.last_error
+        metrics.set_gauge(f"credentials.{self.provider}.{label}.ejected", 1)
+        return True
+
+    @contextmanager
+    def lease(self):
+        """
+        Lease a key for one call, reporting the outcome when the block exits.
+
+        Set `lease.headers` to the response headers inside the block to update the key's
+        quota; an exception escaping the block is reported as the call's failure and re-raised.
+        A lease the block hold()s stays in flight until its end() is called.
+
+        Yields:
+            Lease: The leased key.
+        """
+        lease = Lease(self, self.acquire())
+        try:
+            yield lease
+        except Exception as e:
+            lease.end(e)
+            raise
+        if not lease.held:
+            lease.end()
+
+    def snapshot(self):
+        """
+        Summarize every key of the pool.
+
+        Returns:
+            list: Credential.to_dict() results, in configured order.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [credential.to_dict(now) for credential in self.credentials]
@@ -0,0 +1,201 @@
+"""
+credentials.py - Pools of API keys per provider
+
+Lets a provider spread its calls over several API keys instead of one, so throughput is
+not capped by a single key's rate limits. A pool is configured with an environment
+variable named after the provider's key variable plus 'S', a comma-separated list of keys,
+each optionally followed by ';organization=...' and/or ';project=...' (OpenAI only):
+
+    GROQ_API_KEYS=gsk_a,gsk_b
+    OPENAI_API_KEYS=sk-a;project=proj_1,sk-b;organization=org-2
+
+Without it the pool holds the single key of the provider's usual variable (GROQ_API_KEY,
+...), so behaviour is unchanged.
+
+Each call leases one key, a streaming call until its stream closes (LLMProvider.hold_lease()):
+
+- keys are ranked by remaining quota, read from the rate-limit headers of their last
+  response (x-ratelimit-* for OpenAI-style APIs, anthropic-ratelimit-* for Anthropic; the
+  tightest of the request and token windows counts, and a window past its reset counts as
+  full), then by calls in flight, then by least recent use, so bursts spread across keys
+- a 429 ejects the key until Retry-After (or the rate-limit reset), otherwise for
+  API_KEY_EJECT_SECONDS doubling on consecutive 429s up to API_KEY_MAX_EJECT_SECONDS
+- a 401/403 ejects the key for API_KEY_AUTH_EJECT_SECONDS
+- when every key is ejected, the one returning soonest is used anyway
+
+Every key gets its own shared SDK client (see shared_client()), so each keeps its own warm
+connections. Per-key usage and health are published as credentials.<provider>.<label>.*
+metrics and by GET /admin/credentials; keys are only ever shown by their last four characters.
+Quota and in-flight counts are per process. With a shared state backend (app/state/),
+ejections are shared: a worker that ejects a key records it (credentials:ejected:<provider>:
+<label>, expiring with the ejection) and publishes it on `credentials:ejected`, so every
+worker sits the key out instead of each finding the 429 or 401 for itself. Workers must use
+the same key settings, since keys are matched by label.
+
+Main functions/classes:
+- CredentialPools: Process-wide pools by provider name (`credential_pools`)
+- Credential, Lease, parse_key_pool() (credential.py), CredentialPool (credential_pool.py)
+  and the rate-limit header parsing (rate_limits.py) are re-exported for callers of this module
+
+Dependencies:
+- Python standard library (json, logging, os, threading, time)
+- app.observability.metrics
+- app.providers.credential (Credential, Lease, parse_key_pool)
+- app.providers.credential_pool.CredentialPool
+- app.providers.rate_limits.read_rate_limits
+- app.state (shared_state, StateBackendError, worker_id)
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from app.observability import metrics
+from app.providers.credential import Credential, Lease, parse_key_pool
+from app.providers.credential_pool import CredentialPool
+from app.providers.rate_limits import read_rate_limits
+from app.state import StateBackendError, shared_state, worker_id
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# ====================================
+# Constants and configuration
+# ====================================
+POOL_SUFFIX = 'S'
+EJECTION_CHANNEL = 'credentials:ejected'
+
+class CredentialPools:
+    """
+    Process-wide key pools, built per provider on first use from the environment.
+
+    Attributes:
+        backend (StateBackend | None): Shared state ejections are exchanged through.
+    """
+
+    def __init__(self, backend=None, worker_id=None):
+        """
+        Initialize an empty registry.
+
+        Args:
+            backend (StateBackend): Shared state (only used if it is shared between processes).
+            worker_id (str): Fixed id of this registry (None: the process's, see worker_id property).
+        """
+        self.backend = backend if backend is not None and backend.shared else None
+        self._worker_id = worker_id
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    @property
+    def worker_id(self):
+        """
+        str: This process's id, to ignore its own ejection messages (resolved after fork).
+        """
+        return self._worker_id or worker_id()
+
+    def start(self):
+        """
+        Subscribe to other workers' ejections (no-op without a shared backend or if started).
+        """
+        if self.backend is None or self._started:
+            return
+        self._started = True
+        self.backend.subscribe(EJECTION_CHANNEL, self._on_remote_ejection)
+
+    def get(self, provider, api_key_env=None, default_api_key=None):
+        """
+        Get a provider's pool, creating it on first use.
+
+        Args:
+            provider (str): Provider name.
+            api_key_env (str): Variable holding the single key; api_key_env + 'S' holds a pool.
+            default_api_key (str): Key used when neither variable is set.
+
+        Returns:
+            CredentialPool: The provider's pool (at least one key, possibly None).
+        """
+        pool = self._pools.get(provider)
+        created = False
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(provider)
+                if pool is None:
+                    entries = []
+                    if api_key_env:
+                        entries = parse_key_pool(os.environ.get(api_key_env + POOL_SUFFIX))
+                        if not entries and os.environ.get(api_key_env):
+                            entries = [{"api_key": os.environ.get(api_key_env)}]
+                    pool = self._pools[provider] = CredentialPool(
+                        provider, entries or [{"api_key": default_api_key}],
+                        eject_seconds=Config.API_KEY_EJECT_SECONDS,
+                        max_eject_seconds=Config.API_KEY_MAX_EJECT_SECONDS,
+                        auth_eject_seconds=Config.API_KEY_AUTH_EJECT_SECONDS,
+                    )
+                    created = True
+        if created and self.backend is not None:
+            pool.on_eject = self._share_ejection
+            self._load_ejections(pool)
+        return pool
+
+    def snapshot(self):
+        """
+        Summarize every pool created so far.
+
+        Returns:
+            dict: Provider names mapped to CredentialPool.snapshot() results.
+        """
+        with self._lock:
+            pools = dict(self._pools)
+        return {provider: pool.snapshot() for provider, pool in pools.items()}
+
+    def _share_ejection(self, provider, label, seconds, error):
+        """
+        Record and announce a key this worker ejected (CredentialPool.on_eject callback).
+        """
+        message = json.dumps({"worker": self.worker_id, "provider": provider, "label": label,
+                              "until": time.time() + seconds, "error": error})
+        try:
+            self.backend.set(f"{EJECTION_CHANNEL}:{provider}:{label}", message, ttl=seconds)
+            self.backend.publish(EJECTION_CHANNEL, message)
+        except StateBackendError as e:
+            logger.warning("Could not share ejection of %s %s: %s", provider, label, e)
+
+    def _load_ejections(self, pool):
+        """
+        Apply ejections other workers recorded before this pool existed.
+        """
+        for credential in pool.credentials:
+            try:
+                message = self.backend.get(f"{EJECTION_CHANNEL}:{pool.provider}:{credential.label}")
+            except StateBackendError as e:
+                logger.warning("Could not read ejections of %s: %s", pool.provider, e)
+                return
+            if message:
+                ejection = json.loads(message)
+                pool.eject(credential.label, ejection["until"] - time.time(), ejection.get("error"))
+
+    def _on_remote_ejection(self, message):
+        """
+        Sit out a key another worker ejected (subscriber callback).
+
+        Args:
+            message (str): JSON with 'worker', 'provider', 'label', 'until' (Unix time) and 'error'.
+        """
+        ejection = json.loads(message)
+        pool = self._pools.get(ejection.get("provider"))
+        if ejection.get("worker") == self.worker_id or pool is None:
+            return
+        seconds = ejection["until"] - time.time()
+        if seconds > 0 and pool.eject(ejection["label"], seconds, ejection.get("error")):
+            metrics.increment(f"credentials.{pool.provider}.remote_ejections")
+
+credential_pools = CredentialPools(shared_state)
+
+__all__ = ["Credential", "CredentialPool", "CredentialPools", "Lease", "credential_pools", "parse_key_pool",
+           "read_rate_limits"]
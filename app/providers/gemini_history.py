@@ -0,0 +1,44 @@
+"""
+gemini_history.py - Conversation history in Gemini's chat format
+
+to_gemini_history() converts the history to Gemini chat contents; system turns (the rolling
+summary) go to the model's system_instruction (system_instruction()) instead, since Gemini
+expects user and model turns to alternate.
+
+Dependencies:
+- None
+
+@author Auto-refactored by Cline
+"""
+
+def to_gemini_history(history):
+    """
+    Convert a conversation history to Gemini chat contents.
+
+    Args:
+        history (list): Message dicts with 'role' and 'content'.
+
+    Returns:
+        list: {'role', 'parts'} dicts; assistant turns become model turns, system turns are left
+        to system_instruction().
+    """
+    gemini_history = []
+    for entry in history:
+        if entry['role'] == 'user':
+            gemini_history.append({"role": "user", "parts": [{"text": entry['content']}]})
+        elif entry['role'] == 'assistant':
+            gemini_history.append({"role": "model", "parts": [{"text": entry['content']}]})
+    return gemini_history
+
+def system_instruction(history):
+    """
+    Collect the system turns of a conversation history for Gemini's system_instruction.
+
+    Args:
+        history (list): Message dicts with 'role' and 'content'.
+
+    Returns:
+        str | None: System turns joined by blank lines, or None if there are none.
+    """
+    system = [entry['content'] for entry in history if entry['role'] == 'system']
+    return "\n\n".join(system) if system else None
@@ -2,13 +2,17 @@
 gemini-provider.py - Gemini LLM API provider implementation
 
 Implements the GeminiProvider class, which extends LLMProvider to interact with the Google Gemini API.
-Supports chat, reasoning, and streaming responses.
+Supports chat, reasoning, and streaming responses. Chats start from the history converted by
+gemini_history.py. Generation options (see generation.py) map onto the generation_config
+fields max_output_tokens, stop_sequences and temperature.
 
 Dependencies:
 - google-generativeai
 - Python standard library
 - Logging module
 - app.providers.base.LLMProvider
+- app.providers.gemini_history (system_instruction, to_gemini_history)
+- app.providers.reasoning (prompts and layout of reasoning answers)
 
 @author Auto-refactored by Cline
 """
@@ -19,6 +23,8 @@ import logging
 import google.generativeai as genai
 
 from app.providers.base import LLMProvider
+from app.providers.gemini_history import system_instruction, to_gemini_history
+from app.providers.reasoning import final_prompt, format_reasoning_answer, reasoning_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +47,65 @@ class GeminiProvider(LLMProvider):
         self.api_key = os.environ.get('GEMINI_API_KEY')
         genai.configure(api_key=self.api_key)
 
+    def list_models(self):
+        """
+        List Gemini models that support content generation.
+
+        Returns:
+            list: Model ids without the 'models/' prefix.
+        """
+        return [model.name.removeprefix('models/') for model in genai.list_models()
+                if 'generateContent' in model.supported_generation_methods]
+
+    def read_usage(self, response):
+        """
+        Read token usage from a Gemini response or stream chunk (usage_metadata).
+
+        Returns:
+            tuple | None: (prompt_tokens, completion_tokens), or None if not reported.
+        """
+        usage = getattr(response, 'usage_metadata', None)
+        if not usage or not usage.prompt_token_count:
+            return None
+        return usage.prompt_token_count, usage.candidates_token_count
+
+    def request_options(self, reasoning=False):
+        """
+        Map the generation options of one call onto a Gemini generation_config.
+
+        Args:
+            reasoning (bool): True for the reasoning step of a reasoning request.
+
+        Returns:
+            dict: generation_config keyword argument (empty when no option is set).
+        """
+        options = self.generation_options(reasoning)
+        config = {}
+        if "max_tokens" in options:
+            config["max_output_tokens"] = options["max_tokens"]
+        if "stop" in options:
+            config["stop_sequences"] = options["stop"]
+        if "temperature" in options:
+            config["temperature"] = options["temperature"]
+        return {"generation_config": config} if config else {}
+
+    def start_chat(self, message, model):
+        """
+        Start a Gemini chat over the conversation history, before the new message.
+
+        Args:
+            message (str): New user message (already the last history turn; sent by the caller).
+            model (str): Model identifier.
+
+        Returns:
+            ChatSession: The chat, with the rolling summary as system instruction.
+        """
+        history = self.get_conversation_history()
+        if history and history[-1] == {"role": "user", "content": message}:
+            history = history[:-1]
+        genai_model = genai.GenerativeModel(model, system_instruction=system_instruction(history))
+        return genai_model.start_chat(history=to_gemini_history(history))
+
     def generate_response(self, message, model):
         """
         Generate a response from Gemini API.
@@ -54,21 +119,13 @@ class GeminiProvider(LLMProvider):
         """
         try:
             self.add_to_history("user", message)
-            
-            gemini_history = []
-            for entry in self.get_conversation_history():
-                if entry['role'] == 'user':
-                    gemini_history.append({"role": "user", "parts": [{"text": entry['content']}]})
-                elif entry['role'] == 'assistant':
-                    gemini_history.append({"role": "model", "parts": [{"text": entry['content']}]})
-
-            genai_model = genai.GenerativeModel(model)
-            chat = genai_model.start_chat(history=gemini_history)
-            response = chat.send_message(message)
+            chat = self.start_chat(message, model)
+            response = chat.send_message(message, **self.request_options())
+            self.record_usage(self.read_usage(response))
             self.add_to_history("assistant", response.text)
             return response.text
         except Exception as e:
-            logger.error(f"Error in GeminiProvider.generate_response: {str(e)}")
+            logger.error("Error in GeminiProvider.generate_response: %s", e)
             raise
 
     def generate_response_with_reasoning(self, message, model):
@@ -85,17 +142,19 @@ class GeminiProvider(LLMProvider):
         try:
             self.add_to_history("user", message)
             
-            reasoning_prompt = f"Reason step-by-step about the following message: {message}"
             genai_model = genai.GenerativeModel(model)
-            reasoning_response = genai_model.generate_content(reasoning_prompt).text
+            reasoning = genai_model.generate_content(reasoning_prompt(message), **self.request_options(reasoning=True))
+            self.record_usage(self.read_usage(reasoning))
+            reasoning_response = reasoning.text
 
-            final_prompt = f"Based on the following reasoning, provide a final response:\n\nReasoning:\n{reasoning_response}\n\nFinal response:"
-            final_response = genai_model.generate_content(final_prompt).text
+            final = genai_model.generate_content(final_prompt(reasoning_response), **self.request_options())
+            self.record_usage(self.read_usage(final))
+            final_response = final.text
 
             self.add_to_history("assistant", final_response)
-            return f"Reasoning:\n{reasoning_response}\n\nFinal Response:\n{final_response}"
+            return format_reasoning_answer(reasoning_response, final_response)
         except Exception as e:
-            logger.error(f"Error in GeminiProvider.generate_response_with_reasoning: {str(e)}")
+            logger.error("Error in GeminiProvider.generate_response_with_reasoning: %s", e)
             raise
 
     def generate_stream(self, message, model, use_reasoning=False):
@@ -112,33 +171,21 @@ class GeminiProvider(LLMProvider):
         """
         try:
             self.add_to_history("user", message)
-            
-            gemini_history = []
-            for entry in self.get_conversation_history():
-                if entry['role'] == 'user':
-                    gemini_history.append({"role": "user", "parts": [{"text": entry['content']}]})
-                elif entry['role'] == 'assistant':
-                    gemini_history.append({"role": "model", "parts": [{"text": entry['content']}]})
-
             genai_model = genai.GenerativeModel(model)
-            
+
             if use_reasoning:
-                reasoning_prompt = f"Reason step-by-step about the following message: {message}"
-                yield "Reasoning:\n"
-                for chunk in genai_model.generate_content(reasoning_prompt, stream=True):
-                    if chunk.text:
-                        yield chunk.text
-                
-                final_prompt = f"Based on the reasoning, provide a final response."
-                yield "\n\nFinal Response:\n"
-                for chunk in genai_model.generate_content(final_prompt, stream=True):
-                    if chunk.text:
-                        yield chunk.text
+                yield from self.stream_reasoning(
+                    lambda: self.open_stream(genai_model.generate_content, reasoning_prompt(message), stream=True,
+                                             **self.request_options(reasoning=True)),
+                    lambda reasoning: self.open_stream(genai_model.generate_content, final_prompt(reasoning), stream=True,
+                                                       **self.request_options()),
+                    lambda chunk: chunk.text)
             else:
-                chat = genai_model.start_chat(history=gemini_history)
-                for chunk in chat.send_message(message, stream=True):
-                    if chunk.text:
-                        yield chunk.text
+                chat = self.start_chat(message, model)
+                yield from self.iter_stream(self.open_stream(chat.send_message, message, stream=True,
+                                                                 **self.request_options()), lambda chunk: chunk.text)
         except Exception as e:
-            logger.error(f"Error in GeminiProvider.generate_stream: {str(e)}")
+            logger.error("Error in GeminiProvider.generate_stream: %s", e)
             raise
+
+__all__ = ["GeminiProvider", "system_instruction", "to_gemini_history"]
@@ -0,0 +1,156 @@
+"""
+generation.py - Normalized generation options and per-model defaults
+
+Providers name their output controls differently (max_tokens / max_completion_tokens /
+max_tokens_to_sample / max_output_tokens, stop / stop_sequences, temperature ranges). /chat
+and /ws accept one normalized set, which each provider maps onto its SDK call
+(see LLMProvider.generation_options()):
+
+- max_tokens (int): Longest answer, in tokens
+- stop (list): Up to MAX_STOP_SEQUENCES sequences the answer ends before (upstream, so
+  generation stops there too)
+- temperature (float): 0 to 2 (Anthropic's maximum is 1; higher values are capped)
+- reasoning_max_tokens (int): Longest reasoning step of reasoning requests (defaults to max_tokens)
+
+Defaults come from GENERATION_DEFAULTS, a JSON object keyed by '*', a provider name or
+'provider:model' (most specific wins, per option). Besides the options above, an entry may
+set max_tokens_limit, a ceiling that also clamps what requests ask for (and is the answer
+length when no max_tokens applies), so a deployment can bound tail latency and cost per model:
+
+    {"*": {"max_tokens": 1024, "max_tokens_limit": 4096},
+     "anthropic": {"max_tokens": 300},
+     "openai:gpt-4.1": {"max_tokens": 2048, "temperature": 0.3}}
+
+Options neither requested nor configured are left to the provider's own default.
+
+Main functions:
+- parse_generation_options(): Validate requested options
+- parse_generation_defaults(): Validate the GENERATION_DEFAULTS setting
+- resolve_generation(): Effective options of one provider call
+
+Dependencies:
+- Python standard library (json)
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import json
+
+from config import Config
+
+# ====================================
+# Constants and configuration
+# ====================================
+GENERATION_OPTIONS = ("max_tokens", "stop", "temperature", "reasoning_max_tokens")
+TOKEN_OPTIONS = ("max_tokens", "reasoning_max_tokens")
+# The smallest limit among the SDKs (OpenAI, Groq)
+MAX_STOP_SEQUENCES = 4
+MAX_TEMPERATURE = 2.0
+
+def parse_generation_options(data, extra=()):
+    """
+    Validate and normalize generation options.
+
+    Args:
+        data (dict | None): Options as sent by a client (None for none).
+        extra (tuple): Further token-count options to accept (e.g. max_tokens_limit in defaults).
+
+    Returns:
+        dict: Only the options given, normalized (ints, float, list of strings).
+
+    Raises:
+        ValueError: If an option is unknown or out of range.
+    """
+    if not data:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError("generation must be an object")
+    unknown = set(data) - set(GENERATION_OPTIONS) - set(extra)
+    if unknown:
+        raise ValueError(f"Unknown generation options: {', '.join(sorted(unknown))}")
+    options = {}
+    for name in TOKEN_OPTIONS + tuple(extra):
+        if data.get(name) is None:
+            continue
+        value = data[name]
+        if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).isdigit() or int(value) < 1:
+            raise ValueError(f"{name} must be a positive integer")
+        options[name] = int(value)
+    if data.get("temperature") is not None:
+        try:
+            temperature = float(data["temperature"])
+        except (TypeError, ValueError):
+            temperature = -1.0
+        if not 0 <= temperature <= MAX_TEMPERATURE:
+            raise ValueError(f"temperature must be between 0 and {MAX_TEMPERATURE:g}")
+        options["temperature"] = temperature
+    if data.get("stop") is not None:
+        stop = data["stop"]
+        if isinstance(stop, str):
+            stop = [stop]
+        if (not isinstance(stop, list) or len(stop) > MAX_STOP_SEQUENCES
+                or not all(isinstance(sequence, str) and sequence for sequence in stop)):
+            raise ValueError(f"stop must be a string or a list of up to {MAX_STOP_SEQUENCES} non-empty strings")
+        if stop:
+            options["stop"] = stop
+    return options
+
+def parse_generation_defaults(spec):
+    """
+    Parse and validate the GENERATION_DEFAULTS setting.
+
+    Args:
+        spec (str): JSON object mapping '*', provider names or 'provider:model' to options
+            (empty for none).
+
+    Returns:
+        dict: Keys mapped to normalized options (max_tokens_limit included).
+
+    Raises:
+        ValueError: If the JSON is invalid or an entry has invalid options.
+    """
+    if not spec or not spec.strip():
+        return {}
+    try:
+        entries = json.loads(spec)
+    except ValueError as e:
+        raise ValueError(f"GENERATION_DEFAULTS is not valid JSON: {e}") from e
+    if not isinstance(entries, dict):
+        raise ValueError("GENERATION_DEFAULTS must be a JSON object")
+    defaults = {}
+    for key, options in entries.items():
+        try:
+            defaults[key] = parse_generation_options(options, extra=("max_tokens_limit",))
+        except ValueError as e:
+            raise ValueError(f"GENERATION_DEFAULTS['{key}']: {e}") from e
+    return defaults
+
+GENERATION_DEFAULTS = parse_generation_defaults(Config.GENERATION_DEFAULTS)
+
+def resolve_generation(provider, model, requested=None, defaults=None):
+    """
+    Get the effective options of one provider call.
+
+    Args:
+        provider (str): Provider name.
+        model (str): Model identifier (after any budget downgrade).
+        requested (dict): parse_generation_options() result of the request.
+        defaults (dict): parse_generation_defaults() result (GENERATION_DEFAULTS if None).
+
+    Returns:
+        dict: Configured defaults ('*', then provider, then 'provider:model') overridden by
+        the request, with token counts clamped to the most specific max_tokens_limit.
+    """
+    defaults = GENERATION_DEFAULTS if defaults is None else defaults
+    options = {}
+    for key in ('*', provider, f"{provider}:{model}"):
+        options.update(defaults.get(key, {}))
+    options.update(requested or {})
+    limit = options.pop("max_tokens_limit", None)
+    if limit:
+        for name in TOKEN_OPTIONS:
+            if name in options:
+                options[name] = min(options[name], limit)
+        options.setdefault("max_tokens", limit)
+    return options
@@ -0,0 +1,110 @@
+"""
+openai-compatible-provider.py - Generic OpenAI-compatible chat completions provider
+
+Implements the OpenAICompatibleProvider class, which extends LLMProvider for any API that
+speaks the OpenAI chat completions protocol: OpenAI itself, Groq and Cerebras (whose SDKs
+share that interface), and self-hosted inference servers such as vLLM or the llama.cpp
+server. Supports chat, reasoning, and streaming responses.
+
+Subclasses only set class attributes (SDK client class, API key variable, base URL,
+headers, timeouts; see CompletionsAPI in completions_api.py, which makes the calls). The
+built-in presets live in groq_provider.py, openai_provider.py and cerebras_provider.py;
+further entries are registered from the OPENAI_COMPATIBLE_PROVIDERS setting (see
+compatible_providers.py).
+
+Dependencies:
+- Python standard library (logging)
+- app.providers.base.chat_chunk_text
+- app.providers.completions_api.CompletionsAPI
+- app.providers.reasoning (prompts and layout of reasoning answers)
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+
+from app.providers.base import chat_chunk_text
+from app.providers.completions_api import CompletionsAPI
+from app.providers.reasoning import final_prompt, format_reasoning_answer, reasoning_prompt
+
+logger = logging.getLogger(__name__)
+
+class OpenAICompatibleProvider(CompletionsAPI):
+    """
+    LLMProvider implementation for OpenAI-compatible chat completions APIs.
+
+    Class attributes configuring the API are documented on CompletionsAPI.
+    """
+
+    name = 'openai-compatible'
+
+    def generate_response(self, message, model):
+        """
+        Generate a response.
+
+        Args:
+            message (str): User input message.
+            model (str): Model identifier.
+
+        Returns:
+            str: Generated response.
+        """
+        try:
+            self.add_to_history("user", message)
+            response = self.complete(self.get_conversation_history(), model)
+            self.add_to_history("assistant", response)
+            return response
+        except Exception as e:
+            logger.error("Error in %s.generate_response: %s", type(self).__name__, e)
+            raise
+
+    def generate_response_with_reasoning(self, message, model):
+        """
+        Generate a response with reasoning.
+
+        Args:
+            message (str): User input message.
+            model (str): Model identifier.
+
+        Returns:
+            str: Reasoning and final response.
+        """
+        try:
+            self.add_to_history("user", message)
+            reasoning_response = self.complete([{"role": "user", "content": reasoning_prompt(message)}], model,
+                                               reasoning=True)
+            final_response = self.complete([{"role": "user", "content": final_prompt(reasoning_response)}], model)
+
+            self.add_to_history("assistant", final_response)
+            return format_reasoning_answer(reasoning_response, final_response)
+        except Exception as e:
+            logger.error("Error in %s.generate_response_with_reasoning: %s", type(self).__name__, e)
+            raise
+
+    def generate_stream(self, message, model, use_reasoning=False):
+        """
+        Generate a streaming response.
+
+        Args:
+            message (str): User input message.
+            model (str): Model identifier.
+            use_reasoning (bool): Whether to include reasoning.
+
+        Yields:
+            str: Streamed response chunks.
+        """
+        try:
+            self.add_to_history("user", message)
+            if use_reasoning:
+                yield from self.stream_reasoning(
+                    lambda: self.open_completion_stream([{"role": "user", "content": reasoning_prompt(message)}], model,
+                                                        reasoning=True),
+                    lambda reasoning: self.open_completion_stream([{"role": "user", "content": final_prompt(reasoning)}],
+                                                                  model),
+                    chat_chunk_text)
+            else:
+                stream = self.open_completion_stream(self.get_conversation_history(), model)
+                yield from self.iter_stream(stream, chat_chunk_text)
+        except Exception as e:
+            logger.error("Error in %s.generate_stream: %s", type(self).__name__, e)
+            raise
@@ -0,0 +1,129 @@
+"""
+rate_limits.py - Rate-limit information in provider responses
+
+Reads what OpenAI-style (x-ratelimit-*) and Anthropic (anthropic-ratelimit-*) responses say
+about a key's rate limits: the tightest of the request and token windows, as a remaining
+fraction plus the time until it resets, and the status and Retry-After of failed calls.
+Credential pools (credential_pool.py) rank and eject keys from these values.
+
+Main functions:
+- read_rate_limits(): Binding rate-limit window of a response
+- parse_reset(): Parse a reset header into seconds
+- error_status(): HTTP status of an SDK error
+- retry_after(): Retry-After of an SDK error, in seconds
+
+Dependencies:
+- Python standard library (datetime, re, time)
+
+@author Auto-refactored by Cline
+"""
+
+import re
+import time
+from datetime import datetime
+
+# ====================================
+# Constants and configuration
+# ====================================
+RATE_LIMIT_HEADER = re.compile(
+    r"^(?:x|anthropic)-ratelimit-(?:(?P<field>limit|remaining|reset)-(?P<resource>requests|tokens)"
+    r"|(?P<resource2>requests|tokens)-(?P<field2>limit|remaining|reset))(?P<window>-[a-z]+)?$")
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+
+def parse_reset(value, now):
+    """
+    Parse a rate-limit reset header into seconds from now.
+
+    Args:
+        value (str): A duration ('1m30.5s', '250ms', '12') or an RFC 3339 timestamp (Anthropic).
+        now (float): Current time.time().
+
+    Returns:
+        float | None: Seconds until the window resets, or None if unparseable.
+    """
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+    try:
+        return max(0.0, datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() - now)
+    except ValueError:
+        return None
+
+def read_rate_limits(headers):
+    """
+    Read the binding rate-limit window from response headers.
+
+    Args:
+        headers (Mapping): Response headers (case-insensitive, e.g. httpx.Headers).
+
+    Returns:
+        dict | None: 'quota' (remaining fraction of the tightest window), 'remaining_requests',
+        'remaining_tokens' and 'reset_in' (seconds until the tightest window resets), or
+        None if the response has no rate-limit headers.
+    """
+    windows = {}
+    for name, value in headers.items():
+        match = RATE_LIMIT_HEADER.match(name.lower())
+        if not match:
+            continue
+        resource = match.group("resource") or match.group("resource2")
+        field = match.group("field") or match.group("field2")
+        windows.setdefault((resource, match.group("window")), {})[field] = value
+    if not windows:
+        return None
+    now = time.time()
+    limits = {"quota": None, "remaining_requests": None, "remaining_tokens": None, "reset_in": None}
+    for (resource, _), window in windows.items():
+        try:
+            remaining = int(float(window["remaining"]))
+        except (KeyError, ValueError):
+            continue
+        key = f"remaining_{resource}"
+        limits[key] = remaining if limits[key] is None else min(limits[key], remaining)
+        try:
+            quota = remaining / float(window["limit"])
+        except (KeyError, ValueError, ZeroDivisionError):
+            continue
+        if limits["quota"] is None or quota < limits["quota"]:
+            limits["quota"] = quota
+            limits["reset_in"] = parse_reset(window["reset"], now) if "reset" in window else None
+    return limits
+
+def error_status(error):
+    """
+    Get the HTTP status of an SDK error (status_code for OpenAI-style SDKs, code for Google's).
+
+    Returns:
+        int | None: Status code, or None for errors without one (e.g. connection errors).
+    """
+    for attribute in ('status_code', 'code'):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return status
+    return None
+
+def retry_after(error):
+    """
+    Get the Retry-After of an SDK error response in seconds, falling back to its rate-limit reset.
+
+    Returns:
+        float | None: Seconds, or None if the response says nothing.
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    for name, scale in (('retry-after-ms', 0.001), ('retry-after', 1)):
+        value = headers.get(name)
+        if value:
+            try:
+                return max(0.0, float(value) * scale)
+            except ValueError:
+                pass
+    limits = read_rate_limits(headers)
+    return limits["reset_in"] if limits else None
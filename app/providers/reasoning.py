@@ -0,0 +1,73 @@
+"""
+reasoning.py - Prompts and output layout of two-step reasoning requests
+
+A reasoning request first asks the model to reason step-by-step about the message, then
+asks for a final response based on that reasoning. Streaming and non-streaming paths of
+every provider build the same prompts and lay the answer out the same way:
+"Reasoning:\n<reasoning>\n\nFinal Response:\n<final response>".
+
+Main functions:
+- reasoning_prompt(): Prompt of the reasoning step
+- final_prompt(): Prompt of the final step, carrying the reasoning
+- final_response(): The final response part of a reasoning answer
+
+Dependencies:
+- None
+
+@author Auto-refactored by Cline
+"""
+
+# ====================================
+# Constants and configuration
+# ====================================
+REASONING_HEADER = "Reasoning:\n"
+FINAL_RESPONSE_HEADER = "\n\nFinal Response:\n"
+
+def reasoning_prompt(message):
+    """
+    Build the prompt of the reasoning step.
+
+    Args:
+        message (str): User message.
+
+    Returns:
+        str: Prompt asking for step-by-step reasoning.
+    """
+    return f"Reason step-by-step about the following message: {message}"
+
+def final_prompt(reasoning):
+    """
+    Build the prompt of the final step.
+
+    Args:
+        reasoning (str): Text of the reasoning step.
+
+    Returns:
+        str: Prompt asking for a final response based on the reasoning.
+    """
+    return f"Based on the following reasoning, provide a final response:\n\nReasoning:\n{reasoning}\n\nFinal response:"
+
+def format_reasoning_answer(reasoning, final):
+    """
+    Lay out a non-streaming reasoning answer like the streamed one.
+
+    Returns:
+        str: Reasoning and final response under their headers.
+    """
+    return f"{REASONING_HEADER}{reasoning}{FINAL_RESPONSE_HEADER}{final}"
+
+def final_response(text):
+    """
+    Get the final response from text that starts at (or just before) its header.
+
+    The reasoning itself may contain the header's wording, so callers pass the text from
+    where the header was streamed rather than the whole answer.
+
+    Args:
+        text (str): Reasoning answer from the final response header on (possibly cut short).
+
+    Returns:
+        str: Text after the first final response header, '' if there is none.
+    """
+    _, header, final = text.partition(FINAL_RESPONSE_HEADER)
+    return final if header else ""
@@ -0,0 +1,110 @@
+"""
+upstream.py - Helpers shared by the LLM provider implementations
+
+Contains the process-wide SDK clients, the token estimates used when an SDK reports no
+usage, and the helpers that read and close OpenAI-style SDK streams.
+
+Dependencies:
+- Python standard library (logging, threading)
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# ====================================
+# Constants and configuration
+# ====================================
+CHARS_PER_TOKEN = 4
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def shared_client(key, factory):
+    """
+    Get a process-wide SDK client, creating it on first use.
+
+    Provider instances are rebuilt from the session on every request; sharing the SDK
+    client keeps its HTTP connection pool (and warm TLS connections) across requests.
+    SDK clients are thread-safe.
+
+    Args:
+        key (tuple): Identifies the client, e.g. ('groq', api_key).
+        factory (callable): Creates the client when it does not exist yet.
+
+    Returns:
+        object: The shared client.
+    """
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = factory()
+    return client
+
+def estimate_tokens(text):
+    """
+    Roughly estimate the token count of a text when the SDK reports no usage.
+
+    Args:
+        text (str): Text to measure.
+
+    Returns:
+        int: Estimated token count (about four characters per token, at least 1 for non-empty text).
+    """
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def estimate_prompt_tokens(history, summary, message):
+    """
+    Estimate the prompt tokens of a call before it is made.
+
+    Args:
+        history (list): Conversation history (message dicts) before the new message.
+        summary (str | None): Rolling summary sent ahead of the history.
+        message (str): New user message.
+
+    Returns:
+        int: Estimated prompt tokens (an upper bound in 'retrieval' history mode).
+    """
+    return (sum(estimate_tokens(turn["content"]) for turn in history)
+            + estimate_tokens(summary) + estimate_tokens(message))
+
+def chat_chunk_text(chunk):
+    """
+    Extract the text delta from an OpenAI-style chat completion stream chunk.
+
+    Args:
+        chunk: Stream chunk from the Groq, OpenAI or Cerebras SDK.
+
+    Returns:
+        str | None: Delta text (None for chunks without choices, e.g. usage-only chunks).
+    """
+    if not chunk.choices:
+        return None
+    return chunk.choices[0].delta.content
+
+def close_stream(stream):
+    """
+    Close an SDK response stream and its underlying HTTP response, best effort.
+
+    OpenAI-style SDKs (Groq, OpenAI, Cerebras, Anthropic) expose close(); Gemini's
+    streaming response wraps a gRPC call that exposes cancel().
+
+    Args:
+        stream: SDK stream object.
+    """
+    for target in (stream, getattr(stream, '_iterator', None)):
+        for method_name in ('close', 'cancel'):
+            method = getattr(target, method_name, None)
+            if callable(method):
+                try:
+                    method()
+                except Exception as e:
+                    logger.debug("Ignoring error while closing stream: %s", e)
+                return
@@ -0,0 +1,169 @@
+"""
+upstream_calls.py - Upstream call handling for LLM providers
+
+Defines the UpstreamCalls class, which every LLMProvider extends: it opens SDK streams in
+traced spans, closes them when iteration stops or cancel() is called from another thread,
+keeps pooled API key leases for as long as a stream is open, and accounts the token usage
+the SDKs report.
+
+Dependencies:
+- app.observability.tracer
+- app.providers.upstream.close_stream
+
+@author Auto-refactored by Cline
+"""
+
+from app.observability import tracer
+from app.providers.upstream import close_stream
+
+class UpstreamCalls:
+    """
+    Upstream streams, key leases and usage of one provider instance.
+
+    Attributes:
+        cancelled (bool): Set by cancel(); stops and closes any open upstream streams.
+        usage (dict): Upstream calls made since take_usage() and the tokens the SDK reported for them.
+    """
+
+    def __init__(self):
+        """
+        Initialize with no open stream and no usage.
+        """
+        self.cancelled = False
+        self._active_streams = []
+        self._stream_leases = {}
+        self.usage = {"calls": 0, "reported": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def open_stream(self, create, *args, **kwargs):
+        """
+        Call an SDK method that starts a streaming response, inside an 'upstream.request' span.
+
+        The span covers connection setup, upstream queueing and the wait for response headers.
+
+        Args:
+            create (callable): SDK call, e.g. self.client.chat.completions.create.
+            *args, **kwargs: Passed to `create`.
+
+        Returns:
+            The SDK stream.
+        """
+        with tracer.span('upstream.request'):
+            return create(*args, **kwargs)
+
+    def hold_lease(self, stream, lease):
+        """
+        Keep a pooled key in flight for as long as a stream is open.
+
+        iter_stream() ends the lease when it closes the stream, reporting a mid-stream
+        failure as the key's error, so the pool sees the whole call rather than its opening.
+
+        Args:
+            stream: SDK stream opened with the key.
+            lease (Lease): The key's lease (see CredentialPool.lease()).
+        """
+        lease.hold()
+        self._stream_leases[id(stream)] = lease
+
+    def iter_stream(self, stream, extract):
+        """
+        Yield text from an SDK stream, closing it as soon as iteration stops.
+
+        Closing happens on normal completion, on errors, when the consumer closes this
+        generator (e.g. the client disconnected), and when cancel() is called from another
+        thread, so upstream generation never outlives the request. A key lease held for the
+        stream (see hold_lease()) ends with it.
+
+        Args:
+            stream: Iterable SDK stream.
+            extract (callable): Returns the text of one stream item (or None/'' to skip it).
+
+        Yields:
+            str: Non-empty text chunks.
+        """
+        self._active_streams.append(stream)
+        # Time to first token, then the rest of the stream
+        phase = tracer.span('upstream.first_token')
+        chunks = 0
+        usage = None
+        error = None
+        try:
+            if self.cancelled:
+                return
+            for item in stream:
+                # Usage arrives on the final chunk (cumulative on every chunk for Gemini)
+                usage = self.read_usage(item) or usage
+                text = extract(item)
+                if text:
+                    if not chunks:
+                        phase.end()
+                        phase = tracer.span('upstream.tail')
+                    chunks += 1
+                    yield text
+        except Exception as e:
+            # Reading from a stream closed by cancel() raises; that is the expected outcome
+            if not self.cancelled:
+                phase.record_error(e)
+                error = e
+                raise
+        finally:
+            phase.set_attribute('chunks', chunks)
+            phase.set_attribute('cancelled', self.cancelled)
+            phase.end()
+            self.record_usage(usage)
+            self._active_streams.remove(stream)
+            close_stream(stream)
+            lease = self._stream_leases.pop(id(stream), None)
+            if lease is not None:
+                lease.end(error)
+
+    def read_usage(self, response):
+        """
+        Read token usage from an SDK response or stream chunk.
+
+        Handles OpenAI-style `usage` (OpenAI, Cerebras, Groq responses) and Groq's
+        `x_groq.usage` on the last stream chunk.
+
+        Args:
+            response: SDK response or stream chunk.
+
+        Returns:
+            tuple | None: (prompt_tokens, completion_tokens), or None if not reported.
+        """
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            usage = getattr(getattr(response, 'x_groq', None), 'usage', None)
+        if usage is None or getattr(usage, 'prompt_tokens', None) is None:
+            return None
+        return usage.prompt_tokens, usage.completion_tokens
+
+    def record_usage(self, usage):
+        """
+        Account for one upstream call.
+
+        Args:
+            usage (tuple | None): read_usage() result, None if the SDK reported nothing.
+        """
+        self.usage["calls"] += 1
+        if usage:
+            self.usage["reported"] += 1
+            self.usage["prompt_tokens"] += usage[0] or 0
+            self.usage["completion_tokens"] += usage[1] or 0
+
+    def take_usage(self):
+        """
+        Get and reset the usage accumulated since the last call.
+
+        Returns:
+            dict: 'calls', 'reported', 'prompt_tokens', 'completion_tokens'.
+        """
+        usage = self.usage
+        self.usage = {"calls": 0, "reported": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        return usage
+
+    def cancel(self):
+        """
+        Stop generation and close open upstream streams. Safe to call from any thread.
+        """
+        self.cancelled = True
+        for stream in list(self._active_streams):
+            close_stream(stream)
@@ -4,11 +4,23 @@ __init__.py - Register all Flask blueprints for the app.routes package
 Imports and exposes:
 - chat_bp: Chat endpoints
 - history_bp: Conversation history endpoints
+- metrics_bp: Metrics endpoint
+- eval_bp: Batch evaluation endpoints
+- models_bp: Model catalog endpoint
+- admin_bp: Operator endpoints (profiling, usage)
+- ws_bp: WebSocket chat transport (/ws)
+- jobs_bp: Background chat job endpoints (/chat/jobs)
 
 @author Auto-refactored by Cline
 """
 
+from app.routes.admin_routes import admin_bp
 from app.routes.chat_routes import chat_bp
+from app.routes.eval_routes import eval_bp
 from app.routes.history_routes import history_bp
+from app.routes.job_routes import jobs_bp
+from app.routes.metrics_routes import metrics_bp
+from app.routes.model_routes import models_bp
+from app.routes.ws_routes import ws_bp
 
-__all__ = ["chat_bp", "history_bp"]
+__all__ = ["admin_bp", "chat_bp", "eval_bp", "history_bp", "jobs_bp", "metrics_bp", "models_bp", "ws_bp"]
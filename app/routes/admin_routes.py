@@ -0,0 +1,107 @@
+"""
+admin_routes.py - Operator endpoints
+
+Defines Flask routes for operators: arming on-demand profiling of the next /chat requests,
+listing/downloading saved profiles, today's token usage and the health of pooled API keys. All routes require `Authorization: Bearer
+<ADMIN_TOKEN>` and answer 404 when ADMIN_TOKEN is not configured.
+
+Dependencies:
+- flask (Blueprint, abort, jsonify, request, send_from_directory)
+- hmac, os
+- app.observability.profiling
+- app.providers.credentials.credential_pools
+- app.usage.usage_ledger
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import hmac
+import os
+
+from flask import Blueprint, abort, jsonify, request, send_from_directory
+
+from app.observability import profiling
+from app.providers.credentials import credential_pools
+from app.usage import usage_ledger
+from config import Config
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.before_request
+def require_admin():
+    """
+    Reject requests without the admin bearer token.
+    """
+    if not Config.ADMIN_TOKEN:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {Config.ADMIN_TOKEN}"):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+@admin_bp.route('/admin/profiles/arm', methods=['POST'])
+def arm_profiling():
+    """
+    Profile the next N /chat requests handled by the worker that receives this call.
+
+    Body:
+        count (int): Requests to profile (default 1, 0 disarms).
+
+    Returns:
+        JSON response with 'armed'.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        count = int(data.get('count', 1))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'count must be an integer'}), 400
+    return jsonify({'armed': profiling.arm(count)})
+
+@admin_bp.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """
+    List saved profiles, newest first.
+
+    Returns:
+        JSON response with 'profiles' ('name', 'size', 'created').
+    """
+    return jsonify({'profiles': profiling.list_profiles()})
+
+@admin_bp.route('/admin/profiles/<name>', methods=['GET'])
+def download_profile(name):
+    """
+    Download a profile in pstats format (load with pstats.Stats or snakeviz).
+
+    Args:
+        name (str): Profile file name from the listing.
+
+    Returns:
+        The .prof file, or 404.
+    """
+    if not profiling.PROFILE_NAME_PATTERN.match(name):
+        abort(404)
+    return send_from_directory(os.path.abspath(Config.PROFILE_DIR), name, as_attachment=True)
+
+@admin_bp.route('/admin/usage', methods=['GET'])
+def usage_summary():
+    """
+    Summarize today's token usage (UTC day) across all workers.
+
+    Query:
+        top (int): Heaviest sessions to include (default 20).
+
+    Returns:
+        JSON response with 'day', 'providers' and 'top_sessions'.
+    """
+    top = request.args.get('top', 20, type=int)
+    return jsonify(usage_ledger.summary(top_sessions=max(0, top)))
+
+@admin_bp.route('/admin/credentials', methods=['GET'])
+def credential_health():
+    """
+    Report per-key usage and health of the API key pools used by the worker that receives this call.
+
+    Returns:
+        JSON response with 'pools' (provider -> keys with label, masked key, calls, rate_limited,
+        auth_failures, errors, quota, remaining_requests, remaining_tokens, ejected_for, last_error).
+    """
+    return jsonify({'pools': credential_pools.snapshot()})
@@ -0,0 +1,201 @@
+"""
+chat_compare.py - Non-streaming chat answers for /chat
+
+Contains the two ways a non-streaming /chat request calls its providers:
+
+- compare_chat(): one provider after the other, each answer passed through the
+  STREAM_TRANSFORMS pipeline like a streamed one, and saved to the session's history
+- compare_with_deadline(): every provider at once as background chat jobs (app/jobs/),
+  answering with those that finished before the request's deadline; the others are
+  returned as pending job ids (see job_routes.py)
+
+Dependencies:
+- flask (jsonify, session)
+- logging, threading, time
+- app.control.router
+- app.jobs.jobs
+- app.observability (log_context, tracer)
+- app.providers.base.estimate_tokens
+- app.providers.generation.resolve_generation
+- app.routes.provider_factory.get_llm_provider
+- app.streaming.build_pipeline
+- app.usage.usage_ledger
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+import threading
+import time
+
+from flask import jsonify, session
+
+from app.control import router
+from app.jobs import jobs
+from app.observability import log_context, tracer
+from app.providers.base import estimate_tokens
+from app.providers.generation import resolve_generation
+from app.routes.provider_factory import get_llm_provider
+from app.streaming import build_pipeline
+from app.usage import usage_ledger
+
+logger = logging.getLogger(__name__)
+
+def compare_chat(message, planned, requested, use_reasoning, history_mode, session_id, generation=None):
+    """
+    Call every provider in turn and collect their answers.
+
+    Args:
+        message (str): User message.
+        planned (dict): Models to call (after budget downgrades).
+        requested (dict): Models the client asked for.
+        use_reasoning (bool): Whether to include reasoning.
+        history_mode (str): Optional history mode.
+        session_id (str): Browser session id.
+        generation (dict): Requested generation options.
+
+    Returns:
+        dict: Provider -> answer text ('Error: ...' if it failed), or {'model', 'content'}
+        when a budget downgrade changed the model.
+    """
+    responses = {}
+    for provider, model in planned.items():
+        with tracer.span('provider', provider=provider, model=model) as span:
+            with tracer.span('session.restore'):
+                llm = get_llm_provider(provider)
+            if history_mode:
+                llm.history_mode = history_mode
+            llm.generation = resolve_generation(provider, model, generation)
+            prompt_estimate = llm.estimate_prompt_tokens(message)
+            answer = call_provider(llm, provider, model, message, use_reasoning, span)
+            usage_ledger.record_call(session_id, provider, model, llm, prompt_estimate, estimate_tokens(answer),
+                                     requested[provider])
+        if model != requested[provider]:
+            # Budget downgrade: tell the UI which model actually answered
+            answer = {'model': model, 'content': answer}
+        responses[provider] = answer
+    return responses
+
+def call_provider(llm, provider, model, message, use_reasoning, span):
+    """
+    Get one provider's answer and save its history to the session.
+
+    Args:
+        llm (LLMProvider): Provider restored from the session.
+        provider (str): Provider name.
+        model (str): Model to call.
+        message (str): User message.
+        use_reasoning (bool): Whether to include reasoning.
+        span (Span): Span of the provider call.
+
+    Returns:
+        str: The transformed answer, or 'Error: ...' if the call failed.
+    """
+    timing = router.timing(provider, model)
+    try:
+        with log_context(provider=provider, model=model):
+            if use_reasoning:
+                answer = llm.generate_response_with_reasoning(message, model)
+            else:
+                answer = llm.generate_response(message, model)
+        timing.finish(estimate_tokens(answer))
+        # Same output transforms as streamed answers (redaction, filtering, stop rules)
+        answer = build_pipeline().transform(answer)
+        with tracer.span('session.save'):
+            session['llm_provider'][provider] = llm.to_dict()
+        return answer
+    except Exception as e:
+        logger.error("Error generating response for provider %s: %s", provider, e)
+        span.record_error(e)
+        timing.fail()
+        return f"Error: {str(e)}"
+
+def compare_with_deadline(message, planned, requested, use_reasoning, history_mode, deadline, session_id,
+                          permit, trace, route=None, generation=None):
+    """
+    Call every provider in parallel and answer with those that finish before the deadline.
+
+    Each provider runs as a background chat job. Jobs finished in time are committed to
+    the session's history and returned like a regular non-streaming /chat; the others
+    keep running and are returned under 'pending'. Each job holds one of the permit's
+    slots while it calls upstream; the permit and the trace are released when the last job
+    finishes, since stragglers still call upstream. If a job cannot be started, those that
+    did not start are not waited for.
+
+    Args:
+        message (str): User message.
+        planned (dict): Models to call (after budget downgrades).
+        requested (dict): Models the client asked for.
+        use_reasoning (bool): Whether to include reasoning.
+        history_mode (str): Optional history mode.
+        deadline (float): Seconds to wait.
+        session_id (str): Browser session id.
+        permit (Permit): Admission permit of the request.
+        trace (Span): Root span of the request.
+        route (dict): Routing decision of an `auto` request, returned as 'route'.
+        generation (dict): Requested generation options.
+
+    Returns:
+        Response: JSON with 'responses' (provider -> answer) and 'pending' (provider -> job id).
+    """
+    states = session['llm_provider']
+    remaining = [len(planned)]
+    lock = threading.Lock()
+
+    def jobs_finished(count):
+        with lock:
+            remaining[0] -= count
+            last = remaining[0] == 0
+        if last:
+            permit.release()
+            trace.end()
+
+    with tracer.use(trace):
+        spans = {provider: tracer.span('provider', provider=provider, model=model) for provider, model in planned.items()}
+    started = []
+    try:
+        for provider, model in planned.items():
+            started.append(jobs.submit(session_id, provider, model, requested[provider], message, states.get(provider),
+                                       history_mode, use_reasoning, spans[provider],
+                                       on_finish=lambda job: jobs_finished(1), generation=generation,
+                                       slot=permit.slot()))
+    except Exception as e:
+        # Jobs that never started will not finish: stop counting them, so the permit and trace are released
+        trace.record_error(e)
+        for provider in list(planned)[len(started):]:
+            spans[provider].end()
+        jobs_finished(len(planned) - len(started))
+        raise
+
+    responses, pending = collect_jobs(started, deadline, states)
+    session.modified = True
+    trace.set_attribute('pending', len(pending))
+    if route is not None:
+        return jsonify({'responses': responses, 'pending': pending, 'route': route})
+    return jsonify({'responses': responses, 'pending': pending})
+
+def collect_jobs(started, deadline, states):
+    """
+    Wait up to the deadline, then commit the answers of the jobs that finished.
+
+    Args:
+        started (list): The request's chat jobs.
+        deadline (float): Seconds to wait.
+        states (dict): Session's provider states, updated with the finished answers.
+
+    Returns:
+        tuple: (responses, pending): provider -> answer, and provider -> job id of the
+        jobs still running.
+    """
+    expires = time.monotonic() + deadline
+    for job in started:
+        job.wait(max(0.0, expires - time.monotonic()))
+    responses, pending = {}, {}
+    for job in started:
+        if job.finished:
+            responses[job.provider] = job.result()
+            jobs.results.commit(job, states)
+            jobs.discard(job)
+        else:
+            pending[job.provider] = job.job_id
+    return responses, pending
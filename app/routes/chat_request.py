@@ -0,0 +1,200 @@
+"""
+chat_request.py - Reading, validating and admitting /chat requests
+
+Contains the checks /chat makes before any upstream call: reading the request's
+parameters, resolving the `auto` provider, validating providers, models, history
+mode, generation options and deadline, and waiting for admission. prepare_chat_request()
+and start_chat_trace() also serve /ws turns; draining_response() and retry_later()
+build the 503 and 429 answers.
+
+Dependencies:
+- flask (jsonify, request)
+- json
+- config.Config
+- app.catalog.model_catalog
+- app.control (AUTO_PROVIDER, RouteUnavailable, admission, router)
+- app.observability.tracer
+- app.providers.generation.parse_generation_options
+
+@author Auto-refactored by Cline
+"""
+
+import json
+
+from flask import jsonify, request
+
+from config import Config
+from app.catalog import model_catalog
+from app.control import AUTO_PROVIDER, RouteUnavailable, admission, router
+from app.observability import tracer
+from app.providers.generation import parse_generation_options
+
+def validate_chat_request(providers, history_mode):
+    """
+    Check a chat request's providers, models and history mode before any upstream call.
+
+    Args:
+        providers (dict): Provider names mapped to model names.
+        history_mode (str): None, 'window' or 'retrieval'.
+
+    Returns:
+        str | None: Error message for a 400 answer, or None if the request is valid.
+    """
+    if history_mode not in (None, 'window', 'retrieval'):
+        return f"Unknown history_mode: {history_mode}"
+    if Config.MODEL_CATALOG_VALIDATE:
+        # Set lookups against the cached catalog: fail before spending an upstream round trip
+        for provider, model in providers.items():
+            if model_catalog.get(provider) is None:
+                return f"Unknown provider: {provider}"
+            if not model_catalog.is_known(provider, model):
+                return f"Unknown model for {provider}: {model}"
+    return None
+
+def route_auto(providers, streaming=False):
+    """
+    Replace an `auto` entry with the provider/model pair the latency router picks.
+
+    Providers named explicitly in the same request are not candidates.
+
+    Args:
+        providers (dict): Provider names mapped to model names (the model of `auto` is ignored).
+        streaming (bool): Whether the answer is streamed (changes what "fastest" means).
+
+    Returns:
+        tuple: (providers with `auto` resolved, routing decision or None without `auto`).
+
+    Raises:
+        RouteUnavailable: If no candidate is left to route to.
+    """
+    if AUTO_PROVIDER not in providers:
+        return providers, None
+    route = router.choose(exclude=[provider for provider in providers if provider != AUTO_PROVIDER],
+                          streaming=streaming)
+    resolved = {}
+    for provider, model in providers.items():
+        if provider == AUTO_PROVIDER:
+            resolved[route['provider']] = route['model']
+        else:
+            resolved[provider] = model
+    return resolved, route
+
+def read_chat_request():
+    """
+    Read a /chat request's parameters from the query string (GET) or JSON body (POST).
+
+    Returns:
+        dict: message, providers, use_reasoning, use_streaming, history_mode, generation and deadline.
+    """
+    if request.method == 'GET':
+        generation = {name: request.args.get(name) for name in ('max_tokens', 'temperature', 'reasoning_max_tokens')}
+        generation['stop'] = request.args.getlist('stop') or None
+        return {
+            'message': request.args.get('message'),
+            'providers': json.loads(request.args.get('providers')),
+            'use_reasoning': request.args.get('use_reasoning') == 'true',
+            'use_streaming': request.args.get('use_streaming') == 'true',
+            'history_mode': request.args.get('history_mode'),
+            'generation': generation,
+            'deadline': request.args.get('deadline'),
+        }
+    data = request.json
+    return {
+        'message': data.get('message'),
+        'providers': data.get('providers', {}),
+        'use_reasoning': data.get('use_reasoning', False),
+        'use_streaming': data.get('use_streaming', False),
+        'history_mode': data.get('history_mode'),
+        'generation': data.get('generation'),
+        'deadline': data.get('deadline'),
+    }
+
+def prepare_chat_request(params):
+    """
+    Resolve `auto`, then validate providers, history mode, generation options and deadline.
+
+    Args:
+        params (dict): read_chat_request() result; providers, generation and deadline are
+            replaced by their resolved values and 'route' is added.
+
+    Returns:
+        str | None: Error message for a 400 answer, or None if the request is valid.
+    """
+    try:
+        params['providers'], params['route'] = route_auto(params['providers'], streaming=bool(params['use_streaming']))
+    except RouteUnavailable as e:
+        return str(e)
+    error = validate_chat_request(params['providers'], params['history_mode'])
+    if error:
+        return error
+    try:
+        params['generation'] = parse_generation_options(params['generation'])
+    except ValueError as e:
+        return str(e)
+    if params['deadline'] is not None:
+        try:
+            params['deadline'] = float(params['deadline'])
+        except (TypeError, ValueError):
+            params['deadline'] = -1
+        if params['deadline'] <= 0:
+            return 'deadline must be a positive number of seconds'
+    return None
+
+def start_chat_trace(params, request_id, **attributes):
+    """
+    Start a chat request's root span (subject to sampling), with the routing decision if any.
+
+    Args:
+        params (dict): The checked request (see prepare_chat_request()).
+        request_id (str): Id of the HTTP request.
+        **attributes: Extra span attributes (e.g. the /ws transport and conversation).
+
+    Returns:
+        Span: The root span.
+    """
+    trace = tracer.start_trace('chat', request_id=request_id, providers=','.join(params['providers']),
+                               streaming=bool(params['use_streaming']), reasoning=bool(params['use_reasoning']),
+                               history_mode=params['history_mode'] or 'window', **attributes)
+    route = params['route']
+    if route is not None:
+        trace.set_attribute('route', f"{route['provider']}:{route['model']}")
+        trace.set_attribute('route_reason', route['reason'])
+    return trace
+
+def admit(session_id, params, planned, trace):
+    """
+    Wait for the request's admission permit.
+
+    Returns:
+        Permit: Held until the answer is complete.
+
+    Raises:
+        AdmissionRejected: If the request should get 429.
+    """
+    upstream_calls = len(params['providers']) * (2 if params['use_reasoning'] else 1)
+    # Deadline compares call every provider at once, one slot each
+    slots = len(planned) if params['deadline'] is not None and not params['use_streaming'] else 1
+    with tracer.use(trace), tracer.span('admission.wait'):
+        return admission.acquire(session_id, cost=max(1, upstream_calls), slots=slots)
+
+def draining_response():
+    """
+    Answer 503 while the server drains, asking the client to retry on another worker.
+    """
+    response = jsonify({'error': 'Server is restarting, please retry'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    response.headers['Connection'] = 'close'
+    return response
+
+def retry_later(error):
+    """
+    Answer 429 with Retry-After for a request rejected by admission control or a budget.
+
+    Args:
+        error (AdmissionRejected | BudgetExceeded): The rejection (provides retry_after).
+    """
+    response = jsonify({'error': str(error)})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
@@ -4,23 +4,39 @@ chat_routes.py - Chat endpoints for multi-provider LLM app
 Defines Flask routes for chat interactions, including streaming and reasoning support.
 
 Dependencies:
-- flask (Blueprint, render_template, request, jsonify, session, Response, stream_with_context)
+- flask (Blueprint, after_this_request, g, render_template, request, jsonify, session, Response, stream_with_context)
 - logging
-- json
-- app.routes.provider_factory.get_llm_provider
+- copy, os
+- app.routes.provider_factory (COMPATIBLE_PROVIDERS, get_session_id)
+- app.control (AdmissionRejected, budget, BudgetExceeded)
+- app.jobs.jobs
+- app.observability (profiling, redact_body)
+- app.routes.chat_request (admit, draining_response, prepare_chat_request, read_chat_request, retry_later,
+  route_auto, start_chat_trace, validate_chat_request)
+- app.routes.chat_compare (compare_chat, compare_with_deadline)
+- app.routes.chat_stream.stream_chat
+- app.streaming (drain, format_sse, streams)
 
 @author Auto-refactored by Cline
 """
 
-from flask import Blueprint, render_template, request, jsonify, session, Response, stream_with_context
+from flask import Blueprint, after_this_request, g, render_template, request, jsonify, session, Response, stream_with_context
 import logging
-import json
+import copy
+import os
 
-from app.routes.provider_factory import get_llm_provider
+from app.jobs import jobs
+from app.control import AdmissionRejected, BudgetExceeded, budget
+from app.observability import profiling, redact_body
+from app.routes.chat_compare import compare_chat, compare_with_deadline
+from app.routes.chat_request import (admit, draining_response, prepare_chat_request, read_chat_request, retry_later,
+                                     route_auto, start_chat_trace, validate_chat_request)
+from app.routes.chat_stream import stream_chat
+from app.routes.provider_factory import COMPATIBLE_PROVIDERS, get_session_id
+from app.streaming import drain, format_sse, streams
 
 chat_bp = Blueprint('chat', __name__)
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 @chat_bp.route('/')
@@ -29,9 +45,10 @@ def index():
     Render the main chat UI.
 
     Returns:
-        str: Rendered HTML page.
+        str: Rendered HTML page (with a model select per configured OpenAI-compatible provider).
     """
-    return render_template('index.html')
+    compatible = {name: options.get('label', name) for name, options in COMPATIBLE_PROVIDERS.items()}
+    return render_template('index.html', compatible_providers=compatible)
 
 @chat_bp.route('/chat', methods=['POST', 'GET'])
 def chat():
@@ -40,64 +57,137 @@ def chat():
 
     POST or GET parameters:
         message (str): User message.
-        providers (dict): Provider names mapped to model names.
+        providers (dict): Provider names mapped to model names. Provider 'auto' lets the
+            latency router pick among AUTO_ROUTE_CANDIDATES; its decision is returned as
+            'route' (JSON) or an `event: route` frame (SSE).
         use_reasoning (bool): Whether to include reasoning.
         use_streaming (bool): Whether to stream responses.
+        history_mode (str): Optional 'window' or 'retrieval'; remembered per session.
+        generation (dict): Optional max_tokens, stop, temperature and reasoning_max_tokens
+            (see app/providers/generation.py), over the configured per-model defaults. GET
+            takes them as separate parameters (stop repeated per sequence).
+        deadline (float): Optional seconds to wait for non-streaming answers. Providers
+            still generating then are listed under 'pending' (provider -> job id) and
+            continue in the background (see app/routes/job_routes.py).
 
     Returns:
-        JSON response or streaming response.
+        JSON response or streaming response (503 while the server is draining,
+        429 with Retry-After when admission control rejects the request). Profiled
+        requests (see app.observability.profiling) name their profile in X-Profile.
     """
+    if drain.draining:
+        return draining_response()
+    attach_profiler()
     try:
-        if request.method == 'GET':
-            message = request.args.get('message')
-            providers = json.loads(request.args.get('providers'))
-            use_reasoning = request.args.get('use_reasoning') == 'true'
-            use_streaming = request.args.get('use_streaming') == 'true'
-        else:
-            data = request.json
-            message = data.get('message')
-            providers = data.get('providers', {})
-            use_reasoning = data.get('use_reasoning', False)
-            use_streaming = data.get('use_streaming', False)
-
-        logger.debug(f"Received chat request: message={message}, providers={providers}, use_reasoning={use_reasoning}, use_streaming={use_streaming}")
-
-        if 'llm_provider' not in session:
-            session['llm_provider'] = {}
-
-        if use_streaming:
-            def generate():
-                try:
-                    for provider, model in providers.items():
-                        yield f"data: {provider}\n\n"
-                        llm = get_llm_provider(provider)
-                        for chunk in llm.generate_stream(message, model, use_reasoning):
-                            yield f"data: {chunk}\n\n"
-                        yield "data: [DONE]\n\n"
-                except Exception as e:
-                    logger.error(f"Error in generate function: {str(e)}")
-                    yield f"data: Error: {str(e)}\n\n"
-            return Response(stream_with_context(generate()), content_type='text/event-stream')
-        else:
-            responses = {}
-            for provider, model in providers.items():
-                llm = get_llm_provider(provider)
-                try:
-                    if use_reasoning:
-                        responses[provider] = llm.generate_response_with_reasoning(message, model)
-                    else:
-                        responses[provider] = llm.generate_response(message, model)
-                    session['llm_provider'][provider] = llm.to_dict()
-                except Exception as e:
-                    logger.error(f"Error generating response for provider {provider}: {str(e)}")
-                    responses[provider] = f"Error: {str(e)}"
-            
-            return jsonify({'responses': responses})
+        params = read_chat_request()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received chat request: message=%s, providers=%s, use_reasoning=%s, use_streaming=%s",
+                         redact_body(params['message']), params['providers'], params['use_reasoning'],
+                         params['use_streaming'])
+        error = prepare_chat_request(params)
+        if error:
+            return jsonify({'error': error}), 400
+        session_id = get_session_id()
+        try:
+            planned = plan_chat(session_id, params)
+        except BudgetExceeded as e:
+            return retry_later(e)
+
+        trace = start_chat_trace(params, g.get('request_id'))
+        try:
+            permit = admit(session_id, params, planned, trace)
+        except AdmissionRejected as e:
+            trace.record_error(e)
+            trace.end()
+            return retry_later(e)
+        return answer_chat(params, planned, session_id, permit, trace)
     except Exception as e:
-        logger.error(f"Unexpected error in chat route: {str(e)}")
-        if 'use_streaming' in locals() and use_streaming:
-            def generate():
-                yield f"data: Error: {str(e)}\n\n"
-            return Response(stream_with_context(generate()), content_type='text/event-stream')
-        else:
-            return jsonify({'error': str(e)}), 500
+        logger.error("Unexpected error in chat route: %s", e)
+        return chat_error(e, locals().get('params'))
+
+def plan_chat(session_id, params):
+    """
+    Join finished deadline stragglers to the history, then plan the models to call.
+
+    Returns:
+        dict: Provider names mapped to the models to call (after budget downgrades).
+
+    Raises:
+        BudgetExceeded: If the request should get 429.
+    """
+    if 'llm_provider' not in session:
+        session['llm_provider'] = {}
+    # Answers of earlier deadline stragglers join the history before this turn
+    if jobs.commit_finished(session_id, session['llm_provider']):
+        session.modified = True
+    # Estimated from session state alone, before any provider is built or called
+    return budget.plan(session_id, params['providers'], session['llm_provider'], params['message'],
+                       params['use_reasoning'])
+
+def chat_error(error, params):
+    """
+    Answer an unexpected error, as an SSE frame if the request asked for streaming.
+    """
+    if params is not None and params['use_streaming']:
+        def generate():
+            yield format_sse(f"Error: {str(error)}")
+        return Response(stream_with_context(generate()), content_type='text/event-stream')
+    return jsonify({'error': str(error)}), 500
+
+def attach_profiler():
+    """
+    Profile the request if it asked for it (see app.observability.profiling), naming the profile in X-Profile.
+    """
+    profiler = profiling.profiler_for_request(request.headers, g.request_id)
+    if profiler is None:
+        return
+
+    @after_this_request
+    def stop_profiler(response):
+        # Close runs after the last SSE frame, so streaming profiles cover the whole generator
+        response.call_on_close(profiler.stop)
+        response.headers['X-Profile'] = os.path.basename(profiler.path)
+        return response
+
+def answer_chat(params, planned, session_id, permit, trace):
+    """
+    Answer an admitted request: streamed, with a deadline, or provider by provider.
+
+    Returns:
+        Response: SSE stream or JSON with 'responses' (and 'pending', 'route' where they apply).
+    """
+    message, providers, route = params['message'], params['providers'], params['route']
+    if params['use_streaming']:
+        generate = stream_chat(message, planned, params['use_reasoning'], params['history_mode'], trace, session_id,
+                               providers, route, params['generation'], copy.deepcopy(session['llm_provider']))
+        response = Response(stream_with_context(generate), content_type='text/event-stream')
+        # Released when the stream finishes, is cancelled or the client disconnects
+        response.call_on_close(permit.release)
+        return response
+    if params['deadline'] is not None:
+        return compare_with_deadline(message, planned, providers, params['use_reasoning'], params['history_mode'],
+                                     params['deadline'], session_id, permit, trace, route, params['generation'])
+    with permit, trace:
+        responses = compare_chat(message, planned, providers, params['use_reasoning'], params['history_mode'],
+                                 session_id, params['generation'])
+    if route is not None:
+        return jsonify({'responses': responses, 'route': route})
+    return jsonify({'responses': responses})
+
+@chat_bp.route('/chat/cancel', methods=['POST'])
+def cancel_chat():
+    """
+    Cancel an in-flight streaming chat, closing its upstream provider stream.
+
+    POST JSON:
+        stream_id (str): Id from the stream's first `stream` event.
+
+    Returns:
+        JSON response with 'cancelled' (200), or an error (404) if the stream is unknown or finished.
+    """
+    data = request.get_json(silent=True) or {}
+    if streams.cancel(data.get('stream_id'), reason='client'):
+        return jsonify({'cancelled': True}), 200
+    return jsonify({'error': 'Unknown or finished stream'}), 404
+
+__all__ = ["chat_bp", "route_auto", "validate_chat_request"]
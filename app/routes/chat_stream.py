@@ -0,0 +1,188 @@
+"""
+chat_stream.py - Generators for streaming chat responses
+
+Contains chat_events(), which streams each selected provider in turn as transport-neutral
+events and makes sure upstream generation stops as soon as nobody is listening: on client
+disconnect, on cancel, and at the drain deadline. stream_chat() encodes those events as
+SSE for streaming /chat requests; the WebSocket transport (ws_routes.py) frames them itself.
+stream_chat() runs the events on a producer thread and sends an SSE comment every
+HEARTBEAT_SECONDS of silence, so a client that disconnected during an upstream stall is
+noticed by the failed write and its stream cancelled, rather than at the next chunk.
+Each provider's answer comes from provider_chunks() (provider_stream.py): its chunks pass
+through the STREAM_TRANSFORMS pipeline (app/streaming/transforms.py), and a stop rule ends
+the answer early and closes its upstream stream.
+
+SSE protocol (see static/js/main.js):
+- `event: stream` with the stream id (needed for /chat/cancel)
+- `event: route` with the routing decision (JSON) when the request asked for provider `auto`
+- unnamed events: provider name, then its chunks, then `[DONE]`, per provider
+- `event: downgrade` right after a provider name when a budget switched its model
+  ('provider:model')
+- `event: end` after the last provider; `event: cancelled` / `event: shutdown` if cut short
+- `: keep-alive` comments while upstream is silent (ignored by EventSource)
+
+Dependencies:
+- json, logging
+- app.observability.tracing.NOOP_SPAN
+- app.routes.provider_stream.provider_chunks
+- app.streaming (drain, format_sse, streams, with_heartbeats)
+
+@author Auto-refactored by Cline
+"""
+
+import json
+import logging
+
+from app.observability.tracing import NOOP_SPAN
+from app.routes.provider_stream import provider_chunks
+from app.streaming import drain, format_sse, streams, with_heartbeats
+
+logger = logging.getLogger(__name__)
+
+# ====================================
+# Constants and configuration
+# ====================================
+# Seconds of upstream silence before a keep-alive; bounds how long a disconnect goes unnoticed
+HEARTBEAT_SECONDS = 5
+
+def chat_events(message, providers, use_reasoning, history_mode=None, trace=NOOP_SPAN, session_id=None,
+                requested=None, states=None, route=None, generation=None):
+    """
+    Stream responses from each provider as transport-neutral events.
+
+    Events are (kind, data) tuples:
+    - ('stream', stream id), first, then ('route', decision) if `route` is given
+    - ('provider', name), then ('downgrade', 'provider:model') if a budget switched its
+      model, its ('chunk', text) events and ('done', name), per provider
+    - ('error', message) if generation failed
+    - last, exactly one of ('end', ''), ('cancelled', reason) or ('shutdown', message)
+
+    Args:
+        message (str): User message.
+        providers (dict): Provider names mapped to model names.
+        use_reasoning (bool): Whether to include reasoning.
+        history_mode (str): Optional history mode to apply to each provider.
+        trace (Span): Span of this stream, ended when the stream ends.
+        session_id (str): Browser session id usage is recorded under.
+        requested (dict): Models the client asked for, where a budget downgraded them.
+        states (dict): Provider names mapped to serialized provider state, read and updated
+            in place; None restores from the Flask session (and saves nothing).
+        route (dict): Routing decision of an `auto` request (see app/control/routing.py).
+        generation (dict): Requested generation options, merged with each model's configured
+            defaults (see app/providers/generation.py).
+
+    Yields:
+        tuple: (kind, data) events.
+
+    Side effects:
+        Registers the stream in `streams` for its lifetime; closing this generator early
+        (client disconnect) cancels it and closes the current upstream stream. Each
+        provider's token usage is recorded in the usage ledger, including cut-short streams,
+        and completed or failed streams are timed for the latency router (answers ended by a
+        stop rule are not, their latency being partial).
+    """
+    with trace:
+        handle = streams.open(providers)
+        drain.stream_opened()
+        finished = False
+        try:
+            yield 'stream', handle.stream_id
+            if route is not None:
+                yield 'route', route
+            requested = requested or providers
+            for provider, model in providers.items():
+                if drain.draining:
+                    # No new upstream calls while draining; the stream ends with `shutdown`
+                    handle.cancel('shutdown')
+                    break
+                yield 'provider', provider
+                if model != requested.get(provider, model):
+                    yield 'downgrade', f"{provider}:{model}"
+                llm = yield from provider_chunks(handle, provider, model, message, use_reasoning, history_mode,
+                                                 states, generation, session_id, requested.get(provider))
+                if handle.cancelled:
+                    break
+                streams.finish_provider(handle)
+                if states is not None:
+                    states[provider] = llm.to_dict()
+                yield 'done', provider
+            yield closing_event(handle)
+            finished = True
+        except Exception as e:
+            logger.error("Error in generate function: %s", e)
+            trace.record_error(e)
+            yield 'error', f"Error: {str(e)}"
+            yield 'end', ''
+            finished = True
+        finally:
+            # Not finished means the generator was closed at a yield: the client went away
+            streams.close(handle, finished)
+            drain.stream_closed()
+            trace.set_attribute('cancel_reason', handle.reason)
+
+def closing_event(handle):
+    """
+    Get the last event of a stream that was not cut short by an error.
+
+    Args:
+        handle (StreamHandle): The stream.
+
+    Returns:
+        tuple: ('shutdown', message), ('cancelled', reason) or ('end', '').
+    """
+    if handle.reason == 'shutdown':
+        return 'shutdown', 'Server is restarting'
+    if handle.cancelled:
+        return 'cancelled', handle.reason
+    return 'end', ''
+
+def stream_chat(message, providers, use_reasoning, history_mode=None, trace=NOOP_SPAN, session_id=None,
+                requested=None, route=None, generation=None, states=None):
+    """
+    Stream responses from each provider as SSE frames.
+
+    Args:
+        message (str): User message.
+        providers (dict): Provider names mapped to model names.
+        use_reasoning (bool): Whether to include reasoning.
+        history_mode (str): Optional history mode to apply to each provider.
+        trace (Span): Root span of the request, ended when the stream ends.
+        session_id (str): Browser session id usage is recorded under.
+        requested (dict): Models the client asked for, where a budget downgraded them.
+        route (dict): Routing decision of an `auto` request, sent as `event: route`.
+        generation (dict): Requested generation options (see chat_events()).
+        states (dict): Snapshot of the session's provider states; the events run on another
+            thread, which cannot read the Flask session.
+
+    Yields:
+        str: Encoded SSE frames (see chat_events() for the events behind them).
+    """
+    stream_id = []
+    events = chat_events(message, providers, use_reasoning, history_mode, trace, session_id, requested,
+                         {} if states is None else states, route=route, generation=generation)
+
+    def disconnected():
+        # Unblocks the producer thread: cancelling closes the upstream stream
+        if stream_id:
+            streams.cancel(stream_id[0], reason='disconnect')
+
+    frames = with_heartbeats(events, HEARTBEAT_SECONDS, on_abandon=disconnected)
+    try:
+        for kind, data in frames:
+            if kind == 'heartbeat':
+                yield ": keep-alive\n\n"
+                continue
+            if kind == 'stream':
+                stream_id.append(data)
+            if kind in ('provider', 'chunk', 'error'):
+                yield format_sse(data)
+            elif kind == 'done':
+                yield format_sse('[DONE]')
+            elif kind == 'route':
+                yield format_sse(json.dumps(data), event='route')
+            else:
+                yield format_sse(data, event=kind)
+    finally:
+        # Closing the SSE generator (client disconnect) cancels the stream; the producer
+        # thread then closes chat_events, which runs its cleanup
+        frames.close()
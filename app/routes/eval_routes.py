@@ -0,0 +1,127 @@
+"""
+eval_routes.py - Batch evaluation endpoints
+
+Defines Flask routes to start a batch evaluation run in the background, poll its progress
+and download its JSONL results. Runs spend upstream tokens outside admission control and
+budgets, so every route requires the admin token (see admin_routes.require_admin()).
+
+Dependencies:
+- flask (Blueprint, request, jsonify, send_file)
+- threading, uuid, re, os, json
+- app.evaluation (BatchRunner, load_prompts)
+- app.routes.admin_routes.require_admin
+- app.routes.provider_factory.PROVIDER_CLASSES
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import json
+import os
+import re
+import threading
+import uuid
+
+from flask import Blueprint, request, jsonify, send_file
+
+from app.evaluation import BatchRunner, load_prompts
+from app.routes.admin_routes import require_admin
+from app.routes.provider_factory import PROVIDER_CLASSES
+from config import Config
+
+eval_bp = Blueprint('eval', __name__)
+eval_bp.before_request(require_admin)
+
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_runs = {}
+_runs_lock = threading.Lock()
+
+def _output_path(run_id):
+    return os.path.join(Config.EVAL_OUTPUT_DIR, f"{run_id}.jsonl")
+
+@eval_bp.route('/eval/runs', methods=['POST'])
+def start_run():
+    """
+    Start (or resume) a batch evaluation run in the background.
+
+    Accepts multipart form data (file 'prompts' plus JSON-encoded fields) or a JSON body
+    where 'prompts' is a list of {"id", "prompt"} records.
+
+    Fields:
+        prompts (file | list): JSONL prompt file or list of prompt records.
+        matrix (dict | list): Provider/model matrix, e.g. {"groq": ["llama-3.1-8b-instant"]}.
+        concurrency (dict): Optional worker threads per provider.
+        use_reasoning (bool): Optional, run cells with reasoning.
+        run_id (str): Optional id of an earlier run to resume.
+
+    Returns:
+        JSON response with 'run_id' (202), or an error (400 for an invalid request, unknown
+        providers included; 409).
+    """
+    try:
+        prompts, matrix, concurrency, use_reasoning, run_id = read_run_request()
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f"Invalid evaluation request: {e}"}), 400
+
+    run_id = run_id or uuid.uuid4().hex
+    if not RUN_ID_PATTERN.match(run_id):
+        return jsonify({'error': 'Invalid run_id'}), 400
+
+    with _runs_lock:
+        if run_id in _runs and not _runs[run_id].finished:
+            return jsonify({'error': 'Run is already in progress'}), 409
+        try:
+            runner = BatchRunner(prompts, matrix, _output_path(run_id), concurrency=concurrency,
+                                 default_concurrency=Config.EVAL_DEFAULT_CONCURRENCY,
+                                 use_reasoning=use_reasoning, providers=PROVIDER_CLASSES)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f"Invalid evaluation request: {e}"}), 400
+        _runs[run_id] = runner
+    threading.Thread(target=runner.run, name=f"eval-{run_id}", daemon=True).start()
+    return jsonify({'run_id': run_id}), 202
+
+def read_run_request():
+    """
+    Read the fields of a POST /eval/runs request (multipart form or JSON).
+
+    Returns:
+        tuple: (prompts, matrix, concurrency, use_reasoning, run_id).
+
+    Raises:
+        KeyError, TypeError, ValueError: If a field is missing or malformed.
+    """
+    if request.files.get('prompts'):
+        form = request.form
+        prompts = load_prompts(request.files['prompts'].read().decode('utf-8').splitlines())
+        return (prompts, json.loads(form['matrix']), json.loads(form.get('concurrency', '{}')),
+                form.get('use_reasoning') == 'true', form.get('run_id'))
+    data = request.json
+    prompts = load_prompts(json.dumps(record) for record in data['prompts'])
+    return (prompts, data['matrix'], data.get('concurrency', {}), data.get('use_reasoning', False),
+            data.get('run_id'))
+
+@eval_bp.route('/eval/runs/<run_id>', methods=['GET'])
+def run_status(run_id):
+    """
+    Get the progress of a run started by this process.
+
+    Returns:
+        JSON response with counters and 'finished', or 404.
+    """
+    runner = _runs.get(run_id)
+    if runner is None:
+        return jsonify({'error': 'Unknown run'}), 404
+    return jsonify(dict(runner.status(), run_id=run_id))
+
+@eval_bp.route('/eval/runs/<run_id>/results', methods=['GET'])
+def run_results(run_id):
+    """
+    Download the JSONL results written so far.
+
+    Returns:
+        JSONL file, or 404.
+    """
+    if not RUN_ID_PATTERN.match(run_id) or not os.path.exists(_output_path(run_id)):
+        return jsonify({'error': 'Unknown run'}), 404
+    return send_file(os.path.abspath(_output_path(run_id)), mimetype='application/x-ndjson')
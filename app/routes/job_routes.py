@@ -0,0 +1,117 @@
+"""
+job_routes.py - Endpoints for background chat jobs
+
+Defines the routes for providers that missed the deadline of a deadline-bounded /chat
+compare (see app/jobs/registry.py). A job is only visible to the session that started it;
+unknown, expired and foreign job ids all answer 404.
+
+Routes:
+- GET /chat/jobs/<job_id>: status and text so far; commits a finished job to the session's history
+- GET /chat/jobs/<job_id>/events: SSE stream of the job's text, then `event: done`,
+  `event: error` or `event: cancelled`
+- POST /chat/jobs/<job_id>/cancel: stop a running job
+
+Dependencies:
+- flask (Blueprint, jsonify, Response, session, stream_with_context)
+- app.jobs.jobs
+- app.routes.provider_factory.get_session_id
+- app.streaming (drain, format_sse)
+
+@author Auto-refactored by Cline
+"""
+
+from flask import Blueprint, jsonify, Response, session, stream_with_context
+
+from app.jobs import jobs
+from app.routes.provider_factory import get_session_id
+from app.streaming import drain, format_sse
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# ====================================
+# Constants and configuration
+# ====================================
+# Seconds between SSE keep-alive comments while a job produces nothing
+KEEPALIVE_SECONDS = 15
+
+@jobs_bp.route('/chat/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Poll a chat job.
+
+    Returns:
+        JSON with job_id, provider, model, status ('running', 'done', 'error', 'cancelled'),
+        content (partial while running) and, once finished, result (shaped like a /chat
+        response entry); 404 if the job is unknown.
+    """
+    session_id = get_session_id()
+    job = jobs.get(job_id, session_id)
+    if job is None:
+        # Finished on another worker (shared state backend only)
+        data = jobs.results.get(job_id, session_id)
+        if data is None:
+            return jsonify({'error': 'Unknown or expired job'}), 404
+        if jobs.results.commit_shared(job_id, data, session.setdefault('llm_provider', {})):
+            session.modified = True
+        data.pop('message', None)
+        data.pop('history_mode', None)
+        return jsonify(data), 200
+    data = job.to_dict()
+    if job.finished:
+        data['result'] = job.result()
+        if jobs.results.commit(job, session.setdefault('llm_provider', {})):
+            session.modified = True
+    return jsonify(data), 200
+
+@jobs_bp.route('/chat/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Follow a chat job as Server-Sent Events.
+
+    Unnamed events carry the text (everything so far first, then new chunks); the stream
+    ends with `event: done`, `event: error` (message) or `event: cancelled` (reason). The
+    session cookie cannot change once streaming started, so the finished job is committed
+    to history by the next poll or chat of the session.
+
+    Returns:
+        text/event-stream response, or 404 if the job is unknown.
+    """
+    session_id = get_session_id()
+    job = jobs.get(job_id, session_id)
+    if job is None:
+        data = jobs.results.get(job_id, session_id)
+        if data is None:
+            return jsonify({'error': 'Unknown or expired job'}), 404
+
+        def replay():
+            if data['content']:
+                yield format_sse(data['content'])
+            yield format_sse(data.get('error') or data.get('reason') or '', event=data['status'])
+        return Response(replay(), content_type='text/event-stream')
+
+    def generate():
+        for kind, text in job.follow(poll=KEEPALIVE_SECONDS):
+            if kind == 'chunk':
+                yield format_sse(text)
+            elif kind == 'wait':
+                if drain.expired():
+                    # The job itself is cancelled at the deadline; stop following too
+                    yield format_sse('Server is restarting', event='shutdown')
+                    return
+                yield ": keep-alive\n\n"
+            else:
+                yield format_sse(text, event=kind)
+
+    return Response(stream_with_context(generate()), content_type='text/event-stream')
+
+@jobs_bp.route('/chat/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancel a running chat job, closing its upstream stream.
+
+    Returns:
+        JSON with 'cancelled' (200), or an error (404) if the job is unknown or finished.
+    """
+    if jobs.cancel(job_id, get_session_id(), reason='client'):
+        return jsonify({'cancelled': True}), 200
+    return jsonify({'error': 'Unknown or finished job'}), 404
@@ -0,0 +1,27 @@
+"""
+metrics_routes.py - Metrics endpoint
+
+Defines the Flask route that exposes the in-process metrics registry as JSON.
+
+Dependencies:
+- flask (Blueprint, jsonify)
+- app.observability.metrics
+
+@author Auto-refactored by Cline
+"""
+
+from flask import Blueprint, jsonify
+
+from app.observability import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Return a snapshot of all counters, gauges and distributions.
+
+    Returns:
+        JSON response with 'counters', 'gauges' and 'distributions'.
+    """
+    return jsonify(metrics.snapshot())
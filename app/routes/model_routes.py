@@ -0,0 +1,29 @@
+"""
+model_routes.py - Model catalog endpoint
+
+Defines the Flask route that lists the models each provider currently offers, served from
+the in-memory catalog (no upstream call per request).
+
+Dependencies:
+- flask (Blueprint, jsonify)
+- app.catalog.model_catalog
+
+@author Auto-refactored by Cline
+"""
+
+from flask import Blueprint, jsonify
+
+from app.catalog import model_catalog
+
+models_bp = Blueprint('models', __name__)
+
+@models_bp.route('/models', methods=['GET'])
+def get_models():
+    """
+    Return the cached model catalog.
+
+    Returns:
+        JSON response mapping each provider to 'models', 'source' ('api' or 'static')
+        and 'fetched_at'.
+    """
+    return jsonify(model_catalog.snapshot())
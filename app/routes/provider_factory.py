@@ -2,15 +2,24 @@
 provider_factory.py - Factory function for LLM provider instances
 
 Contains the get_llm_provider() function, which instantiates or restores provider classes
-based on the provider name and session data.
+based on the provider name and session data, and create_llm_provider() for session-free
+instances (used by background workers). PROVIDER_CLASSES holds the built-in providers plus
+one class per OPENAI_COMPATIBLE_PROVIDERS entry, recording to or replaced by cassettes when
+CASSETTE_MODE is 'record' or 'replay'.
 
 Dependencies:
 - flask.session
+- uuid
 - app.providers.* (GroqProvider, GeminiProvider, AnthropicProvider, OpenAIProvider, CerebrasProvider)
+- app.providers.compatible_providers (compatible_provider_classes, parse_compatible_providers)
+- app.providers.cassette_provider (cassette_provider_classes, parse_speed)
+- config.Config
 
 @author Auto-refactored by Cline
 """
 
+import uuid
+
 from flask import session
 
 from app.providers.groq_provider import GroqProvider
@@ -18,13 +27,65 @@ from app.providers.gemini_provider import GeminiProvider
 from app.providers.anthropic_provider import AnthropicProvider
 from app.providers.openai_provider import OpenAIProvider
 from app.providers.cerebras_provider import CerebrasProvider
+from app.providers.compatible_providers import compatible_provider_classes, parse_compatible_providers
+from app.providers.cassette_provider import cassette_provider_classes, parse_speed
+from config import Config
+
+def get_session_id():
+    """
+    Get a stable id for the current browser session, creating one if needed.
+
+    Returns:
+        str: Session id.
+
+    Side effects:
+        Stores the id in the Flask session on first use.
+    """
+    if 'session_id' not in session:
+        session['session_id'] = uuid.uuid4().hex
+    return session['session_id']
+
+PROVIDER_CLASSES = {
+    'groq': GroqProvider,
+    'gemini': GeminiProvider,
+    'anthropic': AnthropicProvider,
+    'openai': OpenAIProvider,
+    'cerebras': CerebrasProvider,
+}
+
+# Configured OpenAI-compatible endpoints (name -> options), e.g. self-hosted inference servers
+COMPATIBLE_PROVIDERS = parse_compatible_providers(Config.OPENAI_COMPATIBLE_PROVIDERS)
+PROVIDER_CLASSES.update(compatible_provider_classes(COMPATIBLE_PROVIDERS, reserved=PROVIDER_CLASSES))
+# Record real calls, or replay them offline (benchmarks, CI)
+PROVIDER_CLASSES.update(cassette_provider_classes(PROVIDER_CLASSES, Config.CASSETTE_MODE, Config.CASSETTE_DIR,
+                                                  parse_speed(Config.CASSETTE_SPEED)))
+
+def create_llm_provider(provider):
+    """
+    Create a fresh provider instance without touching session state.
+
+    Safe to call outside a request context (e.g. from background workers).
+
+    Args:
+        provider (str): Provider name (a key of PROVIDER_CLASSES).
+
+    Returns:
+        LLMProvider: A new instance of the requested provider.
+
+    Raises:
+        ValueError: If the provider name is unknown.
+    """
+    if provider not in PROVIDER_CLASSES:
+        raise ValueError(f"Unknown provider: {provider}")
+    return PROVIDER_CLASSES[provider]()
 
 def get_llm_provider(provider, new_instance=False):
     """
     Factory function to get or restore an LLM provider instance.
 
     Args:
-        provider (str): Provider name ('groq', 'gemini', 'anthropic', 'openai', 'cerebras').
+        provider (str): Provider name ('groq', 'gemini', 'anthropic', 'openai', 'cerebras', or a
+            configured OpenAI-compatible provider).
         new_instance (bool): If True, create a new instance ignoring session state.
 
     Returns:
@@ -33,28 +94,26 @@ def get_llm_provider(provider, new_instance=False):
     Raises:
         ValueError: If the provider name is unknown.
     """
-    if new_instance or provider not in session.get('llm_provider', {}):
-        if provider == 'groq':
-            return GroqProvider()
-        elif provider == 'gemini':
-            return GeminiProvider()
-        elif provider == 'anthropic':
-            return AnthropicProvider()
-        elif provider == 'openai':
-            return OpenAIProvider()
-        elif provider == 'cerebras':
-            return CerebrasProvider()
-        else:
-            raise ValueError(f"Unknown provider: {provider}")
-    else:
-        llm_dict = session['llm_provider'][provider]
-        if provider == 'groq':
-            return GroqProvider.from_dict(llm_dict)
-        elif provider == 'gemini':
-            return GeminiProvider.from_dict(llm_dict)
-        elif provider == 'anthropic':
-            return AnthropicProvider.from_dict(llm_dict)
-        elif provider == 'openai':
-            return OpenAIProvider.from_dict(llm_dict)
-        elif provider == 'cerebras':
-            return CerebrasProvider.from_dict(llm_dict)
+    if new_instance:
+        return create_llm_provider(provider)
+    return provider_from_state(provider, session.get('llm_provider', {}).get(provider))
+
+def provider_from_state(provider, state):
+    """
+    Restore a provider instance from serialized state, without touching the Flask session.
+
+    Args:
+        provider (str): Provider name (a key of PROVIDER_CLASSES).
+        state (dict | None): LLMProvider.to_dict() output, or None for a fresh instance.
+
+    Returns:
+        LLMProvider: The restored (or new) provider instance.
+
+    Raises:
+        ValueError: If the provider name is unknown.
+    """
+    if state is None:
+        return create_llm_provider(provider)
+    if provider not in PROVIDER_CLASSES:
+        raise ValueError(f"Unknown provider: {provider}")
+    return PROVIDER_CLASSES[provider].from_dict(state)
@@ -0,0 +1,116 @@
+"""
+provider_stream.py - One provider's part of a chat stream
+
+Contains provider_chunks(), used by chat_events() (chat_stream.py) for each provider of a
+stream: restores the provider from session state, applies the history mode and generation
+options, streams its answer through the STREAM_TRANSFORMS pipeline and records the
+upstream calls in the usage ledger. The upstream stream is closed however the loop ends:
+a stop rule, a cancel, or the generator being closed at a yield (client disconnect).
+
+Dependencies:
+- app.control.router
+- app.observability (log_context, tracer)
+- app.providers.generation.resolve_generation
+- app.routes.provider_factory (get_llm_provider, provider_from_state)
+- app.streaming.build_pipeline
+- app.usage.usage_ledger
+
+@author Auto-refactored by Cline
+"""
+
+from app.control import router
+from app.observability import log_context, tracer
+from app.providers.generation import resolve_generation
+from app.routes.provider_factory import get_llm_provider, provider_from_state
+from app.streaming import build_pipeline
+from app.usage import usage_ledger
+
+def restore_provider(provider, states, history_mode):
+    """
+    Build a provider instance with the conversation it has so far.
+
+    Args:
+        provider (str): Provider name.
+        states (dict): Provider names mapped to serialized state; None reads the Flask session.
+        history_mode (str): Optional history mode to apply.
+
+    Returns:
+        LLMProvider: The provider.
+    """
+    with tracer.span('session.restore'):
+        if states is None:
+            llm = get_llm_provider(provider)
+        else:
+            llm = provider_from_state(provider, states.get(provider))
+    if history_mode:
+        llm.history_mode = history_mode
+    return llm
+
+def provider_chunks(handle, provider, model, message, use_reasoning, history_mode=None, states=None,
+                    generation=None, session_id=None, requested_model=None):
+    """
+    Stream one provider's answer as ('chunk', text) events.
+
+    Args:
+        handle (StreamHandle): The stream; its cancel flag is checked between chunks.
+        provider (str): Provider name.
+        model (str): Model to call.
+        message (str): User message.
+        use_reasoning (bool): Whether to include reasoning.
+        history_mode (str): Optional history mode.
+        states (dict): Serialized provider states (see restore_provider()).
+        generation (dict): Requested generation options.
+        session_id (str): Browser session id usage is recorded under.
+        requested_model (str): Model the client asked for.
+
+    Yields:
+        tuple: ('chunk', text) events.
+
+    Returns:
+        LLMProvider: The provider, whose state the caller saves once the answer is done.
+
+    Side effects:
+        Completed or failed streams are timed for the latency router; answers cut short by
+        a cancel or a stop rule are not, their latency being partial.
+    """
+    with log_context(provider=provider, model=model), tracer.span('provider', provider=provider, model=model):
+        llm = restore_provider(provider, states, history_mode)
+        llm.generation = resolve_generation(provider, model, generation)
+        handle.start_provider(provider, model, llm)
+        prompt_estimate = llm.estimate_prompt_tokens(message)
+        timing = router.timing(provider, model)
+        pipeline = build_pipeline()
+        chunks = llm.generate_stream(message, model, use_reasoning)
+        local_chunks = llm.local_chunks
+        try:
+            for chunk in chunks:
+                if handle.cancelled:
+                    # Also set at the drain deadline (see StreamRegistry.cancel_all())
+                    break
+                if llm.local_chunks == local_chunks:
+                    # Reasoning headers are yielded before their upstream stream opens
+                    timing.chunk()
+                local_chunks = llm.local_chunks
+                handle.record_chunk(chunk)
+                text = pipeline.feed(chunk)
+                if text:
+                    yield 'chunk', text
+                if pipeline.stopped:
+                    # Leaving the loop closes the upstream stream below
+                    break
+            if not handle.cancelled:
+                text = pipeline.flush()
+                if text:
+                    yield 'chunk', text
+        except Exception:
+            timing.fail()
+            raise
+        finally:
+            # Runs on disconnect too (GeneratorExit at a yield), closing the SDK stream
+            chunks.close()
+            pipeline.report()
+            usage_ledger.record_call(session_id, provider, model, llm, prompt_estimate, handle.current_tokens,
+                                     requested_model)
+    if not handle.cancelled and not pipeline.stopped:
+        timing.finish(handle.current_tokens)
+    return llm
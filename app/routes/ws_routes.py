@@ -0,0 +1,193 @@
+"""
+ws_routes.py - WebSocket chat transport
+
+Defines the /ws endpoint, an alternative to POST /chat and SSE streaming that carries any
+number of concurrent conversations and provider streams over one persistent connection
+(see app/streaming/multiplex.py for framing and flow control). Each turn goes through the
+same catalog validation, budget and admission checks as /chat; its providers stream in
+parallel (one admission slot each, see app/control/admission.py; turns run in ws_turn.py),
+and each conversation keeps its provider history for the connection's lifetime, starting
+from the session's history. A connection holds one server thread (SERVER_THREADS) for its
+lifetime, plus up to WS_MAX_STREAMS stream threads while providers generate.
+
+Client -> server frames (JSON text):
+- {"type": "chat", "conv", "message", "providers", "use_reasoning", "history_mode", "generation"?}
+  (generation: options as in /chat, see app/providers/generation.py)
+- {"type": "cancel", "conv", "provider"?}  (no provider cancels the whole turn)
+- {"type": "ack", "conv", "seq"}  (highest seq processed; grants flow-control credit)
+- {"type": "reset", "conv", "provider"}  (forget the provider's history, e.g. after /clear_history)
+
+Server -> client frames (JSON text, all tagged with "conv" and "seq" except ready/shutdown):
+- ready {window}: sent on connect
+- accepted {providers, route?}: the models that will answer (after budget downgrades), and the
+  routing decision when the frame asked for provider `auto` (see app/control/routing.py)
+- rejected {status, error, retry_after?}: 400 invalid, 409 busy, 429 budget/admission, 503 draining
+- start {provider, model, requested_model?}, chunk {provider, data}, done {provider}
+- error {provider, data}, cancelled {provider, reason}, shutdown {provider, data}
+- end: every provider of the turn has finished
+- shutdown (connection-level): the server is restarting; reconnect
+
+Dependencies:
+- flask (Blueprint, g, session)
+- flask_sock.Sock
+- Python standard library (concurrent.futures, contextvars, copy, json, threading)
+- config.Config
+- app.control (budget, BudgetExceeded)
+- app.observability.metrics
+- app.routes.chat_request.prepare_chat_request
+- app.routes.ws_turn (run_turn, stream_provider)
+- app.routes.provider_factory.get_session_id
+- app.streaming (drain, Multiplexer)
+
+@author Auto-refactored by Cline
+"""
+
+import contextvars
+import copy
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, g, session
+from flask_sock import Sock
+
+from config import Config
+from app.control import BudgetExceeded, budget
+from app.observability import metrics
+from app.routes.chat_request import prepare_chat_request
+from app.routes.provider_factory import get_session_id
+from app.routes.ws_turn import run_turn, stream_provider
+from app.streaming import Multiplexer, drain
+
+ws_bp = Blueprint('ws', __name__)
+sock = Sock()
+
+# ====================================
+# Constants and configuration
+# ====================================
+# How often the receive loop wakes up to notice a drain
+RECEIVE_POLL_SECONDS = 1.0
+
+@sock.route('/ws', bp=ws_bp)
+def chat_socket(ws):
+    """
+    Serve one multiplexed WebSocket connection until the client or the server closes it.
+
+    Args:
+        ws: flask-sock WebSocket connection.
+    """
+    mux = Multiplexer(ws, Config.WS_STREAM_WINDOW, Config.WS_STALL_TIMEOUT)
+    session_id = get_session_id()
+    # History is read from the session once; the connection cannot write cookies afterwards
+    initial_states = dict(session.get('llm_provider', {}))
+    pool = ThreadPoolExecutor(max_workers=Config.WS_MAX_STREAMS, thread_name_prefix="ws-stream")
+    metrics.increment("ws.connections")
+    try:
+        mux.send({"type": "ready", "window": Config.WS_STREAM_WINDOW})
+        while True:
+            if drain.draining and not mux.busy():
+                mux.send({"type": "shutdown", "data": "Server is restarting"})
+                break
+            raw = ws.receive(timeout=RECEIVE_POLL_SECONDS)
+            if raw is None:
+                continue
+            try:
+                frame = json.loads(raw)
+                kind = frame.get('type')
+            except (ValueError, AttributeError):
+                mux.send({"type": "error", "error": "Frames must be JSON objects"})
+                continue
+            handle_frame(mux, frame, kind, initial_states, session_id, pool)
+    finally:
+        mux.close()
+        pool.shutdown(wait=False)
+
+def handle_frame(mux, frame, kind, initial_states, session_id, pool):
+    """
+    Act on one client frame (see the frame types above).
+
+    Args:
+        mux (Multiplexer): The connection.
+        frame (dict): The frame.
+        kind (str): Its 'type'.
+        initial_states (dict): Session history that new conversations start from.
+        session_id (str): Browser session id.
+        pool (ThreadPoolExecutor): Connection's provider stream workers.
+    """
+    if kind == 'ack':
+        mux.ack(frame.get('conv'), frame.get('seq'))
+    elif kind == 'cancel':
+        channel = mux.get(frame.get('conv'))
+        if channel is not None:
+            channel.cancel(frame.get('provider'), reason='client')
+    elif kind == 'reset':
+        channel = mux.get(frame.get('conv'))
+        if channel is not None:
+            channel.states.pop(frame.get('provider'), None)
+    elif kind == 'chat':
+        channel = mux.channel(str(frame.get('conv')), lambda: copy.deepcopy(initial_states))
+        start_turn(mux, channel, frame, session_id, pool)
+    else:
+        mux.send({"type": "error", "error": f"Unknown frame type: {kind}"})
+
+def start_turn(mux, channel, frame, session_id, pool):
+    """
+    Validate a chat frame and run its turn on a background thread.
+
+    Admission may wait in the fair queue, so it happens off the receive loop.
+
+    Args:
+        mux (Multiplexer): The connection.
+        channel (Channel): The conversation.
+        frame (dict): The 'chat' frame.
+        session_id (str): Browser session id.
+        pool (ThreadPoolExecutor): Connection's provider stream workers.
+    """
+    if drain.draining:
+        mux.emit(channel, 'rejected', status=503, error='Server is restarting, please retry', retry_after=1)
+        return
+    params = read_chat_frame(frame)
+    error = prepare_chat_request(params) if params['message'] and params['providers'] else 'message and providers are required'
+    if error:
+        mux.emit(channel, 'rejected', status=400, error=error)
+        return
+    if not channel.begin_turn():
+        mux.emit(channel, 'rejected', status=409, error='A turn is already running in this conversation')
+        return
+    try:
+        planned = budget.plan(session_id, params['providers'], channel.states, params['message'],
+                              params['use_reasoning'])
+    except BudgetExceeded as e:
+        channel.end_turn()
+        mux.emit(channel, 'rejected', status=429, error=str(e), retry_after=e.retry_after)
+        return
+
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, name="ws-turn",
+                              args=(run_turn, mux, channel, params, planned, session_id, pool, g.get('request_id')))
+    thread.daemon = True
+    thread.start()
+
+def read_chat_frame(frame):
+    """
+    Read a 'chat' frame's parameters in the shape of chat_request.read_chat_request().
+
+    Turns always stream and have no deadline, so prepare_chat_request() checks them like /chat.
+
+    Args:
+        frame (dict): The 'chat' frame.
+
+    Returns:
+        dict: message, providers, use_reasoning, use_streaming, history_mode, generation and deadline.
+    """
+    return {
+        'message': frame.get('message'),
+        'providers': frame.get('providers') or {},
+        'use_reasoning': bool(frame.get('use_reasoning', False)),
+        'use_streaming': True,
+        'history_mode': frame.get('history_mode'),
+        'generation': frame.get('generation'),
+        'deadline': None,
+    }
+
+__all__ = ["chat_socket", "run_turn", "sock", "start_turn", "stream_provider", "ws_bp"]
@@ -0,0 +1,112 @@
+"""
+ws_turn.py - One chat turn of a /ws conversation
+
+Runs a turn that ws_routes.py has validated: waits for admission (one slot per provider),
+streams the providers in parallel on the connection's stream workers, and sends their
+events as conversation frames (see ws_routes.py for the frame types).
+
+Dependencies:
+- Python standard library (concurrent.futures, contextvars, logging)
+- app.control (admission, AdmissionRejected)
+- app.observability.tracer
+- app.routes.chat_request.start_chat_trace
+- app.routes.chat_stream.chat_events
+
+@author Auto-refactored by Cline
+"""
+
+import contextvars
+import logging
+from concurrent.futures import wait
+
+from app.control import AdmissionRejected, admission
+from app.observability import tracer
+from app.routes.chat_request import start_chat_trace
+from app.routes.chat_stream import chat_events
+
+logger = logging.getLogger(__name__)
+
+def run_turn(mux, channel, params, planned, session_id, pool, request_id):
+    """
+    Admit a turn, stream its providers in parallel and finish it.
+
+    Args:
+        mux (Multiplexer): The connection.
+        channel (Channel): The conversation.
+        params (dict): The turn's checked 'chat' frame (see ws_routes.read_chat_frame()): message,
+            providers (the models the client asked for), use_reasoning, history_mode, route and generation.
+        planned (dict): Models to call (after budget downgrades).
+        session_id (str): Browser session id.
+        pool (ThreadPoolExecutor): Connection's provider stream workers.
+        request_id (str): Id of the WebSocket handshake request, for the trace.
+    """
+    trace = start_chat_trace(params, request_id, transport='ws', conv=channel.conv)
+    try:
+        try:
+            upstream_calls = len(planned) * (2 if params['use_reasoning'] else 1)
+            with tracer.use(trace), tracer.span('admission.wait'):
+                # One slot per provider streaming in parallel
+                permit = admission.acquire(session_id, cost=max(1, upstream_calls), slots=len(planned))
+        except AdmissionRejected as e:
+            trace.record_error(e)
+            mux.emit(channel, 'rejected', status=429, error=str(e), retry_after=e.retry_after)
+            return
+        with permit:
+            fields = {"route": params['route']} if params['route'] else {}
+            mux.emit(channel, 'accepted', providers=planned, **fields)
+            with tracer.use(trace):
+                spans = {provider: tracer.span('stream', provider=provider) for provider in planned}
+
+            def stream_in_slot(provider, model):
+                # Providers beyond the permit's slots wait for one to free up
+                with permit.slot():
+                    stream_provider(mux, channel, params, provider, model, session_id, spans[provider])
+
+            futures = [pool.submit(contextvars.copy_context().run, stream_in_slot, provider, model)
+                       for provider, model in planned.items()]
+            wait(futures)
+        mux.emit(channel, 'end')
+    except Exception as e:
+        # Typically the connection closed while sending; provider streams clean up themselves
+        logger.info("WebSocket turn ended early: %s", e)
+    finally:
+        channel.end_turn()
+        trace.end()
+
+def stream_provider(mux, channel, params, provider, model, session_id, span):
+    """
+    Stream one provider of a turn onto the connection.
+
+    Args:
+        mux (Multiplexer): The connection.
+        channel (Channel): The conversation.
+        params (dict): The turn's checked 'chat' frame (see run_turn()).
+        provider (str): Provider name.
+        model (str): Model to call.
+        session_id (str): Browser session id.
+        span (Span): Span of this provider stream.
+    """
+    requested_model = params['providers'][provider]
+    events = chat_events(params['message'], {provider: model}, params['use_reasoning'], params['history_mode'], span,
+                         session_id, {provider: requested_model}, channel.states, generation=params['generation'])
+    try:
+        for kind, data in events:
+            if kind == 'stream':
+                channel.register_stream(provider, data)
+            elif kind == 'provider':
+                fields = {"requested_model": requested_model} if model != requested_model else {}
+                mux.emit(channel, 'start', provider, model=model, **fields)
+            elif kind == 'chunk':
+                mux.emit(channel, 'chunk', provider, data=data)
+            elif kind == 'done':
+                mux.emit(channel, 'done', provider)
+            elif kind in ('end', 'downgrade'):
+                # The turn's 'end' is sent once every provider finished; downgrades ride on 'start'
+                continue
+            elif kind == 'cancelled':
+                mux.emit(channel, 'cancelled', provider, reason=data)
+            else:
+                mux.emit(channel, kind, provider, data=data)
+    finally:
+        # Runs when sending fails too, closing the upstream stream
+        events.close()
@@ -0,0 +1,51 @@
+"""
+__init__.py - Cross-worker shared state for the app.state package
+
+Imports and exposes:
+- shared_state: Process-wide StateBackend built from STATE_BACKEND_URL
+- StateBackend: Interface for shared keys, counters and pub/sub
+- InProcessBackend: Single-process implementation (the default)
+- StateBackendError: Raised when the shared-state server fails
+- create_backend: Build a backend from a URL
+- worker_id: Identifies this process in shared state ('host:pid'), recomputed after fork
+
+@author Auto-refactored by Cline
+"""
+
+import os
+import socket
+
+from app.state.backend import StateBackend, StateBackendError, create_backend
+from app.state.memory_backend import InProcessBackend
+from config import Config
+
+_worker_id = None
+
+def worker_id():
+    """
+    Get this process's id in shared state.
+
+    Computed on first use rather than at import: gunicorn workers are forked from a master
+    that may have imported the app, and each needs its own id.
+
+    Returns:
+        str: 'host:pid'.
+    """
+    global _worker_id
+    if _worker_id is None:
+        _worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    return _worker_id
+
+def _forget_worker_id():
+    """
+    Drop the parent's id in a forked child (os.register_at_fork callback).
+    """
+    global _worker_id
+    _worker_id = None
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_worker_id)
+
+shared_state = create_backend(Config.STATE_BACKEND_URL, prefix=Config.STATE_KEY_PREFIX, timeout=Config.STATE_TIMEOUT)
+
+__all__ = ["InProcessBackend", "StateBackend", "StateBackendError", "create_backend", "shared_state", "worker_id"]
@@ -0,0 +1,155 @@
+"""
+backend.py - Pluggable shared-state backends
+
+Defines the StateBackend interface used for state that must be visible to every worker
+process: short-lived keys (with optional TTL), counters and pub/sub channels. Two
+implementations exist:
+
+- InProcessBackend (memory_backend.py): dictionaries and in-process callbacks, for a single
+  worker (the default)
+- RedisBackend (redis_backend.py): any server speaking the Redis protocol (Redis, Valkey,
+  KeyDB, ...), for several workers or hosts
+
+Values are strings; callers encode structured values as JSON. Every key and channel is
+namespaced with the backend's prefix.
+
+Main functions/classes:
+- StateBackend: Interface
+- StateBackendError: Raised when the backend cannot be reached or rejects a command
+- create_backend(): Build a backend from a URL ('memory://' or 'redis://...')
+
+Dependencies:
+- Python standard library (urllib.parse)
+- app.state.memory_backend / app.state.redis_backend (imported by create_backend())
+
+@author Auto-refactored by Cline
+"""
+
+from urllib.parse import urlsplit
+
+class StateBackendError(Exception):
+    """
+    Raised when a shared-state command fails (connection lost, server error).
+    """
+
+class StateBackend:
+    """
+    Interface for shared key/value, counter and pub/sub state.
+
+    Attributes:
+        prefix (str): Namespace prepended to every key and channel.
+        shared (bool): True if other processes see the same state.
+    """
+
+    shared = False
+
+    def __init__(self, prefix=''):
+        """
+        Initialize StateBackend.
+
+        Args:
+            prefix (str): Namespace for keys and channels.
+        """
+        self.prefix = prefix
+
+    def get(self, key):
+        """
+        Get a value.
+
+        Args:
+            key (str): Key (without prefix).
+
+        Returns:
+            str | None: The value, or None if missing or expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """
+        Set a value.
+
+        Args:
+            key (str): Key (without prefix).
+            value (str): Value.
+            ttl (float): Seconds until the key expires (None keeps it).
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """
+        Delete a key (no-op if missing).
+
+        Args:
+            key (str): Key (without prefix).
+        """
+        raise NotImplementedError
+
+    def incr(self, key, amount=1, ttl=None):
+        """
+        Atomically add to a counter, creating it at 0.
+
+        Args:
+            key (str): Key (without prefix).
+            amount (int): Increment (may be negative).
+            ttl (float): Expiry set when the counter is created (e.g. a rate-limit window).
+
+        Returns:
+            int: The new value.
+        """
+        raise NotImplementedError
+
+    def publish(self, channel, message):
+        """
+        Send a message to every subscriber of a channel, in every process.
+
+        Args:
+            channel (str): Channel (without prefix).
+            message (str): Message.
+
+        Returns:
+            int: Subscribers that received it (processes for RedisBackend).
+        """
+        raise NotImplementedError
+
+    def subscribe(self, channel, callback):
+        """
+        Call callback(message) for each message published to a channel.
+
+        Callbacks run on a backend thread (or the publisher's, in-process) and must not block.
+
+        Args:
+            channel (str): Channel (without prefix).
+            callback (callable): Receives the message string.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Release connections and stop background threads.
+        """
+
+def create_backend(url, prefix='', timeout=2.0):
+    """
+    Build a shared-state backend from a URL.
+
+    Args:
+        url (str): '' or 'memory://' for InProcessBackend;
+            'redis://[:password@]host[:port][/db]' for RedisBackend.
+        prefix (str): Namespace for keys and channels.
+        timeout (float): Seconds to wait on the server per command (RedisBackend).
+
+    Returns:
+        StateBackend: The backend.
+
+    Raises:
+        ValueError: If the URL scheme is not supported.
+    """
+    scheme = urlsplit(url).scheme if url else 'memory'
+    # Implementations import this module, so they are imported here
+    if scheme == 'memory':
+        from app.state.memory_backend import InProcessBackend
+        return InProcessBackend(prefix)
+    if scheme == 'redis':
+        from app.state.redis_backend import RedisBackend
+        return RedisBackend(url, prefix, timeout)
+    raise ValueError(f"Unsupported STATE_BACKEND_URL scheme: {scheme!r} (use 'memory://' or 'redis://')")
@@ -0,0 +1,116 @@
+"""
+memory_backend.py - In-process shared-state backend
+
+Implements InProcessBackend, the default StateBackend: dictionaries and in-process callbacks.
+State is only shared within one worker process, so it is correct with SERVER_WORKERS=1 and
+needs no server in development. Expired keys are dropped when read and swept every
+SWEEP_EVERY writes.
+
+Dependencies:
+- Python standard library (logging, threading, time)
+- app.state.backend.StateBackend
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+import threading
+import time
+
+from app.state.backend import StateBackend
+
+logger = logging.getLogger(__name__)
+
+# ====================================
+# Constants and configuration
+# ====================================
+# Writes between sweeps of expired in-process keys
+SWEEP_EVERY = 1024
+
+class InProcessBackend(StateBackend):
+    """
+    StateBackend kept in this process's memory.
+
+    Only correct with a single worker process (SERVER_WORKERS=1); it is the default so
+    development needs no server.
+    """
+
+    def __init__(self, prefix=''):
+        """
+        Initialize an empty InProcessBackend.
+
+        Args:
+            prefix (str): Namespace for keys and channels.
+        """
+        super().__init__(prefix)
+        self._lock = threading.Lock()
+        # key -> (value, expires_at or None)
+        self._values = {}
+        self._subscribers = {}
+        self._writes = 0
+
+    def get(self, key):
+        with self._lock:
+            return self._live(self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._values[self.prefix + key] = (value, self._expiry(ttl))
+            self._count_write()
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(self.prefix + key, None)
+
+    def incr(self, key, amount=1, ttl=None):
+        key = self.prefix + key
+        with self._lock:
+            current = self._live(key)
+            if current is None:
+                value, expires_at = amount, self._expiry(ttl)
+            else:
+                value, expires_at = int(current) + amount, self._values[key][1]
+            self._values[key] = (str(value), expires_at)
+            self._count_write()
+            return value
+
+    def publish(self, channel, message):
+        with self._lock:
+            callbacks = list(self._subscribers.get(self.prefix + channel, ()))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.warning("Subscriber of %s failed: %s", channel, e)
+        return len(callbacks)
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._subscribers.setdefault(self.prefix + channel, []).append(callback)
+
+    def _live(self, key):
+        """
+        Get a value that has not expired (caller holds the lock).
+        """
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self._values[key]
+            return None
+        return entry[0]
+
+    def _count_write(self):
+        """
+        Drop expired keys every SWEEP_EVERY writes (caller holds the lock).
+        """
+        self._writes += 1
+        if self._writes % SWEEP_EVERY:
+            return
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in self._values.items() if expires_at is not None and expires_at <= now]:
+            del self._values[key]
+
+    @staticmethod
+    def _expiry(ttl):
+        return None if ttl is None else time.monotonic() + ttl
@@ -0,0 +1,168 @@
+"""
+redis_backend.py - Shared-state backend over the Redis protocol
+
+Implements RedisBackend, a StateBackend for any server speaking RESP (Redis, Valkey,
+KeyDB, or a local stand-in in tests), with a minimal client on plain sockets (resp.py) so no
+client library is needed. Commands use a small pool of connections; pub/sub uses one
+dedicated connection read by a RespSubscriber thread (resp_subscriber.py).
+
+Commands used: AUTH, SELECT, GET, SET (PX), DEL, INCRBY, PEXPIRE, PUBLISH, SUBSCRIBE.
+
+Dependencies:
+- Python standard library (queue, socket, urllib.parse)
+- app.observability.metrics
+- app.state.backend (StateBackend, StateBackendError)
+- app.state.resp.RespConnection
+- app.state.resp_subscriber.RespSubscriber
+
+@author Auto-refactored by Cline
+"""
+
+import queue
+import socket
+from urllib.parse import unquote, urlsplit
+
+from app.observability import metrics
+from app.state.backend import StateBackend, StateBackendError
+from app.state.resp import RespConnection
+from app.state.resp_subscriber import RespSubscriber
+
+# ====================================
+# Constants and configuration
+# ====================================
+DEFAULT_PORT = 6379
+POOL_SIZE = 8
+
+class RedisBackend(StateBackend):
+    """
+    StateBackend stored on a Redis-protocol server, shared by every worker that uses it.
+
+    Attributes:
+        host (str): Server host.
+        port (int): Server port.
+        db (int): Database number selected on connect.
+        timeout (float): Seconds to wait for connects and replies.
+    """
+
+    shared = True
+
+    def __init__(self, url, prefix='', timeout=2.0):
+        """
+        Initialize RedisBackend (connections are opened on first use).
+
+        Args:
+            url (str): 'redis://[:password@]host[:port][/db]'.
+            prefix (str): Namespace for keys and channels.
+            timeout (float): Seconds to wait for connects and replies.
+        """
+        super().__init__(prefix)
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or DEFAULT_PORT
+        self.db = int(parts.path.strip('/') or 0)
+        self.timeout = timeout
+        self._username = unquote(parts.username) if parts.username else None
+        self._password = unquote(parts.password) if parts.password else None
+        self._pool = queue.LifoQueue(maxsize=POOL_SIZE)
+        self._subscriber = RespSubscriber(lambda: self._connect(None), f"{self.host}:{self.port}")
+
+    def get(self, key):
+        return self.execute('GET', self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            self.execute('SET', self.prefix + key, value)
+        else:
+            self.execute('SET', self.prefix + key, value, 'PX', max(1, int(ttl * 1000)))
+
+    def delete(self, key):
+        self.execute('DEL', self.prefix + key)
+
+    def incr(self, key, amount=1, ttl=None):
+        value = self.execute('INCRBY', self.prefix + key, amount)
+        if ttl is not None and value == amount:
+            # First increment created the counter: start its window
+            self.execute('PEXPIRE', self.prefix + key, max(1, int(ttl * 1000)))
+        return value
+
+    def publish(self, channel, message):
+        return self.execute('PUBLISH', self.prefix + channel, message)
+
+    def subscribe(self, channel, callback):
+        self._subscriber.subscribe(self.prefix + channel, callback)
+
+    def close(self):
+        self._subscriber.close()
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def execute(self, *args):
+        """
+        Run one command on a pooled connection.
+
+        Args:
+            *args: Command name and arguments.
+
+        Returns:
+            The decoded reply.
+
+        Raises:
+            StateBackendError: If the server is unreachable or rejects the command.
+        """
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = None
+        try:
+            if conn is None:
+                conn = self._connect(self.timeout)
+            reply = conn.call(*args)
+        except StateBackendError:
+            if conn is not None:
+                self._release(conn)
+            raise
+        except (OSError, ValueError) as e:
+            if conn is not None:
+                conn.close()
+            metrics.increment("state.errors")
+            raise StateBackendError(f"State server {self.host}:{self.port} unavailable: {e}") from e
+        self._release(conn)
+        return reply
+
+    def _release(self, conn):
+        """
+        Return a healthy connection to the pool (closing it if the pool is full).
+        """
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _connect(self, timeout):
+        """
+        Open and authenticate a connection.
+
+        Args:
+            timeout (float | None): Socket timeout (None blocks, for the subscriber).
+
+        Returns:
+            RespConnection: The connection.
+        """
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.settimeout(timeout)
+        conn = RespConnection(sock)
+        try:
+            if self._password is not None:
+                if self._username:
+                    conn.call('AUTH', self._username, self._password)
+                else:
+                    conn.call('AUTH', self._password)
+            if self.db:
+                conn.call('SELECT', self.db)
+        except Exception:
+            conn.close()
+            raise
+        return conn
@@ -0,0 +1,96 @@
+"""
+resp.py - Minimal Redis-protocol (RESP2) connection on a plain socket
+
+Implements RespConnection, which sends commands as arrays of bulk strings and parses the
+replies, so RedisBackend needs no client library.
+
+Dependencies:
+- Python standard library (socket)
+- app.state.backend.StateBackendError
+
+@author Auto-refactored by Cline
+"""
+
+import socket
+
+from app.state.backend import StateBackendError
+
+class RespConnection:
+    """
+    One socket speaking RESP2: commands out as arrays of bulk strings, replies parsed back.
+    """
+
+    def __init__(self, sock):
+        """
+        Initialize RespConnection.
+
+        Args:
+            sock (socket.socket): Connected socket.
+        """
+        self.sock = sock
+        self._reader = sock.makefile('rb')
+
+    def send(self, *args):
+        """
+        Write one command.
+
+        Args:
+            *args: Command name and arguments (str, bytes or int).
+        """
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        self.sock.sendall(b''.join(parts))
+
+    def read(self):
+        """
+        Read one reply.
+
+        Returns:
+            str | int | list | None: Decoded reply.
+
+        Raises:
+            StateBackendError: For error replies (the connection stays usable).
+            OSError / ConnectionError: If the connection broke.
+        """
+        line = self._reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Connection closed by the state server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode()
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by the state server")
+            return data[:-2].decode()
+        if kind == b'*':
+            length = int(body)
+            return None if length < 0 else [self.read() for _ in range(length)]
+        if kind == b'-':
+            raise StateBackendError(body.decode())
+        raise ConnectionError(f"Unexpected reply from the state server: {line[:32]!r}")
+
+    def call(self, *args):
+        """
+        Send a command and read its reply.
+        """
+        self.send(*args)
+        return self.read()
+
+    def close(self):
+        """
+        Close the socket, waking a thread blocked reading it.
+        """
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._reader.close()
+        self.sock.close()
@@ -0,0 +1,129 @@
+"""
+resp_subscriber.py - Pub/sub listener of the Redis-protocol state backend
+
+Implements RespSubscriber, which reads pub/sub messages from one dedicated connection on a
+daemon thread and hands them to callbacks. When the server goes away it reconnects and
+re-subscribes with backoff (messages published meanwhile are lost, as with any Redis
+pub/sub). Used by RedisBackend.subscribe().
+
+Dependencies:
+- Python standard library (logging, threading, time)
+- app.observability.metrics
+- app.state.backend.StateBackendError
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+import threading
+import time
+
+from app.observability import metrics
+from app.state.backend import StateBackendError
+
+logger = logging.getLogger(__name__)
+
+# ====================================
+# Constants and configuration
+# ====================================
+RECONNECT_BACKOFF = (0.5, 30.0)
+
+class RespSubscriber:
+    """
+    Delivers pub/sub messages from one dedicated connection to callbacks.
+
+    Attributes:
+        address (str): 'host:port' of the server, for logs.
+    """
+
+    def __init__(self, connect, address):
+        """
+        Initialize RespSubscriber (the connection is opened on the first subscribe()).
+
+        Args:
+            connect (callable): Opens an authenticated RespConnection without a read timeout.
+            address (str): 'host:port' of the server, for logs.
+        """
+        self.connect = connect
+        self.address = address
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._thread = None
+        self._closed = False
+
+    def subscribe(self, channel, callback):
+        """
+        Call callback(message) for every message published to a (prefixed) channel.
+        """
+        with self._lock:
+            callbacks = self._subscribers.setdefault(channel, [])
+            callbacks.append(callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="state-subscriber", daemon=True)
+                self._thread.start()
+            elif len(callbacks) == 1 and self._conn is not None:
+                try:
+                    self._conn.send('SUBSCRIBE', channel)
+                except OSError:
+                    # The listener reconnects and subscribes to every channel
+                    pass
+
+    def close(self):
+        """
+        Stop listening and close the connection.
+        """
+        self._closed = True
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+
+    def _listen(self):
+        """
+        Subscriber loop: deliver messages to callbacks, reconnecting with backoff.
+        """
+        delay = RECONNECT_BACKOFF[0]
+        while not self._closed:
+            conn = None
+            try:
+                conn = self._open()
+                delay = RECONNECT_BACKOFF[0]
+                while True:
+                    reply = conn.read()
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == 'message':
+                        self._deliver(reply[1], reply[2])
+            except (OSError, ValueError, StateBackendError) as e:
+                with self._lock:
+                    self._conn = None
+                if conn is not None:
+                    conn.close()
+                if self._closed:
+                    return
+                metrics.increment("state.subscriber_reconnects")
+                logger.warning("State subscriber lost %s (%s); reconnecting in %.1fs", self.address, e, delay)
+                time.sleep(delay)
+                delay = min(delay * 2, RECONNECT_BACKOFF[1])
+
+    def _open(self):
+        """
+        Connect and subscribe to every channel with callbacks.
+        """
+        conn = self.connect()
+        with self._lock:
+            self._conn = conn
+            channels = list(self._subscribers)
+            if channels:
+                conn.send('SUBSCRIBE', *channels)
+        return conn
+
+    def _deliver(self, channel, message):
+        """
+        Run the callbacks of a channel, isolating their failures.
+        """
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.warning("Subscriber of %s failed: %s", channel, e)
@@ -0,0 +1,26 @@
+"""
+__init__.py - Streaming response helpers for the app.streaming package
+
+Imports and exposes:
+- drain: Process-wide DrainController used during graceful shutdown
+- DrainController: Draining state and open-stream accounting
+- format_sse: Server-Sent Events frame encoding
+- with_heartbeats: Run an event generator on a thread, with keep-alive events while it is silent
+- Multiplexer: Conversation framing and flow control over one WebSocket connection
+- streams: Process-wide StreamRegistry of in-flight streams (cancellation)
+- StreamRegistry: Stream ids, cancellation and cancelled-stream accounting
+- build_pipeline: Per-stream output transform pipeline configured by STREAM_TRANSFORMS
+- TransformPipeline: Chunk transforms (redaction, phrase filtering, stop rules) applied in order
+
+@author Auto-refactored by Cline
+"""
+
+from app.streaming.drain import DrainController, drain
+from app.streaming.heartbeat import HEARTBEAT, with_heartbeats
+from app.streaming.multiplex import Multiplexer
+from app.streaming.registry import StreamRegistry, streams
+from app.streaming.sse import format_sse
+from app.streaming.transforms import TransformPipeline, build_pipeline
+
+__all__ = ["DrainController", "HEARTBEAT", "Multiplexer", "StreamRegistry", "TransformPipeline", "build_pipeline",
+           "drain", "format_sse", "streams", "with_heartbeats"]
@@ -0,0 +1,115 @@
+"""
+channel.py - One conversation of a multiplexed WebSocket connection
+
+Implements the Channel class used by Multiplexer (multiplex.py): a conversation's
+sequence numbers and acknowledgements (the flow-control window), the provider state kept
+for the connection's lifetime, and its running turn, whose provider streams can be
+cancelled as a whole or one provider at a time, before or after they are registered.
+
+Dependencies:
+- Python standard library (threading)
+- app.streaming.registry.streams
+
+@author Auto-refactored by Cline
+"""
+
+import threading
+
+from app.streaming.registry import streams
+
+class Channel:
+    """
+    One conversation on a multiplexed connection.
+
+    Attributes:
+        conv (str): Conversation id chosen by the client.
+        window (int): Unacknowledged frames allowed before chunks wait.
+        seq (int): Sequence number of the last frame sent.
+        acked (int): Highest sequence number the client acknowledged.
+        states (dict): Provider names mapped to serialized provider state (history),
+            kept for the connection's lifetime.
+        busy (bool): True while a turn is running.
+    """
+
+    def __init__(self, conv, window, states):
+        """
+        Initialize Channel.
+
+        Args:
+            conv (str): Conversation id.
+            window (int): Flow-control window in frames.
+            states (dict): Initial provider state (copied from the session by the caller).
+        """
+        self.conv = conv
+        self.window = window
+        self.seq = 0
+        self.acked = 0
+        self.states = states
+        self.busy = False
+        self.cond = threading.Condition()
+        self._stream_ids = {}
+        self._cancelled = {}
+
+    def begin_turn(self):
+        """
+        Start a turn, forgetting the previous turn's streams and cancellations.
+
+        Returns:
+            bool: False if a turn is already running.
+        """
+        with self.cond:
+            if self.busy:
+                return False
+            self.busy = True
+            self._stream_ids = {}
+            self._cancelled = {}
+            return True
+
+    def end_turn(self):
+        """
+        Mark the running turn as finished.
+        """
+        with self.cond:
+            self.busy = False
+
+    def register_stream(self, provider, stream_id):
+        """
+        Remember the registry stream of a provider, cancelling it if the client already asked.
+
+        Args:
+            provider (str): Provider name.
+            stream_id (str): Id from the 'stream' event of chat_events().
+        """
+        with self.cond:
+            self._stream_ids[provider] = stream_id
+            reason = self._cancelled.get(provider) or self._cancelled.get(None)
+        if reason:
+            streams.cancel(stream_id, reason)
+
+    def cancel(self, provider=None, reason='client'):
+        """
+        Cancel the running turn, or one provider of it.
+
+        Args:
+            provider (str): Provider to cancel (None cancels all).
+            reason (str): Why it is cancelled.
+
+        Returns:
+            bool: True if a turn was running.
+        """
+        with self.cond:
+            if not self.busy:
+                return False
+            self._cancelled[provider] = reason
+            targets = [stream_id for name, stream_id in self._stream_ids.items() if provider in (None, name)]
+            # Wake chunk senders waiting for credit so they see the cancellation
+            self.cond.notify_all()
+        for stream_id in targets:
+            streams.cancel(stream_id, reason)
+        return True
+
+    def is_cancelled(self, provider):
+        """
+        Check whether a provider of the running turn was cancelled.
+        """
+        return provider in self._cancelled or None in self._cancelled
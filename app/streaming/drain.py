@@ -0,0 +1,115 @@
+"""
+drain.py - Graceful drain of in-flight streams on shutdown
+
+Implements the DrainController class and the process-wide `drain` instance. When the
+serving process receives SIGTERM (see /serve.py), drain.begin() is called: new chats are
+refused with 503, streams already running may continue until the drain deadline, and any
+still open at the deadline are closed with a terminal `shutdown` event. A timer fires the
+on_expire() callbacks at the deadline (the stream and job registries cancel everything
+they hold), so streams waiting on a stalled upstream are closed on time too.
+
+Dependencies:
+- Python standard library (threading, time)
+- Logging module
+- app.observability.metrics
+
+@author Auto-refactored by Cline
+"""
+
+import logging
+import threading
+import time
+
+from app.observability import metrics
+
+logger = logging.getLogger(__name__)
+
+class DrainController:
+    """
+    Tracks whether the process is draining and how many streams are still open.
+
+    Attributes:
+        deadline (float | None): time.monotonic() value at which open streams are closed,
+            or None while serving normally.
+    """
+
+    def __init__(self):
+        """
+        Initialize a controller in the serving (not draining) state.
+        """
+        self._lock = threading.Lock()
+        self.deadline = None
+        self._open_streams = 0
+        self._expiry_callbacks = []
+
+    @property
+    def draining(self):
+        """
+        bool: True once begin() has been called.
+        """
+        return self.deadline is not None
+
+    def begin(self, timeout):
+        """
+        Start draining. Repeated calls keep the first deadline.
+
+        Args:
+            timeout (float): Seconds in-flight streams may keep running.
+
+        Side effects:
+            Safe to call from a signal handler (no blocking I/O beyond logging).
+        """
+        with self._lock:
+            if self.deadline is not None:
+                return
+            self.deadline = time.monotonic() + timeout
+            logger.warning("Draining: %d open streams, closing stragglers in %.0fs", self._open_streams, timeout)
+        timer = threading.Timer(timeout, self._expire)
+        timer.daemon = True
+        timer.start()
+
+    def on_expire(self, callback):
+        """
+        Register a callback run (on the timer thread) when the drain deadline passes.
+
+        Args:
+            callback (callable): Called without arguments; should cancel what it tracks.
+        """
+        self._expiry_callbacks.append(callback)
+
+    def _expire(self):
+        """
+        Run the expiry callbacks (timer thread).
+        """
+        for callback in self._expiry_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error("Drain expiry callback failed: %s", e)
+
+    def expired(self):
+        """
+        Check whether open streams must now be closed.
+
+        Returns:
+            bool: True if draining and the deadline has passed.
+        """
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def stream_opened(self):
+        """
+        Record that a streaming response started.
+        """
+        with self._lock:
+            self._open_streams += 1
+            metrics.set_gauge("streams.open", self._open_streams)
+
+    def stream_closed(self):
+        """
+        Record that a streaming response finished (for any reason).
+        """
+        with self._lock:
+            self._open_streams -= 1
+            metrics.set_gauge("streams.open", self._open_streams)
+
+drain = DrainController()
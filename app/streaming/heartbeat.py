@@ -0,0 +1,84 @@
+"""
+heartbeat.py - Keep-alive events for streams whose upstream may stall
+
+Contains with_heartbeats(), which runs an event generator on its own thread and yields a
+('heartbeat', '') event whenever it stays silent for an interval. Transports write those
+as keep-alives (an SSE comment), so a client that went away is noticed by the failed write
+within about one interval, even while upstream sends nothing, instead of at the next chunk.
+
+Dependencies:
+- Python standard library (contextvars, queue, threading)
+
+@author Auto-refactored by Cline
+"""
+
+import contextvars
+import queue
+import threading
+
+# ====================================
+# Constants and configuration
+# ====================================
+HEARTBEAT = ('heartbeat', '')
+_END = object()
+
+def _produce(events, items, abandoned):
+    """
+    Move events onto the queue until they end, fail or the consumer is gone (producer thread).
+    """
+    try:
+        for event in events:
+            if abandoned.is_set():
+                break
+            items.put(event)
+    except Exception as e:
+        items.put(e)
+    finally:
+        # Closing at a suspended yield runs the generator's own cleanup
+        events.close()
+        items.put(_END)
+
+def with_heartbeats(events, interval, on_abandon=None):
+    """
+    Yield the events of a generator, plus heartbeats while it is silent.
+
+    The generator runs on a worker thread (in a copy of the caller's context) and is
+    closed there. If the consumer closes this generator early, `on_abandon` is called so
+    the producer can be unblocked (e.g. by cancelling the stream, which closes upstream);
+    the producer then stops and closes `events` at its next event.
+
+    Args:
+        events (generator): Events to forward, e.g. chat_events().
+        interval (float): Seconds of silence after which a heartbeat is yielded.
+        on_abandon (callable): Called without arguments when the consumer goes away first.
+
+    Yields:
+        The events of `events`, and HEARTBEAT while it is silent.
+
+    Raises:
+        Exception: Whatever `events` raised, re-raised on the consumer's thread.
+    """
+    items = queue.SimpleQueue()
+    abandoned = threading.Event()
+    producer = threading.Thread(target=contextvars.copy_context().run, args=(_produce, events, items, abandoned),
+                                name="stream-producer", daemon=True)
+    producer.start()
+    finished = False
+    try:
+        while True:
+            try:
+                item = items.get(timeout=interval)
+            except queue.Empty:
+                yield HEARTBEAT
+                continue
+            if item is _END:
+                finished = True
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if not finished:
+            abandoned.set()
+            if on_abandon is not None:
+                on_abandon()
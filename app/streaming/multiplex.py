@@ -0,0 +1,178 @@
+"""
+multiplex.py - Conversation multiplexing over one WebSocket connection
+
+Implements the Multiplexer class used by the /ws transport (app/routes/ws_routes.py).
+One browser connection carries any number of conversations; each has a Channel
+(channel.py), and every frame sent for it is a JSON object tagged with the
+conversation id ('conv'), the provider (where it applies) and a per-conversation
+sequence number ('seq').
+
+Flow control is credit based: the client acknowledges the highest seq it has processed
+(`{"type": "ack", "conv": ..., "seq": ...}`), and chunk frames wait while a conversation
+has `window` frames unacknowledged. A provider stream that stays blocked for
+stall_timeout seconds is cancelled, so a stuck tab cannot hold upstream streams open.
+Control frames (start, done, end, ...) are never held back.
+
+Dependencies:
+- Python standard library (json, threading, time)
+- app.observability.metrics
+- app.streaming.channel.Channel
+
+@author Auto-refactored by Cline
+"""
+
+import json
+import threading
+import time
+
+from app.observability import metrics
+from app.streaming.channel import Channel
+
+class Multiplexer:
+    """
+    Frames conversations onto one WebSocket and applies per-conversation backpressure.
+
+    Attributes:
+        window (int): Flow-control window for new channels.
+        stall_timeout (float): Seconds a chunk may wait for credit before its stream is cancelled.
+        closed (bool): True once the connection has gone away.
+    """
+
+    def __init__(self, ws, window, stall_timeout):
+        """
+        Initialize Multiplexer.
+
+        Args:
+            ws: WebSocket with send(str) (flask-sock / simple-websocket Server).
+            window (int): Flow-control window in frames.
+            stall_timeout (float): Seconds before a blocked stream is cancelled.
+        """
+        self.ws = ws
+        self.window = window
+        self.stall_timeout = stall_timeout
+        self.closed = False
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def channel(self, conv, states_factory):
+        """
+        Get a conversation's channel, creating it on first use.
+
+        Args:
+            conv (str): Conversation id.
+            states_factory (callable): Returns the initial provider state for a new channel.
+
+        Returns:
+            Channel: The conversation's channel.
+        """
+        with self._lock:
+            channel = self._channels.get(conv)
+            if channel is None:
+                channel = self._channels[conv] = Channel(conv, self.window, states_factory())
+            return channel
+
+    def get(self, conv):
+        """
+        Get an existing channel.
+
+        Returns:
+            Channel | None: The channel, or None for an unknown conversation.
+        """
+        with self._lock:
+            return self._channels.get(conv)
+
+    def busy(self):
+        """
+        bool: True if any conversation has a turn running.
+        """
+        with self._lock:
+            return any(channel.busy for channel in self._channels.values())
+
+    def send(self, frame):
+        """
+        Send one connection-level frame (not tied to a conversation).
+
+        Args:
+            frame (dict): JSON-serializable frame.
+        """
+        with self._send_lock:
+            self.ws.send(json.dumps(frame))
+
+    def emit(self, channel, kind, provider=None, **fields):
+        """
+        Send one conversation frame, waiting for credit first if it is a chunk.
+
+        Args:
+            channel (Channel): The conversation.
+            kind (str): Frame type ('start', 'chunk', 'done', ...).
+            provider (str): Provider the frame belongs to, if any.
+            **fields: Extra frame fields (e.g. data, model, reason).
+
+        Returns:
+            bool: False if a chunk was dropped because its provider was cancelled or stalled.
+        """
+        with channel.cond:
+            if kind == 'chunk' and not self._wait_for_credit(channel, provider):
+                return False
+            frame = {"type": kind, "conv": channel.conv}
+            if provider is not None:
+                frame["provider"] = provider
+            frame.update(fields)
+            # Numbering and sending together keeps frames of a conversation in seq order
+            with self._send_lock:
+                channel.seq += 1
+                frame["seq"] = channel.seq
+                self.ws.send(json.dumps(frame))
+        return True
+
+    def ack(self, conv, seq):
+        """
+        Record the client's acknowledgement and release waiting chunks.
+
+        Args:
+            conv (str): Conversation id.
+            seq (int): Highest sequence number processed by the client.
+        """
+        channel = self.get(conv)
+        if channel is None or not isinstance(seq, int):
+            return
+        with channel.cond:
+            if seq > channel.acked:
+                channel.acked = min(seq, channel.seq)
+                channel.cond.notify_all()
+
+    def close(self):
+        """
+        Cancel every running turn after the connection went away.
+        """
+        self.closed = True
+        with self._lock:
+            channels = list(self._channels.values())
+        for channel in channels:
+            channel.cancel(reason='disconnect')
+
+    def _wait_for_credit(self, channel, provider):
+        """
+        Block (holding channel.cond) until the window has room.
+
+        Returns:
+            bool: False if the provider was cancelled, the connection closed, or the wait stalled.
+        """
+        deadline = None
+        while channel.seq - channel.acked >= channel.window:
+            if self.closed or channel.is_cancelled(provider):
+                return False
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + self.stall_timeout
+                metrics.increment("ws.backpressure_waits")
+            elif now >= deadline:
+                metrics.increment("ws.stalled")
+                # Channel.cancel takes the same (reentrant) condition lock
+                channel.cancel(provider, reason='stalled')
+                return False
+            channel.cond.wait(deadline - now)
+        return not channel.is_cancelled(provider)
+
+__all__ = ["Channel", "Multiplexer"]
@@ -0,0 +1,90 @@
+"""
+redaction.py - PII redaction stage of the streaming chunk-transform pipeline
+
+Implements RegexRedactor ('redact_pii'), which replaces e-mail addresses, phone numbers, card
+numbers and US social security numbers in streamed text. It holds back only the trailing run
+of characters a pattern can contain (usually part of one word), capped at MAX_PATTERN_CHARS.
+
+Main functions/classes:
+- RegexRedactor: Regex replacement stage
+- PII_PATTERNS: Built-in patterns by STREAM_PII_TYPES name
+
+Dependencies:
+- Python standard library (re)
+- app.streaming.transform_stages.ChunkTransform
+
+@author Auto-refactored by Cline
+"""
+
+import re
+
+from app.streaming.transform_stages import ChunkTransform
+
+# ====================================
+# Constants and configuration
+# ====================================
+# Longest text a redaction pattern is guaranteed to catch across chunk boundaries
+MAX_PATTERN_CHARS = 128
+# name -> (pattern, characters a match can contain)
+PII_PATTERNS = {
+    "email": (r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+", r"[\w.+@-]"),
+    "card": (r"\b\d(?:[ -]?\d){12,18}\b", r"[\d -]"),
+    "ssn": (r"\b\d{3}-\d{2}-\d{4}\b", r"[\d-]"),
+    "phone": (r"(?<![\w+(])(?:\+?\d{1,3}[ .-]?)?\(?\d{3}\)?[ .-]?\d{3}[ .-]?\d{4}\b", r"[\d()+ .-]"),
+}
+
+class RegexRedactor(ChunkTransform):
+    """
+    Replaces regex matches, holding back only a tail that could still grow into a match.
+
+    A match only contains characters of its rule's character class, so a match cut by the
+    chunk boundary lies entirely in the trailing run of such characters; everything before
+    the longest of the rules' trailing runs is final.
+    """
+
+    name = 'redact_pii'
+
+    def __init__(self, rules, replacement="[redacted]", max_chars=MAX_PATTERN_CHARS):
+        """
+        Initialize RegexRedactor.
+
+        Args:
+            rules (dict): Rule names mapped to (pattern, character class of a match).
+            replacement (str): Text replacing each match.
+            max_chars (int): Longest tail held back.
+        """
+        super().__init__()
+        self.pattern = re.compile("|".join(f"(?:{pattern})" for pattern, _ in rules.values())) if rules else None
+        # Matched against the reversed tail: length of each rule's trailing run
+        self.runs = [re.compile(f"{chars}*") for _, chars in rules.values()]
+        self.replacement = replacement
+        self.max_chars = max_chars
+
+    def feed(self, text):
+        """
+        See ChunkTransform.feed().
+        """
+        if self.pattern is None:
+            return text
+        buffer = self.carry + text
+        reversed_tail = buffer[:-self.max_chars - 1:-1]
+        held = max(run.match(reversed_tail).end() for run in self.runs)
+        self.carry = buffer[len(buffer) - held:]
+        return self._redact(buffer[:len(buffer) - held])
+
+    def flush(self):
+        """
+        See ChunkTransform.flush().
+        """
+        carry, self.carry = self.carry, ""
+        return self._redact(carry)
+
+    def _redact(self, text):
+        """
+        Replace every match in final text.
+        """
+        if not text:
+            return text
+        redacted, count = self.pattern.subn(self.replacement, text)
+        self.matches += count
+        return redacted
@@ -0,0 +1,211 @@
+"""
+registry.py - In-flight stream registry and cancellation
+
+Implements the StreamRegistry class and the process-wide `streams` instance. Every SSE
+chat stream registers a StreamHandle under a random stream id, so it can be cancelled
+explicitly (POST /chat/cancel) or implicitly when the client disconnects. Cancelling
+closes the upstream SDK stream of the provider currently generating and skips the rest.
+
+Cancelled streams and the completion tokens they saved (StreamHandle.tokens_saved()) are
+counted in metrics.
+
+With a shared state backend (app/state/), streams are addressable from every worker
+process: open() records which worker owns a stream id, and cancel() for a stream owned by
+another worker publishes the request on that worker's cancel channel, where start()'s
+subscription cancels it locally. With the in-process backend only local streams exist.
+At the drain deadline every local stream is cancelled with reason 'shutdown'.
+
+Dependencies:
+- Python standard library (json, logging, threading, uuid)
+- app.observability.metrics
+- app.state (shared_state, StateBackendError, worker_id)
+- app.streaming.drain.drain
+- app.streaming.stream_handle (CompletionLengthEstimator, StreamHandle)
+
+@author Auto-refactored by Cline
+"""
+
+import json
+import logging
+import threading
+import uuid
+
+from app.observability import metrics
+from app.state import StateBackendError, shared_state, worker_id
+from app.streaming.drain import drain
+from app.streaming.stream_handle import CompletionLengthEstimator, StreamHandle
+
+logger = logging.getLogger(__name__)
+
+# ====================================
+# Constants and configuration
+# ====================================
+# Upper bound on a stream's lifetime; owner records outliving a crashed worker expire
+STREAM_OWNER_TTL = 3600
+
+class StreamRegistry:
+    """
+    Registry of in-flight streams keyed by stream id.
+
+    Attributes:
+        backend (StateBackend): Shared state used to reach streams of other workers.
+        lengths (CompletionLengthEstimator): Completed response lengths (this process only).
+    """
+
+    def __init__(self, backend=None, worker_id=None):
+        """
+        Initialize an empty registry.
+
+        Args:
+            backend (StateBackend): Shared state (None keeps streams local).
+            worker_id (str): Fixed id of this registry (None: the process's, see worker_id property).
+        """
+        self.backend = backend
+        self._worker_id = worker_id
+        self._lock = threading.Lock()
+        self._handles = {}
+        self._started = False
+        self.lengths = CompletionLengthEstimator()
+
+    @property
+    def worker_id(self):
+        """
+        str: This process's id in owner records and channel names (resolved after fork).
+        """
+        return self._worker_id or worker_id()
+
+    @property
+    def shared(self):
+        """
+        bool: True if streams are addressable from other worker processes.
+        """
+        return self.backend is not None and self.backend.shared
+
+    def start(self):
+        """
+        Subscribe to this worker's cancel channel (no-op without a shared backend or if started).
+        """
+        if not self.shared or self._started:
+            return
+        self._started = True
+        self.backend.subscribe(f"streams:cancel:{self.worker_id}", self._on_remote_cancel)
+
+    def open(self, providers):
+        """
+        Register a new stream.
+
+        Args:
+            providers (dict): Provider names mapped to model names.
+
+        Returns:
+            StreamHandle: Handle for the new stream.
+        """
+        handle = StreamHandle(uuid.uuid4().hex, providers)
+        with self._lock:
+            self._handles[handle.stream_id] = handle
+        if self.shared:
+            try:
+                self.backend.set(f"stream:{handle.stream_id}", self.worker_id, ttl=STREAM_OWNER_TTL)
+            except StateBackendError as e:
+                # The stream still works; it just cannot be cancelled from other workers
+                logger.warning("Could not share stream %s: %s", handle.stream_id, e)
+        return handle
+
+    def cancel(self, stream_id, reason='client'):
+        """
+        Cancel a registered stream, in this worker or (shared backend) the one owning it.
+
+        Args:
+            stream_id (str): Stream id.
+            reason (str): Why the stream is cancelled.
+
+        Returns:
+            bool: True if a running local stream was cancelled, or a cancel request was
+            sent to the worker owning the stream.
+        """
+        with self._lock:
+            handle = self._handles.get(stream_id)
+        if handle is not None:
+            return handle.cancel(reason)
+        if not self.shared or not isinstance(stream_id, str):
+            return False
+        try:
+            owner = self.backend.get(f"stream:{stream_id}")
+            if owner is None or owner == self.worker_id:
+                return False
+            message = json.dumps({"stream_id": stream_id, "reason": reason})
+            delivered = self.backend.publish(f"streams:cancel:{owner}", message) > 0
+        except StateBackendError as e:
+            logger.warning("Could not forward cancel of stream %s: %s", stream_id, e)
+            return False
+        if delivered:
+            metrics.increment("streams.cancel_forwarded")
+        return delivered
+
+    def cancel_all(self, reason):
+        """
+        Cancel every local stream (e.g. at the drain deadline).
+
+        Args:
+            reason (str): Why the streams are cancelled.
+
+        Returns:
+            int: Streams cancelled.
+        """
+        with self._lock:
+            handles = list(self._handles.values())
+        return sum(1 for handle in handles if handle.cancel(reason))
+
+    def finish_provider(self, handle):
+        """
+        Record a provider that streamed to completion.
+
+        Args:
+            handle (StreamHandle): The stream.
+        """
+        self.lengths.update(*handle.finish_provider())
+
+    def close(self, handle, finished):
+        """
+        Unregister a stream and account for it if it was cancelled.
+
+        A stream closed before its generator finished (the client went away) is cancelled
+        here with reason 'disconnect', which also closes the upstream stream.
+
+        Args:
+            handle (StreamHandle): The stream.
+            finished (bool): Whether the SSE generator ran to its end.
+        """
+        with self._lock:
+            self._handles.pop(handle.stream_id, None)
+        if self.shared:
+            try:
+                self.backend.delete(f"stream:{handle.stream_id}")
+            except StateBackendError:
+                # The owner record expires on its own
+                pass
+        if not finished:
+            handle.cancel('disconnect')
+        if not handle.cancelled:
+            return
+        metrics.increment("streams.cancelled")
+        metrics.increment(f"streams.cancelled.{handle.reason}")
+        metrics.increment("streams.tokens_saved", round(handle.tokens_saved(self.lengths)))
+
+    def _on_remote_cancel(self, message):
+        """
+        Cancel a local stream on request of another worker (subscriber callback).
+
+        Args:
+            message (str): JSON with 'stream_id' and 'reason'.
+        """
+        request = json.loads(message)
+        with self._lock:
+            handle = self._handles.get(request.get("stream_id"))
+        if handle is not None:
+            handle.cancel(request.get("reason") or 'client')
+
+streams = StreamRegistry(shared_state)
+drain.on_expire(lambda: streams.cancel_all('shutdown'))
+
+__all__ = ["CompletionLengthEstimator", "StreamHandle", "StreamRegistry", "streams"]
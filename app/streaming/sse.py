@@ -0,0 +1,33 @@
+"""
+sse.py - Server-Sent Events frame encoding
+
+Contains format_sse(), which encodes one SSE event. Multi-line payloads are split into
+one `data:` field per line, as the SSE spec requires, so chunks containing newlines reach
+the browser intact instead of being cut at the first line break.
+
+Dependencies:
+- None
+
+@author Auto-refactored by Cline
+"""
+
+def format_sse(data, event=None):
+    """
+    Encode one Server-Sent Event.
+
+    Args:
+        data (str): Event payload (may contain newlines).
+        event (str): Optional event name; unnamed events reach EventSource.onmessage.
+
+    Returns:
+        str: The encoded frame, terminated by a blank line.
+
+    Example:
+        >>> format_sse("a\\nb", event="chunk")
+        'event: chunk\\ndata: a\\ndata: b\\n\\n'
+    """
+    lines = str(data).split("\n")
+    frame = "".join(f"data: {line}\n" for line in lines) + "\n"
+    if event:
+        return f"event: {event}\n" + frame
+    return frame
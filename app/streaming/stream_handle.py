@@ -0,0 +1,170 @@
+"""
+stream_handle.py - Cancellation handle of one in-flight stream
+
+Implements the StreamHandle class, which StreamRegistry (registry.py) hands out for every
+SSE chat stream: it tracks the provider currently generating and those not yet started,
+and cancel() closes the current provider's upstream stream. CompletionLengthEstimator keeps
+the EWMA of completed response lengths used to estimate the tokens a cancel saved.
+
+Dependencies:
+- Python standard library (threading)
+- app.providers.base.estimate_tokens
+
+@author Auto-refactored by Cline
+"""
+
+import threading
+
+from app.providers.base import estimate_tokens
+
+# ====================================
+# Constants and configuration
+# ====================================
+EWMA_ALPHA = 0.2
+
+class CompletionLengthEstimator:
+    """
+    EWMA of completion tokens per (provider, model), used to estimate tokens saved.
+    """
+
+    def __init__(self):
+        """
+        Initialize an estimator with no observations.
+        """
+        self._lock = threading.Lock()
+        self._averages = {}
+
+    def update(self, provider, model, tokens):
+        """
+        Record the length of a completed response.
+
+        Args:
+            provider (str): Provider name.
+            model (str): Model identifier.
+            tokens (int): Completion tokens produced.
+        """
+        with self._lock:
+            previous = self._averages.get((provider, model))
+            self._averages[(provider, model)] = tokens if previous is None else previous + EWMA_ALPHA * (tokens - previous)
+
+    def expected(self, provider, model):
+        """
+        Get the expected completion length.
+
+        Returns:
+            float: EWMA of completion tokens, or 0 if never observed.
+        """
+        with self._lock:
+            return self._averages.get((provider, model), 0)
+
+class StreamHandle:
+    """
+    Cancellation handle for one SSE chat stream.
+
+    Attributes:
+        stream_id (str): Random id sent to the client in the first `stream` event.
+        pending (list): (provider, model) pairs not yet started.
+        reason (str | None): Why the stream was cancelled ('client', 'disconnect', ...).
+    """
+
+    def __init__(self, stream_id, providers):
+        """
+        Initialize StreamHandle.
+
+        Args:
+            stream_id (str): Stream id.
+            providers (dict): Provider names mapped to model names, in request order.
+        """
+        self.stream_id = stream_id
+        self.pending = list(providers.items())
+        self.reason = None
+        self._lock = threading.Lock()
+        self._current = None
+        self._current_tokens = 0
+
+    @property
+    def cancelled(self):
+        """
+        bool: True once cancel() has been called.
+        """
+        return self.reason is not None
+
+    def start_provider(self, provider, model, llm):
+        """
+        Mark a provider as the one currently generating.
+
+        Args:
+            provider (str): Provider name.
+            model (str): Model identifier.
+            llm (LLMProvider): Provider instance whose streams cancel() will close.
+        """
+        with self._lock:
+            self.pending.remove((provider, model))
+            self._current = (provider, model, llm)
+            self._current_tokens = 0
+            if self.cancelled:
+                llm.cancel()
+
+    @property
+    def current_tokens(self):
+        """
+        int: Estimated tokens streamed so far by the current (or just finished) provider.
+        """
+        return self._current_tokens
+
+    def record_chunk(self, chunk):
+        """
+        Account for text streamed by the current provider (estimate_tokens(): CHARS_PER_TOKEN characters a token, at least one a chunk).
+
+        Args:
+            chunk (str): Text chunk.
+        """
+        self._current_tokens += estimate_tokens(chunk)
+
+    def finish_provider(self):
+        """
+        Mark the current provider as complete.
+
+        Returns:
+            tuple: (provider, model, completion_tokens) of the finished provider.
+        """
+        with self._lock:
+            provider, model, _ = self._current
+            self._current = None
+            return provider, model, self._current_tokens
+
+    def cancel(self, reason):
+        """
+        Cancel the stream, closing the current provider's upstream stream.
+
+        Args:
+            reason (str): Why the stream is cancelled.
+
+        Returns:
+            bool: False if it was already cancelled.
+        """
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.reason = reason
+            if self._current is not None:
+                self._current[2].cancel()
+            return True
+
+    def tokens_saved(self, lengths):
+        """
+        Estimate the completion tokens cancellation saved: the expected length of every
+        provider not started, plus what the current one had left to generate.
+
+        Args:
+            lengths (CompletionLengthEstimator): Completed response lengths.
+
+        Returns:
+            float: Estimated tokens saved.
+        """
+        with self._lock:
+            saved = sum(lengths.expected(provider, model) for provider, model in self.pending)
+            if self._current is not None:
+                provider, model, _ = self._current
+                saved += max(0, lengths.expected(provider, model) - self._current_tokens)
+        return saved
@@ -0,0 +1,190 @@
+"""
+transform_stages.py - Stages of the streaming chunk-transform pipeline
+
+Each stage returns the text that is safe to emit now and keeps a carry-over buffer of the
+smallest tail that could still be the start of a pattern spanning the next chunk boundary:
+
+- RegexRedactor ('redact_pii', redaction.py): replaces e-mail addresses, phone numbers, card
+  numbers and US social security numbers
+- PhraseFilter ('filter_phrases'): replaces banned phrases (case-insensitive). Holds back
+  only the longest tail that is a prefix of a phrase
+- StopRule ('stop'): ends the answer before the first stop sequence, or after a number of
+  characters. The caller then stops reading, which closes the upstream stream
+
+Main functions/classes:
+- ChunkTransform: Base class of stages
+- PhraseFilter / StopRule: Built-in stages
+- held_prefix(): Longest tail of a buffer that starts a phrase
+
+Dependencies:
+- Python standard library (re)
+
+@author Auto-refactored by Cline
+"""
+
+import re
+
+class ChunkTransform:
+    """
+    One stage of a TransformPipeline (one instance per stream).
+
+    Attributes:
+        name (str): Stage name used in metrics.
+        matches (int): Patterns acted on so far.
+        stopped (bool): True once the stage ended the answer; no more input is fed.
+    """
+
+    name = 'transform'
+
+    def __init__(self):
+        """
+        Initialize the stage with an empty carry-over.
+        """
+        self.carry = ""
+        self.matches = 0
+        self.stopped = False
+
+    def feed(self, text):
+        """
+        Transform the next piece of text.
+
+        Args:
+            text (str): Output of the previous stage.
+
+        Returns:
+            str: Text safe to emit now (possibly empty); the rest stays in self.carry.
+        """
+        return text
+
+    def flush(self):
+        """
+        Transform and release the carry-over at the end of the answer.
+
+        Returns:
+            str: Remaining text.
+        """
+        carry, self.carry = self.carry, ""
+        return carry
+
+class PhraseFilter(ChunkTransform):
+    """
+    Replaces banned phrases (case-insensitive), holding back the longest tail that starts one.
+    """
+
+    name = 'filter_phrases'
+
+    def __init__(self, phrases, replacement="[filtered]"):
+        """
+        Initialize PhraseFilter.
+
+        Args:
+            phrases (list): Phrases to replace.
+            replacement (str): Text replacing each phrase.
+        """
+        super().__init__()
+        phrases = [phrase for phrase in phrases if phrase]
+        self.pattern = re.compile("|".join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True)),
+                                  re.IGNORECASE) if phrases else None
+        self.prefixes = {phrase.lower()[:i] for phrase in phrases for i in range(1, len(phrase))}
+        self.longest = max((len(phrase) for phrase in phrases), default=0)
+        self.replacement = replacement
+
+    def feed(self, text):
+        """
+        See ChunkTransform.feed().
+        """
+        if self.pattern is None:
+            return text
+        buffer = self.carry + text
+        # Replace complete phrases first: a tail left after a replacement cannot overlap it
+        buffer, count = self.pattern.subn(self.replacement, buffer)
+        self.matches += count
+        held = held_prefix(buffer.lower(), self.prefixes, self.longest)
+        self.carry = buffer[len(buffer) - held:]
+        return buffer[:len(buffer) - held]
+
+class StopRule(ChunkTransform):
+    """
+    Ends the answer before the first stop sequence or after max_chars characters.
+    """
+
+    name = 'stop'
+
+    def __init__(self, sequences=(), max_chars=0):
+        """
+        Initialize StopRule.
+
+        Args:
+            sequences (list): Stop sequences (case-sensitive); the answer ends before the first one.
+            max_chars (int): Characters after which the answer ends (0: no limit).
+        """
+        super().__init__()
+        self.sequences = [sequence for sequence in sequences if sequence]
+        self.prefixes = {sequence[:i] for sequence in self.sequences for i in range(1, len(sequence))}
+        self.longest = max((len(sequence) for sequence in self.sequences), default=0)
+        self.max_chars = max_chars
+        self.emitted = 0
+        self.reason = None
+
+    def feed(self, text):
+        """
+        See ChunkTransform.feed().
+        """
+        buffer = self.carry + text
+        found = [(buffer.find(sequence), sequence) for sequence in self.sequences]
+        found = [(index, sequence) for index, sequence in found if index >= 0]
+        if found:
+            index, sequence = min(found)
+            self.carry = ""
+            self._stop(f"sequence {sequence!r}")
+            return self._limit(buffer[:index])
+        held = held_prefix(buffer, self.prefixes, self.longest)
+        self.carry = buffer[len(buffer) - held:]
+        return self._limit(buffer[:len(buffer) - held])
+
+    def flush(self):
+        """
+        See ChunkTransform.flush().
+        """
+        carry, self.carry = self.carry, ""
+        return self._limit(carry)
+
+    def _limit(self, text):
+        """
+        Apply max_chars to text about to be emitted.
+        """
+        if self.max_chars and self.emitted + len(text) >= self.max_chars:
+            text = text[:self.max_chars - self.emitted]
+            self.carry = ""
+            self._stop("max_chars")
+        self.emitted += len(text)
+        return text
+
+    def _stop(self, reason):
+        """
+        Mark the answer as ended (first reason wins).
+        """
+        if not self.stopped:
+            self.stopped = True
+            self.reason = reason
+            self.matches += 1
+
+def held_prefix(buffer, prefixes, longest):
+    """
+    Length of the longest tail of buffer that is a proper prefix of a phrase.
+
+    Args:
+        buffer (str): Text seen so far (lowercased by callers matching case-insensitively).
+        prefixes (set): Proper prefixes of the phrases.
+        longest (int): Length of the longest phrase.
+
+    Returns:
+        int: Characters to hold back.
+    """
+    if not prefixes:
+        return 0
+    tail = buffer[-(longest - 1):]
+    for size in range(len(tail), 0, -1):
+        if tail[-size:] in prefixes:
+            return size
+    return 0
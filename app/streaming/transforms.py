@@ -0,0 +1,186 @@
+"""
+transforms.py - Streaming chunk-transform pipeline
+
+Post-processes model output between LLMProvider.generate_stream() and the transport (SSE,
+WebSocket, chat jobs) without buffering whole answers. A TransformPipeline feeds each
+upstream chunk through its stages in order (RegexRedactor in redaction.py, PhraseFilter and
+StopRule in transform_stages.py); each stage emits what is safe now and holds back only a tail that
+could still start a pattern spanning the next chunk boundary.
+
+STREAM_TRANSFORMS lists the stages in order (empty: output is passed through unchanged);
+further stage types can be registered in TRANSFORMS. Each stream gets its own pipeline from
+build_pipeline(), since stages are stateful.
+
+Every pipeline reports per stage, when its stream ends, the processing time per chunk
+(transforms.<stage>.us_per_chunk) and the largest carry-over (transforms.<stage>.held_chars)
+as distributions, plus transforms.<stage>.matches and transforms.stopped counters; the totals
+are also set on the current trace span.
+
+Main functions/classes:
+- TransformPipeline: Stages applied in order, with timing
+- build_pipeline(): Pipeline configured by STREAM_TRANSFORMS
+- TRANSFORMS: Stage factories by name
+
+Dependencies:
+- Python standard library (codecs, time)
+- app.observability.metrics
+- app.observability.tracing.current_span
+- app.streaming.redaction (RegexRedactor, PII_PATTERNS)
+- app.streaming.transform_stages (ChunkTransform, PhraseFilter, StopRule)
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import codecs
+import time
+
+from app.observability import metrics
+from app.observability.tracing import current_span
+from app.streaming.redaction import MAX_PATTERN_CHARS, PII_PATTERNS, RegexRedactor
+from app.streaming.transform_stages import ChunkTransform, PhraseFilter, StopRule, held_prefix
+from config import Config
+
+__all__ = ["ChunkTransform", "MAX_PATTERN_CHARS", "PII_PATTERNS", "PhraseFilter", "RegexRedactor", "StopRule",
+           "TRANSFORMS", "TransformPipeline", "build_pipeline", "held_prefix", "parse_list"]
+
+class TransformPipeline:
+    """
+    Chunk transforms applied in order to one stream, timed per stage.
+
+    Attributes:
+        stages (list): ChunkTransform instances.
+        stopped (bool): True once a stage ended the answer; stop reading upstream.
+    """
+
+    def __init__(self, stages):
+        """
+        Initialize TransformPipeline.
+
+        Args:
+            stages (list): ChunkTransform instances, applied in order.
+        """
+        self.stages = list(stages)
+        self.stopped = False
+        self.chunks = 0
+        self._elapsed = [0.0] * len(self.stages)
+        self._held = [0] * len(self.stages)
+        self._reported = False
+
+    def feed(self, chunk):
+        """
+        Run one upstream chunk through every stage.
+
+        Args:
+            chunk (str): Upstream text.
+
+        Returns:
+            str: Text to send now (possibly empty while stages hold text back).
+        """
+        self.chunks += 1
+        return self._run(chunk, flush=False)
+
+    def flush(self):
+        """
+        Release what the stages hold back once upstream has finished (or a stage stopped it).
+
+        Returns:
+            str: Remaining text to send.
+        """
+        return self._run("", flush=True)
+
+    def transform(self, text):
+        """
+        Transform a complete answer (non-streaming responses).
+
+        Args:
+            text (str): The answer.
+
+        Returns:
+            str: The transformed answer.
+        """
+        output = self.feed(text) + self.flush()
+        self.report()
+        return output
+
+    def _run(self, text, flush):
+        """
+        Pass text through the stages; with flush, each stage also releases its carry-over.
+        """
+        for i, stage in enumerate(self.stages):
+            started = time.perf_counter()
+            if stage.stopped:
+                # Later stages only see what was emitted before the stop
+                text = stage.flush() if flush else ""
+            else:
+                text = stage.feed(text)
+                if flush:
+                    text += stage.flush()
+            self._elapsed[i] += time.perf_counter() - started
+            self._held[i] = max(self._held[i], len(stage.carry))
+            if stage.stopped:
+                self.stopped = True
+        return text
+
+    def report(self):
+        """
+        Publish per-stage overhead and match counts (once, when the stream ends).
+        """
+        if self._reported or not self.stages:
+            return
+        self._reported = True
+        span = current_span()
+        total_us = 0.0
+        for stage, elapsed, held in zip(self.stages, self._elapsed, self._held):
+            total_us += elapsed * 1e6
+            metrics.observe(f"transforms.{stage.name}.us_per_chunk", elapsed * 1e6 / max(1, self.chunks))
+            metrics.observe(f"transforms.{stage.name}.held_chars", held)
+            if stage.matches:
+                metrics.increment(f"transforms.{stage.name}.matches", stage.matches)
+            if stage.stopped:
+                metrics.increment("transforms.stopped")
+                if span is not None:
+                    span.set_attribute('stopped_by', f"{stage.name}: {getattr(stage, 'reason', None)}")
+        if span is not None:
+            span.set_attribute('transform_us', round(total_us, 1))
+
+def parse_list(spec):
+    """
+    Parse a comma-separated setting, decoding backslash escapes such as '\\n'.
+
+    Returns:
+        list: Non-empty items.
+    """
+    items = [codecs.decode(item.strip(), 'unicode_escape') for item in (spec or "").split(",")]
+    return [item for item in items if item]
+
+# Stage factories by STREAM_TRANSFORMS name
+TRANSFORMS = {
+    'redact_pii': lambda config: RegexRedactor(
+        {name: PII_PATTERNS[name] for name in parse_list(config.STREAM_PII_TYPES)},
+        replacement=config.STREAM_REDACTION_TEXT),
+    'filter_phrases': lambda config: PhraseFilter(parse_list(config.STREAM_BANNED_PHRASES),
+                                                  replacement=config.STREAM_FILTER_TEXT),
+    'stop': lambda config: StopRule(parse_list(config.STREAM_STOP_SEQUENCES), max_chars=config.STREAM_MAX_CHARS),
+}
+
+def build_pipeline(config=Config):
+    """
+    Build the pipeline for one stream from STREAM_TRANSFORMS.
+
+    Args:
+        config: Configuration object.
+
+    Returns:
+        TransformPipeline: Fresh stages (no stages when STREAM_TRANSFORMS is empty).
+
+    Raises:
+        ValueError: If STREAM_TRANSFORMS or STREAM_PII_TYPES names an unknown stage or type.
+    """
+    names = parse_list(config.STREAM_TRANSFORMS)
+    unknown = [name for name in names if name not in TRANSFORMS]
+    unknown += [name for name in (parse_list(config.STREAM_PII_TYPES) if 'redact_pii' in names else [])
+                if name not in PII_PATTERNS]
+    if unknown:
+        raise ValueError(f"Unknown stream transform or PII type: {', '.join(unknown)}")
+    return TransformPipeline([TRANSFORMS[name](config) for name in names])
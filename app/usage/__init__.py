@@ -0,0 +1,15 @@
+"""
+__init__.py - Token usage accounting for the app.usage package
+
+Imports and exposes:
+- usage_ledger: Process-wide UsageLedger
+- UsageLedger: Buffered append-only usage store with daily per-session/per-provider totals
+- resolve_usage: Pick SDK-reported or estimated token counts for a call
+
+@author Auto-refactored by Cline
+"""
+
+from app.usage.ledger import UsageLedger, usage_ledger
+from app.usage.ledger_files import resolve_usage
+
+__all__ = ["UsageLedger", "resolve_usage", "usage_ledger"]
@@ -0,0 +1,187 @@
+"""
+ledger.py - Append-only token usage ledger
+
+Implements the UsageLedger class and the process-wide `usage_ledger` instance. Every
+upstream provider call is recorded with its session, provider, model, and prompt and
+completion tokens, taken from the SDK's usage fields or estimated when the SDK reports
+none. Records are buffered in memory and appended by a background thread to one JSONL
+file per UTC day (ledger_files.py), so request threads never touch the disk.
+
+The same thread aggregates: after each flush it reads the records appended to today's file
+since the last pass (including those written by other worker processes) into per-session
+and per-provider totals (totals.py). tokens() combines those totals with records not yet
+flushed, so budget checks (app/control/budget.py) are dictionary lookups.
+
+Dependencies:
+- Python standard library (atexit, logging, threading)
+- app.observability.metrics
+- app.usage.ledger_files (append_records, ledger_record, resolve_usage, utc_day)
+- app.usage.totals.DailyTotals
+- config.Config
+
+@author Auto-refactored by Cline
+"""
+
+import atexit
+import logging
+import threading
+
+from app.observability import metrics
+from app.usage.ledger_files import append_records, ledger_record, resolve_usage, utc_day
+from app.usage.totals import DailyTotals
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class UsageLedger:
+    """
+    Buffered append-only usage store with per-session and per-provider daily totals.
+
+    Attributes:
+        directory (str): Where ledger-YYYY-MM-DD.jsonl files are written.
+        flush_interval (float): Seconds between background flush/aggregation passes.
+    """
+
+    def __init__(self, directory, flush_interval):
+        """
+        Initialize UsageLedger.
+
+        Args:
+            directory (str): Ledger directory.
+            flush_interval (float): Seconds between background passes.
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._totals = DailyTotals()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Load today's totals and start the background flusher (no-op if already started).
+        """
+        if self._thread is not None:
+            return
+        self.flush()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="usage-ledger", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background flusher and write what is buffered.
+        """
+        self._stop.set()
+        self._thread = None
+        self.flush()
+
+    def record(self, session_id, provider, model, prompt_tokens, completion_tokens, estimated, requested_model=None):
+        """
+        Buffer one provider call.
+
+        Args:
+            session_id (str): Browser session id.
+            provider (str): Provider name.
+            model (str): Model that served the call.
+            prompt_tokens (int): Prompt tokens.
+            completion_tokens (int): Completion tokens.
+            estimated (bool): True if the counts are estimates rather than SDK usage.
+            requested_model (str): Model the client asked for, if a budget downgraded it.
+        """
+        record = ledger_record(session_id, provider, model, prompt_tokens, completion_tokens, estimated,
+                               requested_model)
+        with self._lock:
+            self._pending.append(record)
+            self._totals.buffer(record)
+        metrics.increment("usage.prompt_tokens", prompt_tokens)
+        metrics.increment("usage.completion_tokens", completion_tokens)
+
+    def record_call(self, session_id, provider, model, llm, prompt_estimate, completion_estimate, requested_model=None):
+        """
+        Record the upstream calls a provider made for one request, if it made any.
+
+        Args:
+            session_id (str): Browser session id.
+            provider (str): Provider name.
+            model (str): Model that served the calls.
+            llm (LLMProvider): Provider instance; its usage counters are taken and reset.
+            prompt_estimate (int): Estimated prompt tokens of one call.
+            completion_estimate (int): Estimated tokens of the text produced.
+            requested_model (str): Model the client asked for.
+        """
+        usage = llm.take_usage()
+        if not usage["calls"]:
+            return
+        prompt_tokens, completion_tokens, estimated = resolve_usage(usage, prompt_estimate, completion_estimate)
+        self.record(session_id, provider, model, prompt_tokens, completion_tokens, estimated, requested_model)
+
+    def tokens(self, kind, key):
+        """
+        Get tokens used today.
+
+        Args:
+            kind (str): 'session' or 'provider'.
+            key (str): Session id or provider name.
+
+        Returns:
+            int: Tokens recorded today, including records not yet flushed.
+        """
+        return self._totals.tokens(kind, key)
+
+    def summary(self, top_sessions=20):
+        """
+        Summarize today's usage.
+
+        Args:
+            top_sessions (int): Heaviest sessions to include.
+
+        Returns:
+            dict: 'day', 'providers' (name to tokens) and 'top_sessions' ([session, tokens] pairs).
+        """
+        with self._lock:
+            keys = self._totals.keys()
+        providers = {key: self.tokens(kind, key) for kind, key in keys if kind == "provider"}
+        sessions = sorted(((key, self.tokens(kind, key)) for kind, key in keys if kind == "session"),
+                          key=lambda item: item[1], reverse=True)
+        return {"day": self._totals.day or utc_day(), "providers": providers, "top_sessions": sessions[:top_sessions]}
+
+    def flush(self):
+        """
+        Append buffered records to the day files, then fold new lines of today's file into the totals.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            try:
+                append_records(self.directory, batch)
+            except OSError as e:
+                logger.error("Could not write usage ledger: %s", e)
+                with self._lock:
+                    self._pending = batch + self._pending
+                return
+            flushed = self._totals.read(self.directory)
+            with self._lock:
+                # Swap in the new totals and drop the same records from the unflushed counts together
+                self._totals.update(flushed, batch)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Usage ledger flush failed: %s", e)
+
+usage_ledger = UsageLedger(Config.USAGE_LEDGER_DIR, Config.USAGE_FLUSH_INTERVAL)
+
+@atexit.register
+def _flush_on_exit():
+    """
+    Write buffered records before the interpreter exits.
+    """
+    if usage_ledger._pending:
+        usage_ledger.flush()
+
+__all__ = ["UsageLedger", "resolve_usage", "usage_ledger", "utc_day"]
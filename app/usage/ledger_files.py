@@ -0,0 +1,139 @@
+"""
+ledger_files.py - Day files of the usage ledger
+
+The usage ledger (ledger.py) keeps one JSON-lines file per UTC day,
+USAGE_LEDGER_DIR/ledger-YYYY-MM-DD.jsonl, shared by every worker process. Batches are
+appended with one write each, so lines of concurrent workers stay whole, and readers only
+take complete lines, so a line being written is read on the next pass. A line's token
+counts come from resolve_usage(): SDK-reported where every call reported them, else estimates.
+
+Dependencies:
+- Python standard library (datetime, json, os)
+
+@author Auto-refactored by Cline
+"""
+
+import datetime
+import json
+import os
+
+def utc_day(timestamp=None):
+    """
+    Get the UTC date that budgets and ledger files are keyed by.
+
+    Args:
+        timestamp (float): Unix time (defaults to now).
+
+    Returns:
+        str: 'YYYY-MM-DD'.
+    """
+    moment = datetime.datetime.now(datetime.timezone.utc) if timestamp is None else \
+        datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+    return moment.strftime('%Y-%m-%d')
+
+def resolve_usage(usage, prompt_estimate, completion_estimate):
+    """
+    Choose SDK-reported or estimated token counts for a provider call.
+
+    SDK numbers are used only when every upstream call reported usage; otherwise the
+    whole call is estimated so partial reports are not mistaken for totals.
+
+    Args:
+        usage (dict): LLMProvider.take_usage() result.
+        prompt_estimate (int): Estimated prompt tokens of one call.
+        completion_estimate (int): Estimated tokens of the text produced.
+
+    Returns:
+        tuple: (prompt_tokens, completion_tokens, estimated).
+    """
+    if usage["calls"] and usage["reported"] == usage["calls"]:
+        return usage["prompt_tokens"], usage["completion_tokens"], False
+    return prompt_estimate * max(1, usage["calls"]), completion_estimate, True
+
+def ledger_record(session_id, provider, model, prompt_tokens, completion_tokens, estimated, requested_model=None):
+    """
+    Build the ledger line of one provider call, stamped with the current time.
+
+    Args:
+        session_id (str): Browser session id.
+        provider (str): Provider name.
+        model (str): Model that served the call.
+        prompt_tokens (int): Prompt tokens.
+        completion_tokens (int): Completion tokens.
+        estimated (bool): True if the counts are estimates rather than SDK usage.
+        requested_model (str): Model the client asked for; kept only if a budget downgraded it.
+
+    Returns:
+        dict: ts, session, provider, model, prompt_tokens, completion_tokens, estimated
+        (and requested_model).
+    """
+    record = {
+        "ts": round(datetime.datetime.now(datetime.timezone.utc).timestamp(), 3),
+        "session": session_id,
+        "provider": provider,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "estimated": estimated,
+    }
+    if requested_model and requested_model != model:
+        record["requested_model"] = requested_model
+    return record
+
+def ledger_path(directory, day):
+    """
+    Get the path of one day's ledger file.
+
+    Args:
+        directory (str): Ledger directory.
+        day (str): 'YYYY-MM-DD'.
+
+    Returns:
+        str: Path of ledger-YYYY-MM-DD.jsonl.
+    """
+    return os.path.join(directory, f"ledger-{day}.jsonl")
+
+def append_records(directory, records):
+    """
+    Append records to the files of the UTC days they were made on.
+
+    Args:
+        directory (str): Ledger directory (created if missing).
+        records (list): Record dicts, each with a 'ts' Unix time.
+
+    Raises:
+        OSError: If the directory or a file cannot be written.
+    """
+    by_day = {}
+    for record in records:
+        by_day.setdefault(utc_day(record["ts"]), []).append(record)
+    os.makedirs(directory, exist_ok=True)
+    for day, batch in by_day.items():
+        with open(ledger_path(directory, day), "a", encoding="utf-8") as ledger:
+            # One write per batch keeps lines from concurrent workers whole
+            ledger.write("".join(json.dumps(record) + "\n" for record in batch))
+
+def read_appended(path, offset):
+    """
+    Read the complete lines appended to a ledger file since `offset`.
+
+    Args:
+        path (str): Ledger file (a missing file has no records).
+        offset (int): Byte offset reached by the previous read.
+
+    Returns:
+        tuple: (records, offset after the last complete line). Unparsable lines are skipped.
+    """
+    if not os.path.exists(path):
+        return [], offset
+    with open(path, "rb") as ledger:
+        ledger.seek(offset)
+        data = ledger.read()
+    complete = data[:data.rfind(b"\n") + 1]
+    records = []
+    for line in complete.splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records, offset + len(complete)
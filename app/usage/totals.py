@@ -0,0 +1,112 @@
+"""
+totals.py - Daily token totals of the usage ledger
+
+Implements the DailyTotals class, the per-session and per-provider token counts that
+UsageLedger (ledger.py) answers budget checks from. Flushed totals come from today's
+ledger file, so they include the records of every worker process; records this process
+has buffered but not written yet are counted separately until the flush that writes them.
+
+Dependencies:
+- app.usage.ledger_files (ledger_path, read_appended, utc_day)
+
+@author Auto-refactored by Cline
+"""
+
+from app.usage.ledger_files import ledger_path, read_appended, utc_day
+
+def _add(totals, record):
+    """
+    Add a record's tokens to its session and provider totals.
+    """
+    tokens = record["prompt_tokens"] + record["completion_tokens"]
+    for key in (("session", record["session"]), ("provider", record["provider"])):
+        totals[key] = totals.get(key, 0) + tokens
+
+def _remove(totals, record):
+    """
+    Subtract a record's tokens from its session and provider totals, dropping totals that reach zero.
+    """
+    tokens = record["prompt_tokens"] + record["completion_tokens"]
+    for key in (("session", record["session"]), ("provider", record["provider"])):
+        remaining = totals.get(key, 0) - tokens
+        if remaining > 0:
+            totals[key] = remaining
+        else:
+            totals.pop(key, None)
+
+class DailyTotals:
+    """
+    Tokens used today per session and per provider.
+
+    The caller (UsageLedger) serializes access: buffer(), update() and keys() under its
+    lock, read() under its flush lock.
+
+    Attributes:
+        day (str | None): UTC day the flushed totals are for (None before the first read).
+    """
+
+    def __init__(self):
+        """
+        Initialize empty totals.
+        """
+        self.day = None
+        self._offset = 0
+        self._flushed = {}
+        self._unflushed = {}
+
+    def tokens(self, kind, key):
+        """
+        Get tokens used today by a session ('session') or provider ('provider'), buffered records included.
+        """
+        return self._flushed.get((kind, key), 0) + self._unflushed.get((kind, key), 0)
+
+    def keys(self):
+        """
+        Get every (kind, key) pair with tokens today.
+
+        Returns:
+            set: ('session', id) and ('provider', name) pairs.
+        """
+        return set(self._flushed) | set(self._unflushed)
+
+    def buffer(self, record):
+        """
+        Count a record that is not written yet.
+
+        Args:
+            record (dict): Ledger record.
+        """
+        _add(self._unflushed, record)
+
+    def read(self, directory):
+        """
+        Add the records appended to today's file since the last read to a copy of the flushed totals.
+
+        Starts from zero when the UTC day changed since the last read.
+
+        Args:
+            directory (str): Ledger directory.
+
+        Returns:
+            dict: Flushed totals to pass to update().
+        """
+        today = utc_day()
+        flushed = dict(self._flushed)
+        if today != self.day:
+            self.day, self._offset, flushed = today, 0, {}
+        records, self._offset = read_appended(ledger_path(directory, today), self._offset)
+        for record in records:
+            _add(flushed, record)
+        return flushed
+
+    def update(self, flushed, written):
+        """
+        Swap in new flushed totals and stop counting the records just written as buffered.
+
+        Args:
+            flushed (dict): read() result.
+            written (list): Records the flush wrote (now included in `flushed`).
+        """
+        self._flushed = flushed
+        for record in written:
+            _remove(self._unflushed, record)
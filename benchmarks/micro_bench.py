@@ -0,0 +1,263 @@
+"""
+micro_bench.py - Microbenchmarks for per-request Python hot paths
+
+Times the Python work every chat request does besides waiting for the provider, and
+compares it with a stored baseline so hot-path slowdowns fail before deploy:
+
+- LLMProvider.to_dict() / from_dict() and a full session cookie round trip (Flask's tagged
+  JSON serializer) at several history sizes
+- get_llm_provider() restoring a provider from the session
+- add_to_history() on a full window (append and trim)
+- prompt rendering: the Anthropic completion prompt join and the Gemini parts conversion
+- SSE frame encoding (format_sse)
+- the output transform pipeline (PII redaction, phrase filter, stop rule) per streamed chunk
+
+Raw timings depend on the machine and drift with its load and clock speed, so each round
+of a benchmark is paired with a round of a fixed pure-Python calibration workload, and
+benchmarks are judged on their time relative to it (median over rounds). A benchmark
+regresses when its relative time exceeds the baseline's by more than the tolerance
+(baseline file `tolerance`, per-benchmark `tolerances`, or --tolerance). The best
+nanoseconds per call are reported alongside, for reading.
+
+Usage (from the repository root):
+    python -m benchmarks.micro_bench                    # compare with benchmarks/baseline.json
+    python -m benchmarks.micro_bench --update           # record a new baseline
+    python -m benchmarks.micro_bench --filter sse --tolerance 0.5
+
+Exit codes: 0 no regression, 1 regression, 2 no baseline to compare with.
+
+Dependencies:
+- Python standard library (argparse, json, os, platform, statistics, sys, timeit)
+- flask (Flask, session, TaggedJSONSerializer)
+- app.providers (GroqProvider, completion_prompt, to_gemini_history)
+- app.routes.provider_factory.get_llm_provider
+- app.streaming (format_sse, TransformPipeline)
+- app.streaming.transforms (PII_PATTERNS, PhraseFilter, RegexRedactor, StopRule)
+
+@author Auto-refactored by Cline
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+
+# Provider clients are built but never called; they only need a key to be constructed
+for key in ("GROQ_API_KEY", "OPENAI_API_KEY", "CEREBRAS_API_KEY", "ANTHROPIC_API_KEY", "GEMINI_API_KEY"):
+    os.environ.setdefault(key, "benchmark")
+
+from flask import Flask, session
+from flask.json.tag import TaggedJSONSerializer
+
+from app.providers.anthropic_provider import completion_prompt
+from app.providers.gemini_provider import to_gemini_history
+from app.providers.groq_provider import GroqProvider
+from app.routes.provider_factory import get_llm_provider
+from app.streaming import TransformPipeline, format_sse
+from app.streaming.transforms import PII_PATTERNS, PhraseFilter, RegexRedactor, StopRule
+
+# ====================================
+# Constants and configuration
+# ====================================
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_TOLERANCE = 0.3
+DEFAULT_REPEAT = 7
+# Default window (LLMProvider max_history), a long window and a very long one
+HISTORY_SIZES = (10, 50, 200)
+TURN_CHARS = 400
+
+def make_history(size):
+    """
+    Build a conversation of alternating user/assistant turns.
+
+    Args:
+        size (int): Number of turns.
+
+    Returns:
+        list: Message dicts.
+    """
+    return [{"role": "user" if i % 2 == 0 else "assistant",
+             "content": f"Turn {i}: " + "lorem ipsum dolor sit amet " * (TURN_CHARS // 27)}
+            for i in range(size)]
+
+def make_provider(size):
+    """
+    Build a provider whose window is full with `size` turns.
+    """
+    provider = GroqProvider(max_history=size)
+    provider.conversation_history = make_history(size)
+    return provider
+
+def calibration():
+    """
+    Fixed pure-Python workload (dict access, a loop, string building) used as the unit of time.
+    """
+    turns = [{"role": "user", "content": "calibration " * 4} for _ in range(100)]
+    return "".join(turn["content"].upper() for turn in turns if turn["role"] == "user")
+
+def benchmarks():
+    """
+    Build the benchmarks.
+
+    Returns:
+        list: (name, callable) pairs; each callable runs one operation.
+    """
+    serializer = TaggedJSONSerializer()
+    app = Flask(__name__)
+    app.secret_key = "benchmark"
+    # One request context for the whole run: get_llm_provider() is timed, not Flask's request setup
+    app.test_request_context().push()
+    cases = []
+    for size in HISTORY_SIZES:
+        provider = make_provider(size)
+        state = provider.to_dict()
+        cookie = serializer.dumps({"llm_provider": {"groq": state}})
+        history = provider.conversation_history
+        full = make_provider(size)
+
+        def get_from_session(state=state):
+            session["llm_provider"] = {"groq": state}
+            return get_llm_provider("groq")
+
+        def add_turn(full=full):
+            full.add_to_history("user", "One more question about the previous answer?")
+
+        cases += [
+            (f"provider.to_dict[{size}]", provider.to_dict),
+            (f"provider.from_dict[{size}]", lambda state=state: GroqProvider.from_dict(state)),
+            (f"session.round_trip[{size}]", lambda provider=provider, cookie=cookie: (
+                serializer.dumps({"llm_provider": {"groq": provider.to_dict()}}),
+                GroqProvider.from_dict(serializer.loads(cookie)["llm_provider"]["groq"]))),
+            (f"get_llm_provider[{size}]", get_from_session),
+            (f"add_to_history[{size}]", add_turn),
+            (f"anthropic.completion_prompt[{size}]", lambda history=history: completion_prompt(history)),
+            (f"gemini.to_gemini_history[{size}]", lambda history=history: to_gemini_history(history)),
+        ]
+    chunk = "Hello, this is a typical streamed chunk"
+    paragraph = "\n".join(["A line of a multi-line chunk"] * 20)
+    cases += [
+        ("format_sse[chunk]", lambda: format_sse(chunk)),
+        ("format_sse[multiline]", lambda: format_sse(paragraph)),
+        ("format_sse[event]", lambda: format_sse("b9a40ae2714e4741bd68655ef412e5e3", event="stream")),
+    ]
+    # Stages keep state across chunks; one pipeline fed forever is the steady state of a long answer
+    pipeline = TransformPipeline([RegexRedactor(PII_PATTERNS), PhraseFilter(["banned phrase", "another one"]),
+                                  StopRule(["\n\nUser:"])])
+    cases.append(("transforms.feed[chunk]", lambda: pipeline.feed(" typical streamed words")))
+    return cases
+
+def measure(fn, repeat):
+    """
+    Time one operation in rounds, each paired with a calibration round.
+
+    Args:
+        fn (callable): The operation.
+        repeat (int): Rounds (each at least 0.2s of the operation).
+
+    Returns:
+        tuple: (best nanoseconds per call, median time relative to the calibration workload).
+    """
+    timer, reference = timeit.Timer(fn), timeit.Timer(calibration)
+    number, _ = timer.autorange()
+    reference_number, _ = reference.autorange()
+    best, ratios = float("inf"), []
+    for _ in range(repeat):
+        unit = reference.timeit(reference_number) / reference_number
+        elapsed = timer.timeit(number) / number
+        best = min(best, elapsed)
+        ratios.append(elapsed / unit)
+    return best * 1e9, statistics.median(ratios)
+
+def compare(results, baseline, tolerance=None):
+    """
+    Compare relative timings with a baseline.
+
+    Args:
+        results (dict): Benchmark names mapped to {'ns', 'relative'}.
+        baseline (dict): Loaded baseline file.
+        tolerance (float): Overrides the baseline's tolerances.
+
+    Returns:
+        list: (name, baseline ns or None, ns, change or None, status) rows; change is the
+        relative slowdown and status is 'ok', 'faster', 'REGRESSED' or 'new'.
+    """
+    rows = []
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append((name, None, result["ns"], None, 'new'))
+            continue
+        limit = tolerance
+        if limit is None:
+            limit = baseline.get("tolerances", {}).get(name, baseline.get("tolerance", DEFAULT_TOLERANCE))
+        change = result["relative"] / base["relative"] - 1
+        status = 'REGRESSED' if change > limit else 'faster' if change < -limit else 'ok'
+        rows.append((name, base["ns"], result["ns"], change, status))
+    return rows
+
+def main(argv=None):
+    """
+    Run the benchmarks, then compare with or update the baseline.
+
+    Args:
+        argv (list): Command-line arguments (defaults to sys.argv[1:]).
+
+    Returns:
+        int: Exit code (1 on regression, 2 without a baseline).
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.micro_bench", description="Microbenchmarks for request hot paths.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--update", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, help="Allowed slowdown as a fraction (overrides the baseline's)")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Rounds per benchmark (the median ratio is kept)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, fn in benchmarks():
+        if args.filter and args.filter not in name:
+            continue
+        ns, relative = measure(fn, args.repeat)
+        results[name] = {"ns": round(ns, 1), "relative": round(relative, 5)}
+        print(f"{name:<40} {ns:>12,.0f} ns  x{relative:.4f}", file=sys.stderr)
+
+    if args.update:
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                previous = json.load(f)
+        baseline = {
+            "tolerance": previous.get("tolerance", DEFAULT_TOLERANCE),
+            "tolerances": previous.get("tolerances", {}),
+            "python": platform.python_version(),
+            # A filtered run only replaces the benchmarks it ran
+            "results": dict(previous.get("results", {}), **results),
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --update", file=sys.stderr)
+        return 2
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.tolerance)
+    print(f"{'benchmark':<40} {'baseline ns':>12} {'now ns':>12} {'change':>8}  status")
+    for name, base, ns, change, status in rows:
+        base_text = "-" if base is None else f"{base:,.0f}"
+        change_text = "-" if change is None else f"{change:+.1%}"
+        print(f"{name:<40} {base_text:>12} {ns:>12,.0f} {change_text:>8}  {status}")
+    regressed = [row[0] for row in rows if row[4] == 'REGRESSED']
+    if regressed:
+        print(f"{len(regressed)} benchmark(s) regressed beyond tolerance: {', '.join(regressed)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+// render_bench.js - Headless benchmark of streamed-chunk rendering cost for EchoChat UI
+// Streams synthetic chunks into five response panels in headless Chrome and reports the
+// DOM time per chunk for growing response lengths, comparing the previous per-chunk
+// renderer (panel lookup, textContent reset to the whole answer, scrollTop per chunk)
+// with StreamRenderer (/static/js/stream-renderer.js). Each simulated animation frame
+// delivers CHUNKS_PER_FRAME chunks per panel and ends with a forced layout, as the
+// browser would before painting.
+//
+// Usage:
+//   NODE_PATH=$(npm root -g) node benchmarks/render_bench.js [length ...]
+//
+// Dependencies:
+// - Node.js 18+
+// - puppeteer (downloads its own Chrome)
+//
+// See also: /benchmarks/README.md
+
+const fs = require('fs');
+const path = require('path');
+const puppeteer = require('puppeteer');
+
+const PANELS = 5;
+const CHUNK_SIZE = 8;
+const CHUNKS_PER_FRAME = 4;
+const DEFAULT_LENGTHS = [2000, 8000, 32000, 64000];
+
+const PAGE = `<!DOCTYPE html><html><head><style>
+  #response-grid { display: grid; grid-template-columns: repeat(${PANELS}, 1fr); gap: 8px; }
+  .messages { height: 400px; overflow-y: auto; display: flex; flex-direction: column; }
+  .whitespace-pre-line { white-space: pre-line; }
+  .break-words { overflow-wrap: break-word; }
+</style></head><body><div id="response-grid"></div></body></html>`;
+
+// Runs in the page: builds fresh panels and streams `length` characters per panel
+function runInPage(mode, length, panels, chunkSize, chunksPerFrame) {
+    const grid = document.getElementById('response-grid');
+    grid.innerHTML = '';
+    const providers = [];
+    for (let i = 0; i < panels; i++) {
+        const panel = document.createElement('div');
+        panel.dataset.provider = `provider${i}`;
+        const messages = document.createElement('div');
+        messages.className = 'messages';
+        panel.appendChild(messages);
+        grid.appendChild(panel);
+        providers.push(panel.dataset.provider);
+    }
+    const chunk = 'lorem ipsum dolor sit amet consectetur '.repeat(4).slice(0, chunkSize - 1) + '\n';
+    const chunks = Math.ceil(length / chunkSize);
+
+    let render;
+    let endFrame;
+    if (mode === 'legacy') {
+        // The renderer main.js used before StreamRenderer
+        const responses = {};
+        render = (provider, text) => {
+            responses[provider] = (responses[provider] || '') + text;
+            const panel = Array.from(grid.children).find(p => p.dataset.provider === provider);
+            const messages = panel.querySelector('.messages');
+            let bubble = messages.lastElementChild;
+            if (!bubble || !bubble.classList.contains('ai-stream')) {
+                bubble = document.createElement('div');
+                bubble.className = 'ai-stream flex justify-start';
+                bubble.innerHTML = `<div class="${STREAM_BUBBLE_CLASS}"></div>`;
+                messages.appendChild(bubble);
+            }
+            bubble.querySelector('div').textContent = responses[provider];
+            messages.scrollTop = messages.scrollHeight;
+        };
+        endFrame = () => {};
+    } else {
+        // Frames are driven by the benchmark, not requestAnimationFrame
+        const renderer = new StreamRenderer(grid, () => {});
+        render = (provider, text) => renderer.append(provider, text);
+        endFrame = () => renderer.flush();
+    }
+
+    const start = performance.now();
+    for (let sent = 0; sent < chunks; sent += chunksPerFrame) {
+        const count = Math.min(chunksPerFrame, chunks - sent);
+        for (let c = 0; c < count; c++) {
+            providers.forEach(provider => render(provider, chunk));
+        }
+        endFrame();
+        // Layout the browser would do before painting this frame
+        void grid.offsetHeight;
+    }
+    return (performance.now() - start) / (chunks * panels);
+}
+
+async function main() {
+    const lengths = process.argv.slice(2).map(Number).filter(Boolean);
+    const browser = await puppeteer.launch({ headless: 'shell', args: ['--no-sandbox'] });
+    try {
+        const page = await browser.newPage();
+        await page.setViewport({ width: 1600, height: 900 });
+        await page.setContent(PAGE);
+        await page.addScriptTag({
+            content: fs.readFileSync(path.join(__dirname, '..', 'static', 'js', 'stream-renderer.js'), 'utf8')
+        });
+
+        console.log(`${PANELS} panels, ${CHUNK_SIZE}-character chunks, ${CHUNKS_PER_FRAME} chunks per panel per frame`);
+        console.log('length    legacy us/chunk    renderer us/chunk    speedup');
+        for (const length of lengths.length ? lengths : DEFAULT_LENGTHS) {
+            const legacy = await page.evaluate(runInPage, 'legacy', length, PANELS, CHUNK_SIZE, CHUNKS_PER_FRAME);
+            const batched = await page.evaluate(runInPage, 'renderer', length, PANELS, CHUNK_SIZE, CHUNKS_PER_FRAME);
+            console.log(`${String(length).padEnd(10)}${(legacy * 1000).toFixed(1).padStart(15)}` +
+                        `${(batched * 1000).toFixed(1).padStart(21)}${(legacy / batched).toFixed(1).padStart(10)}x`);
+        }
+    } finally {
+        await browser.close();
+    }
+}
+
+main().catch(error => {
+    console.error(error);
+    process.exit(1);
+});
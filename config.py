@@ -22,6 +22,86 @@ class Config:
         ANTHROPIC_API_KEY (str): Anthropic API key.
         OPENAI_API_KEY (str): OpenAI API key.
         CEREBRAS_API_KEY (str): Cerebras API key.
+        (<PROVIDER>_API_KEYS): Optional key pool replacing a provider's single key, read from the
+            environment by app/providers/credentials.py, e.g. OPENAI_API_KEYS='sk-a,sk-b;project=proj_1'.
+        API_KEY_EJECT_SECONDS (float): Seconds a pooled key sits out after a 429 without Retry-After
+            (doubling on consecutive 429s).
+        API_KEY_MAX_EJECT_SECONDS (float): Longest rate-limit ejection.
+        API_KEY_AUTH_EJECT_SECONDS (float): Seconds a pooled key sits out after a 401/403.
+        HISTORY_SUMMARY_ENABLED (bool): Summarize turns evicted from the history window (off by default).
+        HISTORY_SUMMARY_PROVIDER (str): Provider used for summarization.
+        HISTORY_SUMMARY_MODEL (str): Model used for summarization (pick a cheap, fast one).
+        HISTORY_SUMMARY_WORKERS (int): Background summarization threads.
+        HISTORY_RETRIEVAL_TOP_K (int): Older turns retrieved per request in 'retrieval' mode.
+        HISTORY_RETRIEVAL_RECENT (int): Newest turns always sent in 'retrieval' mode.
+        HISTORY_RETRIEVAL_DIM (int): Hashed embedding dimension.
+        HISTORY_RETRIEVAL_MAX_CONVERSATIONS (int): Conversation indexes kept in memory.
+        EVAL_OUTPUT_DIR (str): Directory for batch evaluation results started over HTTP.
+        EVAL_DEFAULT_CONCURRENCY (int): Worker threads per provider in batch evaluation.
+        SERVER_HOST / SERVER_PORT (str / int): Address serve.py binds to.
+        SERVER_WORKERS (int): gunicorn worker processes.
+        SERVER_THREADS (int): Threads per worker (each open SSE stream holds one).
+        SERVER_KEEPALIVE (int): Seconds to hold idle keep-alive connections.
+        SERVER_TIMEOUT (int): Seconds before a silent worker is restarted.
+        DRAIN_TIMEOUT (int): Seconds in-flight streams may run after SIGTERM.
+        ADMISSION_GLOBAL_LIMIT (int): Upstream provider calls in flight at once per process.
+        ADMISSION_SESSION_LIMIT (int): Upstream provider calls in flight at once per session.
+        ADMISSION_MAX_QUEUE (int): Requests allowed to wait before answering 429.
+        ADMISSION_MAX_WAIT (float): Seconds a request may wait before answering 429.
+        LOG_LEVEL (str): Root log level.
+        LOG_SINKS (str): Comma-separated sinks: 'stderr', 'stdout', 'file:/path/app.log'.
+        LOG_SAMPLE_RATES (str): Per-level fraction kept, e.g. 'DEBUG=0.01,INFO=0.5'.
+        LOG_BODY_MODE (str): How message bodies are logged: 'truncate', 'redact' or 'full'.
+        LOG_BODY_MAX_CHARS (int): Characters kept when truncating bodies.
+        MODEL_CATALOG_REFRESH_INTERVAL (int): Seconds between background model list refreshes.
+        MODEL_CATALOG_TTL (int): Seconds a listed catalog stays valid when refreshes keep failing.
+        MODEL_CATALOG_VALIDATE (bool): Reject /chat requests naming models not in the catalog.
+        TRACE_SAMPLE_RATE (float): Fraction of /chat requests traced (0 disables tracing).
+        TRACE_EXPORTER (str): 'file' (JSONL at TRACE_FILE) or 'otlp' (OTLP/HTTP JSON).
+        TRACE_FILE (str): Span output file for the 'file' exporter.
+        TRACE_OTLP_ENDPOINT (str): Collector URL for the 'otlp' exporter.
+        TRACE_SERVICE_NAME (str): service.name reported to the collector.
+        ADMIN_TOKEN (str): Bearer token for /admin endpoints (unset disables them).
+        PROFILE_SECRET (str): HMAC secret for X-Profile-Token headers (unset disables them).
+        PROFILE_TOKEN_TTL (int): Seconds a profiling token stays valid.
+        PROFILE_DIR (str): Directory profiles are written to.
+        PROFILE_MAX_FILES (int): Profiles kept before the oldest are deleted.
+        USAGE_LEDGER_DIR (str): Directory of the daily token usage ledger files.
+        USAGE_FLUSH_INTERVAL (float): Seconds between ledger flush/aggregation passes.
+        BUDGET_SESSION_DAILY_TOKENS (int): Tokens per session per UTC day (0 = unlimited).
+        BUDGET_PROVIDER_DAILY_TOKENS (str): Per-provider daily tokens, e.g. 'openai=2000000,groq=5000000'.
+        BUDGET_DOWNGRADE_AT (float): Fraction of a budget after which calls use the downgrade model.
+        BUDGET_DOWNGRADE_MODELS (str): Cheaper models, e.g. 'openai:gpt-4.1=gpt-4.1-mini'.
+        BUDGET_DEFAULT_COMPLETION_TOKENS (int): Expected completion length before any is observed.
+        WS_STREAM_WINDOW (int): Unacknowledged frames per conversation before /ws chunks wait.
+        WS_STALL_TIMEOUT (float): Seconds a /ws stream may wait for acknowledgements before it is cancelled.
+        WS_MAX_STREAMS (int): Provider streams running at once per /ws connection.
+        WS_PING_INTERVAL (int): Seconds between /ws keep-alive pings (0 disables them).
+        SOCK_SERVER_OPTIONS (dict): flask-sock server options derived from the WS_* settings.
+        OPENAI_COMPATIBLE_PROVIDERS (str): JSON object of extra OpenAI-compatible providers
+            (name -> base_url, api_key_env, headers, timeout, max_retries, stream_usage, models, label).
+        STATE_BACKEND_URL (str): Shared state for multi-worker deployments: 'memory://' (one process)
+            or 'redis://[:password@]host[:port][/db]'.
+        STATE_KEY_PREFIX (str): Namespace for shared-state keys and channels.
+        STATE_TIMEOUT (float): Seconds to wait on the shared-state server per command.
+        JOB_RETENTION (float): Seconds a finished chat job (deadline compare straggler) is kept.
+        JOB_MAX_RETAINED (int): Chat jobs kept per process at most (oldest finished evicted first).
+        CASSETTE_MODE (str): 'off', 'record' (save provider calls to cassettes) or 'replay' (offline playback).
+        CASSETTE_DIR (str): Directory of the cassette files (one per provider).
+        CASSETTE_SPEED (str): Replay pacing: 'recorded', 'max' or a speed-up factor such as '10'.
+        AUTO_ROUTE_CANDIDATES (str): Equivalent pairs the `auto` provider routes between,
+            e.g. 'groq:llama-3.1-8b-instant,cerebras:llama3.1-8b'.
+        AUTO_ROUTE_EXPLORATION (float): Share of `auto` decisions sent to the least recently measured candidate.
+        AUTO_ROUTE_MAX_ERROR_RATE (float): Recent error rate above which a candidate is avoided.
+        STREAM_TRANSFORMS (str): Ordered output transforms, e.g. 'redact_pii,filter_phrases,stop' (empty: none).
+        STREAM_PII_TYPES (str): What 'redact_pii' replaces: any of 'email,phone,card,ssn'.
+        STREAM_REDACTION_TEXT (str): Replacement for redacted PII.
+        STREAM_BANNED_PHRASES (str): Comma-separated phrases 'filter_phrases' replaces (case-insensitive).
+        STREAM_FILTER_TEXT (str): Replacement for banned phrases.
+        STREAM_STOP_SEQUENCES (str): Comma-separated sequences 'stop' ends answers before ('\\n' escapes allowed).
+        STREAM_MAX_CHARS (int): Characters after which 'stop' ends answers (0: no limit).
+        GENERATION_DEFAULTS (str): JSON object of default generation options per '*', provider or
+            'provider:model' (max_tokens, stop, temperature, reasoning_max_tokens, max_tokens_limit).
     """
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess'
     GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
@@ -30,6 +110,118 @@ class Config:
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
     CEREBRAS_API_KEY = os.environ.get('CEREBRAS_API_KEY')
 
+    # API key pools (see app/providers/credentials.py)
+    API_KEY_EJECT_SECONDS = float(os.environ.get('API_KEY_EJECT_SECONDS', '30'))
+    API_KEY_MAX_EJECT_SECONDS = float(os.environ.get('API_KEY_MAX_EJECT_SECONDS', '600'))
+    API_KEY_AUTH_EJECT_SECONDS = float(os.environ.get('API_KEY_AUTH_EJECT_SECONDS', '900'))
+
+    # History compaction (see app/history/compaction.py)
+    HISTORY_SUMMARY_ENABLED = os.environ.get('HISTORY_SUMMARY_ENABLED', 'false').lower() == 'true'
+    HISTORY_SUMMARY_PROVIDER = os.environ.get('HISTORY_SUMMARY_PROVIDER', 'groq')
+    HISTORY_SUMMARY_MODEL = os.environ.get('HISTORY_SUMMARY_MODEL', 'llama-3.1-8b-instant')
+    HISTORY_SUMMARY_WORKERS = int(os.environ.get('HISTORY_SUMMARY_WORKERS', '2'))
+
+    # History retrieval (see app/history/retrieval.py)
+    HISTORY_RETRIEVAL_TOP_K = int(os.environ.get('HISTORY_RETRIEVAL_TOP_K', '4'))
+    HISTORY_RETRIEVAL_RECENT = int(os.environ.get('HISTORY_RETRIEVAL_RECENT', '4'))
+    HISTORY_RETRIEVAL_DIM = int(os.environ.get('HISTORY_RETRIEVAL_DIM', '1024'))
+    HISTORY_RETRIEVAL_MAX_CONVERSATIONS = int(os.environ.get('HISTORY_RETRIEVAL_MAX_CONVERSATIONS', '256'))
+
+    # Batch evaluation (see app/evaluation/runner.py)
+    EVAL_OUTPUT_DIR = os.environ.get('EVAL_OUTPUT_DIR', 'eval_runs')
+    EVAL_DEFAULT_CONCURRENCY = int(os.environ.get('EVAL_DEFAULT_CONCURRENCY', '4'))
+
+    # Production serving (see serve.py)
+    SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.environ.get('SERVER_PORT', '5152'))
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', '2'))
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', '32'))
+    SERVER_KEEPALIVE = int(os.environ.get('SERVER_KEEPALIVE', '75'))
+    SERVER_TIMEOUT = int(os.environ.get('SERVER_TIMEOUT', '120'))
+    DRAIN_TIMEOUT = int(os.environ.get('DRAIN_TIMEOUT', '25'))
+
+    # Admission control (see app/control/admission.py)
+    ADMISSION_GLOBAL_LIMIT = int(os.environ.get('ADMISSION_GLOBAL_LIMIT', '48'))
+    ADMISSION_SESSION_LIMIT = int(os.environ.get('ADMISSION_SESSION_LIMIT', '2'))
+    ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', '64'))
+    ADMISSION_MAX_WAIT = float(os.environ.get('ADMISSION_MAX_WAIT', '15'))
+
+    # Logging (see app/observability/logging_setup.py)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_SINKS = os.environ.get('LOG_SINKS', 'stderr')
+    LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', '')
+    LOG_BODY_MODE = os.environ.get('LOG_BODY_MODE', 'truncate')
+    LOG_BODY_MAX_CHARS = int(os.environ.get('LOG_BODY_MAX_CHARS', '64'))
+
+    # Model catalog (see app/catalog/model_catalog.py)
+    MODEL_CATALOG_REFRESH_INTERVAL = int(os.environ.get('MODEL_CATALOG_REFRESH_INTERVAL', '300'))
+    MODEL_CATALOG_TTL = int(os.environ.get('MODEL_CATALOG_TTL', '1800'))
+    MODEL_CATALOG_VALIDATE = os.environ.get('MODEL_CATALOG_VALIDATE', 'true').lower() == 'true'
+
+    # Tracing (see app/observability/tracing.py)
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0'))
+    TRACE_EXPORTER = os.environ.get('TRACE_EXPORTER', 'file')
+    TRACE_FILE = os.environ.get('TRACE_FILE', 'traces/spans.jsonl')
+    TRACE_OTLP_ENDPOINT = os.environ.get('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+    TRACE_SERVICE_NAME = os.environ.get('TRACE_SERVICE_NAME', 'multi-chat')
+
+    # Admin endpoints and on-demand profiling (see app/observability/profiling.py)
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    PROFILE_SECRET = os.environ.get('PROFILE_SECRET')
+    PROFILE_TOKEN_TTL = int(os.environ.get('PROFILE_TOKEN_TTL', '300'))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', '50'))
+
+    # Usage ledger and budgets (see app/usage/ledger.py, app/control/budget.py)
+    USAGE_LEDGER_DIR = os.environ.get('USAGE_LEDGER_DIR', 'usage')
+    USAGE_FLUSH_INTERVAL = float(os.environ.get('USAGE_FLUSH_INTERVAL', '5'))
+    BUDGET_SESSION_DAILY_TOKENS = int(os.environ.get('BUDGET_SESSION_DAILY_TOKENS', '0'))
+    BUDGET_PROVIDER_DAILY_TOKENS = os.environ.get('BUDGET_PROVIDER_DAILY_TOKENS', '')
+    BUDGET_DOWNGRADE_AT = float(os.environ.get('BUDGET_DOWNGRADE_AT', '0.8'))
+    BUDGET_DOWNGRADE_MODELS = os.environ.get('BUDGET_DOWNGRADE_MODELS', '')
+    BUDGET_DEFAULT_COMPLETION_TOKENS = int(os.environ.get('BUDGET_DEFAULT_COMPLETION_TOKENS', '512'))
+
+    # WebSocket transport (see app/routes/ws_routes.py, app/streaming/multiplex.py)
+    WS_STREAM_WINDOW = int(os.environ.get('WS_STREAM_WINDOW', '64'))
+    WS_STALL_TIMEOUT = float(os.environ.get('WS_STALL_TIMEOUT', '30'))
+    WS_MAX_STREAMS = int(os.environ.get('WS_MAX_STREAMS', '8'))
+    WS_PING_INTERVAL = int(os.environ.get('WS_PING_INTERVAL', '25'))
+    SOCK_SERVER_OPTIONS = {'ping_interval': WS_PING_INTERVAL or None}
+
+    # OpenAI-compatible providers, e.g. self-hosted vLLM (see app/providers/compatible_providers.py)
+    OPENAI_COMPATIBLE_PROVIDERS = os.environ.get('OPENAI_COMPATIBLE_PROVIDERS', '')
+
+    # Shared state across worker processes (see app/state/)
+    STATE_BACKEND_URL = os.environ.get('STATE_BACKEND_URL', 'memory://')
+    STATE_KEY_PREFIX = os.environ.get('STATE_KEY_PREFIX', 'multichat:')
+    STATE_TIMEOUT = float(os.environ.get('STATE_TIMEOUT', '2'))
+
+    # Background chat jobs for deadline-bounded compares (see app/jobs/registry.py)
+    JOB_RETENTION = float(os.environ.get('JOB_RETENTION', '600'))
+    JOB_MAX_RETAINED = int(os.environ.get('JOB_MAX_RETAINED', '1000'))
+
+    # Provider record/replay cassettes (see app/providers/cassette_provider.py)
+    CASSETTE_MODE = os.environ.get('CASSETTE_MODE', 'off').lower()
+    CASSETTE_DIR = os.environ.get('CASSETTE_DIR', 'cassettes')
+    CASSETTE_SPEED = os.environ.get('CASSETTE_SPEED', 'recorded')
+
+    # Latency-aware `auto` provider (see app/control/routing.py)
+    AUTO_ROUTE_CANDIDATES = os.environ.get('AUTO_ROUTE_CANDIDATES', '')
+    AUTO_ROUTE_EXPLORATION = float(os.environ.get('AUTO_ROUTE_EXPLORATION', '0.05'))
+    AUTO_ROUTE_MAX_ERROR_RATE = float(os.environ.get('AUTO_ROUTE_MAX_ERROR_RATE', '0.5'))
+
+    # Streaming output transforms (see app/streaming/transforms.py)
+    STREAM_TRANSFORMS = os.environ.get('STREAM_TRANSFORMS', '')
+    STREAM_PII_TYPES = os.environ.get('STREAM_PII_TYPES', 'email,phone,card,ssn')
+    STREAM_REDACTION_TEXT = os.environ.get('STREAM_REDACTION_TEXT', '[redacted]')
+    STREAM_BANNED_PHRASES = os.environ.get('STREAM_BANNED_PHRASES', '')
+    STREAM_FILTER_TEXT = os.environ.get('STREAM_FILTER_TEXT', '[filtered]')
+    STREAM_STOP_SEQUENCES = os.environ.get('STREAM_STOP_SEQUENCES', '')
+    STREAM_MAX_CHARS = int(os.environ.get('STREAM_MAX_CHARS', '0'))
+
+    # Generation option defaults per provider/model (see app/providers/generation.py)
+    GENERATION_DEFAULTS = os.environ.get('GENERATION_DEFAULTS', '')
+
     @classmethod
     def get_cerebras_api_key(cls):
         """
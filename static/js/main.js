@@ -3,6 +3,7 @@ console.log('main.js loaded');// main.js - Client-side JavaScript for EchoChat U
 //
 // Dependencies:
 // - Vanilla JavaScript
+// - ws-transport.js (ChatSocket) and stream-renderer.js (StreamRenderer), loaded first
 //
 // See also: /app/routes/chat_routes.py for backend chat logic
 
@@ -16,9 +17,40 @@ document.addEventListener('DOMContentLoaded', () => {
     const comparisonContainer = document.getElementById('comparison-container');
     const reasoningCheckbox = document.getElementById('reasoning-checkbox');
     const streamingCheckbox = document.getElementById('streaming-checkbox');
+    const retrievalCheckbox = document.getElementById('retrieval-checkbox');
+    const websocketCheckbox = document.getElementById('websocket-checkbox');
     const responseGrid = document.getElementById('response-grid');
     const responsePanelTemplate = document.getElementById('response-panel-template');
 
+    // The streaming response in progress, if any: { eventSource, streamId }
+    let activeStream = null;
+
+    // Seconds a non-streaming compare waits before slower providers are polled as jobs
+    // See: /app/routes/job_routes.py
+    const COMPARE_DEADLINE_SECONDS = 15;
+    const JOB_POLL_INTERVAL_MS = 1000;
+
+    // Shared WebSocket transport, connected on first use
+    const chatSocket = new ChatSocket();
+
+    // Draws streamed chunks once per animation frame (SSE and WebSocket)
+    const streamRenderer = new StreamRenderer(responseGrid);
+
+    // Close the active stream and ask the server to stop generating upstream.
+    // sendBeacon still delivers while the page is being hidden or unloaded.
+    // See: /app/routes/chat_routes.py (cancel_chat)
+    function cancelActiveStream() {
+        if (!activeStream) {
+            return;
+        }
+        activeStream.eventSource.close();
+        if (activeStream.streamId) {
+            const body = new Blob([JSON.stringify({ stream_id: activeStream.streamId })], { type: 'application/json' });
+            navigator.sendBeacon('/chat/cancel', body);
+        }
+        activeStream = null;
+    }
+
     // Enhanced addMessage: supports user/AI, error, and provider/model label
     function addMessage(content, isUser = false, isError = false, provider = null, model = null) {
         if (responseGrid && responseGrid.children.length > 0) {
@@ -124,6 +156,7 @@ document.addEventListener('DOMContentLoaded', () => {
     function updateResponseGrid() {
         // Clear grid
         responseGrid.innerHTML = '';
+        streamRenderer.reset();
         const selectedProviders = getSelectedProviders();
         const providerKeys = Object.keys(selectedProviders);
         if (providerKeys.length === 0) {
@@ -147,11 +180,17 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Provider name of a model select: configured providers carry it in data-provider
+    // (their names may contain '-'), built-in ones in the id prefix ('groq-model')
+    function selectProvider(select) {
+        return select.dataset.provider || select.id.split('-')[0];
+    }
+
     function getSelectedProviders() {
         const selectedProviders = {};
         providerSelects.forEach(select => {
             if (select.value) {
-                const provider = select.id.split('-')[0];
+                const provider = selectProvider(select);
                 selectedProviders[provider] = select.value;
             }
         });
@@ -176,59 +215,147 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Poll a provider that missed the compare deadline until its job finishes,
+    // then show its answer like any other response
+    async function pollJob(provider, jobId, selectedProviders) {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+            let data;
+            try {
+                const response = await fetch(`/chat/jobs/${encodeURIComponent(jobId)}`);
+                data = await response.json();
+                if (!response.ok) {
+                    addMessage(`Error: ${data.error || 'Unable to get the pending response.'}`, false, true, provider, selectedProviders[provider] || '');
+                    return;
+                }
+            } catch (error) {
+                console.error('Error:', error);
+                addMessage('Error: Unable to connect to the server.', false, true, provider, selectedProviders[provider] || '');
+                return;
+            }
+            if (data.status !== 'running') {
+                // result is the text, or { model, content } after a budget downgrade
+                const result = data.result;
+                const content = typeof result === 'object' && result !== null ? result.content : result;
+                addMessage(content, false, String(content).startsWith('Error:'), provider, data.model);
+                return;
+            }
+        }
+    }
+
+    // Stream one turn over the shared WebSocket instead of an EventSource.
+    // Providers stream in parallel; a new message cancels the turn still running.
+    // See: /static/js/ws-transport.js
+    function streamOverSocket(message, selectedProviders, useReasoning, historyMode) {
+        chatSocket.chat('main', {
+            message,
+            providers: selectedProviders,
+            use_reasoning: useReasoning,
+            history_mode: historyMode
+        }, {
+            onStart(provider, model, requestedModel) {
+                if (requestedModel) {
+                    console.info('Budget downgrade:', `${provider}:${model}`);
+                }
+            },
+            onChunk(provider, text) {
+                streamRenderer.append(provider, text);
+            },
+            onDone(provider) {
+                streamRenderer.finish(provider);
+            },
+            onError(provider, text) {
+                if (provider) {
+                    streamRenderer.finish(provider);
+                    addMessage(text, false, true, provider, selectedProviders[provider]);
+                } else {
+                    addMessage(text, false, true);
+                }
+            },
+            onShutdown() {
+                addMessage('Error: The server restarted before the answer finished. Please resend your message.', false, true);
+            },
+            onRejected(status, error) {
+                addMessage(`Error: ${error}`, false, true);
+            }
+        }).catch(error => {
+            console.error('WebSocket failed:', error);
+            addMessage('Error: Unable to get a streaming response from the server.', false, true);
+        });
+    }
+
     async function sendMessage() {
         updateResponseGrid();
         const message = userInput.value.trim();
         const selectedProviders = getSelectedProviders();
         const useReasoning = reasoningCheckbox && reasoningCheckbox.checked;
         const useStreaming = streamingCheckbox && streamingCheckbox.checked;
+        const historyMode = retrievalCheckbox && retrievalCheckbox.checked ? 'retrieval' : 'window';
 
         if (message && Object.keys(selectedProviders).length > 0) {
             addMessage(message, true);
             userInput.value = '';
 
-            if (useStreaming) {
+            if (useStreaming && websocketCheckbox && websocketCheckbox.checked) {
+                comparisonContainer.innerHTML = '';
+                comparisonContainer.classList.remove('hidden');
+                cancelActiveStream();
+                streamOverSocket(message, selectedProviders, useReasoning, historyMode);
+            } else if (useStreaming) {
                 comparisonContainer.innerHTML = '';
                 comparisonContainer.classList.remove('hidden');
                 
-                const eventSource = new EventSource(`/chat?message=${encodeURIComponent(message)}&providers=${encodeURIComponent(JSON.stringify(selectedProviders))}&use_reasoning=${useReasoning}&use_streaming=true`);
+                cancelActiveStream();
+                const eventSource = new EventSource(`/chat?message=${encodeURIComponent(message)}&providers=${encodeURIComponent(JSON.stringify(selectedProviders))}&use_reasoning=${useReasoning}&use_streaming=true&history_mode=${historyMode}`);
                 
+                const stream = { eventSource, streamId: null };
+                activeStream = stream;
                 let currentProvider = '';
-                let providerResponses = {};
+
+                // First event: the id used to cancel this stream
+                eventSource.addEventListener('stream', function(event) {
+                    stream.streamId = event.data;
+                });
+
+                // Normal completion (or server-side cancel): close before EventSource auto-reconnects
+                function finishStream() {
+                    eventSource.close();
+                    if (activeStream === stream) {
+                        activeStream = null;
+                    }
+                }
+                eventSource.addEventListener('end', finishStream);
+                eventSource.addEventListener('cancelled', finishStream);
+
+                // A token budget switched this provider to a cheaper model ('provider:model')
+                eventSource.addEventListener('downgrade', function(event) {
+                    console.info('Budget downgrade:', event.data);
+                });
 
                 eventSource.onmessage = function(event) {
                     if (event.data === '[DONE]') {
+                        streamRenderer.finish(currentProvider);
                         currentProvider = '';
                     } else if (currentProvider === '') {
                         currentProvider = event.data;
-                        providerResponses[currentProvider] = '';
                     } else {
-                        providerResponses[currentProvider] += event.data;
-                        // Update in the correct panel
-                        const panel = Array.from(responseGrid.children).find(p => p.dataset.provider === currentProvider);
-                        if (panel) {
-                            let msgList = panel.querySelector('.messages');
-                            let lastMsg = msgList.lastElementChild;
-                            if (!lastMsg || !lastMsg.classList.contains('ai-stream')) {
-                                // New streaming bubble
-                                const bubble = document.createElement('div');
-                                bubble.className = 'ai-stream flex justify-start';
-                                const inner = document.createElement('div');
-                                inner.className = 'max-w-[75%] rounded-xl px-4 py-2 mb-1 shadow whitespace-pre-line break-words bg-gray-100 text-gray-900 self-start';
-                                inner.textContent = '';
-                                bubble.appendChild(inner);
-                                msgList.appendChild(bubble);
-                                lastMsg = bubble;
-                            }
-                            lastMsg.querySelector('div').textContent = providerResponses[currentProvider];
-                            msgList.scrollTop = msgList.scrollHeight;
-                        }
+                        streamRenderer.append(currentProvider, event.data);
                     }
                 };
 
+                // Sent when the server drains for a restart and this answer could not finish in time
+                eventSource.addEventListener('shutdown', function() {
+                    finishStream();
+                    addMessage('Error: The server restarted before the answer finished. Please resend your message.', false, true);
+                });
+
                 eventSource.onerror = function(event) {
                     console.error('EventSource failed:', event);
-                    eventSource.close();
+                    if (activeStream === stream) {
+                        cancelActiveStream();
+                    } else {
+                        eventSource.close();
+                    }
                     addMessage('Error: Unable to get a streaming response from the server.', false, true);
                 };
             } else {
@@ -242,7 +369,9 @@ document.addEventListener('DOMContentLoaded', () => {
                             message, 
                             providers: selectedProviders, 
                             use_reasoning: useReasoning, 
-                            use_streaming: useStreaming 
+                            use_streaming: useStreaming,
+                            history_mode: historyMode,
+                            deadline: COMPARE_DEADLINE_SECONDS
                         }),
                     });
 
@@ -264,6 +393,10 @@ document.addEventListener('DOMContentLoaded', () => {
                                 }
                                 addMessage(content, false, String(content).startsWith('Error:'), provider, model);
                             });
+                            // Providers still generating at the deadline answer later
+                            Object.entries(data.pending || {}).forEach(([provider, jobId]) => {
+                                pollJob(provider, jobId, selectedProviders);
+                            });
                         }
                     } else {
                         const errorData = await response.json();
@@ -279,6 +412,35 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Replace the hard-coded model options with the server's cached catalog.
+    // The template's options stay in place if the request fails.
+    // See: /app/routes/model_routes.py
+    async function loadModelCatalog() {
+        try {
+            const response = await fetch('/models');
+            if (!response.ok) {
+                return;
+            }
+            const catalog = await response.json();
+            providerSelects.forEach(select => {
+                const provider = selectProvider(select);
+                const entry = catalog[provider];
+                if (!entry || entry.models.length === 0) {
+                    return;
+                }
+                const selected = select.value;
+                const placeholder = select.options[0];
+                select.replaceChildren(placeholder);
+                entry.models.forEach(model => {
+                    select.add(new Option(model, model, false, model === selected));
+                });
+            });
+            updateResponseGrid();
+        } catch (error) {
+            console.error('Error loading model catalog:', error);
+        }
+    }
+
     async function clearHistory() {
         const selectedProviders = getSelectedProviders();
         for (const provider of Object.keys(selectedProviders)) {
@@ -292,6 +454,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 });
 
                 if (response.ok) {
+                    // The socket's conversation keeps its own copy of the history
+                    chatSocket.reset('main', provider);
                     console.log(`Cleared history for ${provider}`);
                 } else {
                     console.error(`Failed to clear history for ${provider}`);
@@ -337,9 +501,13 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Closing or navigating away from the tab stops upstream generation
+    window.addEventListener('pagehide', cancelActiveStream);
+
     if (clearHistoryBtn) {
         clearHistoryBtn.addEventListener('click', clearHistory);
     }
 
     updateResponseGrid();
+    loadModelCatalog();
 });
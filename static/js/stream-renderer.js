@@ -0,0 +1,102 @@
+// stream-renderer.js - Frame-batched rendering of streamed chunks for EchoChat UI
+// Streamed chunks are buffered per provider and written once per animation frame: the
+// new text is appended to the streaming bubble's text node (never re-setting the whole
+// answer), panel and bubble elements are cached instead of looked up per chunk, and
+// scroll positions are read and written in separate passes so each frame costs at most
+// one layout, however many panels are streaming.
+//
+// Dependencies:
+// - Vanilla JavaScript (requestAnimationFrame)
+//
+// See also: /static/js/main.js (SSE and WebSocket streaming), /benchmarks/render_bench.js
+
+const STREAM_BUBBLE_CLASS = 'max-w-[75%] rounded-xl px-4 py-2 mb-1 shadow whitespace-pre-line break-words bg-gray-100 text-gray-900 self-start';
+
+class StreamRenderer {
+    // responseGrid: element whose children are panels with data-provider and a .messages list
+    constructor(responseGrid, schedule = (callback) => requestAnimationFrame(callback)) {
+        this.responseGrid = responseGrid;
+        this.schedule = schedule;
+        // provider -> { messages, textNode } for the bubble currently streaming
+        this.targets = new Map();
+        // provider -> text received since the last frame
+        this.pending = new Map();
+        this.scheduled = false;
+    }
+
+    // Queue text for a provider; it is drawn on the next animation frame
+    append(provider, text) {
+        if (!text) {
+            return;
+        }
+        this.pending.set(provider, (this.pending.get(provider) || '') + text);
+        if (!this.scheduled) {
+            this.scheduled = true;
+            this.schedule(() => this.flush());
+        }
+    }
+
+    // Draw everything queued (normally called by the frame callback)
+    flush() {
+        this.scheduled = false;
+        if (this.pending.size === 0) {
+            return;
+        }
+        const updates = [];
+        for (const [provider, text] of this.pending) {
+            const target = this.target(provider);
+            if (target) {
+                updates.push([target, text]);
+            }
+        }
+        this.pending.clear();
+        // Read pass: only follow panels the user has not scrolled up in
+        const follow = updates.map(([target]) => {
+            const list = target.messages;
+            return list.scrollHeight - list.scrollTop - list.clientHeight < 2;
+        });
+        // Write pass: append only the new text
+        updates.forEach(([target, text]) => target.textNode.appendData(text));
+        // Scroll pass: one layout for all panels
+        updates.forEach(([target], index) => {
+            if (follow[index]) {
+                target.messages.scrollTop = target.messages.scrollHeight;
+            }
+        });
+    }
+
+    // End a provider's streaming bubble; the next chunk starts a new one
+    finish(provider) {
+        this.flush();
+        this.targets.delete(provider);
+    }
+
+    // Forget cached elements (call when the panels are rebuilt)
+    reset() {
+        this.targets.clear();
+        this.pending.clear();
+    }
+
+    target(provider) {
+        let target = this.targets.get(provider);
+        if (target && target.messages.isConnected) {
+            return target;
+        }
+        const panel = Array.from(this.responseGrid.children).find(p => p.dataset.provider === provider);
+        if (!panel) {
+            return null;
+        }
+        const messages = panel.querySelector('.messages');
+        const bubble = document.createElement('div');
+        bubble.className = 'ai-stream flex justify-start';
+        const inner = document.createElement('div');
+        inner.className = STREAM_BUBBLE_CLASS;
+        const textNode = document.createTextNode('');
+        inner.appendChild(textNode);
+        bubble.appendChild(inner);
+        messages.appendChild(bubble);
+        target = { messages, textNode };
+        this.targets.set(provider, target);
+        return target;
+    }
+}
@@ -0,0 +1,129 @@
+// ws-transport.js - WebSocket chat transport for EchoChat UI
+// One persistent connection carries every conversation and provider stream, instead of
+// one HTTP request (and one EventSource) per message. Frames are JSON objects tagged with
+// the conversation id, provider and a per-conversation sequence number; the client
+// acknowledges what it has rendered so the server can apply backpressure.
+//
+// Dependencies:
+// - Vanilla JavaScript (WebSocket)
+//
+// See also: /app/routes/ws_routes.py for the frame protocol, /app/streaming/multiplex.py for flow control
+
+class ChatSocket {
+    constructor(url) {
+        this.url = url || `${location.protocol === 'https:' ? 'wss' : 'ws'}://${location.host}/ws`;
+        this.socket = null;
+        this.ready = null;
+        this.window = 64;
+        // conv -> { handlers, acked, queued: [request, handlers] | null }
+        this.turns = new Map();
+    }
+
+    // Open the connection if needed; resolves once the server sent `ready`
+    connect() {
+        if (this.ready) {
+            return this.ready;
+        }
+        this.ready = new Promise((resolve, reject) => {
+            const socket = new WebSocket(this.url);
+            this.socket = socket;
+            socket.onmessage = (event) => {
+                const frame = JSON.parse(event.data);
+                if (frame.type === 'ready') {
+                    this.window = frame.window;
+                    resolve(this);
+                } else {
+                    this.handleFrame(frame);
+                }
+            };
+            socket.onerror = () => reject(new Error('WebSocket connection failed'));
+            socket.onclose = () => this.handleClose();
+        });
+        return this.ready;
+    }
+
+    // Start a turn in a conversation. A turn still running there is cancelled first and
+    // the new one is sent once the server has ended it.
+    async chat(conv, request, handlers) {
+        await this.connect();
+        const turn = this.turns.get(conv);
+        if (turn) {
+            turn.queued = [request, handlers];
+            this.cancel(conv);
+            return;
+        }
+        this.turns.set(conv, { handlers, acked: 0, queued: null });
+        this.send({ type: 'chat', conv, ...request });
+    }
+
+    // Cancel a conversation's running turn, or one provider of it
+    cancel(conv, provider = null) {
+        if (this.turns.has(conv)) {
+            this.send(provider ? { type: 'cancel', conv, provider } : { type: 'cancel', conv });
+        }
+    }
+
+    // Forget a provider's history in a conversation (after /clear_history)
+    reset(conv, provider) {
+        this.send({ type: 'reset', conv, provider });
+    }
+
+    close() {
+        if (this.socket) {
+            this.socket.close();
+        }
+    }
+
+    send(frame) {
+        if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+            this.socket.send(JSON.stringify(frame));
+        }
+    }
+
+    handleFrame(frame) {
+        if (frame.type === 'shutdown' && !frame.conv) {
+            // Server is restarting: the next chat() reconnects
+            this.socket.close();
+            return;
+        }
+        const turn = this.turns.get(frame.conv);
+        if (!turn) {
+            return;
+        }
+        const h = turn.handlers;
+        switch (frame.type) {
+            case 'start': h.onStart && h.onStart(frame.provider, frame.model, frame.requested_model); break;
+            case 'chunk': h.onChunk && h.onChunk(frame.provider, frame.data); break;
+            case 'done': h.onDone && h.onDone(frame.provider); break;
+            case 'error': h.onError && h.onError(frame.provider, frame.data); break;
+            case 'cancelled': h.onCancelled && h.onCancelled(frame.provider, frame.reason); break;
+            case 'shutdown': h.onShutdown && h.onShutdown(frame.provider, frame.data); break;
+            case 'rejected': h.onRejected && h.onRejected(frame.status, frame.error, frame.retry_after); break;
+        }
+        // Acknowledge rendered frames in batches; half a window keeps chunks flowing
+        if (frame.seq - turn.acked >= this.window / 2 || frame.type !== 'chunk') {
+            turn.acked = frame.seq;
+            this.send({ type: 'ack', conv: frame.conv, seq: frame.seq });
+        }
+        if (frame.type === 'end' || frame.type === 'rejected') {
+            this.turns.delete(frame.conv);
+            if (frame.type === 'end' && h.onEnd) {
+                h.onEnd();
+            }
+            if (turn.queued) {
+                this.chat(frame.conv, ...turn.queued);
+            }
+        }
+    }
+
+    handleClose() {
+        this.ready = null;
+        this.socket = null;
+        for (const [conv, turn] of this.turns) {
+            if (turn.handlers.onError) {
+                turn.handlers.onError(null, 'Error: Connection to the server was lost.');
+            }
+            this.turns.delete(conv);
+        }
+    }
+}
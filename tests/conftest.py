@@ -0,0 +1,146 @@
+"""
+conftest.py - Shared pytest fixtures
+
+Provides `resp_server`, a local stand-in for a Redis-protocol server: a threaded TCP server
+that speaks RESP and implements the commands RedisBackend sends (AUTH, SELECT, GET, SET with
+PX, DEL, INCRBY, PEXPIRE, PUBLISH, SUBSCRIBE), keeping every received command for assertions.
+
+Dependencies:
+- pytest
+- Python standard library (socketserver, threading, time)
+
+@author Auto-refactored by Cline
+"""
+
+import socketserver
+import threading
+import time
+
+import pytest
+
+def encode(value):
+    """
+    Encode a reply in RESP (None: null bulk string, Exception: error, 'OK': simple string).
+    """
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, Exception):
+        return b"-ERR %s\r\n" % str(value).encode()
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+    if value == "OK":
+        return b"+OK\r\n"
+    data = value if isinstance(value, bytes) else value.encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """
+    One client connection of the stand-in.
+    """
+
+    def handle(self):
+        server = self.server
+        self.write_lock = threading.Lock()
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            with server.lock:
+                server.commands.append([part.decode() for part in command])
+            name = command[0].upper()
+            if name == b"SUBSCRIBE":
+                for count, channel in enumerate(command[1:], start=1):
+                    with server.lock:
+                        server.subscribers.setdefault(channel, []).append(self)
+                    self.send([b"subscribe", channel, count])
+                continue
+            self.send(server.execute(name, command[1:]))
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        parts = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            parts.append(self.rfile.read(length + 2)[:-2])
+        return parts
+
+    def send(self, reply):
+        with self.write_lock:
+            self.wfile.write(encode(reply))
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """
+    In-memory Redis-protocol server on 127.0.0.1.
+
+    Attributes:
+        url (str): redis:// URL of the server.
+        commands (list): Every command received, as lists of strings.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.url = f"redis://127.0.0.1:{self.server_address[1]}"
+        self.lock = threading.Lock()
+        self.commands = []
+        self.subscribers = {}
+        self._data = {}
+
+    def execute(self, name, args):
+        """
+        Run one non-subscribe command and return its reply.
+        """
+        with self.lock:
+            if name in (b"AUTH", b"SELECT"):
+                return "OK"
+            if name == b"GET":
+                return self._live(args[0])
+            if name == b"SET":
+                expires = time.monotonic() + int(args[3]) / 1000 if len(args) > 3 else None
+                self._data[args[0]] = (args[1], expires)
+                return "OK"
+            if name == b"DEL":
+                return 1 if self._data.pop(args[0], None) else 0
+            if name == b"INCRBY":
+                value = int(self._live(args[0]) or 0) + int(args[1])
+                expires = self._data.get(args[0], (None, None))[1]
+                self._data[args[0]] = (str(value).encode(), expires)
+                return value
+            if name == b"PEXPIRE":
+                self._data[args[0]] = (self._data[args[0]][0], time.monotonic() + int(args[1]) / 1000)
+                return 1
+            if name == b"PUBLISH":
+                subscribers = list(self.subscribers.get(args[0], ()))
+            else:
+                return Exception(f"unknown command '{name.decode()}'")
+        for handler in subscribers:
+            handler.send([b"message", args[0], args[1]])
+        return len(subscribers)
+
+    def _live(self, key):
+        value, expires = self._data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+@pytest.fixture
+def resp_server():
+    """
+    Start a RESP stand-in for one test.
+
+    Yields:
+        RespStandIn: The running server.
+    """
+    server = RespStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
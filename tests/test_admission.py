@@ -0,0 +1,43 @@
+"""
+test_admission.py - Tests for AdmissionController fair queuing
+
+Dependencies:
+- pytest
+- app.control.admission (AdmissionController, AdmissionRejected)
+
+@author Auto-refactored by Cline
+"""
+
+import pytest
+
+from app.control.admission import AdmissionController, AdmissionRejected
+
+def make_controller():
+    return AdmissionController(global_limit=1, session_limit=1, max_queue=10, max_wait=0.05)
+
+def test_timed_out_sessions_leave_no_tag_behind():
+    controller = make_controller()
+    held = controller.acquire("busy")
+
+    for session_id in ("a", "b", "c"):
+        with pytest.raises(AdmissionRejected):
+            controller.acquire(session_id, cost=5)
+    held.release()
+
+    # Only the work that ran keeps a tag
+    assert list(controller._finish_tags) == ["busy"]
+    assert controller._queued == 0 and controller._waiting == {}
+
+def test_timeout_gives_back_the_tag_it_took():
+    controller = make_controller()
+    held = controller.acquire("busy", cost=3)
+    before = controller._finish_tags["busy"]
+
+    # The session is at its limit, so its second request waits and times out
+    with pytest.raises(AdmissionRejected):
+        controller.acquire("busy", cost=5)
+
+    assert controller._finish_tags["busy"] == before
+    held.release()
+    # The clock never passed the tag of the work that did run
+    assert controller._finish_tags == {"busy": before}
@@ -0,0 +1,79 @@
+"""
+test_credential_sharing.py - Tests for API key ejections shared between workers
+
+Two CredentialPools registries with different worker ids stand in for two worker processes;
+they exchange ejections through RedisBackend and the RESP stand-in from conftest.py.
+
+Dependencies:
+- pytest
+- Python standard library (time, types)
+- app.providers.credentials.CredentialPools
+- app.state.create_backend
+
+@author Auto-refactored by Cline
+"""
+
+import time
+from types import SimpleNamespace
+
+from app.providers.credentials import CredentialPools
+from app.state import create_backend
+
+class RateLimited(Exception):
+    """
+    SDK-style 429 error with a Retry-After header.
+    """
+
+    status_code = 429
+
+    def __init__(self, seconds):
+        super().__init__("Too Many Requests")
+        self.response = SimpleNamespace(headers={"retry-after": str(seconds)})
+
+def make_worker(resp_server, worker_id):
+    pools = CredentialPools(create_backend(resp_server.url, prefix="test:"), worker_id)
+    pools.start()
+    return pools
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def rate_limit(pool, seconds=30):
+    credential = pool.acquire()
+    pool.release(credential, error=RateLimited(seconds))
+    return credential
+
+def ejected_for(pool):
+    return pool.snapshot()[0]["ejected_for"]
+
+def test_ejection_reaches_other_workers(resp_server):
+    first, second = make_worker(resp_server, "worker-1"), make_worker(resp_server, "worker-2")
+    first_pool = first.get("groq", default_api_key="gsk_test_key_0001")
+    second_pool = second.get("groq", default_api_key="gsk_test_key_0001")
+    assert wait_for(lambda: sum(command[0] == "SUBSCRIBE" for command in resp_server.commands) == 2)
+
+    rate_limit(first_pool, seconds=30)
+
+    assert wait_for(lambda: ejected_for(second_pool) > 25)
+    assert second_pool.snapshot()[0]["last_error"].startswith("429")
+
+def test_pools_created_later_read_recorded_ejections(resp_server):
+    first = make_worker(resp_server, "worker-1")
+    rate_limit(first.get("groq", default_api_key="gsk_test_key_0001"), seconds=30)
+
+    late_pool = make_worker(resp_server, "worker-2").get("groq", default_api_key="gsk_test_key_0001")
+
+    assert ejected_for(late_pool) > 25
+
+def test_plain_errors_are_not_shared(resp_server):
+    first, second = make_worker(resp_server, "worker-1"), make_worker(resp_server, "worker-2")
+    first_pool = first.get("groq", default_api_key="gsk_test_key_0001")
+    second_pool = second.get("groq", default_api_key="gsk_test_key_0001")
+
+    first_pool.release(first_pool.acquire(), error=ConnectionError("reset"))
+
+    assert not any(command[0] == "PUBLISH" for command in resp_server.commands)
+    assert ejected_for(second_pool) == 0
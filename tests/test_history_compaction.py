@@ -0,0 +1,134 @@
+"""
+test_history_compaction.py - Tests for background summarization of evicted history
+
+The summarizer is resolved through PROVIDER_CLASSES, as in the app: once with a stand-in
+LLMProvider that records its prompts, once with a replayed cassette.
+
+Dependencies:
+- pytest
+- Python standard library (gzip, json, threading)
+- app.history.HistoryCompactor
+- app.providers (base.LLMProvider, cassette_provider, groq_provider.GroqProvider)
+- app.routes.provider_factory (PROVIDER_CLASSES, create_llm_provider)
+
+@author Auto-refactored by Cline
+"""
+
+import gzip
+import json
+import threading
+
+import pytest
+
+from app.history import HistoryCompactor
+from app.providers.base import LLMProvider
+from app.providers.cassette_provider import cassette_path, cassette_provider_classes
+from app.providers.groq_provider import GroqProvider
+from app.routes import provider_factory
+from app.routes.provider_factory import create_llm_provider
+
+class StandInProvider(LLMProvider):
+    """
+    Summarizer stand-in: answers 'summary <n>' and records the prompts it got.
+    """
+
+    prompts = []
+    release = None
+
+    def generate_response(self, message, model):
+        if self.release is not None:
+            self.release.wait(2)
+        self.prompts.append((model, message))
+        return f" summary {len(self.prompts)} "
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    monkeypatch.setattr(StandInProvider, "prompts", [])
+    monkeypatch.setattr(StandInProvider, "release", None)
+    monkeypatch.setitem(provider_factory.PROVIDER_CLASSES, "stand-in", StandInProvider)
+    return StandInProvider
+
+def install_compactor(monkeypatch, provider, model="summary-model"):
+    compactor = HistoryCompactor(lambda: create_llm_provider(provider), model, max_workers=1)
+    monkeypatch.setattr(LLMProvider, "compactor", compactor)
+    return compactor
+
+def chat(llm, turns):
+    for index in range(turns):
+        llm.add_to_history("user", f"question {index}")
+        llm.add_to_history("assistant", f"answer {index}")
+
+def test_evicted_turns_are_summarized_in_the_background(monkeypatch, stand_in):
+    compactor = install_compactor(monkeypatch, "stand-in")
+    llm = LLMProvider(max_history=2)
+
+    chat(llm, 2)
+
+    assert compactor.wait_idle(2)
+    # Each eviction is queued; batches that arrive while one runs are folded in together
+    summary = f"summary {len(stand_in.prompts)}"
+    assert llm.get_conversation_history()[0] == {
+        "role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+    prompts = "\n".join(prompt for _, prompt in stand_in.prompts)
+    assert {model for model, _ in stand_in.prompts} == {"summary-model"}
+    assert "User: question 0" in prompts and "Assistant: answer 0" in prompts
+    assert "question 1" not in prompts
+
+def test_request_path_does_not_wait_for_the_summary(monkeypatch, stand_in):
+    stand_in.release = threading.Event()
+    compactor = install_compactor(monkeypatch, "stand-in")
+    llm = LLMProvider(max_history=2)
+
+    chat(llm, 2)
+
+    # The summarizer is still blocked: the window is trimmed, no summary yet
+    assert [turn["content"] for turn in llm.get_conversation_history()] == ["question 1", "answer 1"]
+    stand_in.release.set()
+    assert compactor.wait_idle(2)
+    assert llm.get_summary() == f"summary {len(stand_in.prompts)}"
+
+def test_each_summary_builds_on_the_previous_one(monkeypatch, stand_in):
+    compactor = install_compactor(monkeypatch, "stand-in")
+    llm = LLMProvider(max_history=2)
+
+    chat(llm, 2)
+    assert compactor.wait_idle(2)
+    first = llm.get_summary()
+    chat(llm, 1)
+    assert compactor.wait_idle(2)
+
+    later = [prompt for _, prompt in stand_in.prompts if "question 1" in prompt]
+    assert later and f"Current summary:\n{first}" in later[0]
+    assert llm.get_summary() == f"summary {len(stand_in.prompts)}"
+
+def test_failed_summaries_leave_the_previous_one(monkeypatch, stand_in):
+    compactor = install_compactor(monkeypatch, "stand-in")
+    llm = LLMProvider(max_history=2)
+    chat(llm, 2)
+    assert compactor.wait_idle(2)
+    summary = llm.get_summary()
+
+    def fail(self, message, model):
+        raise RuntimeError("summarizer down")
+
+    monkeypatch.setattr(StandInProvider, "generate_response", fail)
+    chat(llm, 1)
+
+    assert compactor.wait_idle(2)
+    assert llm.get_summary() == summary
+
+def test_summaries_replay_from_a_cassette(monkeypatch, tmp_path):
+    record = {"kind": "response", "model": "llama-3.1-8b-instant", "message": "(any prompt)",
+              "chunks": ["The user asked about tests."], "delays_ms": [120.0],
+              "usage": {"calls": 1, "reported": 1, "prompt_tokens": 80, "completion_tokens": 6}}
+    with gzip.open(cassette_path(str(tmp_path), "groq"), "wt", encoding="utf-8") as cassette:
+        cassette.write(json.dumps(record) + "\n")
+    replay = cassette_provider_classes({"groq": GroqProvider}, "replay", str(tmp_path), speed=0)
+    monkeypatch.setitem(provider_factory.PROVIDER_CLASSES, "groq", replay["groq"])
+    compactor = install_compactor(monkeypatch, "groq", model="llama-3.1-8b-instant")
+    llm = LLMProvider(max_history=2)
+
+    chat(llm, 2)
+
+    assert compactor.wait_idle(2)
+    assert llm.get_summary() == "The user asked about tests."
@@ -0,0 +1,200 @@
+"""
+test_openai_compatible.py - Tests for providers registered from OPENAI_COMPATIBLE_PROVIDERS
+
+Runs OpenAICompatibleProvider, with the real openai SDK, against a local HTTP stand-in for an
+OpenAI-compatible inference server (GET /v1/models, POST /v1/chat/completions as JSON or SSE).
+
+Dependencies:
+- pytest
+- openai (through the provider)
+- Python standard library (http.server, itertools, json, threading)
+- app.providers.compatible_providers (compatible_provider_classes, parse_compatible_providers)
+- app.providers.reasoning (FINAL_RESPONSE_HEADER, REASONING_HEADER)
+
+@author Auto-refactored by Cline
+"""
+
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openai import InternalServerError
+
+from app.providers.compatible_providers import compatible_provider_classes, parse_compatible_providers
+from app.providers.reasoning import FINAL_RESPONSE_HEADER, REASONING_HEADER
+
+# Provider names are unique per test: credential pools are process-wide and keyed by name
+PROVIDER_NAMES = (f"local-{index}" for index in itertools.count())
+
+class CompletionsHandler(BaseHTTPRequestHandler):
+    """
+    One request to the stand-in server.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path, dict(self.headers), None))
+        if self.path != "/v1/models":
+            return self.send_json(404, {"error": {"message": "not found"}})
+        models = [{"id": model, "object": "model", "created": 0, "owned_by": "local"} for model in self.server.models]
+        self.send_json(200, {"object": "list", "data": models})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(("POST", self.path, dict(self.headers), body))
+        if self.path != "/v1/chat/completions":
+            return self.send_json(404, {"error": {"message": "not found"}})
+        if not self.server.replies:
+            return self.send_json(500, {"error": {"message": "no reply queued"}})
+        chunks = self.server.replies.pop(0)
+        if body.get("stream"):
+            return self.send_stream(body, chunks)
+        self.send_json(200, {
+            "id": "cmpl-1", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "".join(chunks)}}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": len(chunks), "total_tokens": 12 + len(chunks)},
+        })
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("x-ratelimit-remaining-requests", "99")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self, body, chunks):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        events = [{"choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]} for chunk in chunks]
+        if body.get("stream_options", {}).get("include_usage"):
+            events.append({"choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": len(chunks),
+                                                    "total_tokens": 12 + len(chunks)}})
+        for event in events:
+            event.update({"id": "cmpl-1", "object": "chat.completion.chunk", "created": 0, "model": body["model"]})
+            self.wfile.write(b"data: " + json.dumps(event).encode() + b"\n\n")
+        self.wfile.write(b"data: [DONE]\n\n")
+
+class CompletionsStandIn(ThreadingHTTPServer):
+    """
+    OpenAI-compatible server on 127.0.0.1.
+
+    Attributes:
+        base_url (str): API root, as configured in OPENAI_COMPATIBLE_PROVIDERS.
+        models (list): Model ids listed by /v1/models.
+        replies (list): Chunk lists answering the next chat completions, in order (500 once empty).
+        requests (list): (method, path, headers, JSON body) of every request received.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), CompletionsHandler)
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}/v1"
+        self.models = ["llama-local"]
+        self.replies = []
+        self.requests = []
+
+    def completions(self):
+        return [body for method, _, _, body in self.requests if method == "POST"]
+
+@pytest.fixture
+def server():
+    stand_in = CompletionsStandIn()
+    thread = threading.Thread(target=stand_in.serve_forever, daemon=True)
+    thread.start()
+    yield stand_in
+    stand_in.shutdown()
+    stand_in.server_close()
+
+def make_provider(server, **options):
+    name = next(PROVIDER_NAMES)
+    spec = json.dumps({name: {"base_url": server.base_url, "max_retries": 0, "timeout": 5, **options}})
+    return compatible_provider_classes(parse_compatible_providers(spec), reserved=("groq",))[name]()
+
+def test_response_uses_history_and_records_usage(server):
+    server.replies = [["Hi there"], ["Fine"]]
+    provider = make_provider(server, headers={"X-Team": "tests"})
+
+    assert provider.generate_response("Hello", "llama-local") == "Hi there"
+    assert provider.generate_response("How are you?", "llama-local") == "Fine"
+
+    assert [message["content"] for message in server.completions()[1]["messages"]] == [
+        "Hello", "Hi there", "How are you?"]
+    _, _, headers, _ = server.requests[0]
+    assert headers["X-Team"] == "tests"
+    assert headers["Authorization"] == "Bearer EMPTY"
+    assert provider.take_usage() == {"calls": 2, "reported": 2, "prompt_tokens": 24, "completion_tokens": 2}
+    assert provider.credentials.snapshot()[0]["remaining_requests"] == 99
+
+def test_stream_yields_chunks_and_reads_the_usage_chunk(server):
+    server.replies = [["Once", " upon", " a time"]]
+    provider = make_provider(server, stream_usage=True)
+
+    assert list(provider.generate_stream("Tell a story", "llama-local")) == ["Once", " upon", " a time"]
+
+    assert server.completions()[0]["stream_options"] == {"include_usage": True}
+    assert provider.take_usage() == {"calls": 1, "reported": 1, "prompt_tokens": 12, "completion_tokens": 3}
+    assert provider.credentials.snapshot()[0]["in_flight"] == 0
+
+def test_stream_without_usage_option_counts_the_call(server):
+    server.replies = [["ok"]]
+    provider = make_provider(server)
+
+    assert list(provider.generate_stream("Ping", "llama-local")) == ["ok"]
+
+    assert "stream_options" not in server.completions()[0]
+    assert provider.take_usage() == {"calls": 1, "reported": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+def test_reasoning_stream_feeds_the_reasoning_into_the_final_prompt(server):
+    server.replies = [["Think", " hard"], ["Answer"]]
+    provider = make_provider(server)
+
+    chunks = list(provider.generate_stream("Why?", "llama-local", use_reasoning=True))
+
+    assert chunks == [REASONING_HEADER, "Think", " hard", FINAL_RESPONSE_HEADER, "Answer"]
+    assert "Why?" in server.completions()[0]["messages"][0]["content"]
+    assert "Think hard" in server.completions()[1]["messages"][0]["content"]
+    assert provider.take_usage()["calls"] == 2
+
+def test_reasoning_stream_marks_its_headers_as_local(server):
+    server.replies = [["Think"], ["Answer"]]
+    provider = make_provider(server)
+    local_chunks, upstream = provider.local_chunks, []
+
+    for chunk in provider.generate_stream("Why?", "llama-local", use_reasoning=True):
+        if provider.local_chunks == local_chunks:
+            upstream.append(chunk)
+        local_chunks = provider.local_chunks
+
+    assert upstream == ["Think", "Answer"]
+
+def test_reasoning_response_commits_only_the_final_answer(server):
+    server.replies = [["Think"], ["Answer"]]
+    provider = make_provider(server)
+
+    answer = provider.generate_response_with_reasoning("Why?", "llama-local")
+
+    assert answer == f"{REASONING_HEADER}Think{FINAL_RESPONSE_HEADER}Answer"
+    assert provider.get_conversation_history()[-1] == {"role": "assistant", "content": "Answer"}
+
+def test_models_are_listed_from_the_server(server):
+    server.models = ["llama-local", "qwen-local"]
+
+    assert make_provider(server).list_models() == ["llama-local", "qwen-local"]
+
+def test_server_errors_raise_and_count_against_the_key(server):
+    provider = make_provider(server)
+
+    # No reply queued: the stand-in answers 500
+    with pytest.raises(InternalServerError):
+        provider.generate_response("Hello", "llama-local")
+
+    assert provider.credentials.snapshot()[0]["errors"] == 1
@@ -0,0 +1,95 @@
+"""
+test_redis_backend.py - Tests for the Redis-protocol state backend
+
+Runs RedisBackend against the local RESP stand-in from conftest.py.
+
+Dependencies:
+- pytest
+- Python standard library (socket, threading, time)
+- app.state (RedisBackend via create_backend, StateBackendError)
+
+@author Auto-refactored by Cline
+"""
+
+import socket
+import threading
+import time
+
+import pytest
+
+from app.state import StateBackendError, create_backend
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_values_round_trip_under_the_prefix(resp_server):
+    backend = create_backend(resp_server.url, prefix="test:")
+
+    backend.set("greeting", "hello")
+
+    assert backend.get("greeting") == "hello"
+    assert ["SET", "test:greeting", "hello"] in resp_server.commands
+    backend.delete("greeting")
+    assert backend.get("greeting") is None
+
+def test_values_expire_after_their_ttl(resp_server):
+    backend = create_backend(resp_server.url)
+
+    backend.set("short", "lived", ttl=0.05)
+
+    assert backend.get("short") == "lived"
+    assert wait_for(lambda: backend.get("short") is None)
+
+def test_counter_window_starts_at_the_first_increment(resp_server):
+    backend = create_backend(resp_server.url)
+
+    assert backend.incr("hits", ttl=60) == 1
+    assert backend.incr("hits", ttl=60) == 2
+
+    assert [command[0] for command in resp_server.commands].count("PEXPIRE") == 1
+
+def test_connect_authenticates_and_selects_the_database(resp_server):
+    url = resp_server.url.replace("redis://", "redis://:s3cret@") + "/2"
+    backend = create_backend(url)
+
+    backend.get("anything")
+
+    assert resp_server.commands[:2] == [["AUTH", "s3cret"], ["SELECT", "2"]]
+
+def test_published_messages_reach_subscribers(resp_server):
+    backend = create_backend(resp_server.url, prefix="test:")
+    received = []
+    delivered = threading.Event()
+
+    def on_message(message):
+        received.append(message)
+        delivered.set()
+
+    backend.subscribe("events", on_message)
+    assert wait_for(lambda: ["SUBSCRIBE", "test:events"] in resp_server.commands)
+
+    assert backend.publish("events", "hello") == 1
+    assert delivered.wait(2)
+    assert received == ["hello"]
+    backend.close()
+
+def test_server_errors_raise_state_backend_error(resp_server):
+    backend = create_backend(resp_server.url)
+
+    with pytest.raises(StateBackendError):
+        backend.execute("NOPE")
+    # The connection stays usable after an error reply
+    backend.set("after", "error")
+    assert backend.get("after") == "error"
+
+def test_unreachable_server_raises_state_backend_error():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    backend = create_backend(f"redis://127.0.0.1:{port}", timeout=0.5)
+
+    with pytest.raises(StateBackendError):
+        backend.get("anything")
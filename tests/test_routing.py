@@ -0,0 +1,103 @@
+"""
+test_routing.py - Tests for latency-aware routing of `auto` requests
+
+Drives LatencyRouter with direct observe() calls and a seeded random source, so rankings and
+exploration draws are deterministic.
+
+Dependencies:
+- pytest
+- Python standard library (random)
+- app.control.routing
+
+@author Auto-refactored by Cline
+"""
+
+import random
+
+import pytest
+
+from app.control.routing import LatencyRouter, RouteUnavailable
+
+FAST = ('groq', 'fast-model')
+SLOW = ('cerebras', 'slow-model')
+FLAKY = ('openai', 'flaky-model')
+
+def make_router(candidates, exploration=0.0, seed=7):
+    return LatencyRouter(candidates, exploration=exploration, max_error_rate=0.5, rng=random.Random(seed))
+
+def test_never_observed_candidate_is_tried_first():
+    router = make_router([FAST, SLOW])
+    router.observe(*FAST, latency=0.1)
+
+    decision = router.choose()
+
+    assert (decision['provider'], decision['model']) == SLOW
+    assert decision['reason'] == 'unmeasured'
+
+def test_failing_candidate_is_not_ranked_as_unmeasured():
+    router = make_router([FLAKY, FAST])
+    router.observe(*FAST, latency=0.2)
+    # One failure: error rate 0.2, still healthy, but no latency estimate
+    router.observe(*FLAKY, error=True)
+
+    decisions = [router.choose() for _ in range(5)]
+
+    assert all(decision['provider'] == FAST[0] and decision['reason'] == 'fastest' for decision in decisions)
+
+def test_failing_candidate_is_used_when_no_other_is_measured():
+    router = make_router([FLAKY, SLOW])
+    router.observe(*FLAKY, error=True)
+    router.observe(*SLOW, error=True)
+    router.observe(*SLOW, error=True)
+
+    decision = router.choose()
+
+    assert decision['provider'] == FLAKY[0]
+    assert decision['reason'] == 'unmeasured'
+
+def test_fastest_by_mode():
+    router = make_router([FAST, SLOW])
+    router.observe(*FAST, ttft=0.5, tokens_per_second=500, latency=2.0)
+    router.observe(*SLOW, ttft=0.1, tokens_per_second=50, latency=1.0)
+
+    assert router.choose(streaming=True)['provider'] == FAST[0]
+    assert router.choose(streaming=False)['provider'] == SLOW[0]
+
+def test_unhealthy_candidate_is_avoided():
+    router = make_router([FAST, SLOW])
+    router.observe(*FAST, latency=0.1)
+    for _ in range(5):
+        router.observe(*FAST, error=True)
+    router.observe(*SLOW, latency=1.0)
+
+    decision = router.choose()
+
+    assert decision['provider'] == SLOW[0]
+    assert decision['estimates']['groq:fast-model']['error_rate'] > 0.5
+
+def test_exploration_is_reproducible_with_a_seed():
+    def reasons(seed):
+        router = make_router([FAST, SLOW], exploration=0.3, seed=seed)
+        router.observe(*SLOW, latency=1.0)
+        router.observe(*FAST, latency=0.1)
+        return [router.choose()['reason'] for _ in range(50)]
+
+    first = reasons(11)
+
+    assert first == reasons(11)
+    assert 'explore' in first and 'fastest' in first
+
+def test_explores_the_least_recently_measured_other_candidate():
+    router = make_router([FAST, SLOW], exploration=1.0)
+    router.observe(*SLOW, latency=1.0)
+    router.observe(*FAST, latency=0.1)
+
+    decision = router.choose()
+
+    assert (decision['provider'], decision['reason']) == (SLOW[0], 'explore')
+
+def test_excluding_every_candidate_raises():
+    router = make_router([FAST])
+
+    with pytest.raises(RouteUnavailable):
+        router.choose(exclude=[FAST[0]])
@@ -0,0 +1,93 @@
+"""
+test_worker_id.py - Tests for worker ids of forked processes
+
+gunicorn forks its workers from a master that may already have imported the app. Each
+forked process must still get its own worker id, or streams owned by another worker look
+local and their cancels are never forwarded. The forked child talks to the RESP stand-in
+from conftest.py, which keeps serving in the parent.
+
+Dependencies:
+- pytest
+- Python standard library (os, time)
+- app.state (create_backend, worker_id)
+- app.streaming.registry.StreamRegistry
+
+@author Auto-refactored by Cline
+"""
+
+import os
+import time
+
+import pytest
+
+from app.state import create_backend, worker_id
+from app.streaming.registry import StreamRegistry
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+def in_child(work):
+    """
+    Run work() in a forked child and return the bytes it returns, read through a pipe.
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        try:
+            os.write(write_end, work())
+        finally:
+            os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end, "rb") as reader:
+        output = reader.read()
+    os.waitpid(pid, 0)
+    return pid, output
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_forked_workers_get_their_own_id():
+    parent_id = worker_id()
+
+    pid, child_id = in_child(lambda: worker_id().encode())
+
+    assert child_id.decode() != parent_id
+    assert child_id.decode().endswith(f":{pid}")
+    assert worker_id() == parent_id
+
+def test_cancel_is_forwarded_to_the_forked_owner(resp_server):
+    parent_id = worker_id()
+    parent = StreamRegistry(create_backend(resp_server.url, prefix="test:"))
+    read_end, write_end = os.pipe()
+
+    def owner():
+        # Registries built after fork take the child's own id
+        streams = StreamRegistry(create_backend(resp_server.url, prefix="test:"))
+        streams.start()
+        handle = streams.open({"groq": "llama-3.1-8b-instant"})
+        os.write(write_end, handle.stream_id.encode())
+        deadline = time.monotonic() + 2
+        while not handle.cancelled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return streams.worker_id != parent_id and handle.reason == "client"
+
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        cancelled = False
+        try:
+            cancelled = owner()
+        finally:
+            os._exit(0 if cancelled else 1)
+    os.close(write_end)
+    with os.fdopen(read_end, "rb") as reader:
+        stream_id = reader.read(32).decode()
+    assert wait_for(lambda: any(command[0] == "SUBSCRIBE" for command in resp_server.commands))
+    assert parent.cancel(stream_id, reason="client")
+    _, status = os.waitpid(pid, 0)
+
+    assert parent.worker_id == parent_id
+    assert os.waitstatus_to_exitcode(status) == 0